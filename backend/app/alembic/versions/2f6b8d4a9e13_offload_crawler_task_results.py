@@ -0,0 +1,51 @@
+"""Offload crawler_task results to files
+
+Revision ID: 2f6b8d4a9e13
+Revises: 7d3a9e5b2c61
+Create Date: 2026-10-19 14:36:52.107385
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '2f6b8d4a9e13'
+down_revision = '7d3a9e5b2c61'
+branch_labels = None
+depends_on = None
+
+# 与 settings.CRAWL_RESULT_PREVIEW_BYTES 的默认值一致
+PREVIEW_CHARS = 4096
+
+
+def upgrade():
+    op.add_column('crawler_task', sa.Column('result_size_bytes', sa.Integer(), nullable=True))
+    op.add_column('crawler_task', sa.Column('result_row_count', sa.Integer(), nullable=True))
+    op.add_column('crawler_task', sa.Column('result_preview', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.add_column('crawler_task', sa.Column('error_message', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+    # 已有任务：失败原因移到 error_message，成功结果只保留大小、行数和预览（完整内容仍在 SQL 文件中）
+    op.execute(
+        "UPDATE crawler_task SET error_message = result_sql_content "
+        "WHERE status = 'failed' AND result_sql_content IS NOT NULL"
+    )
+    op.execute(
+        "UPDATE crawler_task SET "
+        "result_size_bytes = octet_length(result_sql_content), "
+        "result_row_count = (length(result_sql_content) - length(replace(result_sql_content, 'INSERT INTO', ''))) / 11, "
+        f"result_preview = left(result_sql_content, {PREVIEW_CHARS}) "
+        "WHERE status <> 'failed' AND result_sql_content IS NOT NULL"
+    )
+    op.drop_column('crawler_task', 'result_sql_content')
+
+
+def downgrade():
+    op.add_column('crawler_task', sa.Column('result_sql_content', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    # 只能恢复预览部分
+    op.execute("UPDATE crawler_task SET result_sql_content = coalesce(error_message, result_preview)")
+    op.drop_column('crawler_task', 'error_message')
+    op.drop_column('crawler_task', 'result_preview')
+    op.drop_column('crawler_task', 'result_row_count')
+    op.drop_column('crawler_task', 'result_size_bytes')
@@ -0,0 +1,25 @@
+"""Record the URLs each recrawl task was dispatched for
+
+Revision ID: 4e7a9c2d8b13
+Revises: 9c4f1b7d2e60
+Create Date: 2026-10-19 23:05:41.270318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '4e7a9c2d8b13'
+down_revision = '9c4f1b7d2e60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('crawler_task', sa.Column('recrawl_urls', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('crawler_task', 'recrawl_urls')
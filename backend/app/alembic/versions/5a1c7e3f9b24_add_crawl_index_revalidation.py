@@ -0,0 +1,43 @@
+"""Add revalidation fields to crawl_index
+
+Revision ID: 5a1c7e3f9b24
+Revises: 2f6b8d4a9e13
+Create Date: 2026-10-19 16:08:21.553017
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '5a1c7e3f9b24'
+down_revision = '2f6b8d4a9e13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('crawl_index', sa.Column('etag', sqlmodel.sql.sqltypes.AutoString(length=512), nullable=True))
+    op.add_column('crawl_index', sa.Column('last_modified', sqlmodel.sql.sqltypes.AutoString(length=128), nullable=True))
+    op.add_column('crawl_index', sa.Column('content_hash', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True))
+    op.add_column('crawl_index', sa.Column('links', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+    op.add_column('crawl_index', sa.Column('last_status', sa.Integer(), nullable=True))
+    op.add_column('crawl_index', sa.Column('last_checked_at', sa.DateTime(), nullable=True))
+    op.add_column('crawl_index', sa.Column('last_changed_at', sa.DateTime(), nullable=True))
+    # 手动爬虫的条目只记录元数据，不保存原始内容文件
+    op.alter_column('crawl_index', 'file_path', existing_type=sqlmodel.sql.sqltypes.AutoString(length=512), nullable=True)
+    op.add_column('crawler_task', sa.Column('revalidation', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('crawler_task', 'revalidation')
+    op.execute("DELETE FROM crawl_index WHERE file_path IS NULL")
+    op.alter_column('crawl_index', 'file_path', existing_type=sqlmodel.sql.sqltypes.AutoString(length=512), nullable=False)
+    op.drop_column('crawl_index', 'last_changed_at')
+    op.drop_column('crawl_index', 'last_checked_at')
+    op.drop_column('crawl_index', 'last_status')
+    op.drop_column('crawl_index', 'links')
+    op.drop_column('crawl_index', 'content_hash')
+    op.drop_column('crawl_index', 'last_modified')
+    op.drop_column('crawl_index', 'etag')
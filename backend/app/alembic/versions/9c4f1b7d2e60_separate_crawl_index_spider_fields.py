@@ -0,0 +1,41 @@
+"""Keep spider revalidation out of the collector's crawl_index fields
+
+Revision ID: 9c4f1b7d2e60
+Revises: e6d2a8c41f95
+Create Date: 2026-10-19 21:42:10.318655
+
+"""
+from alembic import op
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '9c4f1b7d2e60'
+down_revision = 'e6d2a8c41f95'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # 手动爬虫的条目没有内容文件，不再填写 content_md5
+    op.alter_column('crawl_index', 'content_md5', existing_type=sqlmodel.sql.sqltypes.AutoString(length=64), nullable=True)
+    op.execute(
+        "UPDATE crawl_index SET content_md5 = NULL, content_type = NULL, size_bytes = NULL "
+        "WHERE file_path IS NULL"
+    )
+    # 被手动爬虫覆盖过的数据湖条目：文件名就是内容的 MD5，按它恢复 content_md5 和 content_type
+    op.execute(
+        r"""
+        UPDATE crawl_index
+        SET content_md5 = substring(file_path from '([0-9a-f]{32})\.[a-z]+$'),
+            content_type = CASE WHEN file_path LIKE '%.json' THEN 'application/json' ELSE 'text/html' END
+        WHERE file_path IS NOT NULL
+          AND content_hash IS NOT NULL
+          AND file_path ~ '[0-9a-f]{32}\.[a-z]+$'
+        """
+    )
+
+
+def downgrade():
+    op.execute("DELETE FROM crawl_index WHERE content_md5 IS NULL")
+    op.alter_column('crawl_index', 'content_md5', existing_type=sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False)
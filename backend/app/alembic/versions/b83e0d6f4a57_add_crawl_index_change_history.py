@@ -0,0 +1,33 @@
+"""Add change history to crawl_index
+
+Revision ID: b83e0d6f4a57
+Revises: 5a1c7e3f9b24
+Create Date: 2026-10-19 17:42:05.318640
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'b83e0d6f4a57'
+down_revision = '5a1c7e3f9b24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('crawl_index', sa.Column('check_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('crawl_index', sa.Column('change_count', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('crawl_index', sa.Column('observed_seconds', sa.Float(), nullable=False, server_default='0'))
+    op.add_column('crawl_index', sa.Column('change_rate', sa.Float(), nullable=True))
+    op.add_column('crawl_index', sa.Column('crawl_spec', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+
+
+def downgrade():
+    op.drop_column('crawl_index', 'crawl_spec')
+    op.drop_column('crawl_index', 'change_rate')
+    op.drop_column('crawl_index', 'observed_seconds')
+    op.drop_column('crawl_index', 'change_count')
+    op.drop_column('crawl_index', 'check_count')
@@ -0,0 +1,62 @@
+"""Add append-only crawler_task_log
+
+Revision ID: e6d2a8c41f95
+Revises: b83e0d6f4a57
+Create Date: 2026-10-19 19:15:47.902264
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6d2a8c41f95'
+down_revision = 'b83e0d6f4a57'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('crawler_task_log',
+    sa.Column('task_id', sa.Uuid(), nullable=False),
+    sa.Column('seq', sa.Integer(), nullable=False),
+    sa.Column('ts', sa.DateTime(), nullable=False),
+    sa.Column('level', sqlmodel.sql.sqltypes.AutoString(length=16), nullable=False),
+    sa.Column('phase', sqlmodel.sql.sqltypes.AutoString(length=32), nullable=True),
+    sa.Column('message', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.ForeignKeyConstraint(['task_id'], ['crawler_task.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('task_id', 'seq')
+    )
+
+    # 已有任务的日志从 pipeline_state.logs 迁出（原日志只有时分秒，日期取任务创建时间）
+    op.execute(
+        """
+        INSERT INTO crawler_task_log (task_id, seq, ts, level, phase, message)
+        SELECT t.id, l.ord, t.created_at, 'INFO', NULL,
+               regexp_replace(l.value, '^\\[\\d{2}:\\d{2}:\\d{2}\\] ', '')
+        FROM crawler_task t,
+             jsonb_array_elements_text(t.pipeline_state::jsonb -> 'logs') WITH ORDINALITY AS l(value, ord)
+        WHERE t.pipeline_state IS NOT NULL
+          AND jsonb_typeof(t.pipeline_state::jsonb -> 'logs') = 'array'
+        """
+    )
+    op.execute(
+        "UPDATE crawler_task SET pipeline_state = (pipeline_state::jsonb - 'logs' - 'log_message')::text "
+        "WHERE pipeline_state IS NOT NULL"
+    )
+
+
+def downgrade():
+    op.execute(
+        """
+        UPDATE crawler_task t SET pipeline_state = jsonb_set(
+            coalesce(t.pipeline_state::jsonb, '{}'::jsonb),
+            '{logs}',
+            (SELECT jsonb_agg('[' || to_char(l.ts, 'HH24:MI:SS') || '] ' || l.message ORDER BY l.seq)
+             FROM crawler_task_log l WHERE l.task_id = t.id)
+        )::text
+        WHERE EXISTS (SELECT 1 FROM crawler_task_log l WHERE l.task_id = t.id)
+        """
+    )
+    op.drop_table('crawler_task_log')
@@ -25,6 +25,7 @@ router = APIRouter(prefix="/chat", tags=["chat"])
 
 
 from app.core.config import settings
+from app.core.llm_client import LlmClient
 
 async def call_doubao_api(prompt: str, history: list[dict[str, str]]) -> AsyncGenerator[str, None]:
     """调用豆包 API 获取回复 (流式)"""
@@ -33,26 +34,13 @@ async def call_doubao_api(prompt: str, history: list[dict[str, str]]) -> AsyncGe
         return
 
     try:
-        from openai import AsyncOpenAI
-        
-        client = AsyncOpenAI(
-            api_key=settings.VOLC_API_KEY,
-            base_url="https://ark.cn-beijing.volces.com/api/v3",
-        )
-        
         messages = history + [{"role": "user", "content": prompt}]
-        
-        stream = await client.chat.completions.create(
-            model=settings.VOLC_MODEL_ID,
-            messages=messages,
-            stream=True,
-        )
-        
-        async for chunk in stream:
-            if chunk.choices and len(chunk.choices) > 0:
-                content = chunk.choices[0].delta.content
-                if content:
-                    yield content
+
+        async for content in LlmClient.stream_chat_completion(
+            {"model": settings.VOLC_MODEL_ID, "messages": messages},
+            call_site="chat",
+        ):
+            yield content
     except Exception as e:
         print(f"Error calling Doubao API: {e}")
         yield f"AI 调用失败: {str(e)}"
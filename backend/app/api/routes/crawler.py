@@ -4,20 +4,33 @@ import logging
 from datetime import datetime
 from typing import Any, Optional, Dict
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
 from fastapi.responses import FileResponse
 from sqlmodel import select
 from pydantic import BaseModel
 
 from app.api.deps import SessionDep
-from app.models import CrawlerTask
-from app.worker_tasks.crawler import generate_sql_from_spider, CSV_DIR, SQL_DIR
+from app.models import (
+    CrawlerTask,
+    CrawlerTaskLogPublic,
+    CrawlerTaskLogsPublic,
+    CrawlerTaskResult,
+    CrawlerTaskStatus,
+)
+from app.worker_tasks.crawler import generate_sql_from_spider, save_llm_usage, CSV_DIR, SQL_DIR
+from app.worker_tasks.recrawl_scheduler import RecrawlScheduler
+from app.worker_tasks.stages import PipelineRegistry
+from app.worker_tasks.task_log import TaskLogWriter, append_logs, read_logs
 from app.sniffer_pipeline.pipeline import SnifferPipeline
 from app.sniffer_pipeline.schemas import ExtractionStrategy
-from app.core.paths import CSV_DIR, SQL_DIR
+from app.core.llm_metrics import track_llm_usage
+from app.core.paths import CSV_DIR, JSONL_DIR, SQL_DIR
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+# 前端轮询到这些阶段后停止刷新
+TASK_LOG_FLUSH_PHASES = ("completed", "failed", "review")
+
 class CrawlRequest(BaseModel):
     url: str
     table_name: Optional[str] = None
@@ -26,6 +39,9 @@ class CrawlRequest(BaseModel):
     concurrency: int = 5
     mode: str = "manual"  # "manual" 或 "auto"
     review_mode: bool = False # 自动模式下暂停等待审核
+    direct_load: bool = False  # 手动模式下通过 COPY 直接写入数据库中的 table_name
+    upsert_keys: list[str] = []  # 直接入库时按这些列 upsert，为空则追加
+    revalidate: bool = False  # 手动模式下作为重抓运行：上次按同样的表和列提取过且内容未变的页面不再输出
 
 class ResumeRequest(BaseModel):
     task_id: uuid.UUID
@@ -40,6 +56,11 @@ def start_crawl(
     """
     启动爬虫任务（手动或自主）。
     """
+    if request.mode != "auto" and request.upsert_keys:
+        missing = set(request.upsert_keys) - set(request.columns or ["content"])
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Upsert keys must be among the columns: {sorted(missing)}")
+
     crawler_task = CrawlerTask(status="pending")
     session.add(crawler_task)
     session.commit()
@@ -47,8 +68,15 @@ def start_crawl(
 
     if request.mode == "auto":
         # 初始化管道状态并记录启动日志
-        initial_logs = [f"[{datetime.now().strftime('%H:%M:%S')}] 任务初始化。已排队等待执行..."]
-        crawler_task.pipeline_state = json.dumps({"logs": initial_logs})
+        crawler_task.pipeline_state = json.dumps({"url": request.url})
+        append_logs(session, [{
+            "task_id": crawler_task.id,
+            "seq": 1,
+            "ts": datetime.now(),
+            "level": "INFO",
+            "phase": None,
+            "message": "任务初始化。已排队等待执行...",
+        }])
         session.add(crawler_task)
         session.commit()
 
@@ -71,7 +99,10 @@ def start_crawl(
             table_name, 
             columns,
             request.max_pages,
-            request.concurrency
+            request.concurrency,
+            request.direct_load,
+            request.upsert_keys or None,
+            revalidate=request.revalidate,
         )
 
     return crawler_task.id
@@ -130,57 +161,54 @@ async def run_autonomous_pipeline_task(
     from sqlmodel import Session
     
     pipeline = SnifferPipeline()
+    # 日志追加到 crawler_task_log，pipeline_state 只保留阶段相关的状态（URL、策略、错误等）
+    task_log = TaskLogWriter(uuid.UUID(task_id))
+    last_phase = None
 
     async def update_state(tid, phase, data):
+        nonlocal last_phase
+        # 检查数据中是否有特定的日志消息
+        log_message = f"Phase: {phase}"
+        if data and "log_message" in data:
+            log_message = data["log_message"]
+        elif phase == "scout":
+             log_message = "阶段：侦察（采样）"
+        elif phase == "architect":
+             log_message = "阶段：架构师（策略定义）"
+        elif phase == "review":
+             log_message = "阶段：审核（等待用户）"
+        elif phase == "harvester":
+             log_message = "阶段：收获者（执行）"
+        elif phase == "refinery":
+             log_message = "阶段：精炼厂（ETL & SQL）"
+        elif phase == "completed":
+             log_message = "阶段：已完成"
+        elif phase == "failed":
+             error_msg = data.get("error", "未知错误") if data else "未知错误"
+             log_message = f"阶段：失败 - {error_msg}"
+        await task_log.write(log_message, level="ERROR" if phase == "failed" else None, phase=phase)
+        if phase in TASK_LOG_FLUSH_PHASES:
+            # 前端看到这些状态后停止轮询，缓冲的日志先写出再提交状态
+            await task_log.flush()
+
+        # 纯日志行且阶段未变：不再写 crawler_task
+        state_data = {key: value for key, value in (data or {}).items() if key != "log_message"}
+        if not state_data and phase == last_phase:
+            return
+        last_phase = phase
+
         with Session(engine) as db_session:
             task = db_session.get(CrawlerTask, uuid.UUID(tid))
             if task:
                 task.current_phase = phase
                 existing = json.loads(task.pipeline_state) if task.pipeline_state else {}
-                
-                # 更新日志
-                logs = existing.get("logs", [])
-                timestamp = datetime.now().strftime("%H:%M:%S")
-                
-                # 检查数据中是否有特定的日志消息
-                log_message = f"Phase: {phase}"
-                if data and "log_message" in data:
-                    log_message = data["log_message"]
-                    # 如果是纯日志更新，我们可能不想更改数据库中的阶段
-                    # 但 current_phase 对 UI 进度条很有用。
-                    # 如果阶段是“日志”，我们保留上一个阶段？
-                    # 让我们假设阶段总是正确传递的。
-                elif phase == "scout":
-                     log_message = "阶段：侦察（采样）"
-                elif phase == "architect":
-                     log_message = "阶段：架构师（策略定义）"
-                elif phase == "review":
-                     log_message = "阶段：审核（等待用户）"
-                elif phase == "harvester":
-                     log_message = "阶段：收获者（执行）"
-                elif phase == "refinery":
-                     log_message = "阶段：精炼厂（ETL & SQL）"
-                elif phase == "completed":
-                     log_message = "阶段：已完成"
-                elif phase == "failed":
-                     error_msg = data.get("error", "未知错误") if data else "未知错误"
-                     log_message = f"阶段：失败 - {error_msg}"
-
-                logs.append(f"[{timestamp}] {log_message}")
-                existing["logs"] = logs
-                
-                if data:
-                    # 如果不存在 URL 则添加（用于恢复的临时处理）
-                    if "url" not in existing:
-                        existing["url"] = url
-                    existing.update(data)
-                
+                # 恢复任务时需要 URL
+                existing.setdefault("url", url)
+                existing.update(state_data)
                 task.pipeline_state = json.dumps(existing)
                 
                 if phase == "completed":
                     task.status = "completed"
-                    if data and "items_harvested" in data:
-                        existing["items_harvested"] = data["items_harvested"]
                 elif phase == "failed":
                     task.status = "failed"
                 elif phase == "review":
@@ -191,8 +219,14 @@ async def run_autonomous_pipeline_task(
                 db_session.add(task)
                 db_session.commit()
 
-    # 运行管道
-    await pipeline.run(url, task_id, update_callback=update_state, table_name_hint=table_name_hint, review_mode=review_mode)
+    # 运行管道，并汇总其中的 LLM 调用
+    await task_log.start()
+    with track_llm_usage() as usage:
+        try:
+            await pipeline.run(url, task_id, update_callback=update_state, table_name_hint=table_name_hint, review_mode=review_mode)
+        finally:
+            await task_log.close()
+            save_llm_usage(uuid.UUID(task_id), usage)
 
 async def resume_autonomous_pipeline_task(
     task_id: str,
@@ -217,44 +251,45 @@ async def resume_autonomous_pipeline_task(
         return
 
     pipeline = SnifferPipeline()
+    task_log = TaskLogWriter(uuid.UUID(task_id))
+    last_phase = None
 
     async def update_state(tid, phase, data):
+        nonlocal last_phase
+        # Check if there is a specific log message in data
+        log_message = f"Phase: {phase}"
+        if data and "log_message" in data:
+            log_message = data["log_message"]
+        elif phase == "scout":
+             log_message = "Phase: Scout (Sampling)"
+        elif phase == "architect":
+             log_message = "Phase: Architect (Strategy Definition)"
+        elif phase == "review":
+             log_message = "Phase: Review (Waiting for user)"
+        elif phase == "harvester":
+             log_message = "Phase: Harvester (Execution)"
+        elif phase == "refinery":
+             log_message = "Phase: Refinery (ETL & SQL)"
+        elif phase == "completed":
+             log_message = "Phase: Completed"
+        elif phase == "failed":
+             error_msg = data.get("error", "Unknown error") if data else "Unknown error"
+             log_message = f"Phase: Failed - {error_msg}"
+        await task_log.write(log_message, level="ERROR" if phase == "failed" else None, phase=phase)
+        if phase in TASK_LOG_FLUSH_PHASES:
+            await task_log.flush()
+
+        state_data = {key: value for key, value in (data or {}).items() if key != "log_message"}
+        if not state_data and phase == last_phase:
+            return
+        last_phase = phase
+
         with Session(engine) as db_session:
             task = db_session.get(CrawlerTask, uuid.UUID(tid))
             if task:
                 task.current_phase = phase
                 existing = json.loads(task.pipeline_state) if task.pipeline_state else {}
-                
-                # Update logs
-                logs = existing.get("logs", [])
-                timestamp = datetime.now().strftime("%H:%M:%S")
-                
-                # Check if there is a specific log message in data
-                log_message = f"Phase: {phase}"
-                if data and "log_message" in data:
-                    log_message = data["log_message"]
-                elif phase == "scout":
-                     log_message = "Phase: Scout (Sampling)"
-                elif phase == "architect":
-                     log_message = "Phase: Architect (Strategy Definition)"
-                elif phase == "review":
-                     log_message = "Phase: Review (Waiting for user)"
-                elif phase == "harvester":
-                     log_message = "Phase: Harvester (Execution)"
-                elif phase == "refinery":
-                     log_message = "Phase: Refinery (ETL & SQL)"
-                elif phase == "completed":
-                     log_message = "Phase: Completed"
-                elif phase == "failed":
-                     error_msg = data.get("error", "Unknown error") if data else "Unknown error"
-                     log_message = f"Phase: Failed - {error_msg}"
-
-                logs.append(f"[{timestamp}] {log_message}")
-                existing["logs"] = logs
-
-                if data:
-                    existing.update(data)
-                
+                existing.update(state_data)
                 task.pipeline_state = json.dumps(existing)
                 
                 if phase == "completed":
@@ -267,21 +302,78 @@ async def resume_autonomous_pipeline_task(
                 db_session.add(task)
                 db_session.commit()
 
-    await pipeline.resume(task_id, url, strategy, update_callback=update_state)
+    # 与暂停前的汇总合并
+    await task_log.start()
+    with track_llm_usage() as usage:
+        try:
+            await pipeline.resume(task_id, url, strategy, update_callback=update_state)
+        finally:
+            await task_log.close()
+            save_llm_usage(uuid.UUID(task_id), usage)
 
 
-@router.get("/{task_id}", response_model=CrawlerTask)
+@router.get("/{task_id}", response_model=CrawlerTaskStatus)
 def get_crawl_status(
     task_id: uuid.UUID,
     session: SessionDep,
 ) -> Any:
     """
-    获取爬虫任务状态。
+    获取爬虫任务状态（轻量投影，供轮询使用；不含结果内容）。
+    """
+    columns = [getattr(CrawlerTask, name) for name in CrawlerTaskStatus.model_fields]
+    row = session.exec(select(*columns).where(CrawlerTask.id == task_id)).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return CrawlerTaskStatus(**row._mapping)
+
+
+@router.get("/{task_id}/result", response_model=CrawlerTaskResult)
+def get_crawl_result(
+    task_id: uuid.UUID,
+    session: SessionDep,
+) -> Any:
+    """
+    获取结果摘要：SQL 文件大小、行数和开头的预览。完整内容通过 /download 接口获取。
     """
     task = session.get(CrawlerTask, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    preview_bytes = len(task.result_preview.encode("utf-8")) if task.result_preview else 0
+    return CrawlerTaskResult(
+        id=task.id,
+        status=task.status,
+        result_size_bytes=task.result_size_bytes,
+        result_row_count=task.result_row_count,
+        result_preview=task.result_preview,
+        preview_truncated=(task.result_size_bytes or 0) > preview_bytes,
+    )
+
+@router.get("/{task_id}/stages", response_model=Dict[str, Any])
+def get_crawl_stages(task_id: uuid.UUID) -> Any:
+    """
+    获取手动爬取流水线各阶段（fetch / reduce / extract / write）的实时指标：
+    并发数、处理数、利用率、队列深度和背压等待时间，用于调整各阶段并发。
+    只保存在当前进程内存中（最近的若干个任务）。
+    """
+    stats = PipelineRegistry.stats(task_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="No pipeline metrics for this task")
+    return stats
+
+@router.get("/recrawl/schedule", response_model=Dict[str, Any])
+def get_recrawl_schedule(limit: int = 50) -> Any:
+    """
+    查看重抓调度：按优先级排序的即将重抓页面（估计变化率、距上次检查时间、
+    已过期概率、优先级，以及是否会在下次调度中被选中）和抓取预算使用情况。
+    """
+    return RecrawlScheduler.schedule(limit=limit)
+
+@router.post("/recrawl/run", response_model=list[uuid.UUID])
+async def run_recrawl() -> Any:
+    """
+    立即执行一次重抓调度（占用预算），返回创建的爬虫任务 ID。
+    """
+    return await RecrawlScheduler.run_once()
 
 @router.get("/download/{task_id}/{file_type}")
 def download_crawl_file(
@@ -290,7 +382,7 @@ def download_crawl_file(
     session: SessionDep,
 ) -> Any:
     """
-    下载生成的 CSV 或 SQL 文件。
+    下载生成的 CSV、SQL 或 JSONL 文件（按块流式返回，不经过数据库）。
     """
     task = session.get(CrawlerTask, task_id)
     if not task:
@@ -304,8 +396,12 @@ def download_crawl_file(
         file_path = SQL_DIR / f"{task_id}.sql"
         filename = f"generated_sql_{task_id}.sql"
         media_type = "application/sql"
+    elif file_type == "jsonl":
+        file_path = JSONL_DIR / f"{task_id}.jsonl"
+        filename = f"crawler_data_{task_id}.jsonl"
+        media_type = "application/x-ndjson"
     else:
-        raise HTTPException(status_code=400, detail="Invalid file type. Must be 'csv' or 'sql'.")
+        raise HTTPException(status_code=400, detail="Invalid file type. Must be 'csv', 'sql' or 'jsonl'.")
     
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="File not found. Please ensure the task is completed.")
@@ -317,16 +413,19 @@ def download_crawl_file(
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
-@router.get("/logs/{task_id}")
-def get_task_logs(task_id: uuid.UUID, session: SessionDep):
+@router.get("/logs/{task_id}", response_model=CrawlerTaskLogsPublic)
+def get_task_logs(
+    task_id: uuid.UUID,
+    session: SessionDep,
+    after: int = 0,
+    limit: int = Query(default=500, ge=1, le=5000),
+) -> Any:
     """
-    从 pipeline_state 获取任务的最近日志/事件。
+    获取任务日志中 seq 大于 after 的行（按 seq 排序）。轮询时把返回的 last_seq 作为下次的 after，
+    只会拿到新行。
     """
-    task = session.get(CrawlerTask, task_id)
-    if not task or not task.pipeline_state:
-        return {"logs": []}
-    
-    state = json.loads(task.pipeline_state)
-    # 我们可以在状态中存储“日志”列表
-    logs = state.get("logs", [])
-    return {"logs": logs}
+    rows = read_logs(session, task_id, after=after, limit=limit)
+    return CrawlerTaskLogsPublic(
+        data=[CrawlerTaskLogPublic.model_validate(row) for row in rows],
+        last_seq=rows[-1].seq if rows else after,
+    )
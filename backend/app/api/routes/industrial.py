@@ -6,6 +6,8 @@
 """
 import uuid
 import json
+import asyncio
+import base64
 import shutil
 import zipfile
 import logging
@@ -13,17 +15,40 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, List
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    File,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
-from sqlmodel import select
+from sqlalchemy import tuple_
+from sqlmodel import func, select
 import tempfile
 import os
 
 from app.api.deps import SessionDep
-from app.models import IndustrialBatch, IndustrialBatchPublic, IndustrialFileInfo
+from app.models import (
+    IndustrialBatch,
+    IndustrialBatchesPublic,
+    IndustrialBatchPublic,
+    IndustrialBatchStatusCounts,
+    IndustrialFileInfo,
+)
+from app.core.fetch_client import FetchClient
+from app.core.llm_client import LlmClient
 from app.core.paths import INDUSTRIAL_DIR
-from app.industrial_pipeline.html_cleaner import HtmlCleaner
+from app.industrial_pipeline.batch_cleaner import BatchCleanRegistry
+from app.industrial_pipeline.clean_cache import CleanCache
+from app.industrial_pipeline.clean_pool import CleanerPool, CleanerPoolBusyError
+from app.industrial_pipeline.progress import TERMINAL_PHASES, ProgressBroker
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -57,19 +82,41 @@ async def run_industrial_harvest(batch_id: str, url: str, config: dict):
             db.add(batch)
             db.commit()
     
-    async def update_progress(current_count: int):
-        """更新数据库中项目数量的回调"""
+    ProgressBroker.publish(batch_id, "phase", phase="processing")
+
+    # 实时进度通过 ProgressBroker 推送（/batch/{id}/events）；
+    # item_count 只在阶段切换和结束时写回数据库
+    collector = IndustrialCollector(batch_id=batch_id)
+
+    def save_item_count(count: int):
         with Session(engine) as db:
-            b = db.get(IndustrialBatch, uuid.UUID(batch_id))
-            if b:
-                b.item_count = current_count
-                db.add(b)
+            batch = db.get(IndustrialBatch, uuid.UUID(batch_id))
+            if batch and batch.status == "processing":
+                batch.item_count = count
+                db.add(batch)
                 db.commit()
 
+    async def save_on_phase_change():
+        phase = "processing"
+        async for event in ProgressBroker.subscribe(batch_id):
+            new_phase = event.get("phase")
+            if event["type"] != "phase" or new_phase == phase or new_phase in TERMINAL_PHASES:
+                continue
+            phase = new_phase
+            try:
+                await run_in_threadpool(save_item_count, collector.collected_count)
+            except Exception as e:
+                logger.warning(f"Failed to save harvest progress for {batch_id}: {e}")
+
+    progress_writer = asyncio.create_task(save_on_phase_change())
+    # 让订阅在收割开始前注册，避免错过第一个阶段
+    await asyncio.sleep(0)
     try:
-        collector = IndustrialCollector()
-        # 执行收割任务 - 传入整套配置和回调
-        collected_count = await collector.harvest(url, batch_dir, config, progress_callback=update_progress)
+        try:
+            collected_count = await collector.harvest(url, batch_dir, config)
+        finally:
+            progress_writer.cancel()
+            await asyncio.gather(progress_writer, return_exceptions=True)
         
         # 更新批次状态 - 成功
         with Session(engine) as db:
@@ -79,6 +126,7 @@ async def run_industrial_harvest(batch_id: str, url: str, config: dict):
                 batch.item_count = collected_count
                 db.add(batch)
                 db.commit()
+        ProgressBroker.publish(batch_id, "phase", phase="completed", item_count=collected_count)
                 
     except Exception as e:
         logger.error(f"Industrial harvest failed: {e}")
@@ -89,27 +137,113 @@ async def run_industrial_harvest(batch_id: str, url: str, config: dict):
                 batch.status = "failed"
                 db.add(batch)
                 db.commit()
+        ProgressBroker.publish(batch_id, "phase", phase="failed", error=str(e))
 
 
-@router.get("/batches", response_model=List[IndustrialBatchPublic])
-def get_batches(session: SessionDep) -> Any:
+def _encode_cursor(batch: IndustrialBatch) -> str:
+    raw = f"{batch.created_at.isoformat()}|{batch.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, batch_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(batch_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _to_public(batch: IndustrialBatch) -> IndustrialBatchPublic:
+    return IndustrialBatchPublic(
+        id=str(batch.id),
+        created_at=batch.created_at.isoformat(),
+        url=batch.url,
+        item_count=batch.item_count,
+        status=batch.status,
+        storage_path=batch.storage_path,
+    )
+
+
+def _query_batches(
+    session: SessionDep,
+    limit: int | None,
+    cursor: str | None,
+    status: list[str] | None,
+    url_prefix: str | None,
+) -> IndustrialBatchesPublic:
     """
-    获取所有工业收割批次列表
+    按 (created_at, id) 倒序的键集分页查询。
+    多取一行用于判断是否还有下一页；limit 为 None 时返回全部剩余批次。
     """
-    statement = select(IndustrialBatch).order_by(IndustrialBatch.created_at.desc())
+    statement = select(IndustrialBatch)
+    if status:
+        statement = statement.where(IndustrialBatch.status.in_(status))
+    if url_prefix:
+        escaped = url_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        statement = statement.where(IndustrialBatch.url.like(f"{escaped}%", escape="\\"))
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        statement = statement.where(
+            tuple_(IndustrialBatch.created_at, IndustrialBatch.id) < tuple_(cursor_created_at, cursor_id)
+        )
+    statement = statement.order_by(IndustrialBatch.created_at.desc(), IndustrialBatch.id.desc())
+    if limit is not None:
+        statement = statement.limit(limit + 1)
+
     batches = session.exec(statement).all()
+    has_more = limit is not None and len(batches) > limit
+    batches = batches[:limit]
+
+    return IndustrialBatchesPublic(
+        data=[_to_public(batch) for batch in batches],
+        next_cursor=_encode_cursor(batches[-1]) if has_more else None,
+    )
+
+
+@router.get("/batches", response_model=List[IndustrialBatchPublic])
+def get_batches(
+    session: SessionDep,
+    response: Response,
+    limit: int | None = Query(default=None, ge=1, le=500),
+    cursor: str | None = None,
+    status: list[str] | None = Query(default=None),
+    url_prefix: str | None = None,
+) -> Any:
+    """
+    获取工业收割批次列表（按创建时间倒序）。
     
-    return [
-        IndustrialBatchPublic(
-            id=str(batch.id),
-            created_at=batch.created_at.isoformat(),
-            url=batch.url,
-            item_count=batch.item_count,
-            status=batch.status,
-            storage_path=batch.storage_path,
-        )
-        for batch in batches
-    ]
+    保持数组格式以兼容现有前端：默认返回全部批次；给出 limit 时分页，
+    下一页游标通过 X-Next-Cursor 响应头返回。新代码应使用 /batches/page。
+    """
+    page = _query_batches(session, limit, cursor, status, url_prefix)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return page.data
+
+
+@router.get("/batches/page", response_model=IndustrialBatchesPublic)
+def get_batches_page(
+    session: SessionDep,
+    limit: int = Query(default=50, ge=1, le=500),
+    cursor: str | None = None,
+    status: list[str] | None = Query(default=None),
+    url_prefix: str | None = None,
+) -> Any:
+    """
+    键集分页获取批次列表，支持按状态和 URL 前缀过滤。
+    """
+    return _query_batches(session, limit, cursor, status, url_prefix)
+
+
+@router.get("/batches/counts", response_model=IndustrialBatchStatusCounts)
+def get_batch_status_counts(session: SessionDep) -> Any:
+    """
+    按状态统计批次数量（走 status 前导索引，无需加载批次行）。
+    """
+    statement = select(IndustrialBatch.status, func.count()).group_by(IndustrialBatch.status)
+    counts = {status: count for status, count in session.exec(statement).all()}
+    return IndustrialBatchStatusCounts(counts=counts, total=sum(counts.values()))
 
 
 @router.post("/collect")
@@ -144,6 +278,82 @@ def start_collect(
     return str(batch.id)
 
 
+def _format_sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+def _final_state_event(batch: IndustrialBatch) -> dict:
+    """批次不在运行时，用数据库中的最终状态作为唯一事件。"""
+    return {
+        "type": "snapshot",
+        "batch_id": str(batch.id),
+        "phase": batch.status,
+        "item_count": batch.item_count,
+        "files": [],
+        "blocked": None,
+    }
+
+
+@router.get("/batch/{batch_id}/events")
+async def stream_batch_events(batch_id: uuid.UUID, session: SessionDep) -> Any:
+    """
+    通过 SSE 推送批次的实时收割进度：
+    条目数量、落盘文件、阶段变化和拦截检测。批次结束后流自动关闭。
+    """
+    batch = await run_in_threadpool(session.get, IndustrialBatch, batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    key = str(batch_id)
+    if batch.status not in ("pending", "processing") and ProgressBroker.snapshot(key) is None:
+        final_event = _final_state_event(batch)
+
+        async def finished():
+            yield _format_sse(final_event)
+
+        return StreamingResponse(finished(), media_type="text/event-stream")
+
+    async def generate():
+        async for event in ProgressBroker.subscribe(key):
+            yield _format_sse(event)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/batch/{batch_id}/ws")
+async def batch_events_websocket(websocket: WebSocket, batch_id: uuid.UUID):
+    """
+    与 /batch/{batch_id}/events 相同的事件流，通过 WebSocket 推送。
+    """
+    from app.core.db import engine
+    from sqlmodel import Session
+
+    await websocket.accept()
+    key = str(batch_id)
+    try:
+        with Session(engine) as db:
+            batch = db.get(IndustrialBatch, batch_id)
+            if not batch:
+                await websocket.close(code=4404)
+                return
+            final_event = None
+            if batch.status not in ("pending", "processing") and ProgressBroker.snapshot(key) is None:
+                final_event = _final_state_event(batch)
+
+        if final_event:
+            await websocket.send_json(final_event)
+        else:
+            async for event in ProgressBroker.subscribe(key):
+                await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.debug(f"Progress websocket disconnected for batch {key}")
+
+
 @router.get("/batch/{batch_id}/files", response_model=List[IndustrialFileInfo])
 def get_batch_files(batch_id: uuid.UUID, session: SessionDep) -> Any:
     """
@@ -257,6 +467,8 @@ def delete_batch(batch_id: uuid.UUID, session: SessionDep) -> dict:
         if batch_dir.exists():
             shutil.rmtree(batch_dir)
     
+    BatchCleanRegistry.remove(str(batch_id))
+    
     # 删除可能存在的 ZIP 文件
     zip_path = INDUSTRIAL_DIR / f"{batch_id}.zip"
     if zip_path.exists():
@@ -275,7 +487,7 @@ class LightCleanRequest(BaseModel):
 
 
 @router.post("/batch/{batch_id}/light-clean")
-def light_clean_batch_file(
+async def light_clean_batch_file(
     batch_id: str,
     request: LightCleanRequest,
     session: SessionDep
@@ -284,12 +496,10 @@ def light_clean_batch_file(
     对批次中的特定文件执行轻量级 HTML 清理。
     
     去除非语义标签（style, script, svg）以减小文件大小
-    并为 AI 提取做准备。
+    并为 AI 提取做准备。清理在进程池中执行，不阻塞事件循环。
     """
-    from app.industrial_pipeline.html_cleaner import HtmlCleaner
-    
-    # 验证批次是否存在
-    batch = session.get(IndustrialBatch, uuid.UUID(batch_id))
+    # 验证批次是否存在（同步会话的查询放到线程池，避免阻塞事件循环）
+    batch = await run_in_threadpool(session.get, IndustrialBatch, uuid.UUID(batch_id))
     if not batch:
         raise HTTPException(status_code=404, detail="Batch not found")
     
@@ -305,7 +515,7 @@ def light_clean_batch_file(
     
     try:
         # 执行清理
-        stats = HtmlCleaner.clean_file(input_file, output_file)
+        stats = await CleanerPool.clean_file(input_file, output_file)
         
         logger.info(f"Light clean completed: {request.file_name} -> {output_filename}")
         logger.info(f"Size reduction: {stats['reduction_percent']}%")
@@ -316,11 +526,116 @@ def light_clean_batch_file(
             "output_file": output_filename,
             "stats": stats
         }
+    except CleanerPoolBusyError as e:
+        raise _busy_exception(e)
     except Exception as e:
         logger.error(f"Light clean failed: {e}")
         raise HTTPException(status_code=500, detail=f"Cleaning failed: {str(e)}")
 
 
+class BatchLightCleanRequest(BaseModel):
+    """批次级轻度清理请求参数"""
+    force: bool = False  # 为 True 时忽略已是最新的清理结果，全部重新清理
+
+
+@router.post("/batch/{batch_id}/light-clean-all")
+def start_batch_light_clean(
+    batch_id: uuid.UUID,
+    request: BatchLightCleanRequest,
+    background_tasks: BackgroundTasks,
+    session: SessionDep,
+) -> Any:
+    """
+    对批次中的所有 HTML 捕获文件（包括 api_data）执行并行轻度清理。
+    
+    立即返回任务状态，通过 GET 同一路径查询每个文件的进度和汇总统计。
+    """
+    batch = session.get(IndustrialBatch, batch_id)
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    batch_dir = Path(batch.storage_path) if batch.storage_path else INDUSTRIAL_DIR / str(batch_id)
+    if not batch_dir.exists():
+        raise HTTPException(status_code=404, detail="Batch directory not found")
+
+    try:
+        job = BatchCleanRegistry.create(str(batch_id), batch_dir, force=request.force)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    background_tasks.add_task(job.run)
+    return job.snapshot()
+
+
+@router.get("/batch/{batch_id}/light-clean-all")
+def get_batch_light_clean(batch_id: uuid.UUID) -> Any:
+    """
+    获取批次最近一次批量清理任务的进度。
+    """
+    job = BatchCleanRegistry.get(str(batch_id))
+    if not job:
+        raise HTTPException(status_code=404, detail="No clean job for this batch")
+    return job.snapshot()
+
+
+def _busy_exception(error: CleanerPoolBusyError) -> HTTPException:
+    """清理进程池已满时返回 503，提示客户端稍后重试。"""
+    logger.warning(f"Rejected cleaning request: {error}")
+    return HTTPException(
+        status_code=503,
+        detail="Cleaner is busy, please retry later",
+        headers={"Retry-After": "5"},
+    )
+
+
+def _save_upload_to_temp(file: UploadFile) -> Path:
+    """将上传的文件保存到临时目录并返回路径。"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as tmp_in:
+        shutil.copyfileobj(file.file, tmp_in)
+        return Path(tmp_in.name)
+
+
+def _remove_temp_input(input_path: Path | None) -> None:
+    """立即清理输入文件，保留输出文件以供下载。"""
+    if input_path and input_path.exists():
+        try:
+            os.unlink(input_path)
+        except OSError:
+            pass
+
+
+@router.get("/clean-pool/stats")
+async def get_clean_pool_stats() -> Any:
+    """
+    获取 HTML 清理进程池的排队与耗时指标。
+    """
+    return CleanerPool.metrics()
+
+
+@router.get("/clean-cache/stats")
+async def get_clean_cache_stats() -> Any:
+    """
+    获取清理结果缓存的命中率、已提供字节数和占用空间。
+    """
+    return CleanCache.stats()
+
+
+@router.get("/llm-client/stats")
+async def get_llm_client_stats() -> Any:
+    """
+    获取共享 LLM 客户端的排队、并发、重试和延迟指标。
+    """
+    return LlmClient.metrics()
+
+
+@router.get("/fetch-client/stats")
+async def get_fetch_client_stats() -> Any:
+    """
+    获取共享页面抓取客户端的请求数、新建连接数和连接复用率（总体和按主机）。
+    """
+    return FetchClient.metrics()
+
+
 @router.post("/upload-clean")
 async def upload_and_clean(file: UploadFile = File(...)) -> Any:
     """
@@ -330,17 +645,14 @@ async def upload_and_clean(file: UploadFile = File(...)) -> Any:
     if not file.filename.endswith(('.html', '.htm')):
         raise HTTPException(status_code=400, detail="Only HTML files are supported")
 
+    input_path = None
     try:
         # 创建临时文件
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as tmp_in:
-            shutil.copyfileobj(file.file, tmp_in)
-            input_path = Path(tmp_in.name)
-        
+        input_path = await run_in_threadpool(_save_upload_to_temp, file)
         output_path = input_path.parent / f"{input_path.stem}_cleaned.html"
         
         # 清理
-        cleaner = HtmlCleaner()
-        stats = cleaner.clean_file(input_path, output_path)
+        stats = await CleanerPool.clean_file(input_path, output_path)
         
         # 返回统计信息和临时文件 ID
         return {
@@ -350,16 +662,72 @@ async def upload_and_clean(file: UploadFile = File(...)) -> Any:
             "stats": stats
         }
         
+    except CleanerPoolBusyError as e:
+        raise _busy_exception(e)
     except Exception as e:
         logger.error(f"Upload cleaning failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        # 立即清理输入文件，保留输出文件以供下载
-        if 'input_path' in locals() and input_path.exists():
-            try:
-                os.unlink(input_path)
-            except:
-                pass
+        _remove_temp_input(input_path)
+
+
+@router.post("/upload-clean-multi")
+async def upload_and_clean_multi(files: List[UploadFile] = File(...)) -> Any:
+    """
+    多文件上传和清理。
+    所有文件并行提交到清理进程池，按上传顺序返回每个文件的结果和汇总统计。
+    """
+    for file in files:
+        if not file.filename.endswith(('.html', '.htm')):
+            raise HTTPException(status_code=400, detail=f"Only HTML files are supported: {file.filename}")
+
+    input_paths: list[Path] = []
+    try:
+        for file in files:
+            input_paths.append(await run_in_threadpool(_save_upload_to_temp, file))
+
+        output_paths = [p.parent / f"{p.stem}_cleaned.html" for p in input_paths]
+        results = await asyncio.gather(
+            *(CleanerPool.clean_file(i, o) for i, o in zip(input_paths, output_paths)),
+            return_exceptions=True,
+        )
+
+        items = []
+        total_original = 0
+        total_cleaned = 0
+        for file, output_path, result in zip(files, output_paths, results):
+            if isinstance(result, BaseException):
+                error = "Cleaner is busy, please retry later" if isinstance(result, CleanerPoolBusyError) else str(result)
+                items.append({"original_name": file.filename, "status": "failed", "error": error})
+                continue
+            total_original += result["original_size"]
+            total_cleaned += result["cleaned_size"]
+            items.append({
+                "original_name": file.filename,
+                "status": "success",
+                "temp_id": output_path.name,
+                "stats": result,
+            })
+
+        reduction = total_original - total_cleaned
+        return {
+            "message": "Cleaning finished",
+            "files": items,
+            "summary": {
+                "file_count": len(files),
+                "succeeded": sum(1 for item in items if item["status"] == "success"),
+                "original_size": total_original,
+                "cleaned_size": total_cleaned,
+                "reduction_bytes": reduction,
+                "reduction_percent": round(reduction / total_original * 100, 2) if total_original else 0.0,
+            },
+        }
+    except Exception as e:
+        logger.error(f"Multi-file cleaning failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        for input_path in input_paths:
+            _remove_temp_input(input_path)
 
 @router.get("/temp-file/{filename}")
 async def download_temp_file(filename: str):
@@ -381,34 +749,35 @@ async def download_temp_file(filename: str):
 
 
 @router.post("/upload-deep-clean")
-async def upload_and_deep_clean(file: UploadFile = File(...)) -> Any:
+async def upload_and_deep_clean(
+    file: UploadFile = File(...),
+    bypass_cache: bool = Query(default=False),
+) -> Any:
     """
     深度清理：轻度清理 + AI 提取。
     返回 AI 提取的 JSON 数据，如果失败则回退到轻度清理统计信息。
+    bypass_cache 为 True 时忽略 LLM 响应缓存，强制重新提取。
     """
     from app.industrial_pipeline.ai_extractor import AiExtractor
     
     if not file.filename.endswith(('.html', '.htm')):
         raise HTTPException(status_code=400, detail="Only HTML files are supported")
 
+    input_path = None
     try:
         # 第一步：保存上传的文件
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".html") as tmp_in:
-            shutil.copyfileobj(file.file, tmp_in)
-            input_path = Path(tmp_in.name)
-        
+        input_path = await run_in_threadpool(_save_upload_to_temp, file)
         output_path = input_path.parent / f"{input_path.stem}_cleaned.html"
         
-        # 第二步：先进行轻度清理
-        cleaner = HtmlCleaner()
-        stats = cleaner.clean_file(input_path, output_path)
+        # 第二步：先进行轻度清理（进程池中执行）
+        stats = await CleanerPool.clean_file(input_path, output_path)
         
         # 读取清理后的 HTML 以供 AI 使用
         cleaned_html = output_path.read_text(encoding='utf-8')
         
         # 第三步：AI 提取
         extractor = AiExtractor()
-        ai_result = extractor.extract(cleaned_html)
+        ai_result = await extractor.extract(cleaned_html, use_cache=not bypass_cache)
         
         if ai_result and ai_result.get("success"):
             # 将提取的 JSON 保存到临时文件以供下载
@@ -423,7 +792,9 @@ async def upload_and_deep_clean(file: UploadFile = File(...)) -> Any:
                 "original_name": file.filename,
                 "stats": stats,
                 "extracted_data": ai_result["data"],
-                "tokens_used": ai_result.get("tokens_used", {})
+                "tokens_used": ai_result.get("tokens_used", {}),
+                "reduction": ai_result.get("reduction", {}),
+                "chunks": ai_result.get("chunks", {})
             }
         else:
             # AI 失败 - 回退到轻度清理
@@ -437,16 +808,74 @@ async def upload_and_deep_clean(file: UploadFile = File(...)) -> Any:
                 "ai_error": ai_result.get("error") if ai_result else "AI service unavailable"
             }
         
+    except CleanerPoolBusyError as e:
+        raise _busy_exception(e)
     except Exception as e:
         logger.error(f"Deep clean failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        # 立即清理输入文件
-        if 'input_path' in locals() and input_path.exists():
-            try:
-                os.unlink(input_path)
-            except:
-                pass
+        _remove_temp_input(input_path)
+
+
+@router.post("/upload-deep-clean/stream")
+async def upload_and_deep_clean_stream(
+    file: UploadFile = File(...),
+    bypass_cache: bool = Query(default=False),
+) -> Any:
+    """
+    流式深度清理：轻度清理完成后，通过 SSE 逐条推送 AI 提取出的数据。
+
+    事件类型:
+    - reduction: 内容精简统计和分块数
+    - item: 一条提取结果（模型输出完该对象后立即推送）
+    - chunk_error: 某个分块提取失败
+    - done: 合并去重后的完整结果，temp_id 可用于下载 JSON 文件
+    """
+    from app.industrial_pipeline.ai_extractor import AiExtractor
+
+    if not file.filename.endswith(('.html', '.htm')):
+        raise HTTPException(status_code=400, detail="Only HTML files are supported")
+
+    input_path = None
+    try:
+        input_path = await run_in_threadpool(_save_upload_to_temp, file)
+        output_path = input_path.parent / f"{input_path.stem}_cleaned.html"
+        stats = await CleanerPool.clean_file(input_path, output_path)
+        cleaned_html = output_path.read_text(encoding='utf-8')
+    except CleanerPoolBusyError as e:
+        raise _busy_exception(e)
+    except Exception as e:
+        logger.error(f"Deep clean failed: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        _remove_temp_input(input_path)
+
+    json_output_path = input_path.parent / f"{input_path.stem}_extracted.json"
+    original_name = file.filename
+
+    async def generate():
+        try:
+            async for event in AiExtractor().extract_stream(cleaned_html, use_cache=not bypass_cache):
+                if event["type"] == "done":
+                    if event.get("success"):
+                        json_output_path.write_text(
+                            json.dumps(event["data"], ensure_ascii=False, indent=2), encoding='utf-8'
+                        )
+                        event = {**event, "mode": "ai_extraction", "temp_id": json_output_path.name}
+                    else:
+                        # AI 失败 - 回退到轻度清理结果
+                        event = {**event, "mode": "fallback", "temp_id": output_path.name}
+                    event.update({"original_name": original_name, "stats": stats})
+                yield _format_sse(event)
+        except Exception as e:
+            logger.error(f"Streaming deep clean failed: {e}")
+            yield _format_sse({"type": "error", "error": str(e)})
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/temp-json/{filename}")
@@ -0,0 +1,230 @@
+"""
+PostgreSQL COPY 批量入库
+
+用 psycopg 3 的 COPY FROM STDIN 把提取结果流式写入目标表，替代逐行 INSERT：
+- 追加模式：每批一次 COPY 直接写入目标表；
+- upsert 模式：每批先 COPY 到临时暂存表，再 INSERT ... SELECT ... ON CONFLICT 合并到目标表
+  （同一批内重复的键只保留最后一行）。
+可按请求的列自动建表（所有列为 TEXT，列里没有 id 时另加 id 主键），并统计行数与吞吐量（rows/s）。
+"""
+import json
+import logging
+import re
+import time
+from typing import AbstractSet, Any, Dict, Iterable, List, Optional, Sequence
+
+import psycopg
+from psycopg import sql
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def database_conninfo() -> str:
+    """SQLAlchemy 连接串去掉驱动名后即为 libpq 连接串。"""
+    return str(settings.SQLALCHEMY_DATABASE_URI).replace("postgresql+psycopg://", "postgresql://", 1)
+
+
+def fold_identifier(name: str, quoted: AbstractSet[str] = frozenset()) -> str:
+    """
+    按 PostgreSQL 的规则得到标识符的实际名称：带双引号的保留大小写，未加引号的折叠为小写。
+    quoted 为 DDL 中以双引号声明的名称，name 在其中时同样保留大小写。
+    """
+    if len(name) >= 2 and name.startswith('"') and name.endswith('"'):
+        return name[1:-1]
+    return name if name in quoted else name.lower()
+
+
+def fold_table_name(table_name: str) -> str:
+    """DDL 中的表名 -> 实际的 schema.table 名称（各部分按 fold_identifier 规范化）。"""
+    return ".".join(fold_identifier(part) for part in re.findall(r'"[^"]+"|[^.]+', table_name))
+
+
+def _table_identifier(table_name: str) -> sql.Identifier:
+    # 支持 schema.table，去掉 CREATE TABLE 语句里可能带的引号
+    return sql.Identifier(*(part.strip('"') for part in table_name.split(".")))
+
+
+def _base_name(table_name: str) -> str:
+    return table_name.split(".")[-1].strip('"')
+
+
+def _copy_value(value: Any) -> Optional[str]:
+    """COPY 文本格式的值：字典和列表序列化为 JSON，其他值转为字符串。"""
+    if value is None:
+        return None
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def create_table_statement(table_name: str, columns: Sequence[str]) -> sql.Composed:
+    """所有列为 TEXT；写入的列里已有 id 时不再另加 id 主键，避免列名重复。"""
+    definitions = [sql.SQL("{} TEXT").format(sql.Identifier(col)) for col in columns]
+    if "id" not in columns:
+        definitions.insert(0, sql.SQL("id BIGSERIAL PRIMARY KEY"))
+    return sql.SQL("CREATE TABLE IF NOT EXISTS {} ({})").format(
+        _table_identifier(table_name),
+        sql.SQL(", ").join(definitions),
+    )
+
+
+def unique_index_statement(table_name: str, keys: Sequence[str]) -> sql.Composed:
+    index_name = f"{_base_name(table_name)}_{'_'.join(keys)}_key"[:63]
+    return sql.SQL("CREATE UNIQUE INDEX IF NOT EXISTS {} ON {} ({})").format(
+        sql.Identifier(index_name),
+        _table_identifier(table_name),
+        sql.SQL(", ").join(map(sql.Identifier, keys)),
+    )
+
+
+def staging_statement(table_name: str, staging_name: str, columns: Sequence[str]) -> sql.Composed:
+    return sql.SQL(
+        "CREATE TEMP TABLE IF NOT EXISTS {} ON COMMIT DELETE ROWS AS SELECT {} FROM {} WITH NO DATA"
+    ).format(
+        sql.Identifier(staging_name),
+        sql.SQL(", ").join(map(sql.Identifier, columns)),
+        _table_identifier(table_name),
+    )
+
+
+def copy_statement(table_name: str, columns: Sequence[str]) -> sql.Composed:
+    return sql.SQL("COPY {} ({}) FROM STDIN").format(
+        _table_identifier(table_name),
+        sql.SQL(", ").join(map(sql.Identifier, columns)),
+    )
+
+
+def merge_statement(table_name: str, staging_name: str, columns: Sequence[str], keys: Sequence[str]) -> sql.Composed:
+    """暂存表合并到目标表；ctid 倒序使同一批内重复键保留最后写入的行。"""
+    col_list = sql.SQL(", ").join(map(sql.Identifier, columns))
+    key_list = sql.SQL(", ").join(map(sql.Identifier, keys))
+    updates = [col for col in columns if col not in keys]
+    if updates:
+        conflict = sql.SQL("DO UPDATE SET {}").format(sql.SQL(", ").join(
+            sql.SQL("{0} = EXCLUDED.{0}").format(sql.Identifier(col)) for col in updates
+        ))
+    else:
+        conflict = sql.SQL("DO NOTHING")
+    return sql.SQL(
+        "INSERT INTO {table} ({cols}) SELECT DISTINCT ON ({keys}) {cols} FROM {staging} "
+        "ORDER BY {keys}, ctid DESC ON CONFLICT ({keys}) {conflict}"
+    ).format(
+        table=_table_identifier(table_name),
+        cols=col_list,
+        keys=key_list,
+        staging=sql.Identifier(staging_name),
+        conflict=conflict,
+    )
+
+
+class PgCopyLoader:
+    """
+    用法:
+        loader = PgCopyLoader("products", ["title", "price"], upsert_keys=["title"])
+        await loader.start()
+        try:
+            await loader.copy_rows(rows)
+        finally:
+            await loader.close()
+
+    参数:
+        columns: 写入的列；为空时使用第一批第一行的键（追加模式下也可由 copy_rows 按批指定）
+        upsert_keys: 非空时启用 upsert（需要在这些列上的唯一索引，建表时一并创建）
+        create_table: 目标表不存在时按 columns 创建（所有列为 TEXT）
+        conninfo: 为空时使用应用数据库
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        columns: Optional[List[str]] = None,
+        upsert_keys: Optional[List[str]] = None,
+        create_table: bool = True,
+        conninfo: Optional[str] = None,
+    ):
+        self.table_name = table_name
+        self.columns = list(columns) if columns else None
+        self.upsert_keys = list(upsert_keys or [])
+        self.create_table = create_table
+        self.conninfo = conninfo or database_conninfo()
+        self.staging_name = f"_staging_{_base_name(table_name)}"[:63]
+        self._conn: Optional[psycopg.AsyncConnection] = None
+        self._prepared = False
+
+        # 统计
+        self.rows = 0
+        self.batches = 0
+        self.copy_seconds = 0.0
+
+    async def start(self):
+        self._conn = await psycopg.AsyncConnection.connect(self.conninfo, autocommit=True)
+        if self.columns:
+            await self._prepare()
+
+    async def _prepare(self):
+        missing = [key for key in self.upsert_keys if key not in self.columns]
+        if missing:
+            raise ValueError(f"Upsert keys {missing} are not among the loaded columns")
+        async with self._conn.transaction():
+            if self.create_table:
+                await self._conn.execute(create_table_statement(self.table_name, self.columns))
+            if self.upsert_keys:
+                await self._conn.execute(unique_index_statement(self.table_name, self.upsert_keys))
+                # 暂存表只有写入的列（沿用目标表的类型），随会话存在，每次提交后清空
+                await self._conn.execute(staging_statement(self.table_name, self.staging_name, self.columns))
+        self._prepared = True
+        logger.info(
+            f"COPY loader ready for {self.table_name} ({len(self.columns)} columns, "
+            f"{'upsert on ' + ', '.join(self.upsert_keys) if self.upsert_keys else 'append'})"
+        )
+
+    async def copy_rows(self, rows: Iterable[Dict[str, Any]], columns: Optional[Sequence[str]] = None) -> int:
+        """
+        在一个事务内写入一批行，返回写入的行数。
+
+        columns 只用于追加模式：本批按这些列写入，未列出的列使用表的默认值，
+        各批的列可以不同（行的键不固定时传入本批所有键的并集）。
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        if self._conn is None:
+            raise RuntimeError("PgCopyLoader is not started")
+        if columns is not None and self.upsert_keys:
+            raise ValueError("Per-batch columns are not supported in upsert mode")
+        if not self.columns:
+            self.columns = list(columns or rows[0].keys())
+        if not self._prepared:
+            await self._prepare()
+        columns = list(columns) if columns is not None else self.columns
+
+        start = time.perf_counter()
+        target = self.staging_name if self.upsert_keys else self.table_name
+        async with self._conn.transaction():
+            async with self._conn.cursor() as cur:
+                async with cur.copy(copy_statement(target, columns)) as copy:
+                    for row in rows:
+                        await copy.write_row([_copy_value(row.get(col)) for col in columns])
+                if self.upsert_keys:
+                    await cur.execute(merge_statement(self.table_name, self.staging_name, self.columns, self.upsert_keys))
+        self.copy_seconds += time.perf_counter() - start
+        self.rows += len(rows)
+        self.batches += 1
+        return len(rows)
+
+    async def close(self):
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "table": self.table_name,
+            "mode": "upsert" if self.upsert_keys else "append",
+            "rows": self.rows,
+            "batches": self.batches,
+            "copy_seconds": round(self.copy_seconds, 3),
+            "rows_per_second": round(self.rows / self.copy_seconds, 1) if self.copy_seconds else 0.0,
+        }
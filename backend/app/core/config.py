@@ -107,10 +107,64 @@ class Settings(BaseSettings):
 
     # DeepSeek 设置
     DEEPSEEK_API_KEY: str | None = None
+
+    # LLM 客户端设置
+    LLM_MAX_CONCURRENCY: int = 8  # 同时进行的 LLM 调用上限
+    LLM_MAX_RETRIES: int = 3  # 429 / 5xx / 网络错误的重试次数
+    LLM_TIMEOUT_SECONDS: float = 120.0
+    LLM_CACHE_DIR: str | None = None  # 为空时使用 STORAGE_ROOT_DIR/cache/llm
+    LLM_CACHE_MAX_BYTES: int = 256 * 1024 * 1024  # 0 表示禁用响应缓存
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600  # 0 表示永不过期
+
+    # 页面抓取客户端设置
+    FETCH_MAX_CONNECTIONS: int = 100  # 进程内共享连接池的连接上限
+    FETCH_MAX_CONNECTIONS_PER_HOST: int = 6  # 同一主机同时进行的请求上限
+    FETCH_KEEPALIVE_EXPIRY_SECONDS: float = 30.0  # 空闲连接保留时间
+    FETCH_TIMEOUT_SECONDS: float = 10.0
+    SPIDER_FRONTIER_MAX_DEPTH: int | None = None  # 发现模式下距起始页的最大链接深度，为空表示只受 max_pages 限制
+    SPIDER_FRONTIER_MAX_LINKS_PER_PAGE: int = 10  # 每个页面最多加入边界的新链接数
+    SPIDER_BATCH_TOKEN_BUDGET: int = 12000  # 批量提取时单个请求的页面内容 token 上限
+    SPIDER_BATCH_MAX_PAGES: int = 8  # 单个批量请求最多包含的页面数，设为 1 关闭批量提取
+    SPIDER_BATCH_LINGER_SECONDS: float = 0.5  # 凑批等待时间，到时即使未满也发送
+    SPIDER_SELECTOR_WARMUP_PAGES: int = 3  # 学习选择器前由 LLM 提取的页面数，0 表示关闭选择器快速路径
+    SPIDER_SELECTOR_MAX_FAILURES: int = 3  # 选择器连续校验失败达到该次数后重新学习
+    SPIDER_REVALIDATE: bool = True  # 在 CrawlIndex 中记录页面的验证器和内容哈希；重抓任务据此发送条件请求并跳过未变化的页面
+    SPIDER_FETCH_CONCURRENCY: int | None = None  # 抓取阶段并发数，为空时使用任务的 concurrency
+    SPIDER_REDUCE_CONCURRENCY: int = 2  # 内容精简阶段并发数（CPU 密集，在线程池中执行）
+    SPIDER_EXTRACT_CONCURRENCY: int | None = None  # 提取阶段并发数，为空时取 concurrency 与 SPIDER_BATCH_MAX_PAGES 的较大值
+    SPIDER_STAGE_QUEUE_SIZE: int | None = None  # 每个阶段的输入队列长度，为空时为该阶段并发数的 4 倍
+    RECRAWL_ENABLED: bool = False  # 是否在后台按变化频率自动重抓 CrawlIndex 中的页面
+    RECRAWL_DAILY_FETCH_BUDGET: int = 1000  # 重抓调度每 24 小时最多抓取的页面数
+    RECRAWL_TICK_SECONDS: int = 3600  # 调度间隔，每次分配 预算 * 间隔 / 24 小时 的抓取量
+    RECRAWL_MIN_INTERVAL_HOURS: float = 1.0  # 同一页面两次检查的最短间隔
+    RECRAWL_MAX_INTERVAL_DAYS: float = 30.0  # 变化率下限取 1 / 该天数，稳定页面也会定期检查
+    RECRAWL_DEFAULT_CHANGE_RATE: float = 1.0  # 尚无变化历史的页面假定的变化率（次/天）
+    RECRAWL_CONCURRENCY: int = 5  # 每个重抓任务的抓取并发数
+    CRAWL_LOG_FLUSH_ROWS: int = 50  # 任务日志缓冲到该行数时批量插入
+    CRAWL_LOG_FLUSH_SECONDS: float = 0.5  # 未满一批时最长缓冲时间
+    CRAWL_SINK_QUEUE_SIZE: int = 256  # 结果写入队列长度，队列满时提取协程等待
+    CRAWL_SINK_FLUSH_ROWS: int = 50  # 每批最多写入的行数
+    CRAWL_SINK_FLUSH_SECONDS: float = 1.0  # 未满一批时最长等待时间
+    CRAWL_SINK_FSYNC: Literal["none", "batch", "close"] = "close"  # 落盘策略：不 fsync / 每批 fsync / 关闭时 fsync
+    CRAWL_RESULT_PREVIEW_BYTES: int = 4096  # 任务上保留的 SQL 结果预览长度，完整结果通过下载接口获取
     
     # 存储设置
     STORAGE_ROOT_DIR: str = "backend/storage"
 
+    # HTML 清理设置
+    HTML_CLEANER_ENGINE: Literal["lxml", "bs4"] = "lxml"  # lxml 为单次遍历的 C 解析器引擎
+    HTML_CLEANER_WORKERS: int | None = None  # 为空时使用 CPU 核数
+    HTML_CLEANER_MAX_PENDING: int = 64  # 超出后返回 503
+    HTML_CLEANER_STREAMING_THRESHOLD: int = 16 * 1024 * 1024  # 超过该字节数的文件使用流式清理，0 表示禁用
+    HTML_CLEANER_CACHE_DIR: str | None = None  # 为空时使用 STORAGE_ROOT_DIR/cache/clean
+    HTML_CLEANER_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 0 表示禁用清理结果缓存
+
+    # LLM 输入缩减设置
+    LLM_INPUT_TOKEN_BUDGET: int = 8000  # 发送给模型的页面内容 token 上限（估算值）
+    CONTENT_REDUCER_EXEMPLARS: int = 3  # 折叠重复模板时每组保留的样例数
+    LLM_EXTRACT_CHUNK_TOKENS: int = 3000  # 深度清理时每个分块的输入 token 上限，需保证输出不超过 max_tokens
+    LLM_EXTRACT_MAX_CHUNKS: int = 32  # 单个文档最多切分的块数，超出部分截断
+
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
             message = (
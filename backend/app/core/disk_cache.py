@@ -0,0 +1,192 @@
+"""
+基于磁盘的 LRU 结果缓存
+
+每个条目由一个数据文件和一个 JSON 元数据文件组成，按键的前两位分目录存放。
+总大小超过上限时按最近访问时间淘汰最旧的条目；访问顺序通过文件 mtime 持久化，
+重启后可以恢复。可选的 TTL 使超过有效期的条目在读取时失效。所有方法都是线程安全的，可以在 run_in_executor 的线程中调用。
+"""
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DATA_SUFFIX = ".bin"
+META_SUFFIX = ".json"
+# 元数据中保存写入时间的保留字段
+STORED_AT_KEY = "_stored_at"
+
+
+class DiskLruCache:
+    """大小受限的磁盘 LRU 缓存。"""
+
+    def __init__(self, directory: Path, max_bytes: int, ttl_seconds: Optional[float] = None):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # 键 -> 数据文件字节数，按访问顺序排列（最旧的在前）
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._size_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        entries = []
+        for data_path in self.directory.glob(f"*/*{DATA_SUFFIX}"):
+            if not data_path.with_suffix(META_SUFFIX).exists():
+                continue
+            stat = data_path.stat()
+            entries.append((stat.st_mtime, data_path.stem, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._size_bytes += size
+        self._evict()
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        shard = self.directory / key[:2]
+        return shard / f"{key}{DATA_SUFFIX}", shard / f"{key}{META_SUFFIX}"
+
+    def _touch(self, key: str, data_path: Path):
+        self._index.move_to_end(key)
+        try:
+            os.utime(data_path)
+        except OSError:
+            pass
+
+    def _read_meta(self, key: str) -> Optional[Dict[str, Any]]:
+        """在锁内调用：返回元数据，条目缺失或损坏时将其移除并返回 None。"""
+        if key not in self._index:
+            self.misses += 1
+            return None
+        data_path, meta_path = self._paths(key)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._remove(key)
+            self.misses += 1
+            return None
+        stored_at = meta.pop(STORED_AT_KEY, None)
+        if self.ttl_seconds and (stored_at is None or time.time() - stored_at > self.ttl_seconds):
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._touch(key, data_path)
+        return meta
+
+    def get_file(self, key: str, destination: Path) -> Optional[Dict[str, Any]]:
+        """
+        命中时把缓存数据复制到 destination 并返回元数据，未命中返回 None。
+        """
+        with self._lock:
+            meta = self._read_meta(key)
+            if meta is None:
+                return None
+            data_path, _ = self._paths(key)
+            try:
+                shutil.copyfile(data_path, destination)
+            except OSError:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.bytes_served += self._index[key]
+            return meta
+
+    def get_bytes(self, key: str) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        """命中时返回 (数据, 元数据)，未命中返回 None。"""
+        with self._lock:
+            meta = self._read_meta(key)
+            if meta is None:
+                return None
+            data_path, _ = self._paths(key)
+            try:
+                data = data_path.read_bytes()
+            except OSError:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.bytes_served += len(data)
+            return data, meta
+
+    def put_file(self, key: str, source: Path, meta: Dict[str, Any]):
+        """把 source 文件作为 key 的缓存数据写入。"""
+        self._put(key, meta, lambda tmp: shutil.copyfile(source, tmp))
+
+    def put_bytes(self, key: str, data: bytes, meta: Dict[str, Any]):
+        self._put(key, meta, lambda tmp: tmp.write_bytes(data))
+
+    def _put(self, key: str, meta: Dict[str, Any], write_data):
+        data_path, meta_path = self._paths(key)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件再原子替换，读者不会看到写了一半的条目
+        suffix = f".{uuid.uuid4().hex}.tmp"
+        tmp_data = data_path.with_name(data_path.name + suffix)
+        tmp_meta = meta_path.with_name(meta_path.name + suffix)
+        try:
+            write_data(tmp_data)
+            stored_meta = {**meta, STORED_AT_KEY: time.time()}
+            tmp_meta.write_text(json.dumps(stored_meta, ensure_ascii=False), encoding="utf-8")
+            size = tmp_data.stat().st_size
+            if self.max_bytes and size > self.max_bytes:
+                return
+
+            with self._lock:
+                os.replace(tmp_data, data_path)
+                os.replace(tmp_meta, meta_path)
+                self._size_bytes -= self._index.pop(key, 0)
+                self._index[key] = size
+                self._size_bytes += size
+                self._evict()
+        except OSError as e:
+            logger.warning(f"Failed to write cache entry {key}: {e}")
+        finally:
+            tmp_data.unlink(missing_ok=True)
+            tmp_meta.unlink(missing_ok=True)
+
+    def _remove(self, key: str):
+        self._size_bytes -= self._index.pop(key, 0)
+        for path in self._paths(key):
+            path.unlink(missing_ok=True)
+
+    def _evict(self):
+        while self.max_bytes and self._size_bytes > self.max_bytes and self._index:
+            oldest = next(iter(self._index))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._index):
+                self._remove(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._index),
+                "size_bytes": self._size_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "bytes_served": self.bytes_served,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
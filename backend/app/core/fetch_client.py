@@ -0,0 +1,154 @@
+"""
+共享的页面抓取 HTTP 客户端
+
+爬虫任务抓取页面时共用一个进程级的 httpx.AsyncClient：连接在任务之间复用（keep-alive，
+可用时使用 HTTP/2），省去每个页面的 DNS / TCP / TLS 建连开销。
+每个主机的并发请求数单独限制，请求头（User-Agent 轮换等）按请求传入，不需要新建客户端。
+通过 httpcore 的 trace 扩展统计新建连接数和 TLS 握手数，得到连接复用率。
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.llm_client import HTTP2_AVAILABLE
+
+logger = logging.getLogger(__name__)
+
+
+class _HostStats:
+    def __init__(self):
+        self.requests = 0
+        self.connections_opened = 0
+        self.tls_handshakes = 0
+        self.http2_responses = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.waiting = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        reused = max(0, self.requests - self.connections_opened)
+        return {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "tls_handshakes": self.tls_handshakes,
+            "reused_requests": reused,
+            "reuse_rate": round(reused / self.requests, 4) if self.requests else 0.0,
+            "http2_responses": self.http2_responses,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+        }
+
+
+class FetchClient:
+    """共享抓取客户端的单例管理器。"""
+    _client: Optional[httpx.AsyncClient] = None
+    _host_semaphores: Dict[str, asyncio.Semaphore] = {}
+    _host_stats: Dict[str, _HostStats] = defaultdict(_HostStats)
+
+    @classmethod
+    def start(cls):
+        if cls._client:
+            return
+
+        cls._client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            follow_redirects=True,
+            timeout=httpx.Timeout(settings.FETCH_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.FETCH_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.FETCH_MAX_CONNECTIONS,
+                keepalive_expiry=settings.FETCH_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            # 客户端在任务之间共享，不保存 Cookie，避免会话在不同任务之间串用
+            cookies=CookieJar(policy=DefaultCookiePolicy(allowed_domains=[])),
+        )
+        cls._host_semaphores = {}
+        logger.info(
+            f"Fetch Client Started (max {settings.FETCH_MAX_CONNECTIONS} connections, "
+            f"{settings.FETCH_MAX_CONNECTIONS_PER_HOST} per host, http2={HTTP2_AVAILABLE})"
+        )
+
+    @classmethod
+    async def stop(cls):
+        if cls._client:
+            await cls._client.aclose()
+            cls._client = None
+            cls._host_semaphores = {}
+            logger.info("Fetch Client Stopped")
+
+    @classmethod
+    def _semaphore(cls, host: str) -> asyncio.Semaphore:
+        semaphore = cls._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(settings.FETCH_MAX_CONNECTIONS_PER_HOST)
+            cls._host_semaphores[host] = semaphore
+        return semaphore
+
+    @classmethod
+    async def get(cls, url: str, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        """
+        抓取页面并读取完整响应体。
+
+        参数:
+            url: 页面地址
+            headers: 本次请求的请求头（例如轮换的 User-Agent），只作用于这一个请求
+
+        异常:
+            httpx.HTTPError: 网络错误或超时
+        """
+        if not cls._client:
+            cls.start()
+
+        host = httpx.URL(url).host
+        stats = cls._host_stats[host]
+
+        async def trace(event_name: str, info: Dict[str, Any]):
+            # 只有新建连接时才会出现 connect_tcp / start_tls 事件，复用的连接不会
+            if event_name == "connection.connect_tcp.complete":
+                stats.connections_opened += 1
+            elif event_name == "connection.start_tls.complete":
+                stats.tls_handshakes += 1
+
+        stats.waiting += 1
+        acquired = False
+        try:
+            async with cls._semaphore(host):
+                acquired = True
+                stats.waiting -= 1
+                stats.in_flight += 1
+                stats.requests += 1
+                try:
+                    response = await cls._client.get(url, headers=headers, extensions={"trace": trace})
+                except httpx.HTTPError:
+                    stats.errors += 1
+                    raise
+                finally:
+                    stats.in_flight -= 1
+        finally:
+            if not acquired:
+                stats.waiting -= 1
+        if response.http_version == "HTTP/2":
+            stats.http2_responses += 1
+        return response
+
+    @classmethod
+    def metrics(cls) -> Dict[str, Any]:
+        """返回总体和按主机的请求数、新建连接数和连接复用率。"""
+        total = _HostStats()
+        for stats in cls._host_stats.values():
+            for field in ("requests", "connections_opened", "tls_handshakes", "http2_responses", "errors",
+                          "in_flight", "waiting"):
+                setattr(total, field, getattr(total, field) + getattr(stats, field))
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "max_connections": settings.FETCH_MAX_CONNECTIONS,
+            "max_connections_per_host": settings.FETCH_MAX_CONNECTIONS_PER_HOST,
+            **total.snapshot(),
+            "hosts": {host: stats.snapshot() for host, stats in sorted(cls._host_stats.items())},
+        }
@@ -0,0 +1,97 @@
+"""
+LLM 响应缓存
+
+重新爬取、失败重试和审核模式恢复会用相同的页面和提示词反复调用模型。
+这里按 (模型, 完整消息, temperature, response_format, max_tokens) 的哈希缓存
+/chat/completions 的响应，存放在带 TTL 的磁盘 LRU 缓存中。
+"""
+import hashlib
+import json
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.disk_cache import DiskLruCache
+
+logger = logging.getLogger(__name__)
+
+# 参与缓存键计算的请求字段
+KEY_FIELDS = ("model", "messages", "temperature", "response_format", "max_tokens")
+
+
+class LlmResponseCache:
+    """LLM 响应缓存的单例封装。"""
+    _cache: Optional[DiskLruCache] = None
+    _init_lock = threading.Lock()
+    _stats_lock = threading.Lock()
+
+    # 命中时节省的 token（按缓存响应中的 usage 统计）
+    _prompt_tokens_saved: int = 0
+    _completion_tokens_saved: int = 0
+
+    @classmethod
+    def _get_cache(cls) -> Optional[DiskLruCache]:
+        if cls._cache is None and settings.LLM_CACHE_MAX_BYTES > 0:
+            with cls._init_lock:
+                if cls._cache is None:
+                    directory = settings.LLM_CACHE_DIR or Path(settings.STORAGE_ROOT_DIR) / "cache" / "llm"
+                    cls._cache = DiskLruCache(
+                        Path(directory),
+                        settings.LLM_CACHE_MAX_BYTES,
+                        ttl_seconds=settings.LLM_CACHE_TTL_SECONDS or None,
+                    )
+        return cls._cache
+
+    @staticmethod
+    def cache_key(payload: Dict[str, Any]) -> str:
+        key_data = {field: payload.get(field) for field in KEY_FIELDS}
+        encoded = json.dumps(key_data, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def get(cls, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """返回缓存的响应；缓存禁用或未命中时返回 None。"""
+        cache = cls._get_cache()
+        if cache is None:
+            return None
+
+        entry = cache.get_bytes(cls.cache_key(payload))
+        if entry is None:
+            return None
+        try:
+            response = json.loads(entry[0])
+        except ValueError:
+            return None
+
+        usage = response.get("usage") or {}
+        with cls._stats_lock:
+            cls._prompt_tokens_saved += usage.get("prompt_tokens") or 0
+            cls._completion_tokens_saved += usage.get("completion_tokens") or 0
+        return response
+
+    @classmethod
+    def put(cls, payload: Dict[str, Any], response: Dict[str, Any]):
+        """缓存成功的响应（没有内容的响应不缓存）。"""
+        cache = cls._get_cache()
+        if cache is None:
+            return
+        choices = response.get("choices") or []
+        if not choices or not (choices[0].get("message") or {}).get("content"):
+            return
+        data = json.dumps(response, ensure_ascii=False).encode("utf-8")
+        cache.put_bytes(cls.cache_key(payload), data, {"model": payload.get("model")})
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        cache = cls._get_cache()
+        if cache is None:
+            return {"enabled": False}
+        return {
+            "enabled": True,
+            **cache.stats(),
+            "prompt_tokens_saved": cls._prompt_tokens_saved,
+            "completion_tokens_saved": cls._completion_tokens_saved,
+            "tokens_saved": cls._prompt_tokens_saved + cls._completion_tokens_saved,
+        }
@@ -0,0 +1,381 @@
+"""
+共享的 LLM HTTP 客户端
+
+进程内所有对 OpenAI 兼容接口（火山引擎 / DeepSeek）的调用共用一个带连接池的
+httpx.AsyncClient（keep-alive + HTTP/2），并通过信号量限制并发调用数。
+429 / 5xx 和网络错误按带抖动的指数退避重试，优先遵循服务端返回的 Retry-After。
+相同请求的响应从 LlmResponseCache 返回，不再占用并发名额。
+每次调用的延迟、首 token 延迟和 token 用量按模型和调用点记录到 LlmMetrics。
+"""
+import asyncio
+import json
+import logging
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Deque, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.llm_cache import LlmResponseCache
+from app.core.llm_metrics import LlmMetrics
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401  # HTTP/2 依赖 httpx[http2]
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+# 用于计算延迟分位数的最近样本数
+LATENCY_WINDOW = 512
+
+
+class LlmRequestError(RuntimeError):
+    """LLM 接口调用失败（重试耗尽或不可重试的错误）。"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 头（秒数或 HTTP 日期），返回需要等待的秒数。"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """第 attempt 次重试前的等待时间：Retry-After 优先，否则使用全抖动指数退避。"""
+    if retry_after is not None:
+        return min(retry_after, BACKOFF_MAX_SECONDS * 4)
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+class LlmClient:
+    """共享 LLM 客户端的单例管理器。"""
+    _client: Optional[httpx.AsyncClient] = None
+    _semaphore: Optional[asyncio.Semaphore] = None
+
+    # 指标
+    _queued: int = 0
+    _in_flight: int = 0
+    _requests: int = 0
+    _succeeded: int = 0
+    _failed: int = 0
+    _retries: int = 0
+    _total_wait_seconds: float = 0.0
+    _max_wait_seconds: float = 0.0
+    _latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    @classmethod
+    def start(cls):
+        if cls._client:
+            return
+
+        if not HTTP2_AVAILABLE:
+            logger.warning("h2 is not installed, LLM client falls back to HTTP/1.1")
+        cls._client = httpx.AsyncClient(
+            base_url=settings.VOLC_BASE_URL,
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONCURRENCY * 2,
+                max_keepalive_connections=settings.LLM_MAX_CONCURRENCY,
+            ),
+        )
+        cls._semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        logger.info(f"LLM Client Started (max {settings.LLM_MAX_CONCURRENCY} concurrent calls, http2={HTTP2_AVAILABLE})")
+
+    @classmethod
+    async def stop(cls):
+        if cls._client:
+            await cls._client.aclose()
+            cls._client = None
+            cls._semaphore = None
+            logger.info("LLM Client Stopped")
+
+    @classmethod
+    @asynccontextmanager
+    async def _slot(cls) -> AsyncIterator[None]:
+        """占用一个并发名额，并统计排队时间。"""
+        cls._queued += 1
+        enqueued_at = time.perf_counter()
+        acquired = False
+        try:
+            async with cls._semaphore:
+                acquired = True
+                cls._queued -= 1
+                wait_seconds = time.perf_counter() - enqueued_at
+                cls._total_wait_seconds += wait_seconds
+                cls._max_wait_seconds = max(cls._max_wait_seconds, wait_seconds)
+                cls._in_flight += 1
+                cls._requests += 1
+                try:
+                    yield
+                finally:
+                    cls._in_flight -= 1
+        finally:
+            if not acquired:
+                cls._queued -= 1
+
+    @staticmethod
+    def _headers(api_key: Optional[str]) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {api_key or settings.VOLC_API_KEY or ''}"}
+
+    @classmethod
+    async def chat_completion(
+        cls,
+        payload: Dict[str, Any],
+        api_key: Optional[str] = None,
+        use_cache: bool = True,
+        call_site: str = "default",
+    ) -> Dict[str, Any]:
+        """
+        调用 /chat/completions 并返回解析后的 JSON 响应。
+
+        参数:
+            payload: 请求体（model、messages 等）
+            api_key: 为空时使用 VOLC_API_KEY
+            use_cache: 为 False 时跳过缓存读取，强制请求模型（结果仍会写入缓存）
+            call_site: 调用点名称，用于按调用点统计延迟和 token
+
+        异常:
+            LlmRequestError: 重试耗尽或遇到不可重试的错误
+        """
+        if not cls._client:
+            cls.start()
+
+        loop = asyncio.get_running_loop()
+        model = payload.get("model")
+        if use_cache:
+            lookup_started_at = time.perf_counter()
+            cached = await loop.run_in_executor(None, LlmResponseCache.get, payload)
+            if cached is not None:
+                LlmMetrics.record(
+                    model, call_site, time.perf_counter() - lookup_started_at,
+                    usage=cached.get("usage"), cached=True,
+                )
+                return cached
+
+        outcome = {"retries": 0}
+        result = None
+        ttft = None
+        failed = False
+        started_at = None
+        try:
+            async with cls._slot():
+                started_at = time.perf_counter()
+                response = await cls._send_with_retries(payload, cls._headers(api_key), outcome)
+                # 非流式调用没有逐 token 输出，以收到响应头的时间作为首 token 延迟
+                ttft = time.perf_counter() - started_at
+                try:
+                    await response.aread()
+                    result = response.json()
+                except (httpx.TimeoutException, httpx.TransportError) as e:
+                    raise LlmRequestError(f"LLM response read failed: {e!r}") from e
+                finally:
+                    await response.aclose()
+                cls._latencies.append(time.perf_counter() - started_at)
+                cls._succeeded += 1
+            await loop.run_in_executor(None, LlmResponseCache.put, payload, result)
+            return result
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            cls._failed += 1
+            failed = True
+            raise
+        finally:
+            if started_at is not None:
+                LlmMetrics.record(
+                    model, call_site, time.perf_counter() - started_at,
+                    ttft=ttft, usage=(result or {}).get("usage"),
+                    retries=outcome["retries"], error=failed,
+                )
+
+    @classmethod
+    async def stream_chat_completion(
+        cls,
+        payload: Dict[str, Any],
+        api_key: Optional[str] = None,
+        use_cache: bool = False,
+        call_site: str = "default",
+    ) -> AsyncIterator[str]:
+        """
+        以流式方式调用 /chat/completions，逐段产出模型输出的文本。
+
+        只在收到第一个字节之前重试。
+        首个内容增量到达的时间记为首 token 延迟，结束时的 usage 计入指标。
+
+        参数:
+            use_cache: 为 True 时先查响应缓存（命中则一次性产出完整内容），
+                完整读完的响应写入缓存，与 chat_completion 共用缓存键
+
+        异常:
+            LlmRequestError: 重试耗尽、遇到不可重试的错误或读取中断
+        """
+        if not cls._client:
+            cls.start()
+
+        loop = asyncio.get_running_loop()
+        model = payload.get("model")
+        if use_cache:
+            lookup_started_at = time.perf_counter()
+            cached = await loop.run_in_executor(None, LlmResponseCache.get, payload)
+            if cached is not None:
+                content = ((cached.get("choices") or [{}])[0].get("message") or {}).get("content")
+                LlmMetrics.record(
+                    model, call_site, time.perf_counter() - lookup_started_at,
+                    usage=cached.get("usage"), cached=True,
+                )
+                if content:
+                    yield content
+                return
+
+        request_payload = {**payload, "stream": True, "stream_options": {"include_usage": True}}
+        parts = []
+        outcome = {"retries": 0}
+        usage = None
+        ttft = None
+        failed = False
+        started_at = None
+        try:
+            async with cls._slot():
+                started_at = time.perf_counter()
+                response = await cls._send_with_retries(request_payload, cls._headers(api_key), outcome)
+                try:
+                    async for line in response.aiter_lines():
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[5:].strip()
+                        if data == "[DONE]":
+                            break
+                        try:
+                            chunk = json.loads(data)
+                        except ValueError:
+                            continue
+                        usage = chunk.get("usage") or usage
+                        for choice in chunk.get("choices") or []:
+                            content = (choice.get("delta") or {}).get("content")
+                            if content:
+                                if ttft is None:
+                                    ttft = time.perf_counter() - started_at
+                                parts.append(content)
+                                yield content
+                except (httpx.TimeoutException, httpx.TransportError) as e:
+                    raise LlmRequestError(f"LLM stream interrupted: {e!r}") from e
+                finally:
+                    await response.aclose()
+                cls._latencies.append(time.perf_counter() - started_at)
+                cls._succeeded += 1
+            if use_cache:
+                response_data = {
+                    "choices": [{"message": {"role": "assistant", "content": "".join(parts)}}],
+                    "usage": usage or {},
+                }
+                await loop.run_in_executor(None, LlmResponseCache.put, payload, response_data)
+        except (asyncio.CancelledError, GeneratorExit):
+            # 调用方中途停止读取（例如客户端断开）不算调用失败
+            raise
+        except Exception:
+            cls._failed += 1
+            failed = True
+            raise
+        finally:
+            if started_at is not None:
+                LlmMetrics.record(
+                    model, call_site, time.perf_counter() - started_at,
+                    ttft=ttft, usage=usage, retries=outcome["retries"], error=failed,
+                )
+
+    @classmethod
+    async def _send_with_retries(
+        cls,
+        payload: Dict[str, Any],
+        headers: Dict[str, str],
+        outcome: Dict[str, int],
+    ) -> httpx.Response:
+        """
+        发送请求直到收到 200 响应头，返回尚未读取响应体的 Response（调用方负责关闭）。
+        重试次数累加到 outcome["retries"]。
+        """
+        max_retries = settings.LLM_MAX_RETRIES
+        for attempt in range(max_retries + 1):
+            retry_after = None
+            request = cls._client.build_request("POST", "/chat/completions", json=payload, headers=headers)
+            try:
+                response = await cls._client.send(request, stream=True)
+            except (httpx.TimeoutException, httpx.TransportError) as e:
+                if attempt >= max_retries:
+                    raise LlmRequestError(f"LLM request failed: {e!r}") from e
+                logger.warning(f"LLM request error ({e!r}), retrying (attempt {attempt + 1}/{max_retries})")
+            else:
+                if response.status_code == 200:
+                    return response
+                try:
+                    await response.aread()
+                finally:
+                    await response.aclose()
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= max_retries:
+                    raise LlmRequestError(
+                        f"LLM API error: {response.status_code} - {response.text[:500]}",
+                        status_code=response.status_code,
+                    )
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                logger.warning(
+                    f"LLM API returned {response.status_code}, retrying (attempt {attempt + 1}/{max_retries})"
+                )
+
+            cls._retries += 1
+            outcome["retries"] += 1
+            await asyncio.sleep(backoff_delay(attempt, retry_after))
+
+        raise LlmRequestError("LLM request failed after retries")
+
+    @classmethod
+    def metrics(cls) -> Dict[str, Any]:
+        """返回排队、并发、重试和延迟指标，以及按模型和调用点的统计。"""
+        latencies = sorted(cls._latencies)
+
+        def percentile(p: float) -> float:
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 2)
+
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "max_concurrency": settings.LLM_MAX_CONCURRENCY,
+            "queued": cls._queued,
+            "in_flight": cls._in_flight,
+            "requests": cls._requests,
+            "succeeded": cls._succeeded,
+            "failed": cls._failed,
+            "retries": cls._retries,
+            "avg_wait_ms": round(cls._total_wait_seconds / cls._requests * 1000, 2) if cls._requests else 0.0,
+            "max_wait_ms": round(cls._max_wait_seconds * 1000, 2),
+            "latency_p50_ms": percentile(0.5),
+            "latency_p95_ms": percentile(0.95),
+            "cache": LlmResponseCache.stats(),
+            "calls": LlmMetrics.snapshot(),
+        }
@@ -0,0 +1,201 @@
+"""
+LLM 调用的延迟与 token 统计
+
+LlmClient 的每次调用（包括缓存命中和流式调用）都会记录到这里：
+- 按 (模型, 调用点) 聚合的进程级指标：调用数、错误数、重试数、token 数、
+  总延迟和首 token 延迟（TTFT）的平均值与分位数；
+- 通过 track_llm_usage() 开启的任务级汇总，任务结束后保存到 CrawlerTask.llm_usage。
+"""
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+# 计算分位数时保留的最近样本数
+SAMPLE_WINDOW = 512
+
+
+def _percentiles(samples: Deque[float]) -> Dict[str, float]:
+    if not samples:
+        return {"avg": 0.0, "p50": 0.0, "p95": 0.0}
+    ordered = sorted(samples)
+
+    def pick(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000, 2)
+
+    return {
+        "avg": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p50": pick(0.5),
+        "p95": pick(0.95),
+    }
+
+
+class LlmUsageSummary:
+    """单个任务内所有 LLM 调用的汇总。"""
+
+    def __init__(self):
+        self.calls = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latency_seconds = 0.0
+        self.by_call_site: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, call_site: str, latency: float, prompt_tokens: int, completion_tokens: int,
+            retries: int, error: bool, cached: bool):
+        self.calls += 1
+        self.cache_hits += int(cached)
+        self.errors += int(error)
+        self.retries += retries
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.latency_seconds += latency
+
+        site = self.by_call_site.setdefault(call_site, {
+            "calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0, "latency_ms": 0.0,
+        })
+        site["calls"] += 1
+        site["errors"] += int(error)
+        site["prompt_tokens"] += prompt_tokens
+        site["completion_tokens"] += completion_tokens
+        site["latency_ms"] = round(site["latency_ms"] + latency * 1000, 2)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "cache_hits": self.cache_hits,
+            "errors": self.errors,
+            "retries": self.retries,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            "latency_ms": round(self.latency_seconds * 1000, 2),
+            "by_call_site": self.by_call_site,
+        }
+
+
+def merge_usage(existing: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Dict[str, Any]:
+    """合并两次运行的汇总（例如审核模式暂停前后）。"""
+    if not existing:
+        return new
+    merged = {key: existing.get(key, 0) + value for key, value in new.items() if key != "by_call_site"}
+    merged["latency_ms"] = round(merged["latency_ms"], 2)
+    sites = {name: dict(values) for name, values in existing.get("by_call_site", {}).items()}
+    for name, values in new.get("by_call_site", {}).items():
+        site = sites.setdefault(name, {key: 0 for key in values})
+        for key, value in values.items():
+            site[key] = round(site.get(key, 0) + value, 2)
+    merged["by_call_site"] = sites
+    return merged
+
+
+_current_usage: ContextVar[Optional[LlmUsageSummary]] = ContextVar("llm_usage", default=None)
+
+
+@contextmanager
+def track_llm_usage() -> Iterator[LlmUsageSummary]:
+    """
+    在上下文内（包括其中创建的 asyncio 任务）汇总 LLM 调用。
+
+    用法:
+        with track_llm_usage() as usage:
+            await run_task()
+        task.llm_usage = json.dumps(usage.to_dict())
+    """
+    summary = LlmUsageSummary()
+    token = _current_usage.set(summary)
+    try:
+        yield summary
+    finally:
+        _current_usage.reset(token)
+
+
+class _CallStats:
+    def __init__(self):
+        self.calls = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies: Deque[float] = deque(maxlen=SAMPLE_WINDOW)
+        self.ttfts: Deque[float] = deque(maxlen=SAMPLE_WINDOW)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "cache_hits": self.cache_hits,
+            "errors": self.errors,
+            "retries": self.retries,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_ms": _percentiles(self.latencies),
+            "ttft_ms": _percentiles(self.ttfts),
+        }
+
+
+class LlmMetrics:
+    """按 (模型, 调用点) 聚合的进程级 LLM 指标。"""
+    _stats: Dict[Tuple[str, str], _CallStats] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def record(
+        cls,
+        model: Optional[str],
+        call_site: str,
+        latency: float,
+        ttft: Optional[float] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        retries: int = 0,
+        error: bool = False,
+        cached: bool = False,
+    ):
+        """
+        记录一次调用。
+
+        参数:
+            latency: 总耗时（秒）
+            ttft: 首 token 延迟（秒）；非流式调用为收到响应头的时间，缓存命中时为空
+            usage: 响应中的 usage 字段
+        """
+        usage = usage or {}
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        completion_tokens = usage.get("completion_tokens") or 0
+
+        with cls._lock:
+            stats = cls._stats.setdefault((model or "unknown", call_site), _CallStats())
+            stats.calls += 1
+            stats.cache_hits += int(cached)
+            stats.errors += int(error)
+            stats.retries += retries
+            if not cached:
+                # 缓存命中不消耗 token，也不计入延迟分布
+                stats.prompt_tokens += prompt_tokens
+                stats.completion_tokens += completion_tokens
+                stats.latencies.append(latency)
+                if ttft is not None:
+                    stats.ttfts.append(ttft)
+
+        summary = _current_usage.get()
+        if summary is not None:
+            summary.add(
+                call_site,
+                latency,
+                0 if cached else prompt_tokens,
+                0 if cached else completion_tokens,
+                retries,
+                error,
+                cached,
+            )
+
+    @classmethod
+    def snapshot(cls) -> list[Dict[str, Any]]:
+        with cls._lock:
+            return [
+                {"model": model, "call_site": call_site, **stats.snapshot()}
+                for (model, call_site), stats in sorted(cls._stats.items())
+            ]
@@ -9,9 +9,11 @@ BASE_DIR = Path(__file__).resolve().parent.parent.parent
 GENERATED_DATA_DIR = BASE_DIR / "generated_data"
 SQL_DIR = GENERATED_DATA_DIR / "sql"
 CSV_DIR = GENERATED_DATA_DIR / "csv"
+JSONL_DIR = GENERATED_DATA_DIR / "jsonl"
 INDUSTRIAL_DIR = GENERATED_DATA_DIR / "industrial"
 
 # 确保目录存在
 SQL_DIR.mkdir(parents=True, exist_ok=True)
 CSV_DIR.mkdir(parents=True, exist_ok=True)
+JSONL_DIR.mkdir(parents=True, exist_ok=True)
 INDUSTRIAL_DIR.mkdir(parents=True, exist_ok=True)
\ No newline at end of file
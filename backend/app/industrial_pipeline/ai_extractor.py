@@ -2,127 +2,408 @@
 AI Extractor Module for Deep Data Cleaning
 
 Uses DeepSeek (via Volcengine) to extract structured data from cleaned HTML.
+Calls go through the shared LlmClient (pooled connections, concurrency limit, retries).
+Large documents are split into token-budgeted chunks on structural boundaries,
+extracted concurrently and merged (map-reduce).
+extract_stream() consumes the completions as streams and emits each item as soon as it is complete.
 Falls back to None on failure, allowing caller to use light-cleaned HTML instead.
 """
-import os
+import asyncio
 import json
 import logging
-from typing import Optional, Dict, Any
-
-import httpx
+from typing import Optional, Dict, Any, AsyncIterator, List, Tuple
 
 from app.core.config import settings
+from app.core.llm_client import LlmClient, LlmRequestError
+from app.industrial_pipeline.content_reducer import ContentReducer, ReducedContent
+from app.industrial_pipeline.json_stream import IncrementalJsonArrayParser
 
 logger = logging.getLogger(__name__)
 
+SYSTEM_PROMPT = """你是一个数据提取专家。
+请忽略HTML中的所有标签结构，直接关注其中的文本内容数据。
+请将网页中看起来是完整数据块的内容（例如商品信息、文章段落、评论列表等）完整地提取出来，按顺序组成一个JSON数组。
+每个数据块应该是一个独立的JSON对象。
+
+要求：
+1. 彻底忽略HTML标签，只关注数据本身
+2. 提取出所有有意义的数据块
+3. 必须返回合法的JSON数组格式
+4. 不要包含任何解释性文字，只返回JSON
+"""
+
+# Lines repeated between neighbouring chunks when a cut is not at a heading
+CHUNK_OVERLAP_LINES = 2
+# Items at each side of a chunk edge that are checked for partial duplicates
+EDGE_ITEMS = 3
+
+
+def strip_code_fence(content: str) -> str:
+    """Remove the markdown code fence the model sometimes wraps JSON in."""
+    content = content.strip()
+    if content.startswith("```json"):
+        content = content[7:]
+    if content.startswith("```"):
+        content = content[3:]
+    if content.endswith("```"):
+        content = content[:-3]
+    return content.strip()
+
+
+def parse_json_array(content: str) -> Tuple[Any, bool]:
+    """
+    Parse the model output. A JSON array cut off by max_tokens is salvaged up to
+    the last complete element.
+
+    Returns:
+        (data, complete) - complete is False when the array had to be salvaged
+
+    Raises:
+        json.JSONDecodeError: content is not JSON and cannot be salvaged
+    """
+    content = strip_code_fence(content)
+    try:
+        return json.loads(content), True
+    except json.JSONDecodeError:
+        if not content.startswith("["):
+            raise
+        end = content.rfind("}")
+        while end > 0:
+            try:
+                return json.loads(content[:end + 1] + "]"), False
+            except json.JSONDecodeError:
+                end = content.rfind("}", 0, end)
+        raise
+
+
+def _canonical(item: Any) -> str:
+    return json.dumps(item, ensure_ascii=False, sort_keys=True)
+
+
+def _is_partial_of(item: Any, other: Any) -> bool:
+    """True when dict item is a subset of dict other (a block cut at a chunk edge)."""
+    if not isinstance(item, dict) or not isinstance(other, dict) or item == other:
+        return False
+    return all(key in other and other[key] == value for key, value in item.items())
+
+
+def merge_chunk_results(chunk_items: List[List[Any]]) -> List[Any]:
+    """
+    Concatenate per-chunk arrays in document order, dropping exact duplicates and
+    partial copies of blocks that straddle a chunk edge.
+    """
+    merged: List[Any] = []
+    seen = set()
+    for items in chunk_items:
+        edge_start = len(merged)
+        for index, item in enumerate(items):
+            key = _canonical(item)
+            if key in seen:
+                continue
+
+            if index < EDGE_ITEMS:
+                # Compare with the tail of the previous chunk
+                tail = merged[max(0, edge_start - EDGE_ITEMS):edge_start]
+                if any(_is_partial_of(item, previous) for previous in tail):
+                    continue
+                superseded = next((i for i, previous in enumerate(tail) if _is_partial_of(previous, item)), None)
+                if superseded is not None:
+                    position = max(0, edge_start - EDGE_ITEMS) + superseded
+                    seen.discard(_canonical(merged[position]))
+                    merged[position] = item
+                    seen.add(key)
+                    continue
+
+            merged.append(item)
+            seen.add(key)
+    return merged
+
+
+def _as_items(data: Any) -> List[Any]:
+    return data if isinstance(data, list) else [data]
+
+
+def _sum_usage(usages: List[Dict[str, Any]]) -> Dict[str, Any]:
+    total: Dict[str, Any] = {}
+    for usage in usages:
+        for key, value in (usage or {}).items():
+            if isinstance(value, (int, float)):
+                total[key] = total.get(key, 0) + value
+    return total
+
 
 class AiExtractor:
     """
     Extracts structured data from HTML using DeepSeek LLM.
     """
-    
+
     def __init__(self):
         self.api_key = settings.VOLC_API_KEY or ""
-        self.base_url = settings.VOLC_BASE_URL
         self.model_id = settings.VOLC_DEEPSEEK_MODEL_ID or ""
-        
+
         if not self.api_key or not self.model_id:
             logger.warning("DeepSeek API not configured. AI extraction will fail.")
-    
-    def extract(self, cleaned_html: str, max_tokens: int = 4096) -> Optional[Dict[str, Any]]:
+
+    async def extract(
+        self,
+        cleaned_html: str,
+        max_tokens: int = 4096,
+        token_budget: Optional[int] = None,
+        collapse_repeats: bool = False,
+        use_cache: bool = True,
+    ) -> Optional[Dict[str, Any]]:
         """
         Send cleaned HTML to DeepSeek and get structured JSON back.
-        
+
         Args:
             cleaned_html: Pre-cleaned HTML (from HtmlCleaner)
-            max_tokens: Max tokens for response
-            
+            max_tokens: Max tokens for each chunk's response
+            token_budget: Input token budget per chunk
+                (defaults to LLM_EXTRACT_CHUNK_TOKENS)
+            collapse_repeats: Collapse repeated item templates to a few exemplars.
+                Off by default because every data block should be extracted.
+            use_cache: Set to False to bypass the LLM response cache
+
         Returns:
             Extracted data as dict, or None if extraction failed
         """
         if not self.api_key or not self.model_id:
             logger.error("DeepSeek API not configured")
             return None
-        
-        # Construct prompt
-        # Construct prompt
-        system_prompt = """你是一个数据提取专家。
-请忽略HTML中的所有标签结构，直接关注其中的文本内容数据。
-请将网页中看起来是完整数据块的内容（例如商品信息、文章段落、评论列表等）完整地提取出来，按顺序组成一个JSON数组。
-每个数据块应该是一个独立的JSON对象。
 
-要求：
-1. 彻底忽略HTML标签，只关注数据本身
-2. 提取出所有有意义的数据块
-3. 必须返回合法的JSON数组格式
-4. 不要包含任何解释性文字，只返回JSON
-"""
-        
-        user_prompt = f"请把以下HTML内容中的数据提取为JSON数组：\n\n{cleaned_html}"
-        
+        reduced, chunks = await self._prepare_chunks(cleaned_html, token_budget, collapse_repeats)
+
+        # Map: every chunk is extracted concurrently (bounded by LlmClient's semaphore)
+        results = await asyncio.gather(
+            *(self._extract_chunk(chunk, max_tokens, use_cache) for chunk in chunks),
+            return_exceptions=True,
+        )
+
+        succeeded = [r for r in results if not isinstance(r, BaseException)]
+        failures = [r for r in results if isinstance(r, BaseException)]
+        for failure in failures:
+            if not isinstance(failure, (json.JSONDecodeError, LlmRequestError)):
+                logger.error(f"AI extraction failed: {failure}")
+
+        if not succeeded:
+            parse_error = next((f for f in failures if isinstance(f, json.JSONDecodeError)), None)
+            if parse_error is not None:
+                logger.error(f"Failed to parse AI response as JSON: {parse_error}")
+                return {
+                    "success": False,
+                    "error": "AI返回的不是有效的JSON格式",
+                    "raw_content": parse_error.doc,
+                    "reduction": reduced.stats()
+                }
+            logger.error(f"DeepSeek API error: {failures[0] if failures else 'no content'}")
+            return None
+
+        # Reduce: merge arrays in document order and drop blocks duplicated across chunk edges
+        if len(chunks) == 1:
+            extracted_data = succeeded[0][0]
+        else:
+            extracted_data = merge_chunk_results([_as_items(r[0]) for r in succeeded])
+
+        return {
+            "success": True,
+            "data": extracted_data,
+            "model": self.model_id,
+            "tokens_used": _sum_usage([r[1] for r in succeeded]),
+            "reduction": reduced.stats(),
+            "chunks": {
+                "total": len(chunks),
+                "failed": len(failures),
+                "salvaged": sum(1 for r in succeeded if not r[2]),
+            }
+        }
+
+    async def extract_stream(
+        self,
+        cleaned_html: str,
+        max_tokens: int = 4096,
+        token_budget: Optional[int] = None,
+        collapse_repeats: bool = False,
+        use_cache: bool = True,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of extract(): chunk completions are consumed as streams and
+        every array element is emitted as soon as its closing brace arrives.
+
+        Yields events:
+            {"type": "reduction", ...}                         - before the first LLM call
+            {"type": "item", "chunk": k, "index": n, "data": item}
+            {"type": "chunk_error", "chunk": k, "error": str}
+            {"type": "done", "success": bool, "data": [...], "chunks": {...}}
+
+        Items are de-duplicated exactly while streaming; "done" carries the merged
+        result in document order (the same merge as extract()).
+        """
+        if not self.api_key or not self.model_id:
+            logger.error("DeepSeek API not configured")
+            yield {"type": "done", "success": False, "error": "AI service unavailable"}
+            return
+
+        reduced, chunks = await self._prepare_chunks(cleaned_html, token_budget, collapse_repeats)
+        yield {"type": "reduction", **reduced.stats(), "chunk_count": len(chunks)}
+
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def run_chunk(index: int, text: str):
+            complete = False
+            try:
+                complete = await self._stream_chunk(index, text, max_tokens, use_cache, queue)
+            except (json.JSONDecodeError, LlmRequestError) as e:
+                await queue.put(("error", index, str(e)))
+            except Exception as e:
+                logger.error(f"AI extraction failed: {e}")
+                await queue.put(("error", index, str(e)))
+            finally:
+                await queue.put(("end", index, complete))
+
+        tasks = [asyncio.create_task(run_chunk(k, text)) for k, text in enumerate(chunks)]
+        chunk_items: List[List[Any]] = [[] for _ in chunks]
+        failed = set()
+        salvaged = 0
+        seen = set()
+        emitted = 0
         try:
-            response = httpx.post(
-                f"{self.base_url}/chat/completions",
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": self.model_id,
-                    "messages": [
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    "max_tokens": max_tokens,
-                    "temperature": 0.1  # Low temperature for more deterministic output
-                },
-                timeout=120.0  # 2 minute timeout for large documents
+            pending = len(chunks)
+            while pending:
+                kind, index, value = await queue.get()
+                if kind == "item":
+                    chunk_items[index].append(value)
+                    key = _canonical(value)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    yield {"type": "item", "chunk": index, "index": emitted, "data": value}
+                    emitted += 1
+                elif kind == "error":
+                    failed.add(index)
+                    yield {"type": "chunk_error", "chunk": index, "error": value}
+                else:
+                    pending -= 1
+                    if index not in failed and not value:
+                        salvaged += 1
+        finally:
+            # The client may disconnect mid-stream
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        # A chunk whose stream broke off still contributes the items it completed
+        succeeded = [items for k, items in enumerate(chunk_items) if k not in failed or items]
+        yield {
+            "type": "done",
+            "success": bool(succeeded),
+            "data": merge_chunk_results(succeeded),
+            "model": self.model_id,
+            "reduction": reduced.stats(),
+            "chunks": {"total": len(chunks), "failed": len(failed), "salvaged": salvaged},
+        }
+
+    async def _prepare_chunks(
+        self,
+        cleaned_html: str,
+        token_budget: Optional[int],
+        collapse_repeats: bool,
+    ) -> Tuple[ReducedContent, List[str]]:
+        chunk_tokens = token_budget or settings.LLM_EXTRACT_CHUNK_TOKENS
+
+        # HTML 解析是 CPU 密集型操作，放到线程池中执行以免阻塞事件循环
+        reduced = await asyncio.get_running_loop().run_in_executor(
+            None,
+            lambda: ContentReducer.reduce(
+                cleaned_html,
+                token_budget=chunk_tokens * settings.LLM_EXTRACT_MAX_CHUNKS,
+                collapse_repeats=collapse_repeats,
+                exemplars=settings.CONTENT_REDUCER_EXEMPLARS,
             )
-            
-            if response.status_code != 200:
-                logger.error(f"DeepSeek API error: {response.status_code} - {response.text}")
-                return None
-            
-            result = response.json()
-            
-            # Extract content from response
-            content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
-            
-            if not content:
-                logger.error("Empty response from DeepSeek")
-                return None
-            
-            # Try to parse as JSON
-            # Sometimes the model wraps JSON in markdown code blocks
-            content = content.strip()
-            if content.startswith("```json"):
-                content = content[7:]
-            if content.startswith("```"):
-                content = content[3:]
-            if content.endswith("```"):
-                content = content[:-3]
-            content = content.strip()
-            
-            extracted_data = json.loads(content)
-            
-            # Add metadata
-            return {
-                "success": True,
-                "data": extracted_data,
-                "model": self.model_id,
-                "tokens_used": result.get("usage", {})
-            }
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Failed to parse AI response as JSON: {e}")
-            return {
-                "success": False,
-                "error": "AI返回的不是有效的JSON格式",
-                "raw_content": content if 'content' in locals() else None
-            }
-        except httpx.TimeoutException:
-            logger.error("DeepSeek API timeout")
-            return None
-        except Exception as e:
-            logger.error(f"AI extraction failed: {e}")
-            return None
+        )
+        chunks = ContentReducer.split_chunks(reduced.text, chunk_tokens, CHUNK_OVERLAP_LINES)
+        logger.info(
+            f"Reduced page content {reduced.original_tokens} -> {reduced.reduced_tokens} tokens "
+            f"(saved {reduced.tokens_saved}, truncated={reduced.truncated}), {len(chunks)} chunk(s)"
+        )
+        return reduced, chunks
+
+    def _payload(self, text: str, max_tokens: int) -> Dict[str, Any]:
+        user_prompt = f"请把以下网页内容（已转换为精简Markdown）中的数据提取为JSON数组：\n\n{text}"
+        return {
+            "model": self.model_id,
+            "messages": [
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            "max_tokens": max_tokens,
+            "temperature": 0.1  # Low temperature for more deterministic output
+        }
+
+    async def _stream_chunk(
+        self,
+        index: int,
+        text: str,
+        max_tokens: int,
+        use_cache: bool,
+        queue: asyncio.Queue,
+    ) -> bool:
+        """
+        Stream one chunk, putting ("item", index, item) on the queue for every completed element.
+
+        Returns:
+            True when the array was closed, False when it was cut off
+
+        Raises:
+            LlmRequestError: API call failed
+            json.JSONDecodeError: the output is neither an array nor (salvageable) JSON
+        """
+        parser = IncrementalJsonArrayParser()
+        async for delta in LlmClient.stream_chat_completion(
+            self._payload(text, max_tokens),
+            api_key=self.api_key,
+            use_cache=use_cache,
+            call_site="ai_extractor",
+        ):
+            for item in parser.feed(delta):
+                await queue.put(("item", index, item))
+
+        if parser.started:
+            if not parser.complete:
+                logger.warning("AI response was truncated, streamed the complete items")
+            return parser.complete
+
+        # Not an array (e.g. a single object): parse the whole output
+        if not parser.text.strip():
+            raise LlmRequestError("Empty response from DeepSeek")
+        data, complete = parse_json_array(parser.text)
+        for item in _as_items(data):
+            await queue.put(("item", index, item))
+        return complete
+
+    async def _extract_chunk(self, text: str, max_tokens: int, use_cache: bool = True) -> Tuple[Any, Dict[str, Any], bool]:
+        """
+        Extract one chunk.
+
+        Returns:
+            (data, usage, complete)
+
+        Raises:
+            LlmRequestError: API call failed
+            json.JSONDecodeError: response is not (salvageable) JSON
+        """
+        result = await LlmClient.chat_completion(
+            self._payload(text, max_tokens),
+            api_key=self.api_key,
+            use_cache=use_cache,
+            call_site="ai_extractor",
+        )
+
+        # Extract content from response
+        content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+        if not content:
+            raise LlmRequestError("Empty response from DeepSeek")
+
+        data, complete = parse_json_array(content)
+        if not complete:
+            logger.warning("AI response was truncated, salvaged the complete items")
+        return data, result.get("usage", {}), complete
@@ -0,0 +1,192 @@
+"""
+批次级轻度清理任务
+
+遍历批次目录（包括 api_data 子目录）中的全部 HTML 捕获文件，
+通过 CleanerPool 在多个工作进程中并行清理，并记录每个文件的进度和汇总的缩减统计。
+清理结果比源文件新的文件会被跳过。
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.industrial_pipeline.clean_pool import CleanerPool, CleanerPoolBusyError
+
+logger = logging.getLogger(__name__)
+
+HTML_SUFFIXES = (".html", ".htm")
+CLEANED_SUFFIX = "_cleaned"
+BUSY_RETRY_SECONDS = 1.0  # 进程池繁忙时的重试间隔
+
+
+def cleaned_output_path(input_file: Path) -> Path:
+    """与单文件轻度清理接口一致的输出文件名：<stem>_cleaned<suffix>。"""
+    return input_file.with_name(f"{input_file.stem}{CLEANED_SUFFIX}{input_file.suffix}")
+
+
+def find_html_captures(batch_dir: Path) -> List[Path]:
+    """递归查找批次中的 HTML 捕获文件（排除已清理的输出）。"""
+    files = [
+        p for p in batch_dir.rglob("*")
+        if p.is_file()
+        and p.suffix.lower() in HTML_SUFFIXES
+        and not p.stem.endswith(CLEANED_SUFFIX)
+    ]
+    return sorted(files)
+
+
+def is_up_to_date(input_file: Path, output_file: Path) -> bool:
+    """清理结果存在且不早于源文件时视为最新。"""
+    if not output_file.exists():
+        return False
+    return output_file.stat().st_mtime >= input_file.stat().st_mtime
+
+
+def skipped_entry(input_file: Path, output_file: Path) -> Optional[Dict[str, int]]:
+    """清理结果已是最新时返回两个文件的大小，否则返回 None。"""
+    if not is_up_to_date(input_file, output_file):
+        return None
+    return {"original_size": input_file.stat().st_size, "cleaned_size": output_file.stat().st_size}
+
+
+class BatchCleanJob:
+    """单个批次清理任务的进度状态。"""
+
+    def __init__(self, batch_id: str, batch_dir: Path, force: bool = False):
+        self.job_id = str(uuid.uuid4())
+        self.batch_id = batch_id
+        self.batch_dir = batch_dir
+        self.force = force
+        self.status = "pending"  # pending, running, completed, failed
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self.error: Optional[str] = None
+        # 相对路径 -> 文件进度
+        self.files: Dict[str, Dict[str, Any]] = {}
+
+    async def run(self):
+        self.status = "running"
+        self.started_at = datetime.now()
+        try:
+            # 遍历目录和 stat 都是阻塞的文件系统调用，放到线程中执行
+            inputs = await asyncio.to_thread(find_html_captures, self.batch_dir)
+            for input_file in inputs:
+                self.files[self._rel(input_file)] = {"status": "pending"}
+
+            # 批次任务最多占用与工作进程数相同的执行槽，不挤占交互式请求的等待队列
+            limit = asyncio.Semaphore(max(1, CleanerPool.metrics()["workers"]))
+            await asyncio.gather(*(self._clean_one(f, limit) for f in inputs))
+            self.status = "completed"
+        except Exception as e:
+            logger.error(f"Batch clean job {self.job_id} failed: {e}")
+            self.status = "failed"
+            self.error = str(e)
+        finally:
+            self.finished_at = datetime.now()
+
+        summary = self.summary()
+        logger.info(
+            f"Batch clean {self.batch_id}: {summary['cleaned']} cleaned, "
+            f"{summary['skipped']} skipped, {summary['failed']} failed, "
+            f"{summary['reduction_percent']}% reduction"
+        )
+
+    async def _clean_one(self, input_file: Path, limit: asyncio.Semaphore):
+        entry = self.files[self._rel(input_file)]
+        output_file = cleaned_output_path(input_file)
+
+        skipped = None if self.force else await asyncio.to_thread(skipped_entry, input_file, output_file)
+        if skipped is not None:
+            entry.update({"status": "skipped", "output_file": self._rel(output_file), **skipped})
+            return
+
+        async with limit:
+            entry["status"] = "running"
+            while True:
+                try:
+                    stats = await CleanerPool.clean_file(input_file, output_file)
+                    break
+                except CleanerPoolBusyError:
+                    # 进程池繁忙时稍后重试，而不是让整个批次失败
+                    await asyncio.sleep(BUSY_RETRY_SECONDS)
+                except Exception as e:
+                    entry.update({"status": "failed", "error": str(e)})
+                    return
+
+        if stats.get("error"):
+            entry.update({"status": "failed", "error": stats["error"]})
+            return
+
+        entry.update({
+            "status": "cleaned",
+            "output_file": self._rel(output_file),
+            "original_size": stats["original_size"],
+            "cleaned_size": stats["cleaned_size"],
+            "reduction_percent": stats["reduction_percent"],
+        })
+
+    def _rel(self, path: Path) -> str:
+        return path.relative_to(self.batch_dir).as_posix()
+
+    def summary(self) -> Dict[str, Any]:
+        counts = {"pending": 0, "running": 0, "cleaned": 0, "skipped": 0, "failed": 0}
+        original_size = 0
+        cleaned_size = 0
+        for entry in self.files.values():
+            counts[entry["status"]] += 1
+            if entry["status"] in ("cleaned", "skipped"):
+                original_size += entry["original_size"]
+                cleaned_size += entry["cleaned_size"]
+
+        reduction = original_size - cleaned_size
+        return {
+            "total_files": len(self.files),
+            **counts,
+            "original_size": original_size,
+            "cleaned_size": cleaned_size,
+            "reduction_bytes": reduction,
+            "reduction_percent": round(reduction / original_size * 100, 2) if original_size else 0.0,
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "batch_id": self.batch_id,
+            "status": self.status,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "error": self.error,
+            "summary": self.summary(),
+            "files": [{"file": name, **entry} for name, entry in self.files.items()],
+        }
+
+
+class BatchCleanRegistry:
+    """进程内的批次清理任务登记表（每个批次保留最近一次任务）。"""
+    _jobs: Dict[str, BatchCleanJob] = {}
+
+    @classmethod
+    def get(cls, batch_id: str) -> Optional[BatchCleanJob]:
+        return cls._jobs.get(batch_id)
+
+    @classmethod
+    def create(cls, batch_id: str, batch_dir: Path, force: bool = False) -> BatchCleanJob:
+        """
+        为批次创建新的清理任务。
+
+        异常:
+            RuntimeError: 该批次已有正在运行的清理任务
+        """
+        existing = cls._jobs.get(batch_id)
+        if existing and existing.status in ("pending", "running"):
+            raise RuntimeError("A clean job is already running for this batch")
+
+        job = BatchCleanJob(batch_id, batch_dir, force=force)
+        cls._jobs[batch_id] = job
+        return job
+
+    @classmethod
+    def remove(cls, batch_id: str):
+        cls._jobs.pop(batch_id, None)
@@ -0,0 +1,91 @@
+"""
+HtmlCleaner 结果缓存
+
+用户会在界面上反复清理同一批文件，深度清理每次也会重新执行轻度清理。
+这里按 (输入内容哈希, 清理器版本, 清理选项) 缓存清理结果，
+未变化的内容直接从磁盘 LRU 缓存复制结果，无需再次解析。
+"""
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.core.disk_cache import DiskLruCache
+from app.industrial_pipeline.html_cleaner import HtmlCleaner
+
+logger = logging.getLogger(__name__)
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class CleanCache:
+    """清理结果缓存的单例封装。"""
+    _cache: Optional[DiskLruCache] = None
+    _init_lock = threading.Lock()
+
+    @classmethod
+    def _get_cache(cls) -> Optional[DiskLruCache]:
+        if cls._cache is None and settings.HTML_CLEANER_CACHE_MAX_BYTES > 0:
+            with cls._init_lock:
+                if cls._cache is None:
+                    directory = settings.HTML_CLEANER_CACHE_DIR or Path(settings.STORAGE_ROOT_DIR) / "cache" / "clean"
+                    cls._cache = DiskLruCache(Path(directory), settings.HTML_CLEANER_CACHE_MAX_BYTES)
+        return cls._cache
+
+    @staticmethod
+    def cache_key(input_path: Path) -> str:
+        """
+        计算缓存键：清理器版本 + 实际使用的清理模式 + 文件内容的 SHA-256。
+        """
+        threshold = settings.HTML_CLEANER_STREAMING_THRESHOLD
+        if threshold and input_path.stat().st_size > threshold:
+            mode = "streaming"
+        else:
+            mode = settings.HTML_CLEANER_ENGINE
+
+        digest = hashlib.sha256(f"v{HtmlCleaner.VERSION}:{mode}:".encode())
+        with open(input_path, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @classmethod
+    def lookup(cls, input_path: Path, output_path: Path) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        查找缓存的清理结果，命中时写入 output_path。
+
+        返回:
+            (缓存键, 统计信息)；缓存禁用时键为 None，未命中时统计信息为 None
+        """
+        cache = cls._get_cache()
+        if cache is None:
+            return None, None
+
+        try:
+            key = cls.cache_key(input_path)
+        except OSError as e:
+            logger.warning(f"Failed to hash {input_path} for clean cache: {e}")
+            return None, None
+
+        stats = cache.get_file(key, output_path)
+        if stats is None:
+            return key, None
+        return key, {**stats, "output_path": str(output_path), "cached": True}
+
+    @classmethod
+    def store(cls, key: Optional[str], output_path: Path, stats: Dict[str, Any]):
+        """保存成功的清理结果；清理失败（回退为原文复制）的结果不缓存。"""
+        cache = cls._get_cache()
+        if cache is None or key is None or stats.get("error"):
+            return
+        meta = {k: v for k, v in stats.items() if k != "output_path"}
+        cache.put_file(key, output_path, meta)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        cache = cls._get_cache()
+        if cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **cache.stats()}
@@ -0,0 +1,162 @@
+"""
+HtmlCleaner 的进程池执行器
+
+BeautifulSoup 解析是 CPU 密集型操作，直接在 async 路由里调用会阻塞事件循环，
+拖慢同进程内的所有请求、WebSocket 和 SSE 流。
+这里把清理任务提交到一个有界进程池，并提供准入控制（队列满时拒绝）和排队指标。
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.industrial_pipeline.clean_cache import CleanCache
+from app.industrial_pipeline.html_cleaner import HtmlCleaner
+
+logger = logging.getLogger(__name__)
+
+
+class CleanerPoolBusyError(RuntimeError):
+    """等待队列已满，新的清理任务被拒绝。"""
+
+
+class CleanerPool:
+    """共享 HTML 清理进程池的单例管理器。"""
+    _executor: Optional[ProcessPoolExecutor] = None
+    _slots: Optional[asyncio.Semaphore] = None
+    _max_workers: int = 0
+    _max_pending: int = 0
+
+    # 指标
+    _admitted: int = 0  # 已接纳（排队中 + 执行中）
+    _running: int = 0
+    _completed: int = 0
+    _failed: int = 0
+    _rejected: int = 0
+    _total_wait_seconds: float = 0.0
+    _total_run_seconds: float = 0.0
+    _max_wait_seconds: float = 0.0
+
+    @classmethod
+    def start(cls):
+        if cls._executor:
+            return
+
+        cls._max_workers = settings.HTML_CLEANER_WORKERS or os.cpu_count() or 1
+        cls._max_pending = settings.HTML_CLEANER_MAX_PENDING
+        # 使用 spawn：父进程中已有事件循环和浏览器线程，fork 不安全
+        cls._executor = ProcessPoolExecutor(
+            max_workers=cls._max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        # 同一时刻只向进程池提交 max_workers 个任务，其余在这里排队，便于统计等待时间
+        cls._slots = asyncio.Semaphore(cls._max_workers)
+        logger.info(f"Cleaner Pool Started ({cls._max_workers} workers, {cls._max_pending} pending slots)")
+
+    @classmethod
+    def stop(cls):
+        if cls._executor:
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
+            cls._slots = None
+            logger.info("Cleaner Pool Stopped")
+
+    @classmethod
+    async def clean_file(cls, input_path: Path, output_path: Path) -> Dict[str, Any]:
+        """
+        在进程池中执行 HtmlCleaner.clean_file。
+        内容未变化的文件直接返回缓存的结果（统计信息中 "cached" 为 True），不占用进程池。
+
+        参数:
+            input_path: 源 HTML 文件
+            output_path: 清理后 HTML 的目标路径
+
+        返回:
+            与 HtmlCleaner.clean_file 相同的统计信息字典
+
+        异常:
+            CleanerPoolBusyError: 执行槽和等待队列均已占满
+        """
+        if not cls._executor:
+            cls.start()
+
+        loop = asyncio.get_running_loop()
+        # 哈希和复制涉及文件 IO，放到线程池中执行
+        cache_key, cached = await loop.run_in_executor(None, CleanCache.lookup, input_path, output_path)
+        if cached is not None:
+            return cached
+
+        if cls._admitted >= cls._max_workers + cls._max_pending:
+            cls._rejected += 1
+            raise CleanerPoolBusyError(
+                f"Cleaner pool is busy ({cls._admitted} tasks admitted)"
+            )
+
+        cls._admitted += 1
+        enqueued_at = time.perf_counter()
+        try:
+            async with cls._slots:
+                started_at = time.perf_counter()
+                wait_seconds = started_at - enqueued_at
+                cls._total_wait_seconds += wait_seconds
+                cls._max_wait_seconds = max(cls._max_wait_seconds, wait_seconds)
+                cls._running += 1
+                # 记下提交到的进程池：同一次崩溃会让多个任务收到 BrokenProcessPool，只重建一次
+                executor = cls._executor
+                try:
+                    stats = await loop.run_in_executor(
+                        executor, HtmlCleaner.clean_file, input_path, output_path
+                    )
+                except BrokenProcessPool:
+                    # 工作进程崩溃（例如 OOM），重建进程池以免后续任务全部失败
+                    cls._restart_executor(executor)
+                    raise
+                finally:
+                    cls._running -= 1
+                    cls._total_run_seconds += time.perf_counter() - started_at
+
+            cls._completed += 1
+            await loop.run_in_executor(None, CleanCache.store, cache_key, output_path, stats)
+            return stats
+        except BaseException:
+            # 包括 CancelledError（请求被取消）
+            cls._failed += 1
+            raise
+        finally:
+            cls._admitted -= 1
+
+    @classmethod
+    def _restart_executor(cls, broken: Optional[ProcessPoolExecutor]):
+        """替换已损坏的进程池；broken 已被其他任务替换时不做任何事。"""
+        if broken is None or cls._executor is not broken:
+            return
+        logger.error("Cleaner pool broken, restarting executor")
+        # 损坏的进程池已让其上所有未完成的任务以 BrokenProcessPool 失败，不需要再取消
+        broken.shutdown(wait=False)
+        cls._executor = ProcessPoolExecutor(
+            max_workers=cls._max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    @classmethod
+    def metrics(cls) -> Dict[str, Any]:
+        """返回进程池的当前排队与耗时指标。"""
+        finished = cls._completed + cls._failed
+        return {
+            "workers": cls._max_workers,
+            "max_pending": cls._max_pending,
+            "running": cls._running,
+            "queued": cls._admitted - cls._running,
+            "completed": cls._completed,
+            "failed": cls._failed,
+            "rejected": cls._rejected,
+            "avg_wait_ms": round(cls._total_wait_seconds / finished * 1000, 2) if finished else 0.0,
+            "max_wait_ms": round(cls._max_wait_seconds * 1000, 2),
+            "avg_run_ms": round(cls._total_run_seconds / finished * 1000, 2) if finished else 0.0,
+        }
@@ -16,6 +16,7 @@ from sqlalchemy.orm import Session
 from app.core.db import engine
 from app.core.config import settings
 from app.models.crawl_index import CrawlIndex
+from app.industrial_pipeline.progress import ProgressBroker
 
 logger = logging.getLogger(__name__)
 
@@ -65,13 +66,22 @@ class IndustrialCollector:
     工业收割采集器（隐身 + 并发版）
     """
 
-    def __init__(self):
+    def __init__(self, batch_id: Optional[str] = None):
+        self.batch_id = batch_id  # 设置后向 ProgressBroker 发布实时进度
         self.collected_count = 0
         self.html_saved = False  # Track if main HTML is already saved
         self.context_requests = 0  # For memory monitoring
         self.context_recycle_threshold = 200  # Recycle after 200 requests (or 512MB)
         self.storage_root = Path(settings.STORAGE_ROOT_DIR)
         
+    def _emit(self, event_type: str, **data: Any):
+        """向订阅者发布进度事件（仅内存操作，不写数据库）。"""
+        if self.batch_id:
+            ProgressBroker.publish(self.batch_id, event_type, **data)
+
+    def _emit_items(self):
+        self._emit("items", item_count=self.collected_count)
+
     def _gaussian_delay(self, mean: float = 1.5, std: float = 0.5) -> float:
         """生成符合高斯分布的延迟（秒）。"""
         delay = random.gauss(mean, std)
@@ -134,11 +144,14 @@ class IndustrialCollector:
                 local_path = local_dir / f"{url_seg}_{content_md5[:8]}{ext}"
                 local_path.write_bytes(content)
                 logger.debug(f"Saved local copy: {local_path.name}")
+                self._emit("file", file_name=local_path.name)
 
             # 2. 处理全局数据湖存储
             with Session(engine) as db:
+                # 手动爬虫的重抓记录只有元数据（file_path 为空），不参与数据湖去重
                 existing = db.query(CrawlIndex).filter(
-                    CrawlIndex.content_md5 == content_md5
+                    CrawlIndex.content_md5 == content_md5,
+                    CrawlIndex.file_path.is_not(None),
                 ).first()
                 
                 if existing:
@@ -152,15 +165,14 @@ class IndustrialCollector:
                 # Write to global pool
                 file_path.write_bytes(content)
                 
-                # Create DB index
-                index_entry = CrawlIndex(
-                    url_hash=url_hash,
-                    original_url=url[:2048],
-                    file_path=str(file_path.relative_to(self.storage_root)),
-                    content_md5=content_md5,
-                    content_type=content_type,
-                    size_bytes=len(content)
-                )
+                # Create DB index（同一 URL 可能已有手动爬虫的记录，合并到同一行）
+                index_entry = db.get(CrawlIndex, url_hash) or CrawlIndex(url_hash=url_hash)
+                index_entry.original_url = url[:2048]
+                index_entry.file_path = str(file_path.relative_to(self.storage_root))
+                index_entry.content_md5 = content_md5
+                index_entry.content_type = content_type
+                index_entry.size_bytes = len(content)
+                index_entry.updated_at = datetime.utcnow()
                 db.add(index_entry)
                 db.commit()
                 
@@ -189,6 +201,7 @@ class IndustrialCollector:
             for keyword in block_keywords:
                 if keyword in content_lower:
                     logger.warning(f"Detected blocking: '{keyword}'")
+                    self._emit("blocked", reason=keyword, url=page.url)
                     return True
             
             return False
@@ -251,11 +264,10 @@ class IndustrialCollector:
         logger.debug(f"[Filter] No match for quality criteria: {url[:80]}")
         return False
 
-    async def harvest(self, url: str, output_dir: Path, config: Dict[str, Any], progress_callback: Optional[Any] = None) -> int:
+    async def harvest(self, url: str, output_dir: Path, config: Dict[str, Any]) -> int:
         """
         使用隐身策略和并发支持执行收割任务。
         配置包括：scroll_count, max_items, wait_until 等。
-        progress_callback: 用于调用 (current_count) 的异步函数
         """
         output_dir.mkdir(parents=True, exist_ok=True)
         self.collected_count = 0
@@ -299,10 +311,11 @@ class IndustrialCollector:
                 
                 # Setup response handler
                 page.on("response", lambda response: asyncio.create_task(
-                    self._handle_response(response, output_dir, max_items, progress_callback)
+                    self._handle_response(response, output_dir, max_items)
                 ))
                 
                 logger.info(f"Navigating to {url} [Config: {config}]")
+                self._emit("phase", phase="navigating")
                 await page.goto(url, wait_until=wait_until, timeout=60000) # type: ignore
                 
                 # 加载后立即检查验证码/阻止
@@ -333,7 +346,7 @@ class IndustrialCollector:
                         page = await context.new_page()
                         await Stealth().apply_stealth_async(page)
                         page.on("response", lambda response: asyncio.create_task(
-                            self._handle_response(response, output_dir, max_items, progress_callback)
+                            self._handle_response(response, output_dir, max_items)
                         ))
                         await page.goto(url, wait_until=wait_until, timeout=60000) # type: ignore
                         self.context_requests = 0
@@ -345,6 +358,7 @@ class IndustrialCollector:
                              break
                         
                     logger.info(f"智能滚动 {i+1}/{scroll_count}")
+                    self._emit("phase", phase="scrolling", step=i + 1, total=scroll_count)
                     await self._bezier_scroll(page)
                     
                     # 如果检测到“加载更多”按钮，则自动点击
@@ -359,16 +373,17 @@ class IndustrialCollector:
                 await self._wait_for_network_idle(page, timeout=3000)
 
                 # --- 提取阶段（在活动页面上下文中） ---
+                self._emit("phase", phase="extracting")
                 
                 # 提取 SSR 数据
                 try:
-                    await self._extract_ssr_data(page, output_dir, progress_callback)
+                    await self._extract_ssr_data(page, output_dir)
                 except Exception as e:
                     logger.warning(f"SSR extraction failed: {e}")
                 
                 # 从 script 标签提取 JSON
                 try:
-                    await self._extract_script_json(page, output_dir, progress_callback)
+                    await self._extract_script_json(page, output_dir)
                 except Exception as e:
                     logger.warning(f"Script JSON extraction failed: {e}")
 
@@ -417,7 +432,7 @@ class IndustrialCollector:
         
         return self.collected_count
         
-    async def _extract_ssr_data(self, page: Page, output_dir: Path, progress_callback: Optional[Any] = None):
+    async def _extract_ssr_data(self, page: Page, output_dir: Path):
         """提取 SSR 数据并直接保存到任务根目录。"""
         # Common SSR patterns
         patterns = [
@@ -437,16 +452,12 @@ class IndustrialCollector:
                     filename = f"ssr_{pattern_name}_{self.collected_count:04d}.json"
                     (output_dir / filename).write_text(result)
                     logger.info(f"Extracted SSR data: {pattern}")
-                    
-                    if self.collected_count % 5 == 0 and progress_callback:
-                        try:
-                                await progress_callback(self.collected_count)
-                        except Exception:
-                            pass
+                    self._emit("file", file_name=filename)
+                    self._emit_items()
             except Exception as e:
                 logger.debug(f"Pattern {pattern} not found or failed: {e}")
 
-    async def _extract_script_json(self, page: Page, output_dir: Path, progress_callback: Optional[Any] = None):
+    async def _extract_script_json(self, page: Page, output_dir: Path):
         """从 <script> 标签提取 JSON 数据并直接保存到任务根目录。"""
         scripts = await page.evaluate("""
             Array.from(document.querySelectorAll('script[type="application/json"], script:not([src])'))
@@ -466,10 +477,8 @@ class IndustrialCollector:
                         filename = f"script_json_{i}_{self.collected_count:04d}.json"
                         (output_dir / filename).write_text(json.dumps(json_data, indent=2, ensure_ascii=False))
                         logger.info(f"Extracted script JSON: {filename}")
-
-                        if self.collected_count % 5 == 0 and progress_callback:
-                            try: await progress_callback(self.collected_count)
-                            except Exception: pass
+                        self._emit("file", file_name=filename)
+                        self._emit_items()
             except Exception: continue
 
     async def _capture_evidence(self, page: Page, output_dir: Path):
@@ -481,6 +490,7 @@ class IndustrialCollector:
             screenshot_path = output_dir / f"evidence_{timestamp}.png"
             await page.screenshot(path=str(screenshot_path), full_page=False)
             logger.info(f"Captured evidence screenshot: {screenshot_path.name}")
+            self._emit("file", file_name=screenshot_path.name)
             
             # HTML Snapshot (lightweight)
             # html_path = output_dir / f"evidence_{timestamp}.html"
@@ -658,7 +668,7 @@ class IndustrialCollector:
         except Exception:
             pass # Ignore scroll errors to ensure task continues
 
-    async def _handle_response(self, response: Response, output_dir: Path, max_items: int, progress_callback: Optional[Any] = None):
+    async def _handle_response(self, response: Response, output_dir: Path, max_items: int):
         """使用启发式 JSON 检测处理单个网络响应。"""
         try:
             if self.collected_count >= max_items:
@@ -702,10 +712,7 @@ class IndustrialCollector:
                                 content_bytes = json.dumps(json_data, indent=2, ensure_ascii=False).encode('utf-8')
                                 self._save_to_hybrid_storage(response.url, content_bytes, "application/json", local_dir=output_dir)
                                 logger.info(f"Heuristic JSON captured: {response.url}")
-                                
-                                # Non-blocking callback (fire and forget)
-                                if self.collected_count % 5 == 0 and progress_callback:
-                                    asyncio.create_task(self._safe_callback(progress_callback, self.collected_count))
+                                self._emit_items()
                                 return
                             except json.JSONDecodeError:
                                 pass  # Not valid JSON, continue to normal handling
@@ -725,9 +732,7 @@ class IndustrialCollector:
                                 self.html_saved = True
                                 self.collected_count += 1 # Count the HTML page itself as a data point
                                 logger.info("Saved main HTML page (hybrid storage)")
-                                
-                                if progress_callback:
-                                    asyncio.create_task(self._safe_callback(progress_callback, self.collected_count))
+                                self._emit_items()
                     except Exception:
                         pass
                 return
@@ -739,13 +744,6 @@ class IndustrialCollector:
         except Exception as e:
             logger.warning(f"Failed to process response {response.url}: {e}")
     
-    async def _safe_callback(self, callback, count: int):
-        """安全执行回调而不阻塞网络。"""
-        try:
-            await callback(count)
-        except Exception as e:
-            logger.error(f"Progress callback failed: {e}")
-
     def _save_metadata(self, url: str, output_dir: Path, config: Dict[str, Any]):
         metadata = {
             "url": url,
@@ -0,0 +1,347 @@
+"""
+LLM 输入缩减阶段
+
+位于 HtmlCleaner 与 LLM 之间，把清理后的 HTML 压缩成在 token 预算内的精简 Markdown：
+1. 去掉导航、页脚、侧栏等模板区域，按文本密度定位主内容节点；
+2. 折叠重复的兄弟模板（例如商品卡片），只保留 N 个样例并注明省略数量；
+3. 转换为紧凑的 Markdown 文本；
+4. 仍超出预算时按行截断。
+
+每个文档都会返回缩减前后的 token 估算，便于统计节省量。
+"""
+import logging
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from bs4 import BeautifulSoup, Comment, NavigableString, Tag
+
+from app.industrial_pipeline.html_cleaner import HtmlCleaner
+
+logger = logging.getLogger(__name__)
+
+# 定位主内容时直接移除的模板区域
+BOILERPLATE_TAGS = ['nav', 'footer', 'aside']
+
+# 子节点占父节点加权文本的比例达到该值时继续向下收缩主内容范围
+MAIN_CONTENT_SHARE = 0.75
+# 链接文本的权重（导航类区域大部分是链接）
+LINK_TEXT_WEIGHT = 0.3
+
+# 没有子标签也按模板折叠的列表型标签
+REPEATABLE_TAGS = {'li', 'tr', 'option', 'dd'}
+DEFAULT_EXEMPLARS = 3
+
+BLOCK_TAGS = {
+    'p', 'div', 'section', 'article', 'main', 'header', 'ul', 'ol', 'table', 'thead',
+    'tbody', 'tfoot', 'dl', 'dt', 'dd', 'blockquote', 'pre', 'form', 'figure',
+    'figcaption', 'address', 'fieldset', 'details', 'summary', 'body', 'html',
+}
+HEADING_TAGS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+SKIP_TAGS = {'head', 'title', 'meta', 'link', 'template'}
+
+CJK_RE = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]')
+SPACE_RE = re.compile(r'[ \t\r\f\v\xa0]+')
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算 token 数：中日韩字符约 1 token/字，其余约 4 字符/token。
+    只用于预算控制和节省量统计，不追求与具体分词器一致。
+    """
+    if not text:
+        return 0
+    cjk = len(CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+@dataclass
+class ReducedContent:
+    """单个文档的缩减结果。"""
+    text: str
+    original_tokens: int
+    reduced_tokens: int
+    collapsed_groups: int = 0
+    omitted_items: int = 0
+    truncated: bool = False
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.original_tokens - self.reduced_tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        saved_percent = (self.tokens_saved / self.original_tokens * 100) if self.original_tokens else 0
+        return {
+            "original_tokens": self.original_tokens,
+            "reduced_tokens": self.reduced_tokens,
+            "tokens_saved": self.tokens_saved,
+            "saved_percent": round(saved_percent, 2),
+            "collapsed_groups": self.collapsed_groups,
+            "omitted_items": self.omitted_items,
+            "truncated": self.truncated,
+        }
+
+
+class ContentReducer:
+    """把 HTML 缩减为预算内的精简 Markdown。"""
+
+    @staticmethod
+    def reduce(
+        html: str,
+        token_budget: Optional[int] = None,
+        collapse_repeats: bool = True,
+        exemplars: int = DEFAULT_EXEMPLARS,
+    ) -> ReducedContent:
+        """
+        缩减 HTML 文档。
+
+        参数:
+            html: 原始或轻度清理后的 HTML
+            token_budget: 输出的 token 上限，为空时不截断
+            collapse_repeats: 是否折叠重复的兄弟模板（逐条提取全部数据时应关闭）
+            exemplars: 折叠时每组保留的样例数
+
+        返回:
+            ReducedContent
+        """
+        original_tokens = estimate_tokens(html)
+
+        soup = BeautifulSoup(html, 'html.parser')
+        for tag_name in HtmlCleaner.JUNK_TAGS + BOILERPLATE_TAGS:
+            for tag in soup.find_all(tag_name):
+                tag.decompose()
+        for comment in soup.find_all(string=lambda text: isinstance(text, Comment)):
+            comment.extract()
+
+        main = ContentReducer.find_main_content(soup)
+
+        collapsed_groups = omitted_items = 0
+        if collapse_repeats:
+            collapsed_groups, omitted_items = ContentReducer.collapse_repeated_siblings(soup, main, exemplars)
+
+        text = ContentReducer.to_markdown(main)
+        truncated = False
+        if token_budget and estimate_tokens(text) > token_budget:
+            text = ContentReducer._truncate(text, token_budget)
+            truncated = True
+
+        return ReducedContent(
+            text=text,
+            original_tokens=original_tokens,
+            reduced_tokens=estimate_tokens(text),
+            collapsed_groups=collapsed_groups,
+            omitted_items=omitted_items,
+            truncated=truncated,
+        )
+
+    @staticmethod
+    def find_main_content(soup: BeautifulSoup) -> Tag:
+        """
+        基于文本密度定位主内容：从 body 开始，只要某个子节点占有当前节点绝大部分
+        加权文本（链接文本降权），就收缩到该子节点。
+        """
+        weights: Dict[int, float] = {}
+
+        def weight(node: Tag) -> float:
+            key = id(node)
+            if key not in weights:
+                total = 0.0
+                for child in node.children:
+                    if isinstance(child, Tag):
+                        child_weight = weight(child)
+                        total += child_weight * LINK_TEXT_WEIGHT if child.name == 'a' else child_weight
+                    elif isinstance(child, NavigableString):
+                        total += len(WHITESPACE_RE.sub('', str(child)))
+                weights[key] = total
+            return weights[key]
+
+        node = soup.body or soup
+        while True:
+            total = weight(node)
+            children = [c for c in node.children if isinstance(c, Tag)]
+            if not total or not children:
+                break
+            best = max(children, key=weight)
+            if weight(best) < total * MAIN_CONTENT_SHARE:
+                break
+            node = best
+        return node
+
+    @staticmethod
+    def collapse_repeated_siblings(soup: BeautifulSoup, root: Tag, exemplars: int = DEFAULT_EXEMPLARS) -> tuple[int, int]:
+        """
+        折叠结构相同的连续兄弟节点，每组保留 exemplars 个样例，其余替换为一条省略说明。
+
+        返回:
+            (折叠的组数, 省略的节点数)
+        """
+        exemplars = max(1, exemplars)
+        groups = omitted = 0
+
+        for parent in [root] + root.find_all(True):
+            if parent.decomposed:
+                continue
+            run: List[Tag] = []
+            run_signature = None
+            for child in list(parent.children) + [None]:
+                if isinstance(child, NavigableString) and not child.strip():
+                    continue
+                signature = ContentReducer._signature(child) if isinstance(child, Tag) else None
+                if signature is not None and signature == run_signature:
+                    run.append(child)
+                    continue
+                if len(run) >= exemplars + 2:
+                    groups += 1
+                    omitted += ContentReducer._collapse_run(soup, run, exemplars)
+                run = [child] if signature is not None else []
+                run_signature = signature
+        return groups, omitted
+
+    @staticmethod
+    def _signature(tag: Tag) -> Optional[tuple]:
+        """模板签名：标签名 + 直接子标签名序列；纯文本的普通块不视为模板。"""
+        child_names = tuple(c.name for c in tag.children if isinstance(c, Tag))
+        if not child_names and tag.name not in REPEATABLE_TAGS:
+            return None
+        return (tag.name, child_names)
+
+    @staticmethod
+    def _collapse_run(soup: BeautifulSoup, run: List[Tag], exemplars: int) -> int:
+        extra = run[exemplars:]
+        marker = soup.new_tag(run[0].name if run[0].name in REPEATABLE_TAGS else 'p')
+        marker.string = f"[... {len(extra)} more similar <{run[0].name}> items omitted]"
+        run[exemplars - 1].insert_after(marker)
+        for tag in extra:
+            tag.decompose()
+        return len(extra)
+
+    @staticmethod
+    def to_markdown(root: Tag) -> str:
+        """转换为紧凑的 Markdown：保留标题、列表、表格行、链接和图片地址。"""
+        parts: List[str] = []
+        ContentReducer._render(root, parts)
+        lines = []
+        for line in ''.join(parts).split('\n'):
+            line = SPACE_RE.sub(' ', line).strip()
+            if line and line not in ('-', '|'):
+                lines.append(line)
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _render(node: Tag, parts: List[str]):
+        for child in node.children:
+            if isinstance(child, NavigableString):
+                if not isinstance(child, Comment):
+                    parts.append(WHITESPACE_RE.sub(' ', str(child)))
+                continue
+            if not isinstance(child, Tag) or child.name in SKIP_TAGS:
+                continue
+
+            name = child.name
+            if name == 'br':
+                parts.append('\n')
+            elif name in HEADING_TAGS:
+                parts.append(f"\n{'#' * HEADING_TAGS[name]} {ContentReducer._render_inline(child)}\n")
+            elif name == 'li':
+                parts.append('\n- ')
+                ContentReducer._render(child, parts)
+                parts.append('\n')
+            elif name == 'tr':
+                cells = [ContentReducer._render_inline(c) for c in child.find_all(['td', 'th'], recursive=False)]
+                parts.append(f"\n| {' | '.join(cells)} |\n")
+            elif name == 'a':
+                text = ContentReducer._inline_text(child)
+                href = (child.get('href') or '').strip()
+                if text and href and not href.startswith(('#', 'javascript:')):
+                    parts.append(f" [{text}]({href}) ")
+                elif text:
+                    parts.append(f" {text} ")
+            elif name == 'img':
+                src = (child.get('src') or '').strip()
+                alt = (child.get('alt') or '').strip()
+                if src.startswith('data:'):
+                    src = ''
+                if src or alt:
+                    parts.append(f" ![{alt}]({src}) ")
+            elif name in BLOCK_TAGS:
+                parts.append('\n')
+                ContentReducer._render(child, parts)
+                parts.append('\n')
+            else:
+                ContentReducer._render(child, parts)
+
+    @staticmethod
+    def _render_inline(node: Tag) -> str:
+        """渲染为单行（保留其中的链接和图片）。"""
+        parts: List[str] = []
+        ContentReducer._render(node, parts)
+        return WHITESPACE_RE.sub(' ', ''.join(parts)).strip()
+
+    @staticmethod
+    def _inline_text(node: Tag) -> str:
+        return WHITESPACE_RE.sub(' ', node.get_text(' ')).strip()
+
+    @staticmethod
+    def split_chunks(text: str, chunk_tokens: int, overlap_lines: int = 2) -> List[str]:
+        """
+        按结构边界把精简 Markdown 切分为不超过 chunk_tokens 的分块。
+
+        优先在标题行（通常是一条数据的开头）之前切分，其次是列表项/表格行，
+        都不满足时按行切分；非标题处切分时，下一块重复上一块末尾 overlap_lines 行，
+        使跨越边界的数据块至少在一个分块中是完整的（合并时再去重）。
+        """
+        lines = text.split('\n')
+        chunks: List[str] = []
+        start = 0
+        while start < len(lines):
+            used = 0
+            end = start
+            # 各级边界在当前分块中最后出现的位置：2 = 标题，1 = 列表项/表格行
+            boundaries: Dict[int, int] = {}
+            while end < len(lines):
+                cost = estimate_tokens(lines[end]) + 1
+                if used + cost > chunk_tokens and end > start:
+                    break
+                rank = ContentReducer._boundary_rank(lines[end])
+                if end > start and rank:
+                    boundaries[rank] = end
+                used += cost
+                end += 1
+
+            cut_rank = 0
+            if end < len(lines):
+                for rank in (2, 1):
+                    position = boundaries.get(rank)
+                    if position is not None and position - start >= (end - start) // 2:
+                        end, cut_rank = position, rank
+                        break
+
+            chunks.append('\n'.join(lines[start:end]))
+            if end >= len(lines):
+                break
+            start = end if cut_rank == 2 else max(end - overlap_lines, start + 1)
+        return chunks
+
+    @staticmethod
+    def _boundary_rank(line: str) -> int:
+        if line.startswith('#'):
+            return 2
+        if line.startswith(('- ', '| ')):
+            return 1
+        return 0
+
+    @staticmethod
+    def _truncate(text: str, token_budget: int) -> str:
+        """按行截断到预算以内，并在末尾注明截断。"""
+        kept = []
+        used = 0
+        for line in text.split('\n'):
+            cost = estimate_tokens(line) + 1
+            if used + cost > token_budget:
+                break
+            kept.append(line)
+            used += cost
+        kept.append("[... content truncated to fit token budget]")
+        return '\n'.join(kept)
@@ -3,11 +3,36 @@
 
 去除非语义 HTML 标签以减小文件大小并为 AI 提取准备数据。
 专注于移除视觉元素，同时保留结构和数据内容。
+
+提供两种引擎：
+- lxml（默认）：基于 C 实现的解析器，一次树遍历完成全部删除和空白合并
+- bs4：原始的 BeautifulSoup + html.parser 实现，lxml 不可用或解析失败时回退
 """
+import logging
 import re
+import shutil
 from pathlib import Path
 from bs4 import BeautifulSoup, Comment
-from typing import Dict
+from typing import Dict, Optional
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:  # pragma: no cover - lxml 是可选加速依赖
+    etree = None
+    lxml_html = None
+
+logger = logging.getLogger(__name__)
+
+# 预编译的空白合并规则（两种引擎共用）
+BLANK_LINES_RE = re.compile(r'\n\s*\n')
+MULTI_SPACE_RE = re.compile(r'  +')
+FULL_DOCUMENT_RE = re.compile(r'<\s*(?:!doctype|html|head|body)\b', re.IGNORECASE)
+
+
+def _collapse_whitespace(text: str) -> str:
+    text = BLANK_LINES_RE.sub('\n', text)
+    return MULTI_SPACE_RE.sub(' ', text)
 
 
 class HtmlCleaner:
@@ -18,19 +43,106 @@ class HtmlCleaner:
     
     # 纯视觉/技术属性
     JUNK_ATTRS = ['class', 'id', 'style', 'onclick', 'onload', 'onerror']
+
+    ENGINES = ('lxml', 'bs4')
+
+    # 清理输出格式的版本号，修改清理规则时递增，使旧的缓存结果失效
+    VERSION = 1
     
     @staticmethod
-    def strip_non_semantic_tags(html: str, focus_content: bool = False) -> str:
+    def strip_non_semantic_tags(html: str, focus_content: bool = False, engine: Optional[str] = None) -> str:
         """
         移除对数据提取没有贡献的标签和属性。
         
         参数:
             html: 原始 HTML 内容
             focus_content: 已弃用的标志，为兼容性保留。
+            engine: 'lxml' 或 'bs4'，默认读取 settings.HTML_CLEANER_ENGINE
             
         返回:
             仅包含语义内容的清理后 HTML
         """
+        if engine is None:
+            from app.core.config import settings
+            engine = settings.HTML_CLEANER_ENGINE
+
+        if engine == 'lxml' and lxml_html is not None:
+            try:
+                return HtmlCleaner._strip_with_lxml(html)
+            except Exception as e:
+                # 例如带编码声明的 XHTML 字符串，回退到 BeautifulSoup
+                logger.warning(f"lxml cleaning failed, falling back to bs4: {e}")
+
+        return HtmlCleaner._strip_with_bs4(html)
+
+    @staticmethod
+    def _strip_with_lxml(html: str) -> str:
+        """
+        单次遍历的 lxml 清理引擎。
+
+        一次 iter() 遍历中同时完成：标记垃圾标签和注释、删除垃圾属性、合并文本空白；
+        遍历结束后统一摘除标记的节点（保留其后的 tail 文本）。
+        """
+        if not html.strip():
+            return _collapse_whitespace(html)
+
+        is_document = FULL_DOCUMENT_RE.search(html) is not None
+        if is_document:
+            roots = [lxml_html.document_fromstring(html)]
+        else:
+            roots = lxml_html.fragments_fromstring(html)
+
+        junk_tags = frozenset(HtmlCleaner.JUNK_TAGS)
+        junk_attrs = HtmlCleaner.JUNK_ATTRS
+        to_drop = []
+
+        # 显式栈深度优先遍历：命中垃圾标签时不再进入其子树
+        stack = [root for root in roots if not isinstance(root, str)]
+        while stack:
+            node = stack.pop()
+            tail = node.tail
+            if tail and ('\n' in tail or '  ' in tail):
+                node.tail = _collapse_whitespace(tail)
+
+            tag = node.tag
+            if not isinstance(tag, str) or tag in junk_tags:
+                # 注释、处理指令和垃圾标签
+                to_drop.append(node)
+                continue
+
+            attrib = node.attrib
+            if attrib:
+                for attr in junk_attrs:
+                    if attr in attrib:
+                        del attrib[attr]
+            text = node.text
+            if text and ('\n' in text or '  ' in text):
+                node.text = _collapse_whitespace(text)
+            stack.extend(node)
+
+        parts = []
+        if is_document:
+            for node in to_drop:
+                node.drop_tree()
+            tree = roots[0].getroottree()
+            return etree.tostring(tree, encoding='unicode', method='html', doctype=tree.docinfo.doctype or None)
+
+        for node in to_drop:
+            if node.getparent() is not None:
+                node.drop_tree()
+        for root in roots:
+            if isinstance(root, str):
+                parts.append(_collapse_whitespace(root))
+            elif not isinstance(root.tag, str) or root.tag in junk_tags:
+                # 顶层的垃圾节点：丢弃节点本身，保留其后的文本
+                parts.append(root.tail or '')
+            else:
+                parts.append(lxml_html.tostring(root, encoding='unicode', method='html'))
+        return ''.join(parts)
+
+    @staticmethod
+    def _strip_with_bs4(html: str) -> str:
+        """原始的 BeautifulSoup 多次遍历实现。"""
         soup = BeautifulSoup(html, 'html.parser')
         
         # 1. 移除整个垃圾标签
@@ -52,8 +164,8 @@ class HtmlCleaner:
         
         # 5. 合并多余的空格
         cleaned_html = str(soup)
-        cleaned_html = re.sub(r'\n\s*\n', '\n', cleaned_html)  # Remove blank lines
-        cleaned_html = re.sub(r'  +', ' ', cleaned_html)  # Collapse multiple spaces
+        cleaned_html = BLANK_LINES_RE.sub('\n', cleaned_html)  # Remove blank lines
+        cleaned_html = MULTI_SPACE_RE.sub(' ', cleaned_html)  # Collapse multiple spaces
         
         return cleaned_html
     
@@ -93,6 +205,15 @@ class HtmlCleaner:
         返回:
             统计信息字典
         """
+        from app.core.config import settings
+
+        try:
+            threshold = settings.HTML_CLEANER_STREAMING_THRESHOLD
+            if threshold and input_path.stat().st_size > threshold:
+                return HtmlCleaner.clean_file_streaming(input_path, output_path)
+        except OSError:
+            pass
+
         try:
             html_content = input_path.read_text(encoding='utf-8')
             cleaned_html = HtmlCleaner.strip_non_semantic_tags(html_content)
@@ -118,3 +239,29 @@ class HtmlCleaner:
                 "output_path": str(output_path),
                 "error": str(e)
             }
+
+    @staticmethod
+    def clean_file_streaming(input_path: Path, output_path: Path) -> Dict[str, any]:
+        """
+        以恒定内存清理超大 HTML 文件（逐块分词、逐块写出）。
+
+        返回值与 clean_file 相同，额外包含 "mode": "streaming"。
+        """
+        from app.industrial_pipeline.streaming_cleaner import StreamingHtmlCleaner
+
+        try:
+            return StreamingHtmlCleaner.clean_file(input_path, output_path)
+        except Exception as e:
+            logger.error(f"Streaming clean failed for {input_path}: {e}")
+
+            # 回退：按块复制原始文件，同样不把整个文件读入内存
+            shutil.copyfile(input_path, output_path)
+            return {
+                "original_size": 0,
+                "cleaned_size": 0,
+                "reduction_bytes": 0,
+                "reduction_percent": 0.0,
+                "output_path": str(output_path),
+                "mode": "streaming",
+                "error": str(e)
+            }
@@ -0,0 +1,112 @@
+"""
+Incremental JSON array parser
+
+Consumes a streamed LLM completion piece by piece and returns every top-level
+array element as soon as it is complete (the closing brace of an object, or the
+comma / closing bracket after a scalar). Text before the opening bracket
+(e.g. a markdown code fence) is ignored; a malformed element is skipped without
+losing the elements around it.
+"""
+import json
+import logging
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalJsonArrayParser:
+    """
+    Usage:
+        parser = IncrementalJsonArrayParser()
+        async for delta in stream:
+            for item in parser.feed(delta):
+                emit(item)
+        if not parser.complete:
+            ...  # the array was cut off; the emitted items are still valid
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        # Unconsumed text, starting at the current element (if any)
+        self._buffer = ""
+        self._pos = 0
+        self._element_start: Optional[int] = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.started = False
+        self.complete = False
+        self.items_emitted = 0
+        self.invalid_elements = 0
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        return "".join(self._parts)
+
+    def feed(self, text: str) -> List[Any]:
+        """Append a piece of the completion and return the elements it completed."""
+        self._parts.append(text)
+        if self.complete:
+            return []
+
+        buf = self._buffer + text
+        items: List[Any] = []
+        i = self._pos
+        while i < len(buf) and not self.complete:
+            ch = buf[i]
+            if not self.started:
+                if ch == "[":
+                    self.started = True
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+                if self._element_start is None:
+                    self._element_start = i
+            elif ch in "{[":
+                if self._element_start is None:
+                    self._element_start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 0:
+                    # Closing bracket of the top-level array
+                    self._emit(buf, i, items)
+                    self.complete = True
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self._emit(buf, i + 1, items)
+            elif ch == "," and self._depth == 0:
+                self._emit(buf, i, items)
+            elif not ch.isspace() and self._element_start is None:
+                self._element_start = i
+            i += 1
+
+        # Keep only the element still being received
+        if self._element_start is None:
+            self._buffer, self._pos = "", 0
+        else:
+            self._buffer = buf[self._element_start:]
+            self._pos = i - self._element_start
+            self._element_start = 0
+        return items
+
+    def _emit(self, buf: str, end: int, items: List[Any]):
+        if self._element_start is None:
+            return
+        raw = buf[self._element_start:end].strip()
+        self._element_start = None
+        if not raw:
+            return
+        try:
+            items.append(json.loads(raw))
+            self.items_emitted += 1
+        except json.JSONDecodeError:
+            self.invalid_elements += 1
+            logger.warning(f"Skipping malformed array element ({len(raw)} chars)")
@@ -0,0 +1,123 @@
+"""
+工业收割进度的进程内发布/订阅通道
+
+IndustrialCollector 把条目计数、落盘文件、阶段变化和拦截检测作为事件发布到这里，
+SSE / WebSocket 接口订阅后直接推送给前端，不再依赖数据库轮询。
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+# 收到这些阶段后订阅流结束
+TERMINAL_PHASES = ("completed", "failed")
+
+
+class ProgressBroker:
+    """按批次 ID 分发进度事件的单例。"""
+    _subscribers: Dict[str, Set[asyncio.Queue]] = {}
+    _snapshots: Dict[str, Dict[str, Any]] = {}
+    # 最近结束的批次的终止事件，避免订阅与结束之间的竞争导致订阅者永远等待
+    _finished: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+    _finished_limit: int = 256
+    _queue_size: int = 256
+
+    @classmethod
+    def publish(cls, batch_id: str, event_type: str, **data: Any):
+        """
+        发布一个进度事件。
+
+        参数:
+            batch_id: 批次 ID
+            event_type: items / file / phase / blocked
+            data: 事件负载
+        """
+        event = {
+            "type": event_type,
+            "batch_id": batch_id,
+            "timestamp": datetime.now().isoformat(),
+            **data,
+        }
+
+        snapshot = cls._snapshots.setdefault(batch_id, {
+            "type": "snapshot",
+            "batch_id": batch_id,
+            "phase": "pending",
+            "item_count": 0,
+            "files": [],
+            "blocked": None,
+        })
+        if event_type == "items":
+            snapshot["item_count"] = data.get("item_count", snapshot["item_count"])
+        elif event_type == "file":
+            snapshot["files"].append(data.get("file_name"))
+            snapshot["item_count"] = data.get("item_count", snapshot["item_count"])
+        elif event_type == "phase":
+            snapshot["phase"] = data.get("phase", snapshot["phase"])
+        elif event_type == "blocked":
+            snapshot["blocked"] = data.get("reason")
+
+        for queue in cls._subscribers.get(batch_id, set()):
+            if queue.full():
+                # 慢速订阅者：丢弃最旧的事件，快照会在重连时补齐状态
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(event)
+
+        if event_type == "phase" and data.get("phase") in TERMINAL_PHASES:
+            # 批次结束后释放快照，之后的订阅者从数据库读取最终状态
+            cls._snapshots.pop(batch_id, None)
+            cls._finished[batch_id] = event
+            cls._finished.move_to_end(batch_id)
+            while len(cls._finished) > cls._finished_limit:
+                cls._finished.popitem(last=False)
+        else:
+            cls._finished.pop(batch_id, None)
+
+    @classmethod
+    def snapshot(cls, batch_id: str) -> Optional[Dict[str, Any]]:
+        """返回批次当前的累计状态；批次不在运行时返回 None。"""
+        snapshot = cls._snapshots.get(batch_id)
+        if snapshot is None:
+            return None
+        return {**snapshot, "files": list(snapshot["files"])}
+
+    @classmethod
+    async def subscribe(cls, batch_id: str, heartbeat: float = 15.0) -> AsyncIterator[Dict[str, Any]]:
+        """
+        订阅批次事件：先返回当前快照，然后逐个返回新事件，直到批次结束。
+        超过 heartbeat 秒没有事件时返回一个 heartbeat 事件，便于保持连接。
+        """
+        queue: asyncio.Queue = asyncio.Queue(maxsize=cls._queue_size)
+        cls._subscribers.setdefault(batch_id, set()).add(queue)
+        try:
+            finished = cls._finished.get(batch_id)
+            if finished:
+                yield finished
+                return
+
+            snapshot = cls.snapshot(batch_id)
+            if snapshot:
+                yield snapshot
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield {"type": "heartbeat", "batch_id": batch_id}
+                    continue
+
+                yield event
+                if event["type"] == "phase" and event.get("phase") in TERMINAL_PHASES:
+                    return
+        finally:
+            subscribers = cls._subscribers.get(batch_id)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    cls._subscribers.pop(batch_id, None)
@@ -0,0 +1,186 @@
+"""
+流式 HTML 清理器
+
+HtmlCleaner.clean_file 会把整个文件读成字符串并构建完整的 DOM 树，
+对几十 MB 的目录页会占用数 GB 内存。这里使用增量分词器逐块读取输入，
+在分词过程中直接丢弃垃圾子树和垃圾属性，并分块写出结果，内存占用与文件大小无关
+（只与最大的单个文本节点有关）。
+"""
+import html as html_lib
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, List, TextIO
+
+from app.industrial_pipeline.html_cleaner import HtmlCleaner, _collapse_whitespace
+
+# 每次从输入读取的字符数
+READ_CHUNK_SIZE = 1024 * 1024
+# 输出缓冲达到该字符数时写出
+WRITE_BUFFER_SIZE = 256 * 1024
+# 没有结束标签的元素，不进入打开元素栈
+VOID_TAGS = frozenset({
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+})
+
+
+class _StreamingCleanParser(HTMLParser):
+    """边分词边清理的 HTML 解析器，结果写入 output。"""
+
+    def __init__(self, output: TextIO):
+        super().__init__(convert_charrefs=True)
+        self.output = output
+        self.junk_tags = frozenset(HtmlCleaner.JUNK_TAGS)
+        self.junk_attrs = frozenset(HtmlCleaner.JUNK_ATTRS)
+        self.buffer: List[str] = []
+        self.buffered_chars = 0
+        self.written_bytes = 0
+        # 相邻文本先累积，遇到保留的标签时再合并空白，保证与整串正则合并的结果一致
+        self.pending_text: List[str] = []
+        # 正在跳过的垃圾子树：(标签名, 同名嵌套深度)
+        self.skip_tag: str | None = None
+        self.skip_depth = 0
+        # 已输出且尚未关闭的元素；未闭合的垃圾标签在外层元素关闭时结束跳过
+        self.open_tags: List[str] = []
+
+    # --- 输出 ---
+
+    def _emit(self, markup: str):
+        self._flush_text()
+        self._write(markup)
+
+    def _write(self, text: str):
+        if not text:
+            return
+        self.buffer.append(text)
+        self.buffered_chars += len(text)
+        if self.buffered_chars >= WRITE_BUFFER_SIZE:
+            self.flush()
+
+    def _flush_text(self):
+        if self.pending_text:
+            text = "".join(self.pending_text)
+            self.pending_text = []
+            self._write(_collapse_whitespace(html_lib.escape(text, quote=False)))
+
+    def flush(self):
+        if self.buffer:
+            chunk = "".join(self.buffer)
+            self.output.write(chunk)
+            self.written_bytes += len(chunk.encode("utf-8"))
+            self.buffer = []
+            self.buffered_chars = 0
+
+    def finish(self):
+        self.close()
+        self._flush_text()
+        self.flush()
+
+    def _format_tag(self, tag: str, attrs: list, self_closing: bool = False) -> str:
+        parts = [tag]
+        for name, value in attrs:
+            if name in self.junk_attrs:
+                continue
+            value = "" if value is None else html_lib.escape(value, quote=True)
+            parts.append(f'{name}="{value}"')
+        return f"<{' '.join(parts)}{'/' if self_closing else ''}>"
+
+    # --- 分词回调 ---
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_depth += 1
+            return
+        if tag in self.junk_tags:
+            self.skip_tag = tag
+            self.skip_depth = 1
+            return
+        self._emit(self._format_tag(tag, attrs))
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if self.skip_tag or tag in self.junk_tags:
+            return
+        self._emit(self._format_tag(tag, attrs, self_closing=True))
+
+    def handle_endtag(self, tag):
+        if self.skip_tag:
+            if tag == self.skip_tag:
+                self.skip_depth -= 1
+                if self.skip_depth == 0:
+                    self.skip_tag = None
+                return
+            if tag not in self.open_tags:
+                return
+            # 外层元素关闭时，其中未闭合的垃圾子树随之结束（与 DOM 解析器的行为一致）
+            self.skip_tag = None
+            self.skip_depth = 0
+        if tag in self.junk_tags:
+            return
+        if tag in self.open_tags:
+            index = len(self.open_tags) - 1 - self.open_tags[::-1].index(tag)
+            del self.open_tags[index:]
+        self._emit(f"</{tag}>")
+
+    def handle_data(self, data):
+        if not self.skip_tag:
+            self.pending_text.append(data)
+
+    def handle_comment(self, data):
+        # 注释直接丢弃
+        pass
+
+    def handle_decl(self, decl):
+        if not self.skip_tag:
+            self._emit(f"<!{decl}>")
+
+    def handle_pi(self, data):
+        if not self.skip_tag:
+            self._emit(f"<?{data}>")
+
+    def unknown_decl(self, data):
+        if not self.skip_tag:
+            self._emit(f"<![{data}]>")
+
+
+class StreamingHtmlCleaner:
+    """恒定内存的 HTML 文件清理。"""
+
+    @staticmethod
+    def clean_file(input_path: Path, output_path: Path, read_chunk_size: int = READ_CHUNK_SIZE) -> Dict[str, Any]:
+        """
+        以流式方式清理 HTML 文件。
+
+        参数:
+            input_path: 源 HTML 文件
+            output_path: 清理后 HTML 的目标路径
+            read_chunk_size: 每次读取的字符数
+
+        返回:
+            与 HtmlCleaner.clean_file 相同格式的统计信息字典
+        """
+        with open(input_path, "r", encoding="utf-8", errors="replace") as source, \
+                open(output_path, "w", encoding="utf-8") as target:
+            parser = _StreamingCleanParser(target)
+            while True:
+                chunk = source.read(read_chunk_size)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+            parser.finish()
+
+        original_size = input_path.stat().st_size
+        cleaned_size = parser.written_bytes
+        reduction_bytes = original_size - cleaned_size
+        reduction_percent = (reduction_bytes / original_size * 100) if original_size > 0 else 0
+
+        return {
+            "original_size": original_size,
+            "cleaned_size": cleaned_size,
+            "reduction_bytes": reduction_bytes,
+            "reduction_percent": round(reduction_percent, 2),
+            "output_path": str(output_path),
+            "mode": "streaming",
+        }
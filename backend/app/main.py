@@ -6,7 +6,11 @@ from starlette.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.api.main import api_router
 from app.core.config import settings
+from app.core.fetch_client import FetchClient
+from app.core.llm_client import LlmClient
+from app.industrial_pipeline.clean_pool import CleanerPool
 from app.industrial_pipeline.collector import GlobalBrowserManager
+from app.worker_tasks.recrawl_scheduler import RecrawlScheduler
 
 # 自定义生成唯一ID函数
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -14,10 +18,18 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # 启动：启动全局浏览器
+    # 启动：启动全局浏览器、HTML 清理进程池、共享 LLM 客户端、页面抓取客户端和重抓调度
     await GlobalBrowserManager.start()
+    CleanerPool.start()
+    LlmClient.start()
+    FetchClient.start()
+    RecrawlScheduler.start()
     yield
-    # 关闭：关闭全局浏览器
+    # 关闭：停止重抓调度，关闭抓取客户端、LLM 客户端、进程池和全局浏览器
+    await RecrawlScheduler.stop()
+    await FetchClient.stop()
+    await LlmClient.stop()
+    CleanerPool.stop()
     await GlobalBrowserManager.stop()
 
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
@@ -39,6 +51,8 @@ if settings.all_cors_origins:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # 分页游标通过响应头返回，需显式暴露给浏览器脚本
+        expose_headers=["X-Next-Cursor"],
     )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
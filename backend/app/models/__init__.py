@@ -10,9 +10,22 @@ from .chat import (
     ChatSessionsPublic,
     ChatsPublic,
 )
-from .crawler_task import CrawlerTask
+from .crawler_task import (
+    CrawlerTask,
+    CrawlerTaskLog,
+    CrawlerTaskLogPublic,
+    CrawlerTaskLogsPublic,
+    CrawlerTaskResult,
+    CrawlerTaskStatus,
+)
 from .crawl_index import CrawlIndex
-from .industrial_batch import IndustrialBatch, IndustrialBatchPublic, IndustrialFileInfo
+from .industrial_batch import (
+    IndustrialBatch,
+    IndustrialBatchesPublic,
+    IndustrialBatchPublic,
+    IndustrialBatchStatusCounts,
+    IndustrialFileInfo,
+)
 from .item import Item, ItemCreate, ItemPublic, ItemsPublic, ItemUpdate
 from .message import Message, NewPassword, Token, TokenPayload, UpdatePassword
 from .user import (
@@ -11,9 +11,26 @@ class CrawlIndex(SQLModel, table=True):
 
     url_hash: str = Field(max_length=64, primary_key=True, index=True)  # MD5 of URL
     original_url: str = Field(max_length=2048)
-    file_path: str = Field(max_length=512)  # Relative path to storage root
-    content_md5: str = Field(max_length=64, index=True)  # MD5 of content for deduplication
+    file_path: str | None = Field(default=None, max_length=512)  # Relative path to storage root (None: content not stored)
+    content_md5: str | None = Field(default=None, max_length=64, index=True)  # MD5 of the stored file for deduplication (None: no file)
     content_type: str | None = Field(default=None, max_length=128)  # application/json, text/html, etc.
     size_bytes: int | None = Field(default=None)
+
+    # Recrawl revalidation (manual crawler)
+    etag: str | None = Field(default=None, max_length=512)
+    last_modified: str | None = Field(default=None, max_length=128)  # Raw Last-Modified header
+    content_hash: str | None = Field(default=None, max_length=64)  # SHA-256 of the reduced page content
+    links: str | None = Field(default=None)  # JSON list of follow-up links found on the page
+    last_status: int | None = Field(default=None)
+    last_checked_at: datetime | None = Field(default=None)
+    last_changed_at: datetime | None = Field(default=None)
+
+    # Change history for adaptive recrawl scheduling
+    check_count: int = Field(default=0)  # Revalidations after the first crawl
+    change_count: int = Field(default=0)  # Revalidations that found changed content
+    observed_seconds: float = Field(default=0.0)  # Total time covered by those revalidations
+    change_rate: float | None = Field(default=None)  # Estimated changes per day
+    crawl_spec: str | None = Field(default=None)  # JSON: table_name and columns to re-extract
+
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
@@ -6,9 +6,64 @@ class CrawlerTask(SQLModel, table=True):
     __tablename__ = "crawler_task"
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     status: str = Field(default="pending")  # 待处理、处理中、已暂停、已完成、失败
-    result_sql_content: str | None = Field(default=None)
     created_at: datetime = Field(default_factory=datetime.now)
-    
+
+    # 结果只保存在文件中（通过下载接口获取），任务上仅保留摘要
+    result_size_bytes: int | None = Field(default=None)  # 生成的 SQL 文件大小
+    result_row_count: int | None = Field(default=None)   # 提取成功的行数（INSERT 语句数）
+    result_preview: str | None = Field(default=None)     # SQL 文件开头的有限长度预览
+    error_message: str | None = Field(default=None)      # 任务失败原因
+
     # 自主管道的新字段
     pipeline_state: str | None = Field(default=None)  # JSON 格式的当前策略/状态
     current_phase: str | None = Field(default=None)   # 侦察、架构、审核、收割、精炼
+    llm_usage: str | None = Field(default=None)       # JSON 格式的 LLM 调用汇总（次数、token、延迟）
+    revalidation: str | None = Field(default=None)    # JSON 格式的重抓统计（304、内容未变、命中率）
+    recrawl_urls: str | None = Field(default=None)    # JSON 格式的重抓调度派发的 URL 列表，普通任务为空
+
+
+# 轮询任务状态时返回的轻量投影（不含结果预览）
+class CrawlerTaskStatus(SQLModel):
+    id: uuid.UUID
+    status: str
+    created_at: datetime
+    current_phase: str | None = None
+    pipeline_state: str | None = None
+    llm_usage: str | None = None
+    revalidation: str | None = None
+    result_size_bytes: int | None = None
+    result_row_count: int | None = None
+    error_message: str | None = None
+
+
+class CrawlerTaskResult(SQLModel):
+    id: uuid.UUID
+    status: str
+    result_size_bytes: int | None = None
+    result_row_count: int | None = None
+    result_preview: str | None = None
+    preview_truncated: bool = False
+
+
+# 任务日志：只追加，按 (task_id, seq) 读取增量
+class CrawlerTaskLog(SQLModel, table=True):
+    __tablename__ = "crawler_task_log"
+    task_id: uuid.UUID = Field(foreign_key="crawler_task.id", primary_key=True, ondelete="CASCADE")
+    seq: int = Field(primary_key=True)  # 任务内从 1 开始递增
+    ts: datetime = Field(default_factory=datetime.now)
+    level: str = Field(default="INFO", max_length=16)  # INFO、WARN、ERROR
+    phase: str | None = Field(default=None, max_length=32)
+    message: str
+
+
+class CrawlerTaskLogPublic(SQLModel):
+    seq: int
+    ts: datetime
+    level: str
+    phase: str | None = None
+    message: str
+
+
+class CrawlerTaskLogsPublic(SQLModel):
+    data: list[CrawlerTaskLogPublic]
+    last_seq: int  # 下次请求时作为 after 传回
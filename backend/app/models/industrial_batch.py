@@ -2,12 +2,25 @@ import uuid
 from datetime import datetime
 from typing import Optional
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
 class IndustrialBatch(SQLModel, table=True):
     """工业收割批次模型"""
     __tablename__ = "industrial_batch"
+    __table_args__ = (
+        # 支持 (created_at, id) 键集分页
+        Index("ix_industrial_batch_created_at_id", "created_at", "id"),
+        # 支持按状态过滤后分页，以及按状态计数
+        Index("ix_industrial_batch_status_created_at_id", "status", "created_at", "id"),
+        # 支持 URL 前缀匹配 (LIKE 'prefix%')
+        Index(
+            "ix_industrial_batch_url_prefix",
+            "url",
+            postgresql_ops={"url": "varchar_pattern_ops"},
+        ),
+    )
     
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.now)
@@ -27,6 +40,18 @@ class IndustrialBatchPublic(SQLModel):
     storage_path: Optional[str] = None
 
 
+class IndustrialBatchesPublic(SQLModel):
+    """键集分页的批次列表"""
+    data: list[IndustrialBatchPublic]
+    next_cursor: Optional[str] = None  # 为空表示没有更多数据
+
+
+class IndustrialBatchStatusCounts(SQLModel):
+    """按状态统计的批次数量"""
+    counts: dict[str, int]
+    total: int
+
+
 class IndustrialFileInfo(SQLModel):
     """批次中单个文件的信息"""
     name: str
@@ -2,8 +2,8 @@ from typing import Optional, Dict, List
 import logging
 import json
 import re
-from openai import AsyncOpenAI
 from app.core.config import settings
+from app.core.llm_client import LlmClient
 from .schemas import Candidate, ExtractionStrategy
 
 logger = logging.getLogger(__name__)
@@ -14,15 +14,12 @@ class Architect:
     分析 API 响应样本并定义提取策略。
     """
     def __init__(self):
-        self.client = AsyncOpenAI(
-            api_key=settings.VOLC_API_KEY, 
-            base_url=settings.VOLC_BASE_URL
-        )
         self.model = settings.VOLC_DEEPSEEK_MODEL_ID
 
-    async def define_extraction_strategy(self, candidates: List[Candidate], table_name_hint: Optional[str] = None, task_id: str = "Unknown", log_callback=None) -> ExtractionStrategy:
+    async def define_extraction_strategy(self, candidates: List[Candidate], table_name_hint: Optional[str] = None, task_id: str = "Unknown", log_callback=None, use_cache: bool = True) -> ExtractionStrategy:
         """
         第二阶段：分析候选者并定义提取策略。
+        相同候选样本的策略从 LLM 响应缓存返回；use_cache=False 时强制重新分析。
         """
         async def _log(msg, level="INFO"):
             logger.info(f"[{task_id}] {msg}")
@@ -84,17 +81,21 @@ class Architect:
 
         try:
             await _log("Sending prompt to AI Architect...", "DEBUG")
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a precise Data Architect. Return only valid JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                stream=False,
-                response_format={"type": "json_object"}
+            response = await LlmClient.chat_completion(
+                {
+                    "model": self.model,
+                    "messages": [
+                        {"role": "system", "content": "You are a precise Data Architect. Return only valid JSON."},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "stream": False,
+                    "response_format": {"type": "json_object"}
+                },
+                use_cache=use_cache,
+                call_site="architect",
             )
 
-            content = response.choices[0].message.content
+            content = response["choices"][0]["message"]["content"]
             await _log(f"AI Response received ({len(content)} chars). Parsing JSON...", "DEBUG")
             
             try:
@@ -4,14 +4,33 @@ import logging
 import csv
 import json
 import re
-from typing import List, Any
+from typing import List, Any, Optional, Set
 from sqlalchemy import text
+from app.core.bulk_loader import PgCopyLoader, fold_identifier, fold_table_name
 from app.core.db import engine
 from app.sniffer_pipeline.schemas import ExtractionStrategy, RawDataBlock
 from app.core.paths import SQL_DIR, CSV_DIR  # 引入统一路径
 
 logger = logging.getLogger(__name__)
 
+# CREATE [TEMP|UNLOGGED] TABLE [IF NOT EXISTS] [schema.]name，名称各部分可带双引号
+TABLE_NAME_PATTERN = re.compile(
+    r'CREATE\s+(?:(?:TEMP|TEMPORARY|UNLOGGED)\s+)?TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?'
+    r'((?:"[^"]+"|[^\s(."]+)(?:\.(?:"[^"]+"|[^\s(."]+))?)',
+    re.IGNORECASE,
+)
+
+
+def table_name_from_schema(sql_schema: str) -> Optional[str]:
+    """从 CREATE TABLE 语句中取出 DDL 里写的表名（可能带 schema 和双引号）。"""
+    match = TABLE_NAME_PATTERN.search(sql_schema)
+    return match.group(1) if match else None
+
+
+def quoted_identifiers(sql_schema: str) -> Set[str]:
+    return set(re.findall(r'"([^"]+)"', sql_schema))
+
+
 class Refinery:
     def __init__(self):
         # 彻底移除 LLM 客户端，纯 Python 处理
@@ -48,8 +67,10 @@ class Refinery:
 
         # 2. 准备数据库表
         # 从 CREATE TABLE 语句中提取表名
-        table_name_match = re.search(r"CREATE TABLE\s+([^\s\(]+)", strategy.sql_schema, re.IGNORECASE)
-        table_name = table_name_match.group(1) if table_name_match else "scraped_data"
+        table_name = table_name_from_schema(strategy.sql_schema) or "scraped_data"
+        # DDL 按原样执行，未加引号的名称被 PostgreSQL 折叠为小写，
+        # 而 COPY 按引号标识符访问表和列，因此入库时名称先按同样的规则规范化
+        quoted = quoted_identifiers(strategy.sql_schema)
         await _log(f"Target table name identified: {table_name}", "DEBUG")
 
         try:
@@ -66,7 +87,15 @@ class Refinery:
         batch_size = 500  # 每 500 条写一次文件和数据库
         buffer = []
 
-        async with engine.connect() as connection:
+        # 入库使用 COPY（表结构已在上面创建），连接失败时仍然生成 CSV / SQL 文件
+        loader = PgCopyLoader(fold_table_name(table_name), create_table=False)
+        try:
+            await loader.start()
+        except Exception as e:
+            await _log(f"Database connection failed, rows will only be written to files: {e}", "ERROR")
+            loader = None
+
+        try:
             for i, block in enumerate(raw_data_list):
                 # 兼容处理: data 可能是 list 也可能是 dict
                 raw_items = block.data
@@ -88,26 +117,38 @@ class Refinery:
 
                     # === 缓冲区满，刷盘 ===
                     if len(buffer) >= batch_size:
-                        await self._flush_buffer(connection, buffer, table_name, task_id)
+                        await self._flush_buffer(loader, buffer, table_name, task_id, quoted)
                         total_items += len(buffer)
                         buffer = [] # 清空缓冲
 
             # === 处理剩余数据 ===
             if buffer:
-                await self._flush_buffer(connection, buffer, table_name, task_id)
+                await self._flush_buffer(loader, buffer, table_name, task_id, quoted)
                 total_items += len(buffer)
+        finally:
+            if loader is not None:
+                await _log(f"COPY load stats: {loader.stats()}", "DEBUG")
+                await loader.close()
 
         await _log(f"Refinery complete. Processed {total_items} items.")
         return total_items
 
-    async def _flush_buffer(self, connection, buffer: List[dict], table_name: str, task_id: str):
+    async def _flush_buffer(
+        self,
+        loader: Optional[PgCopyLoader],
+        buffer: List[dict],
+        table_name: str,
+        task_id: str,
+        quoted: Set[str] = frozenset(),
+    ):
         """
         将缓冲区数据写入 CSV, SQL 文件并插入数据库
         """
         if not buffer:
             return
 
-        keys = list(buffer[0].keys())
+        # transform_item 返回的键可能逐行不同，按本批所有键的并集写入
+        keys = list(dict.fromkeys(key for row in buffer for key in row))
 
         # --- 1. 写入 CSV 文件 ---
         csv_path = CSV_DIR / f"{task_id}.csv"
@@ -146,16 +187,15 @@ class Refinery:
             logger.error(f"Failed to write SQL file: {e}")
 
         # --- 3. 插入数据库 (真实存储) ---
+        if loader is None:
+            return
         try:
-            # 使用 SQLAlchemy 的 bind params 方式防止注入
-            # 构造 :key 格式的 value 占位符
-            bind_vals = ", ".join([f":{k}" for k in keys])
-            cols = ", ".join(keys)
-            stmt = text(f"INSERT INTO {table_name} ({cols}) VALUES ({bind_vals})")
-            
-            await connection.execute(stmt, buffer)
-            await connection.commit()
+            # COPY FROM STDIN 整批写入，值由 psycopg 传输，不拼接进 SQL；键按 DDL 规则映射到实际列名
+            await loader.copy_rows(
+                ({fold_identifier(key, quoted): value for key, value in row.items()} for row in buffer),
+                columns=list(dict.fromkeys(fold_identifier(key, quoted) for key in keys)),
+            )
             logger.info(f"✅ Flushed {len(buffer)} items to DB/CSV/SQL")
         except Exception as e:
-            logger.error(f"DB Insert failed: {e}")
-            await connection.rollback()
\ No newline at end of file
+            # 出错的批次在事务内整体回滚
+            logger.error(f"DB Insert failed: {e}")
\ No newline at end of file
@@ -1,28 +1,39 @@
 import uuid
 import json
 import asyncio
-import os
-import csv
-import httpx
+import logging
 import re
 import random
-from urllib.parse import urljoin
-from bs4 import BeautifulSoup
+from dataclasses import dataclass, field
 from pathlib import Path
 from sqlmodel import Session
 from app.core.db import engine
 from app.models import CrawlerTask
 from app.core.config import settings
-from openai import AsyncOpenAI
+from app.core.bulk_loader import PgCopyLoader, fold_identifier, fold_table_name
+from app.core.fetch_client import FetchClient
+from app.core.llm_metrics import LlmUsageSummary, merge_usage, track_llm_usage
+from app.industrial_pipeline.content_reducer import ContentReducer
+from app.worker_tasks.frontier import UrlFrontier, feed_frontier, frontier_fetch_stage
+from app.worker_tasks.revalidation import Revalidation, RevalidationIndex, content_hash
+from app.worker_tasks.output_sink import CrawlOutputSink, CrawlRecord, read_preview
+from app.worker_tasks.link_extractor import find_next_page_url, find_pagination_links
+from app.worker_tasks.page_extraction import PageBatcher, extract_page_fields
+from app.worker_tasks.selector_learner import SelectorLearner
+from app.worker_tasks.stages import PipelineRegistry, Stage, StagedPipeline
+
+logger = logging.getLogger(__name__)
 
 # 定义生成文件的根目录
 GENERATED_DATA_DIR = Path("generated_data")
 CSV_DIR = GENERATED_DATA_DIR / "csv"
 SQL_DIR = GENERATED_DATA_DIR / "sql"
+JSONL_DIR = GENERATED_DATA_DIR / "jsonl"
 
 # 确保目录存在
 CSV_DIR.mkdir(parents=True, exist_ok=True)
 SQL_DIR.mkdir(parents=True, exist_ok=True)
+JSONL_DIR.mkdir(parents=True, exist_ok=True)
 
 # 用于轮换的常见用户代理列表
 USER_AGENTS = [
@@ -40,7 +51,6 @@ def get_random_headers():
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7",
         "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
         "Accept-Encoding": "gzip, deflate, br",
-        "Connection": "keep-alive",
         "Upgrade-Insecure-Requests": "1",
         "Sec-Fetch-Dest": "document",
         "Sec-Fetch-Mode": "navigate",
@@ -49,244 +59,224 @@ def get_random_headers():
         "Cache-Control": "max-age=0",
     }
 
+# 匹配类似 ?page=123 或 /page/123 的模式
+# 第一组：前缀，第二组：页码
+PAGE_URL_PATTERNS = [
+    re.compile(r"([?&]page=)(\d+)"),
+    re.compile(r"(/page/)(\d+)"),
+]
+
+
 def get_next_page_url(current_url: str, html_content: str) -> str | None:
     """
-    使用正则启发式或 HTML 解析确定下一页 URL。
+    使用正则启发式或页面链接打分确定下一页 URL。
     """
     # 策略 A：正则启发式 (例如 page=1, /page/1)
-    # 匹配类似 ?page=123 或 /page/123 的模式
-    # 第一组：前缀，第二组：页码，第三组：后缀
-    page_patterns = [
-        r"([?&]page=)(\d+)",
-        r"(/page/)(\d+)"
-    ]
-    
-    for pattern in page_patterns:
-        match = re.search(pattern, current_url)
+    for pattern in PAGE_URL_PATTERNS:
+        match = pattern.search(current_url)
         if match:
-            current_page_num = int(match.group(2))
-            next_page_num = current_page_num + 1
+            next_page_num = int(match.group(2)) + 1
             # 仅替换第一次出现
-            next_url = current_url[:match.start(2)] + str(next_page_num) + current_url[match.end(2):]
-            return next_url
+            return current_url[:match.start(2)] + str(next_page_num) + current_url[match.end(2):]
 
-    # 策略 B：HTML 解析 (BeautifulSoup)
+    # 策略 B：扫描 <a> 标签，按 rel="next"、链接文字、分页容器、页码序列和 URL 相似度打分
     try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-        # 查找带有“Next”、“下一页”、“>”等文本的 <a> 标签
-        next_keywords = ["next", "下一页", ">", "more"]
-        
-        for a in soup.find_all('a', href=True):
-            text = a.get_text().strip().lower()
-            if any(keyword in text for keyword in next_keywords):
-                next_href = a['href']
-                return urljoin(current_url, next_href)
+        return find_next_page_url(current_url, html_content)
     except Exception as e:
-        print(f"Error parsing HTML for next page: {e}")
-    
+        logger.warning(f"Error parsing HTML for next page: {e}")
     return None
 
-async def process_page(
-    page_index: int, 
-    url: str, 
-    table_name: str, 
-    columns: list[str], 
-    semaphore: asyncio.Semaphore, 
-    csv_lock: asyncio.Lock, 
-    sql_lock: asyncio.Lock, 
-    client: AsyncOpenAI, 
-    task_id: uuid.UUID,
-    session_updater
-) -> str | None:
+
+def get_pagination_links(current_url: str, html_content: str) -> list[str]:
+    """
+    收集页面上所有分页链接（下一页和数字页码），供 URL 边界提前抓取后续页面。
+    只保留同一主机的链接。
+    """
+    links = []
+    next_page_url = get_next_page_url(current_url, html_content)
+    if next_page_url:
+        links.append(next_page_url)
+    try:
+        links.extend(link for link in find_pagination_links(current_url, html_content) if link not in links)
+    except Exception as e:
+        logger.warning(f"Error parsing HTML for pagination links: {e}")
+    return links
+
+
+@dataclass
+class FetchedPage:
+    """抓取阶段的结果，交给提取阶段使用。"""
+    page_index: int
+    url: str
+    status_code: int
+    html_content: str
+    raw_content: str
+    next_page_url: str | None = None
+    # 重抓验证：上次的记录、本次响应的验证器，以及是否返回 304
+    previous: Revalidation | None = None
+    etag: str | None = None
+    last_modified: str | None = None
+    not_modified: bool = False
+    links: list[str] = field(default_factory=list)
+    content_hash: str | None = None
+
+
+def is_mock_url(url: str) -> bool:
+    return "example.com" in url or "localhost" in url
+
+
+async def fetch_page(page_index: int, url: str, previous: Revalidation | None = None) -> FetchedPage:
     """
-    并发处理单个页面/项目。
-    管道：爬取 -> 保存 CSV -> AI -> 保存 SQL
-    返回：下一页 URL（如果找到）或 None
+    抓取单个页面（只做网络请求和下一页检测，精简由 reduce_page 完成）。
+    给出 previous 时发送条件请求；返回 304 的页面 not_modified 为 True，没有内容。
     """
-    async with semaphore:
+    # 步骤 1：爬取 (使用 httpx)
+    target_url = url
+    next_page_url = None
+    etag = last_modified = None
+    
+    if not is_mock_url(url):
+        # 尝试真实抓取
         try:
-            # 步骤 1：爬取 (使用 httpx)
-            target_url = url
-            next_page_url = None
-            
-            if "example.com" not in url and "localhost" not in url:
-                # 尝试真实抓取
-                try:
-                    # 反爬虫随机延迟
-                    await asyncio.sleep(random.uniform(0.5, 2.0))
-                    
-                    async with httpx.AsyncClient(timeout=10.0, follow_redirects=True, headers=get_random_headers()) as http_client:
-                        resp = await http_client.get(target_url)
-                        # Detect encoding if needed, httpx handles auto-decoding mostly
-                        html_content = resp.text
-                        status_code = resp.status_code
-                        
-                        # 尝试查找下一页
-                        next_page_url = get_next_page_url(target_url, html_content)
-                        
-                        # 增加 AI 上下文限制 (2000 -> 20000)
-                        raw_content = html_content[:20000] 
-                except Exception as e:
-                    raw_content = f"Error fetching {target_url}: {str(e)}"
-                    status_code = 500
-                    html_content = ""
-            else:
-                # 模拟数据生成
-                await asyncio.sleep(0.5) 
-                status_code = 200
-                html_content = f"<html><body><p>Mock Content for {url}</p></body></html>"
-                raw_content = json.dumps({
-                    "title": f"Product {page_index}",
-                    "price": 10.5 + page_index,
-                    "description": f"This is a description for product {page_index}",
-                    "category": "Electronics" if page_index % 2 == 0 else "Clothing",
-                    "source_url": url,
-                    "page": page_index
-                })
-                # 模拟分页逻辑：如果 url 有 'page'，则增加它
-                next_page_url = get_next_page_url(url, html_content)
-                if not next_page_url:
-                     # 如果正则失败，回退到模拟启发式 (例如如果 url 没有 page 参数)
-                     if "?" not in url:
-                         next_page_url = f"{url}?page={page_index + 1}"
-                     elif "page=" not in url:
-                         next_page_url = f"{url}&page={page_index + 1}"
-
-            # 步骤 2：保存到 CSV (带有元数据的初步保存)
-            # 稍后我们将使用 AI 提取的数据更新此行
-            csv_row = {
-                "page_index": page_index,
-                "url": target_url,
-                "status": status_code,
-            }
-            
-            # 步骤 3：AI 处理
-            columns_str = ", ".join(columns)
+            # 反爬虫随机延迟
+            await asyncio.sleep(random.uniform(0.5, 2.0))
             
-            # 向 AI 提供元数据，以便在列中请求时可以使用它
-            metadata_info = f"Page Index: {page_index}, URL: {target_url}, Status: {status_code}"
-            
-            prompt = f"""
-            You are a data extraction expert. Your task is to extract structured data from the provided HTML/JSON content.
-            
-            Target Site: {target_url}
-            Columns to extract: {columns_str}
-            
-            Guidelines:
-            1. Look for the most prominent data matching the columns.
-            2. For 'title' or 'name', look for <h1>, <h2>, <h3> or <a> tags with descriptive text.
-            3. For 'price', look for currency symbols ($, £, ¥) or numeric values near 'price' keywords.
-            4. If the page is a LISTING page (like a search result or category page), extract the details of the FIRST product/item you see.
-            5. If a piece of information (like 'description' or 'category') is NOT present on this specific page, return null for that field.
-            6. Use the Metadata for 'url' or 'page_index' if they are requested in the columns.
-            
-            Return ONLY a valid JSON object. Do not include markdown formatting.
-            
-            Metadata:
-            {metadata_info}
-            
-            Raw Content (First 20k chars):
-            {raw_content}
+            # 共享连接池复用连接；请求头按请求轮换，不需要新建客户端
+            headers = get_random_headers()
+            if previous is not None:
+                headers.update(previous.conditional_headers())
+            resp = await FetchClient.get(target_url, headers=headers)
+            etag = resp.headers.get("etag")
+            last_modified = resp.headers.get("last-modified")
+            if resp.status_code == 304 and previous is not None:
+                # 未修改：后续链接沿用上次记录，发现模式仍能继续
+                return FetchedPage(
+                    page_index, target_url, 304, "", "",
+                    previous.links[0] if previous.links else None,
+                    previous=previous,
+                    etag=etag or previous.etag,
+                    last_modified=last_modified or previous.last_modified,
+                    not_modified=True,
+                    links=previous.links,
+                )
+            # Detect encoding if needed, httpx handles auto-decoding mostly
+            html_content = resp.text
+            status_code = resp.status_code
             
-            Response format: {{"column1": "value1", "column2": "value2", ...}}
-            """
+            # 尝试查找下一页
+            next_page_url = get_next_page_url(target_url, html_content)
+            raw_content = ""
+        except Exception as e:
+            raw_content = f"Error fetching {target_url}: {str(e)}"
+            status_code = 500
+            html_content = ""
+    else:
+        # 模拟数据生成
+        await asyncio.sleep(0.5) 
+        status_code = 200
+        html_content = f"<html><body><p>Mock Content for {url}</p></body></html>"
+        raw_content = json.dumps({
+            "title": f"Product {page_index}",
+            "price": 10.5 + page_index,
+            "description": f"This is a description for product {page_index}",
+            "category": "Electronics" if page_index % 2 == 0 else "Clothing",
+            "source_url": url,
+            "page": page_index
+        })
+        # 模拟分页逻辑：如果 url 有 'page'，则增加它
+        next_page_url = get_next_page_url(url, html_content)
+        if not next_page_url:
+             # 如果正则失败，回退到模拟启发式 (例如如果 url 没有 page 参数)
+             if "?" not in url:
+                 next_page_url = f"{url}?page={page_index + 1}"
+             elif "page=" not in url:
+                 next_page_url = f"{url}&page={page_index + 1}"
 
-            extracted_data = {}
-            sql_result = ""
-            
-            try:
-                if settings.VOLC_API_KEY and settings.VOLC_DEEPSEEK_MODEL_ID:
-                    response = await client.chat.completions.create(
-                        model=settings.VOLC_DEEPSEEK_MODEL_ID,
-                        messages=[
-                            {"role": "system", "content": "You are a precise data extractor that outputs only JSON."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        stream=False,
-                        response_format={ "type": "json_object" }
-                    )
-                    content = response.choices[0].message.content
-                    extracted_data = json.loads(content)
-                else:
-                    await asyncio.sleep(0.5)
-                    # 用于演示/测试的模拟提取数据
-                    extracted_data = {col: f"Mock {col} {page_index}" for col in columns}
-                    if "price" in extracted_data: extracted_data["price"] = 10.5 + page_index
-                    if "url" in columns: extracted_data["url"] = target_url
-
-                # 过滤并清理提取的数据
-                valid_data = {}
-                for col in columns:
-                    val = extracted_data.get(col)
-                    # 将 None/null 转换为字符串 'NULL' 用于 SQL，或保留为 None 用于 CSV
-                    if val is None or val == "None" or val == "null":
-                        valid_data[col] = None
-                    else:
-                        valid_data[col] = val
-
-                # 从提取的数据构造 SQL
-                cols = []
-                vals = []
-                for k, v in valid_data.items():
-                    if v is not None:
-                        cols.append(k)
-                        # 为 SQL 转义单引号
-                        escaped_val = str(v).replace("'", "''")
-                        vals.append(f"'{escaped_val}'")
-                
-                if cols:
-                    sql_result = f"INSERT INTO {table_name} ({', '.join(cols)}) VALUES ({', '.join(vals)});"
-                else:
-                    sql_result = f"-- No data could be extracted for {target_url}"
-                
-                # 使用提取的数据更新 CSV 行 (缺失值使用 None)
-                csv_row.update(valid_data)
+    return FetchedPage(
+        page_index, target_url, status_code, html_content, raw_content, next_page_url,
+        previous=previous, etag=etag, last_modified=last_modified,
+    )
 
-            except Exception as e:
-                print(f"AI extraction error: {e}")
-                sql_result = f"-- Error extracting data for {target_url}: {str(e)}"
-
-            # 最终确定 CSV (使用组合的锁保护写入)
-            async with csv_lock:
-                csv_file_path = CSV_DIR / f"{task_id}.csv"
-                file_exists = csv_file_path.exists()
-                
-                # 确定所有字段名称 (元数据 + 用户列)
-                fieldnames = ["page_index", "url", "status"] + columns
-                
-                await asyncio.get_running_loop().run_in_executor(
-                    None, 
-                    lambda: _append_csv(csv_file_path, csv_row, file_exists, fieldnames)
-                )
 
-            # 步骤 4：保存到 SQL
-            if sql_result:
-                async with sql_lock:
-                    sql_file_path = SQL_DIR / f"{task_id}.sql"
-                    await asyncio.get_running_loop().run_in_executor(
-                        None,
-                        lambda: _append_sql(sql_file_path, sql_result)
-                    )
+async def reduce_page(page: FetchedPage) -> FetchedPage:
+    """
+    把抓到的 HTML 精简为 LLM 输入（CPU 密集，在线程池中执行）。
+    抓取失败（raw_content 为错误信息）或模拟数据（已有 raw_content）时原样返回。
+    """
+    if page.raw_content or not page.html_content:
+        return page
+    # 定位主内容、折叠重复卡片并转换为精简 Markdown，按 token 预算控制长度
+    reduced = await asyncio.get_running_loop().run_in_executor(
+        None,
+        lambda: ContentReducer.reduce(
+            page.html_content,
+            token_budget=settings.LLM_INPUT_TOKEN_BUDGET,
+            exemplars=settings.CONTENT_REDUCER_EXEMPLARS,
+        )
+    )
+    page.raw_content = reduced.text
+    logger.info(
+        f"Page {page.page_index} content reduced {reduced.original_tokens} -> "
+        f"{reduced.reduced_tokens} tokens (saved {reduced.tokens_saved})"
+    )
+    return page
 
-            # 更新进度
-            await session_updater.increment()
-            
-            return next_page_url
 
-        except Exception as e:
-            print(f"Error processing page {page_index}: {e}")
-            return None
+async def extract_record(
+    page: FetchedPage,
+    columns: list[str],
+    batcher: PageBatcher | None = None,
+    learner: SelectorLearner | None = None
+) -> CrawlRecord:
+    """
+    用 AI 提取单个页面的数据；提取失败时记录错误，元数据行照常输出。
+    """
+    page_index, target_url, status_code = page.page_index, page.url, page.status_code
+    record = CrawlRecord(page_index, target_url, status_code)
+
+    # 步骤 3：AI 处理（有批处理器时与同时到达的其他页面合并为一个请求）
+    extracted_data = {}
+
+    try:
+        if settings.VOLC_API_KEY and settings.VOLC_DEEPSEEK_MODEL_ID:
+            loop = asyncio.get_running_loop()
+            # 已学到该站点的选择器时直接解析 HTML，不调用 LLM
+            learned = await loop.run_in_executor(None, learner.extract, page) if learner is not None else None
+            if learned is not None:
+                extracted_data = learned
+            else:
+                if batcher is not None:
+                    extracted_data = await batcher.extract(page)
+                else:
+                    extracted_data = await extract_page_fields(page, columns)
+                if learner is not None:
+                    await loop.run_in_executor(None, learner.observe, page, extracted_data)
+        else:
+            await asyncio.sleep(0.5)
+            # 用于演示/测试的模拟提取数据
+            extracted_data = {col: f"Mock {col} {page_index}" for col in columns}
+            if "price" in extracted_data: extracted_data["price"] = 10.5 + page_index
+            if "url" in columns: extracted_data["url"] = target_url
+
+        # 过滤并清理提取的数据
+        valid_data = {}
+        for col in columns:
+            val = extracted_data.get(col)
+            # 将 None/null 转换为字符串 'NULL' 用于 SQL，或保留为 None 用于 CSV
+            if val is None or val == "None" or val == "null":
+                valid_data[col] = None
+            else:
+                valid_data[col] = val
+
+        # 缺失值保留为 None：CSV 中为空，SQL 中省略该列
+        record.data = valid_data
+
+    except Exception as e:
+        logger.error(f"AI extraction error: {e}")
+        record.error = str(e)
 
-def _append_csv(path, row, file_exists, fieldnames):
-    with open(path, "a", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(row)
+    return record
 
-def _append_sql(path, sql_content):
-    with open(path, "a", encoding="utf-8") as f:
-        f.write(sql_content + "\n\n")
 
 class ProgressUpdater:
     def __init__(self, task_id, total):
@@ -306,25 +296,87 @@ class ProgressUpdater:
                         session.add(task)
                         session.commit()
             except Exception as e:
-                print(f"Failed to update progress: {e}")
+                logger.warning(f"Failed to update progress: {e}")
 
-async def generate_sql_from_spider(task_id: uuid.UUID, url: str, table_name: str, columns: list[str], max_pages: int = 1, concurrency: int = 5):
+def save_llm_usage(task_id: uuid.UUID, usage: LlmUsageSummary):
+    """把本次运行的 LLM 调用汇总合并保存到 CrawlerTask.llm_usage。"""
+    if not usage.calls:
+        return
+    with Session(engine) as session:
+        task = session.get(CrawlerTask, task_id)
+        if task:
+            existing = json.loads(task.llm_usage) if task.llm_usage else None
+            task.llm_usage = json.dumps(merge_usage(existing, usage.to_dict()))
+            session.add(task)
+            session.commit()
+
+
+async def generate_sql_from_spider(
+    task_id: uuid.UUID,
+    url: str,
+    table_name: str,
+    columns: list[str],
+    max_pages: int = 1,
+    concurrency: int = 5,
+    direct_load: bool = False,
+    upsert_keys: list[str] | None = None,
+    seed_urls: list[str] | None = None,
+    revalidate: bool = False,
+):
     """
     使用 DeepSeek API 从模拟爬虫数据生成 SQL 的后台任务。
     针对并发、文件存储和分页进行了优化。
+    任务内所有 LLM 调用的次数、token 和延迟汇总保存到 llm_usage。
+    direct_load 为 True 时，提取结果同时通过 COPY 直接写入数据库中的 table_name
+    （不存在则自动建表；给出 upsert_keys 时按这些列 upsert）。
+    给出 seed_urls 时只抓取这些页面（例如重抓调度），不推断分页也不扩展链接。
+    revalidate 为 True 时（重抓任务）发送条件请求，上次按同样的表和列提取过且内容未变的页面不再输出。
     """
-    # 初始化锁
-    csv_lock = asyncio.Lock()
-    sql_lock = asyncio.Lock()
-    semaphore = asyncio.Semaphore(concurrency)
-    
+    with track_llm_usage() as usage:
+        try:
+            await _run_spider(
+                task_id, url, table_name, columns, max_pages, concurrency, direct_load, upsert_keys, seed_urls,
+                revalidate,
+            )
+        finally:
+            save_llm_usage(task_id, usage)
+
+
+async def _run_spider(
+    task_id: uuid.UUID,
+    url: str,
+    table_name: str,
+    columns: list[str],
+    max_pages: int,
+    concurrency: int,
+    direct_load: bool = False,
+    upsert_keys: list[str] | None = None,
+    seed_urls: list[str] | None = None,
+    revalidate: bool = False,
+):
     # 初始化进度更新器
     updater = ProgressUpdater(task_id, max_pages)
-
-    # 初始化客户端
-    client = AsyncOpenAI(
-        api_key=settings.VOLC_API_KEY or "sk-placeholder", 
-        base_url="https://ark.cn-beijing.volces.com/api/v3"
+    # 并发到达的页面合并为批量 LLM 请求
+    batcher = PageBatcher(columns)
+    # 前几页由 LLM 提取后学习站点模板的选择器，后续页面直接解析
+    learner = SelectorLearner(columns)
+    # 记录每个页面的验证器和内容哈希；重抓任务发送条件请求，304 或内容未变的页面跳过提取和输出
+    revalidation = (
+        RevalidationIndex(table_name, columns, skip_unchanged=revalidate) if settings.SPIDER_REVALIDATE else None
+    )
+    # 单写者输出：提取协程把结果放进队列，由一个写协程批量写入三种格式
+    sink = CrawlOutputSink(
+        table_name,
+        columns,
+        csv_path=CSV_DIR / f"{task_id}.csv",
+        sql_path=SQL_DIR / f"{task_id}.sql",
+        jsonl_path=JSONL_DIR / f"{task_id}.jsonl",
+        # 与 SQL 文件中未加引号的 INSERT 一致，表名和列名按 PostgreSQL 规则折叠为小写
+        loader=PgCopyLoader(
+            fold_table_name(table_name),
+            [fold_identifier(col) for col in columns],
+            upsert_keys=[fold_identifier(key) for key in upsert_keys or []],
+        ) if direct_load else None,
     )
 
     # 创建新会话以设置初始状态
@@ -337,109 +389,143 @@ async def generate_sql_from_spider(task_id: uuid.UUID, url: str, table_name: str
         session.commit()
 
     try:
-        # 确定策略：
-        # 如果我们能推断 URL（启发式），我们可以生成所有 URL 并并发运行。
-        # 否则，我们必须顺序（或混合）运行以发现下一页。
-        
-        urls_to_crawl = []
-        
-        # 首先检查启发式
-        first_next_url = get_next_page_url(url, "")
-        
-        if first_next_url and first_next_url != url:
-             # 启发式有效！我们可以预生成 URL
-             # 例如 url="...page=1", next="...page=2"
-             # 我们假设标准递增
-             # 我们可以生成最多 max_pages
-             print("Heuristic URL generation active")
-             base_url = url
-             urls_to_crawl.append(base_url)
-             
-             # 尝试生成后续 URL
-             current_sim_url = base_url
-             for _ in range(max_pages - 1):
-                 next_sim_url = get_next_page_url(current_sim_url, "")
-                 if next_sim_url:
-                     urls_to_crawl.append(next_sim_url)
-                     current_sim_url = next_sim_url
-                 else:
-                     break
-        else:
-            # 启发式失败或不适用，我们仅从第一个 URL 开始
-            # 并依赖 HTML 解析（这意味着我们无法完全预生成）
-            # 但对于请求的“并发”，只有在我们有 URL 时才能并发运行。
-            # 如果我们依赖第 N 页来查找第 N+1 页，则发现阶段的并发实际上为 1。
-            # 但是，如果我们在模拟模式下或拥有列表，我们可以并发运行。
-            urls_to_crawl.append(url)
-
-        # 主循环
-        processed_count = 0
-        current_batch_urls = urls_to_crawl
-        
-        # 如果我们动态发现 URL，可能需要基于队列的方法
-        # 但为了简单起见，让我们处理初始批次 (启发式)
-        # 或者如果启发式失败进入动态循环。
-        
-        if len(current_batch_urls) >= max_pages or len(current_batch_urls) > 1:
-             # 情况 1：我们有足够的 URL（启发式成功），并发运行
-             tasks = []
-             for i, target_url in enumerate(current_batch_urls[:max_pages]):
-                 tasks.append(
-                     process_page(
-                         page_index=i + 1,
-                         url=target_url,
-                         table_name=table_name,
-                         columns=columns,
-                         semaphore=semaphore,
-                         csv_lock=csv_lock,
-                         sql_lock=sql_lock,
-                         client=client,
-                         task_id=task_id,
-                         session_updater=updater
-                     )
-                 )
-             await asyncio.gather(*tasks)
+        await sink.start()
+
+        # 抓取 -> 精简 -> 提取 -> 写入 四个阶段由有界队列串联，各自有并发数和背压，
+        # 网络、CPU 和 LLM 不再共用一个信号量互相等待
+        frontier = UrlFrontier(
+            max_pages,
+            max_depth=settings.SPIDER_FRONTIER_MAX_DEPTH,
+            max_links_per_page=settings.SPIDER_FRONTIER_MAX_LINKS_PER_PAGE,
+        )
+
+        # 确定策略：指定了 URL 列表，或能按 URL 模式推断后续页面（例如 page=1 -> page=2）时，
+        # 全部 URL 直接放入边界；否则只有起始 URL，后续页面靠解析 HTML 发现
+        start_urls = list(seed_urls or [url])
+        if not seed_urls:
+            next_url = get_next_page_url(url, "")
+            while next_url and next_url != start_urls[-1] and len(start_urls) < max_pages:
+                start_urls.append(next_url)
+                next_url = get_next_page_url(next_url, "")
+        for target_url in start_urls[:max_pages]:
+            frontier.add(target_url)
+
+        if len(start_urls) > 1 or max_pages <= 1:
+            # URL 已经齐全，不再扩展链接
+            async def discover(page_url: str, page: FetchedPage) -> list[str]:
+                return []
         else:
-             # 情况 2：发现模式（串行或有限并发）
-             # 我们抓取第 1 页，看是否得到第 2 页，依此类推。
-             current_url = url
-             for i in range(max_pages):
-                 next_url = await process_page(
-                     page_index=i + 1,
-                     url=current_url,
-                     table_name=table_name,
-                     columns=columns,
-                     semaphore=semaphore, # 信号量在这里用处不大，因为我们是串行的
-                     csv_lock=csv_lock,
-                     sql_lock=sql_lock,
-                     client=client,
-                     task_id=task_id,
-                     session_updater=updater
-                 )
-                 
-                 if not next_url:
-                     print("No next page found, stopping.")
-                     break
-                 current_url = next_url
+            # 发现模式：页面一到就解析分页链接加入 URL 边界，
+            # 后续页面的抓取不必等待当前页面的 LLM 提取完成。
+            async def discover(page_url: str, page: FetchedPage) -> list[str]:
+                if page.not_modified:
+                    # 304 没有内容，沿用上次记录的链接
+                    return page.links
+                links = await asyncio.get_running_loop().run_in_executor(
+                    None, get_pagination_links, page_url, page.html_content
+                )
+                if page.next_page_url and page.next_page_url not in links:
+                    links.insert(0, page.next_page_url)
+                page.links = links
+                return links
+
+        def revalidated(page: FetchedPage) -> bool:
+            return revalidation is not None and not is_mock_url(page.url)
+
+        async def fetch(page_index: int, page_url: str) -> FetchedPage:
+            previous = None
+            if revalidation is not None and not is_mock_url(page_url):
+                previous = await asyncio.get_running_loop().run_in_executor(None, revalidation.lookup, page_url)
+            # 只有能跳过的页面才发送条件请求，否则 304 会让页面没有内容可提取
+            conditional = previous if revalidation is not None and revalidation.can_skip(previous) else None
+            page = await fetch_page(page_index, page_url, conditional)
+            page.previous = previous
+            return page
+
+        async def extract(page: FetchedPage) -> tuple[FetchedPage, CrawlRecord | None]:
+            if revalidated(page):
+                if page.status_code == 200 and page.raw_content:
+                    page.content_hash = content_hash(page.raw_content)
+                # 304 或精简后内容未变：跳过 LLM 和输出
+                if revalidation.check(page.previous, page.content_hash, page.not_modified):
+                    return page, None
+            return page, await extract_record(page, columns, batcher, learner)
+
+        async def write(item: tuple[FetchedPage, CrawlRecord | None]):
+            page, record = item
+            loop = asyncio.get_running_loop()
+            if record is not None:
+                # 由 sink 的写协程批量写入 CSV / SQL / JSONL（sink 队列满时在此等待）
+                await sink.write(record)
+            if revalidated(page):
+                if record is None:
+                    await loop.run_in_executor(
+                        None, revalidation.touch, page.url, page.etag, page.last_modified, page.status_code
+                    )
+                elif record.error is None and page.content_hash:
+                    # 提取成功后才保存新哈希，失败的页面下次会重新提取
+                    await loop.run_in_executor(
+                        None, revalidation.save, page.url, page.status_code,
+                        page.content_hash, page.etag, page.last_modified, page.links,
+                    )
+            await updater.increment()
+
+        queue_size = settings.SPIDER_STAGE_QUEUE_SIZE
+        pipeline = StagedPipeline([
+            frontier_fetch_stage(
+                frontier, fetch, discover,
+                settings.SPIDER_FETCH_CONCURRENCY or concurrency, queue_size,
+            ),
+            Stage("reduce", reduce_page, settings.SPIDER_REDUCE_CONCURRENCY, queue_size),
+            # 提取并发至少能凑满一个批量请求
+            Stage(
+                "extract", extract,
+                settings.SPIDER_EXTRACT_CONCURRENCY or max(concurrency, settings.SPIDER_BATCH_MAX_PAGES),
+                queue_size,
+            ),
+            # 进度更新要写数据库，单个协程顺序执行
+            Stage("write", write, 1, queue_size),
+        ])
+        PipelineRegistry.register(task_id, pipeline)
+        await pipeline.run(feed_frontier(frontier, pipeline))
+        logger.info(f"Frontier finished: {frontier.stats()}")
+        logger.info(f"Pipeline stages: {pipeline.stats()}")
+
+        logger.info(f"Page extraction batching: {batcher.stats()}")
+        logger.info(f"Learned selectors: {learner.stats()}")
+        if revalidation is not None:
+            logger.info(f"Revalidation: {revalidation.stats()}")
+
+        # 写完剩余记录后再统计 SQL 文件
+        await sink.close()
+        logger.info(f"Output sink: {sink.stats()}")
 
         # 最终状态更新
         with Session(engine) as session:
             task = session.get(CrawlerTask, task_id)
             if task:
+                # 结果只保留在文件中，任务上记录大小、行数和有限长度的预览
                 sql_file_path = SQL_DIR / f"{task_id}.sql"
                 if sql_file_path.exists():
-                    with open(sql_file_path, "r", encoding="utf-8") as f:
-                        task.result_sql_content = f.read()
-                
+                    task.result_size_bytes = sql_file_path.stat().st_size
+                    task.result_preview = read_preview(sql_file_path, settings.CRAWL_RESULT_PREVIEW_BYTES)
+                task.result_row_count = sink.data_rows
+                if revalidation is not None:
+                    task.revalidation = json.dumps(revalidation.stats())
+
                 task.status = "completed"
                 session.add(task)
                 session.commit()
 
     except Exception as e:
+        try:
+            await sink.close()
+        except Exception as close_error:
+            logger.error(f"Failed to close output sink: {close_error}")
         with Session(engine) as session:
             task = session.get(CrawlerTask, task_id)
             if task:
                 task.status = "failed"
-                task.result_sql_content = f"Error: {str(e)}"
+                task.error_message = f"Error: {str(e)}"
                 session.add(task)
                 session.commit()
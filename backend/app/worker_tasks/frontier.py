@@ -0,0 +1,139 @@
+"""
+URL 边界（frontier）
+
+把链接发现与数据提取拆成两个阶段：抓取协程拿到 HTML 后立即解析分页链接并加入边界，
+页面再放入提取队列交给（更慢的）LLM 阶段，抓取因此可以跑在提取前面，
+不再出现“抓第 N 页 -> 等 LLM -> 才知道第 N+1 页”的串行等待。
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from app.worker_tasks.stages import Stage, StagedPipeline
+
+# 规范化时去掉的跟踪参数
+TRACKING_PARAMS = {"spm", "ref", "fbclid", "gclid"}
+TRACKING_PARAM_PREFIXES = ("utm_",)
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    规范化 URL 以便去重：协议和主机小写、去掉默认端口和片段、
+    去掉跟踪参数并按名称排序查询参数。
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith(TRACKING_PARAM_PREFIXES)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class UrlFrontier:
+    """
+    去重的待抓取 URL 队列，带页数、深度和每页扩展链接数限制。
+
+    参数:
+        max_pages: 最多接纳的 URL 数（包括起始 URL）
+        max_depth: 距起始 URL 的最大链接深度，None 表示不限
+        max_links_per_page: 每个页面最多扩展的新链接数（广度限制）
+    """
+
+    def __init__(self, max_pages: int, max_depth: Optional[int] = None, max_links_per_page: int = 10):
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.max_links_per_page = max_links_per_page
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._seen: Set[str] = set()
+        self.admitted = 0
+        self.duplicates = 0
+        self.rejected = 0
+
+    def add(self, url: str, depth: int = 0) -> bool:
+        """加入一个 URL；重复或超出限制时返回 False。"""
+        key = normalize_url(url)
+        if key in self._seen:
+            self.duplicates += 1
+            return False
+        if self.admitted >= self.max_pages or (self.max_depth is not None and depth > self.max_depth):
+            self.rejected += 1
+            return False
+        self._seen.add(key)
+        self._queue.put_nowait((self.admitted + 1, url, depth))
+        self.admitted += 1
+        return True
+
+    def add_links(self, links: Iterable[str], depth: int) -> int:
+        """加入一个页面上发现的链接，返回实际加入的数量。"""
+        added = 0
+        for link in links:
+            if added >= self.max_links_per_page:
+                break
+            if self.add(link, depth):
+                added += 1
+        return added
+
+    async def get(self) -> Tuple[int, str, int]:
+        """返回 (页面序号, URL, 深度)。"""
+        return await self._queue.get()
+
+    def task_done(self):
+        self._queue.task_done()
+
+    async def join(self):
+        await self._queue.join()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "admitted": self.admitted,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "pending": self._queue.qsize(),
+        }
+
+
+def frontier_fetch_stage(
+    frontier: UrlFrontier,
+    fetch: Callable[[int, str], Awaitable[Any]],
+    discover: Callable[[str, Any], Awaitable[Iterable[str]]],
+    concurrency: int,
+    queue_size: Optional[int] = None,
+) -> Stage:
+    """
+    由边界驱动的抓取阶段：抓到页面后先扩展链接再把页面交给下游，下一页的抓取不等待提取。
+
+    参数:
+        fetch: fetch(页面序号, URL) -> 页面；返回 None 表示抓取失败
+        discover: discover(URL, 页面) -> 页面上的后续链接
+    """
+    async def handler(item: Tuple[int, str, int]):
+        page_index, url, depth = item
+        try:
+            page = await fetch(page_index, url)
+            if page is not None:
+                frontier.add_links(await discover(url, page), depth + 1)
+            return page
+        finally:
+            frontier.task_done()
+
+    return Stage("fetch", handler, concurrency, queue_size)
+
+
+async def feed_frontier(frontier: UrlFrontier, pipeline: StagedPipeline):
+    """把边界中的 URL 送入流水线，直到边界为空且所有已接纳的 URL 都抓取完成。"""
+    async def feeder():
+        while True:
+            await pipeline.put(await frontier.get())
+
+    task = asyncio.create_task(feeder())
+    try:
+        await frontier.join()
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,250 @@
+"""
+链接提取与下一页识别
+
+只用预编译的正则扫描 <a> / <link> 标签，不构建完整的 DOM 树。
+候选的下一页链接按以下信号打分：rel="next"、链接文字、是否位于分页容器内、
+页码序列（文字为当前页码 + 1）以及与当前 URL 的相似度（只差一个递增的数字）。
+"""
+import html as html_lib
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qsl, urljoin, urlsplit
+
+ANCHOR_RE = re.compile(r"<a\b([^>]*)>(.*?)</a\s*>", re.IGNORECASE | re.DOTALL)
+LINK_TAG_RE = re.compile(r"<link\b([^>]*)>", re.IGNORECASE)
+ATTR_RE = re.compile(r"""([a-zA-Z_:][-\w:.]*)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+TAG_RE = re.compile(r"<[^>]+>")
+WHITESPACE_RE = re.compile(r"\s+")
+# 分页容器的起始标签（class / id 中包含 pagination、pager 等）
+CONTAINER_TAGS = ("nav", "div", "ul", "ol", "section", "p", "span", "td")
+PAGINATION_CONTAINER_RE = re.compile(
+    rf"""<({"|".join(CONTAINER_TAGS)})\b[^>]*?(?:class|id)\s*=\s*["'][^"']*"""
+    r"""(?:pagination|pager|paging|page-nav|pagenav|pagelist|page-list|pages)[^"']*["']""",
+    re.IGNORECASE,
+)
+# 用于查找分页容器闭合标签的同名标签模式
+CONTAINER_TAG_RES = {tag: re.compile(rf"<(/?){tag}\b", re.IGNORECASE) for tag in CONTAINER_TAGS}
+# 分页容器最多覆盖的字符数（找不到闭合标签时的上限）
+PAGINATION_WINDOW = 4000
+NUMBER_RE = re.compile(r"\d+")
+# URL 中的页码参数
+PAGE_NUMBER_PATTERNS = [
+    re.compile(r"[?&](?:page|p|pg|pn|pageno|page_no|pagenum)=(\d+)", re.IGNORECASE),
+    re.compile(r"/page/(\d+)", re.IGNORECASE),
+    re.compile(r"[-_/]p(?:age)?[-_]?(\d+)(?:\.html?)?/?$", re.IGNORECASE),
+]
+
+NEXT_TEXTS = {"next", "next page", "next »", "next >", "下一页", "下页", "后一页", "下一頁", "›", "»", ">", ">>", "→"}
+NEXT_WORDS = ("next", "下一页", "下页", "后一页")
+PREV_WORDS = ("prev", "previous", "上一页", "上页", "前一页", "‹", "«", "<", "first", "首页", "last", "末页", "尾页")
+
+# 低于该分数的候选不视为下一页
+MIN_NEXT_SCORE = 20.0
+
+
+@dataclass
+class Link:
+    href: str
+    text: str
+    rel: List[str] = field(default_factory=list)
+    classes: str = ""
+    position: int = 0
+    in_pagination: bool = False
+
+
+def _attributes(raw: str) -> dict:
+    attrs = {}
+    for match in ATTR_RE.finditer(raw):
+        value = match.group(2) if match.group(2) is not None else (
+            match.group(3) if match.group(3) is not None else match.group(4)
+        )
+        attrs[match.group(1).lower()] = html_lib.unescape(value)
+    return attrs
+
+
+def _pagination_spans(html_content: str) -> List[Tuple[int, int]]:
+    """分页容器在文档中的 (起始, 结束) 位置，按同名标签的嵌套层级找闭合标签。"""
+    spans = []
+    for match in PAGINATION_CONTAINER_RE.finditer(html_content):
+        tag_re = CONTAINER_TAG_RES[match.group(1).lower()]
+        limit = min(len(html_content), match.start() + PAGINATION_WINDOW)
+        depth = 0
+        end = limit
+        for tag in tag_re.finditer(html_content, match.start(), limit):
+            depth += -1 if tag.group(1) else 1
+            if depth == 0:
+                end = tag.end()
+                break
+        spans.append((match.start(), end))
+    return spans
+
+
+def _has_pagination_signal(href: str, text: str, rel: str, classes: str, in_pagination: bool, next_number: str) -> bool:
+    """廉价的预筛选：没有任何分页信号的链接不必解析 URL 和打分。"""
+    if in_pagination or "next" in rel or "prev" in rel or "next" in classes or next_number in href:
+        return True
+    text = text.lower()
+    return text.isdigit() or text in NEXT_TEXTS or any(word in text for word in NEXT_WORDS) or "more" in text
+
+
+def extract_links(base_url: str, html_content: str, candidates_only: bool = False) -> List[Link]:
+    """
+    提取页面上所有带 href 的 <a> 标签和 <link rel="next">，href 转换为绝对地址。
+
+    参数:
+        candidates_only: 只返回带分页信号的链接（rel、链接文字、分页容器、下一页页码），
+            跳过商品卡片等普通链接的 URL 解析
+    """
+    if not html_content:
+        return []
+
+    next_number = str((current_page_number(base_url) or 1) + 1)
+    spans = _pagination_spans(html_content)
+    links: List[Link] = []
+
+    for match in LINK_TAG_RE.finditer(html_content):
+        attrs = _attributes(match.group(1))
+        rel = attrs.get("rel", "").lower().split()
+        if "next" in rel and attrs.get("href"):
+            links.append(Link(
+                href=urljoin(base_url, attrs["href"].strip()),
+                text="",
+                rel=rel,
+                position=match.start(),
+            ))
+
+    span_index = 0
+    for match in ANCHOR_RE.finditer(html_content):
+        attrs = _attributes(match.group(1))
+        href = attrs.get("href", "").strip()
+        if not href or href.startswith(("#", "javascript:", "mailto:", "tel:")):
+            continue
+
+        position = match.start()
+        while span_index < len(spans) and spans[span_index][1] <= position:
+            span_index += 1
+        in_pagination = span_index < len(spans) and spans[span_index][0] <= position
+
+        text = WHITESPACE_RE.sub(" ", html_lib.unescape(TAG_RE.sub(" ", match.group(2)))).strip()
+        if not text:
+            text = attrs.get("aria-label") or attrs.get("title") or ""
+        rel = attrs.get("rel", "").lower()
+        classes = f"{attrs.get('class', '')} {attrs.get('id', '')}".lower()
+        if candidates_only and not _has_pagination_signal(href, text, rel, classes, in_pagination, next_number):
+            continue
+        links.append(Link(
+            href=urljoin(base_url, href),
+            text=text,
+            rel=rel.split(),
+            classes=classes,
+            position=position,
+            in_pagination=in_pagination,
+        ))
+    return links
+
+
+def current_page_number(url: str) -> Optional[int]:
+    """从 URL 中识别当前页码，识别不到返回 None。"""
+    for pattern in PAGE_NUMBER_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return int(match.group(1))
+    return None
+
+
+def _numeric_step(current_url: str, candidate_url: str) -> Optional[int]:
+    """
+    两个 URL 只有一个数字不同时，返回候选 URL 中该数字减去当前 URL 中数字的差值。
+    """
+    current_parts = NUMBER_RE.split(current_url)
+    candidate_parts = NUMBER_RE.split(candidate_url)
+    if current_parts != candidate_parts:
+        return None
+    current_numbers = NUMBER_RE.findall(current_url)
+    candidate_numbers = NUMBER_RE.findall(candidate_url)
+    diffs = [(int(b) - int(a)) for a, b in zip(current_numbers, candidate_numbers) if a != b]
+    return diffs[0] if len(diffs) == 1 else None
+
+
+def score_next_link(current_url: str, link: Link, current_page: Optional[int] = None) -> float:
+    """给候选链接打分，分数越高越可能是下一页。不同主机或指向当前页的链接返回负无穷。"""
+    current = urlsplit(current_url)
+    candidate = urlsplit(link.href)
+    if candidate.scheme not in ("http", "https") or candidate.netloc != current.netloc:
+        return float("-inf")
+    if link.href.split("#")[0] == current_url.split("#")[0]:
+        return float("-inf")
+
+    score = 0.0
+    text = link.text.lower()
+
+    if "next" in link.rel:
+        score += 100
+    if "prev" in link.rel or "previous" in link.rel:
+        score -= 100
+
+    if text in NEXT_TEXTS:
+        score += 40
+    elif any(word in text for word in NEXT_WORDS):
+        score += 30
+    elif any(word in text for word in PREV_WORDS):
+        score -= 60
+    elif "more" in text:
+        score += 5
+    if "next" in link.classes:
+        score += 20
+    elif "prev" in link.classes:
+        score -= 40
+
+    if link.in_pagination:
+        score += 15
+
+    page = current_page if current_page is not None else (current_page_number(current_url) or 1)
+    if text.isdigit():
+        number = int(text)
+        if number == page + 1:
+            score += 30
+        elif link.in_pagination:
+            # 其他页码：有用的分页链接，但不是下一页
+            score -= 10
+
+    if candidate.path == current.path:
+        score += 5
+        current_keys = {key for key, _ in parse_qsl(current.query)}
+        candidate_keys = {key for key, _ in parse_qsl(candidate.query)}
+        if current_keys and current_keys <= candidate_keys:
+            score += 5
+    step = _numeric_step(current_url, link.href)
+    if step == 1:
+        score += 25
+    elif step is not None and step < 0:
+        score -= 30
+
+    return score
+
+
+def find_next_page_url(current_url: str, html_content: str, min_score: float = MIN_NEXT_SCORE) -> Optional[str]:
+    """返回得分最高的下一页链接；没有候选达到 min_score 时返回 None。"""
+    page = current_page_number(current_url) or 1
+    best_url, best_score = None, min_score
+    for link in extract_links(current_url, html_content, candidates_only=True):
+        score = score_next_link(current_url, link, page)
+        # 分数相同时保留文档中靠前的链接
+        if score > best_score or (best_url is None and score == best_score):
+            best_url, best_score = link.href, score
+    return best_url
+
+
+def find_pagination_links(current_url: str, html_content: str) -> List[str]:
+    """同一主机上的分页链接（数字页码和得分足够的下一页候选），按文档顺序去重。"""
+    host = urlsplit(current_url).netloc
+    page = current_page_number(current_url) or 1
+    links = []
+    for link in extract_links(current_url, html_content, candidates_only=True):
+        if urlsplit(link.href).netloc != host or link.href in links:
+            continue
+        is_page_number = link.text.isdigit() and len(link.text) <= 4
+        if is_page_number or score_next_link(current_url, link, page) >= MIN_NEXT_SCORE:
+            links.append(link.href)
+    return links
@@ -0,0 +1,284 @@
+"""
+爬取结果的单写者输出
+
+每个任务一个 CrawlOutputSink：提取协程只把记录放进有界队列，由唯一的写协程按批取出，
+写入常驻打开的带缓冲文件（CSV / SQL / JSONL 三种格式来自同一条记录流）。
+不再每行加锁、每行重新打开文件，CSV 表头也只会由写协程写一次。
+
+落盘策略（CRAWL_SINK_FSYNC）：
+- none：每批只 flush 到操作系统
+- batch：每批 flush 后 fsync
+- close：关闭时 fsync 一次（默认）
+
+传入 PgCopyLoader 时，同一批记录中提取成功的行还会通过 COPY 直接写入目标表
+（列名按 PostgreSQL 对未加引号标识符的规则折叠为小写）。
+"""
+import asyncio
+import csv
+import io
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.bulk_loader import PgCopyLoader, fold_identifier
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+METADATA_FIELDS = ["page_index", "url", "status"]
+# 文件缓冲区大小
+BUFFER_SIZE = 64 * 1024
+
+_CLOSE = object()
+
+
+@dataclass
+class CrawlRecord:
+    """
+    一个页面的提取结果。
+
+    data 为空表示提取失败，此时 error 记录原因；CSV 中只保留元数据列。
+    """
+    page_index: int
+    url: str
+    status: int
+    data: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+
+def render_sql(table_name: str, record: CrawlRecord) -> str:
+    """把记录转换为 INSERT 语句（空值列省略）；没有数据时返回注释。"""
+    if record.data is None:
+        return f"-- Error extracting data for {record.url}: {record.error}"
+
+    cols = []
+    vals = []
+    for k, v in record.data.items():
+        if v is not None:
+            cols.append(k)
+            # 为 SQL 转义单引号
+            escaped_val = str(v).replace("'", "''")
+            vals.append(f"'{escaped_val}'")
+
+    if cols:
+        return f"INSERT INTO {table_name} ({', '.join(cols)}) VALUES ({', '.join(vals)});"
+    return f"-- No data could be extracted for {record.url}"
+
+
+def has_values(record: CrawlRecord) -> bool:
+    """记录是否有可写入数据库的数据（至少一个非空列）。"""
+    return bool(record.data) and any(value is not None for value in record.data.values())
+
+
+def read_preview(path: Path, limit: int) -> str:
+    """文件开头最多 limit 字节的预览；被截断时尽量截在语句之间的空行处。"""
+    with open(path, "rb") as f:
+        head = f.read(limit + 1)
+    text = head[:limit].decode("utf-8", errors="ignore")
+    if len(head) > limit:
+        boundary = text.rfind("\n\n")
+        if boundary > 0:
+            text = text[:boundary + 2]
+    return text
+
+
+def render_json(record: CrawlRecord) -> str:
+    row: Dict[str, Any] = {"page_index": record.page_index, "url": record.url, "status": record.status}
+    if record.data is not None:
+        row["data"] = record.data
+    if record.error is not None:
+        row["error"] = record.error
+    return json.dumps(row, ensure_ascii=False, default=str)
+
+
+class CrawlOutputSink:
+    """
+    用法:
+        sink = CrawlOutputSink(table_name, columns, csv_path, sql_path, jsonl_path)
+        await sink.start()
+        try:
+            await sink.write(record)  # 队列满时等待（背压）
+        finally:
+            await sink.close()
+
+    参数:
+        jsonl_path: 为空时不输出 JSONL
+        loader: 直接入库的 COPY 加载器（可选），随 sink 启动和关闭
+        queue_size / flush_rows / flush_seconds / fsync: 为空时读取 CRAWL_SINK_* 配置
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        columns: List[str],
+        csv_path: Path,
+        sql_path: Path,
+        jsonl_path: Optional[Path] = None,
+        queue_size: Optional[int] = None,
+        flush_rows: Optional[int] = None,
+        flush_seconds: Optional[float] = None,
+        fsync: Optional[str] = None,
+        loader: Optional[PgCopyLoader] = None,
+    ):
+        self.table_name = table_name
+        self.fieldnames = METADATA_FIELDS + [col for col in columns if col not in METADATA_FIELDS]
+        self.csv_path = csv_path
+        self.sql_path = sql_path
+        self.jsonl_path = jsonl_path
+        self.columns = columns
+        self.loader = loader
+        self.flush_rows = max(1, flush_rows or settings.CRAWL_SINK_FLUSH_ROWS)
+        self.flush_seconds = settings.CRAWL_SINK_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self.fsync = fsync or settings.CRAWL_SINK_FSYNC
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or settings.CRAWL_SINK_QUEUE_SIZE)
+        self._files: List[io.TextIOWrapper] = []
+        self._csv_writer: Optional[csv.DictWriter] = None
+        self._sql_file: Optional[io.TextIOWrapper] = None
+        self._jsonl_file: Optional[io.TextIOWrapper] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        # 文件和数据库的写入错误分开记录：入库失败后文件照常写完
+        self._file_error: Optional[BaseException] = None
+        self._load_error: Optional[BaseException] = None
+        self._closed = False
+
+        # 统计
+        self.rows = 0
+        self.data_rows = 0
+        self.batches = 0
+        self.fsyncs = 0
+
+    def _open(self):
+        csv_file = open(self.csv_path, "a", newline="", encoding="utf-8", buffering=BUFFER_SIZE)
+        self._files.append(csv_file)
+        self._csv_writer = csv.DictWriter(csv_file, fieldnames=self.fieldnames, extrasaction="ignore")
+        if csv_file.tell() == 0:
+            self._csv_writer.writeheader()
+        self._sql_file = open(self.sql_path, "a", encoding="utf-8", buffering=BUFFER_SIZE)
+        self._files.append(self._sql_file)
+        if self.jsonl_path is not None:
+            self._jsonl_file = open(self.jsonl_path, "a", encoding="utf-8", buffering=BUFFER_SIZE)
+            self._files.append(self._jsonl_file)
+
+    async def start(self):
+        await asyncio.get_running_loop().run_in_executor(None, self._open)
+        if self.loader is not None:
+            await self.loader.start()
+        self._writer_task = asyncio.create_task(self._run())
+
+    async def write(self, record: CrawlRecord):
+        if self._closed:
+            raise RuntimeError("Crawl output sink is closed")
+        await self._queue.put(record)
+
+    def _write_batch(self, batch: List[CrawlRecord]):
+        rows = []
+        sql = []
+        for record in batch:
+            rows.append({
+                "page_index": record.page_index,
+                "url": record.url,
+                "status": record.status,
+                **(record.data or {}),
+            })
+            sql.append(render_sql(self.table_name, record) + "\n\n")
+        self._csv_writer.writerows(rows)
+        self._sql_file.write("".join(sql))
+        if self._jsonl_file is not None:
+            self._jsonl_file.write("".join(render_json(record) + "\n" for record in batch))
+
+        for f in self._files:
+            f.flush()
+            if self.fsync == "batch":
+                os.fsync(f.fileno())
+        if self.fsync == "batch":
+            self.fsyncs += 1
+        self.rows += len(batch)
+        self.data_rows += sum(1 for record in batch if has_values(record))
+        self.batches += 1
+
+    def _close_files(self):
+        for f in self._files:
+            try:
+                f.flush()
+                if self.fsync in ("batch", "close"):
+                    os.fsync(f.fileno())
+            finally:
+                f.close()
+        if self._files and self.fsync in ("batch", "close"):
+            self.fsyncs += 1
+        self._files = []
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        batch: List[CrawlRecord] = []
+        closing = False
+        while not closing:
+            try:
+                if batch:
+                    item = await asyncio.wait_for(self._queue.get(), timeout=self.flush_seconds)
+                else:
+                    item = await self._queue.get()
+            except asyncio.TimeoutError:
+                item = None
+            if item is _CLOSE:
+                closing = True
+            elif item is not None:
+                batch.append(item)
+                # 顺带取走已经排队的记录
+                while len(batch) < self.flush_rows and not self._queue.empty():
+                    queued = self._queue.get_nowait()
+                    if queued is _CLOSE:
+                        closing = True
+                        break
+                    batch.append(queued)
+
+            if batch and (closing or item is None or len(batch) >= self.flush_rows):
+                # 出错后继续消费队列，避免提取协程在 write() 上永久阻塞；close() 时抛出
+                if self._file_error is None:
+                    try:
+                        await loop.run_in_executor(None, self._write_batch, batch)
+                    except Exception as e:
+                        logger.error(f"Crawl output sink write failed: {e}")
+                        self._file_error = e
+                if self.loader is not None and self._load_error is None:
+                    try:
+                        await self.loader.copy_rows(
+                            {fold_identifier(col): record.data.get(col) for col in self.columns}
+                            for record in batch
+                            if has_values(record)
+                        )
+                    except Exception as e:
+                        logger.error(f"Crawl output direct load failed, continuing with files only: {e}")
+                        self._load_error = e
+                batch = []
+
+    async def close(self):
+        """写完队列中剩余的记录并关闭文件；写文件或入库曾经失败时抛出该异常（文件错误优先）。"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer_task is not None:
+            await self._queue.put(_CLOSE)
+            await self._writer_task
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._close_files)
+        finally:
+            if self.loader is not None:
+                await self.loader.close()
+        if self._file_error is not None:
+            raise self._file_error
+        if self._load_error is not None:
+            raise self._load_error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "data_rows": self.data_rows,
+            "batches": self.batches,
+            "fsyncs": self.fsyncs,
+            "pending": self._queue.qsize(),
+            **({"direct_load": self.loader.stats()} if self.loader is not None else {}),
+        }
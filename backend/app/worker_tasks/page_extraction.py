@@ -0,0 +1,239 @@
+"""
+手动爬取模式的页面字段提取
+
+单页提取：每个页面一次 chat completion（原有提示词）。
+批量提取：PageBatcher 把同时等待提取的多个页面（精简后的内容）按 token 预算打包进一个请求，
+共用一份指令，模型按页面键（page_<序号>）返回各自的结果。
+批量请求失败时自动对半拆分重试，拆到单页后使用单页提取；结果中缺失的页面也单独补提。
+"""
+import asyncio
+import json
+import logging
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.llm_client import LlmClient, LlmRequestError
+from app.industrial_pipeline.content_reducer import estimate_tokens
+
+if TYPE_CHECKING:
+    from app.worker_tasks.crawler import FetchedPage
+
+logger = logging.getLogger(__name__)
+
+SYSTEM_PROMPT = "You are a precise data extractor that outputs only JSON."
+
+GUIDELINES = """Guidelines:
+    1. Look for the most prominent data matching the columns.
+    2. For 'title' or 'name', look for <h1>, <h2>, <h3> or <a> tags with descriptive text.
+    3. For 'price', look for currency symbols ($, £, ¥) or numeric values near 'price' keywords.
+    4. If the page is a LISTING page (like a search result or category page), extract the details of the FIRST product/item you see.
+    5. If a piece of information (like 'description' or 'category') is NOT present on this specific page, return null for that field.
+    6. Use the Metadata for 'url' or 'page_index' if they are requested in the columns."""
+
+# 批量请求中每个页面的标题、元数据等额外开销（估算）
+PAGE_OVERHEAD_TOKENS = 60
+
+
+def _metadata(page: "FetchedPage") -> str:
+    return f"Page Index: {page.page_index}, URL: {page.url}, Status: {page.status_code}"
+
+
+def page_key(page: "FetchedPage") -> str:
+    return f"page_{page.page_index}"
+
+
+def build_page_prompt(page: "FetchedPage", columns: List[str]) -> str:
+    return f"""
+    You are a data extraction expert. Your task is to extract structured data from the provided HTML/JSON content.
+
+    Target Site: {page.url}
+    Columns to extract: {", ".join(columns)}
+
+    {GUIDELINES}
+
+    Return ONLY a valid JSON object. Do not include markdown formatting.
+
+    Metadata:
+    {_metadata(page)}
+
+    Page Content (main content as compact markdown, repeated items collapsed):
+    {page.raw_content}
+
+    Response format: {{"column1": "value1", "column2": "value2", ...}}
+    """
+
+
+def build_batch_prompt(pages: List["FetchedPage"], columns: List[str]) -> str:
+    sections = "\n\n".join(
+        f"=== {page_key(page)} ===\nMetadata: {_metadata(page)}\nPage Content:\n{page.raw_content}"
+        for page in pages
+    )
+    keys = ", ".join(f'"{page_key(page)}"' for page in pages)
+    return f"""
+    You are a data extraction expert. Extract structured data from EACH of the pages below independently.
+
+    Columns to extract: {", ".join(columns)}
+
+    {GUIDELINES}
+
+    Each page starts with a "=== page_<n> ===" header followed by its metadata and content
+    (main content as compact markdown, repeated items collapsed).
+
+    Return ONLY a valid JSON object with exactly these keys: {keys}.
+    Each value is the object extracted from that page, e.g. {{"page_1": {{"column1": "value1", ...}}, "page_2": {{...}}}}
+
+{sections}
+    """
+
+
+async def _complete(prompt: str, call_site: str) -> Dict[str, Any]:
+    response = await LlmClient.chat_completion({
+        "model": settings.VOLC_DEEPSEEK_MODEL_ID,
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": prompt}
+        ],
+        "stream": False,
+        "response_format": { "type": "json_object" }
+    }, call_site=call_site)
+    content = response["choices"][0]["message"]["content"]
+    data = json.loads(content)
+    if not isinstance(data, dict):
+        raise json.JSONDecodeError("Expected a JSON object", content, 0)
+    return data
+
+
+async def extract_page_fields(page: "FetchedPage", columns: List[str]) -> Dict[str, Any]:
+    """
+    单页提取。
+
+    异常:
+        LlmRequestError / json.JSONDecodeError: 调用或解析失败
+    """
+    return await _complete(build_page_prompt(page, columns), "spider.process_page")
+
+
+class PageBatcher:
+    """
+    把并发等待提取的页面打包成批量请求。
+
+    参数:
+        columns: 需要提取的列
+        token_budget: 单个批量请求的页面内容 token 上限
+        max_pages: 单个批量请求最多包含的页面数，1 表示不批量
+        linger_seconds: 凑批等待时间，到时即使未满也发送
+    """
+
+    def __init__(
+        self,
+        columns: List[str],
+        token_budget: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        linger_seconds: Optional[float] = None,
+    ):
+        self.columns = columns
+        self.token_budget = token_budget or settings.SPIDER_BATCH_TOKEN_BUDGET
+        self.max_pages = max_pages or settings.SPIDER_BATCH_MAX_PAGES
+        self.linger_seconds = settings.SPIDER_BATCH_LINGER_SECONDS if linger_seconds is None else linger_seconds
+        self._pending: List[Tuple["FetchedPage", asyncio.Future]] = []
+        self._pending_tokens = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+        # 统计
+        self.pages = 0
+        self.requests = 0
+        self.batched_requests = 0
+        self.splits = 0
+        self.single_fallbacks = 0
+
+    async def extract(self, page: "FetchedPage") -> Dict[str, Any]:
+        """提取一个页面的字段；与同时到达的其他页面合并为一个请求。"""
+        self.pages += 1
+        tokens = estimate_tokens(page.raw_content) + PAGE_OVERHEAD_TOKENS
+        if self.max_pages <= 1 or tokens * 2 > self.token_budget:
+            # 放不下第二个页面，直接单页提取
+            self.requests += 1
+            return await extract_page_fields(page, self.columns)
+
+        if self._pending and self._pending_tokens + tokens > self.token_budget:
+            self._flush()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((page, future))
+        self._pending_tokens += tokens
+        if len(self._pending) >= self.max_pages:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.linger_seconds, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending, self._pending_tokens = self._pending, [], 0
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple["FetchedPage", asyncio.Future]]):
+        try:
+            results = await self._extract_batch([page for page, _ in batch])
+        except Exception as e:
+            results = [e] * len(batch)
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def _extract_batch(self, pages: List["FetchedPage"]) -> List[Any]:
+        """返回与 pages 一一对应的结果；单个页面失败时对应位置为异常对象。"""
+        if len(pages) == 1:
+            self.requests += 1
+            try:
+                return [await extract_page_fields(pages[0], self.columns)]
+            except Exception as e:
+                return [e]
+
+        self.requests += 1
+        self.batched_requests += 1
+        try:
+            data = await _complete(build_batch_prompt(pages, self.columns), "spider.batch")
+        except (LlmRequestError, json.JSONDecodeError, KeyError, IndexError) as e:
+            # 对半拆分重试（例如超出上下文长度或输出被截断）
+            logger.warning(f"Batched extraction of {len(pages)} pages failed ({e}), splitting")
+            self.splits += 1
+            middle = len(pages) // 2
+            left, right = await asyncio.gather(
+                self._extract_batch(pages[:middle]),
+                self._extract_batch(pages[middle:]),
+            )
+            return left + right
+
+        results: List[Any] = [data.get(page_key(page)) for page in pages]
+        missing = [i for i, result in enumerate(results) if not isinstance(result, dict)]
+        if missing:
+            # 模型漏掉的页面单独补提
+            self.single_fallbacks += len(missing)
+            retried = await asyncio.gather(*(self._extract_batch([pages[i]]) for i in missing))
+            for i, (result,) in zip(missing, retried):
+                results[i] = result
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pages": self.pages,
+            "requests": self.requests,
+            "batched_requests": self.batched_requests,
+            "splits": self.splits,
+            "single_fallbacks": self.single_fallbacks,
+            "requests_per_page": round(self.requests / self.pages, 3) if self.pages else 0.0,
+        }
+
@@ -0,0 +1,276 @@
+"""
+自适应重抓调度
+
+固定间隔的定时重抓对稳定页面和频繁变化的页面一视同仁。这里按 CrawlIndex 中记录的变化历史
+估计每个 URL 的变化率 λ（泊松过程，见 revalidation.estimate_change_rate），
+在全局抓取预算内优先重抓“每次抓取带来的新鲜度最多”的页面：
+
+    priority = P(已变化) * 抓取后保持新鲜的比例
+             = (1 - e^(-λ·age)) * (1 - e^(-λ·H)) / (λ·H)
+
+age 为距上次检查的时间，H 为按预算平均多久能轮到一次（页面数 / 每日预算）。
+第一项优先很可能已经过期的页面；第二项压低变化快到抓了也很快又过期的页面，
+把预算留给抓一次能新鲜较久的页面。
+
+预算和正在重抓的 URL 都按数据库中调度器创建的 CrawlerTask（recrawl_urls）统计，
+服务重启后不会清零，多个 worker 各自运行调度时共享同一份预算；
+每次调度在 PostgreSQL advisory 锁内完成选页和建任务，并发的调度依次执行。
+"""
+import asyncio
+import json
+import logging
+import math
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import text
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models import CrawlerTask, CrawlIndex
+from app.worker_tasks.crawler import generate_sql_from_spider
+
+logger = logging.getLogger(__name__)
+
+DAY_SECONDS = 86400
+# 串行化各 worker 调度的 advisory 锁键
+RECRAWL_LOCK_KEY = 0x52454352
+# 这些状态的重抓任务已结束，其 URL 不再视为在途
+FINISHED_STATUSES = ("completed", "failed")
+
+
+@dataclass
+class RecrawlCandidate:
+    url: str
+    crawl_spec: str
+    change_rate: Optional[float]  # 次/天，None 表示还没有变化历史
+    last_checked_at: datetime
+
+
+@dataclass
+class PlannedRecrawl:
+    url: str
+    crawl_spec: str
+    change_rate: float  # 实际使用的变化率（含先验和下限）
+    age_days: float
+    stale_probability: float
+    priority: float
+
+
+def recrawl_priority(change_rate: float, age_days: float, horizon_days: float) -> float:
+    """见模块说明；change_rate 和时间单位均为天。"""
+    stale = 1 - math.exp(-change_rate * age_days)
+    x = change_rate * horizon_days
+    # x 很小时 (1 - e^-x) / x -> 1
+    kept_fresh = (1 - math.exp(-x)) / x if x > 1e-9 else 1.0
+    return stale * kept_fresh
+
+
+def plan_recrawls(
+    candidates: List[RecrawlCandidate],
+    now: datetime,
+    daily_budget: int,
+    in_flight: Optional[Set[str]] = None,
+) -> List[PlannedRecrawl]:
+    """
+    为候选页面计算优先级，返回按优先级从高到低排序的全部可重抓页面，
+    调用方按本次预算取前若干个。未到最短检查间隔的页面和 in_flight 中正在重抓的页面不参与。
+    """
+    min_rate = 1 / settings.RECRAWL_MAX_INTERVAL_DAYS
+    min_age_days = settings.RECRAWL_MIN_INTERVAL_HOURS / 24
+    in_flight = in_flight or set()
+
+    eligible = []
+    for candidate in candidates:
+        age_days = (now - candidate.last_checked_at).total_seconds() / DAY_SECONDS
+        if age_days >= min_age_days and candidate.url not in in_flight:
+            eligible.append((candidate, age_days))
+    # 只按本次可重抓的页面估计多久能轮到一次
+    horizon_days = max(settings.RECRAWL_TICK_SECONDS / DAY_SECONDS, len(eligible) / max(1, daily_budget))
+
+    planned = []
+    for candidate, age_days in eligible:
+        rate = candidate.change_rate if candidate.change_rate is not None else settings.RECRAWL_DEFAULT_CHANGE_RATE
+        rate = max(rate, min_rate)
+        planned.append(PlannedRecrawl(
+            url=candidate.url,
+            crawl_spec=candidate.crawl_spec,
+            change_rate=rate,
+            age_days=age_days,
+            stale_probability=1 - math.exp(-rate * age_days),
+            priority=recrawl_priority(rate, age_days, horizon_days),
+        ))
+    planned.sort(key=lambda item: item.priority, reverse=True)
+    return planned
+
+
+def load_candidates() -> List[RecrawlCandidate]:
+    """读取手动爬虫抓过的页面（有 crawl_spec 和检查时间）。"""
+    with Session(engine) as session:
+        rows = session.exec(
+            select(
+                CrawlIndex.original_url,
+                CrawlIndex.crawl_spec,
+                CrawlIndex.change_rate,
+                CrawlIndex.last_checked_at,
+            ).where(CrawlIndex.crawl_spec.is_not(None), CrawlIndex.last_checked_at.is_not(None))
+        ).all()
+    return [RecrawlCandidate(*row) for row in rows]
+
+
+def recrawl_usage(session: Session) -> Tuple[int, Set[str]]:
+    """
+    最近 24 小时内调度器派发的页面数，以及其中尚未结束的任务正在重抓的 URL。
+    进程中途退出时任务停留在处理中，其 URL 最多在 24 小时后重新参与调度。
+    """
+    since = datetime.now() - timedelta(seconds=DAY_SECONDS)
+    rows = session.exec(
+        select(CrawlerTask.status, CrawlerTask.recrawl_urls)
+        .where(CrawlerTask.recrawl_urls.is_not(None), CrawlerTask.created_at >= since)
+    ).all()
+    used = 0
+    in_flight: Set[str] = set()
+    for status, recrawl_urls in rows:
+        urls = json.loads(recrawl_urls)
+        used += len(urls)
+        if status not in FINISHED_STATUSES:
+            in_flight.update(urls)
+    return used, in_flight
+
+
+def tick_budget(used: int) -> int:
+    """本次调度可用的抓取量：按调度间隔分摊的每日预算，且不超过 24 小时内的剩余量。"""
+    daily = settings.RECRAWL_DAILY_FETCH_BUDGET
+    per_tick = math.ceil(daily * settings.RECRAWL_TICK_SECONDS / DAY_SECONDS)
+    return max(0, min(per_tick, daily - used))
+
+
+def reserve_recrawls(now: datetime) -> Tuple[int, List[Tuple[uuid.UUID, Dict[str, Any], List[str]]]]:
+    """
+    选出本次调度要重抓的页面，按 crawl_spec 分组创建 CrawlerTask 并记录各自的 URL。
+    统计用量、选页和建任务在同一个事务和 advisory 锁内完成，
+    并发的调度会看到之前调度创建的任务。返回 (本次预算, [(任务 ID, spec, URL 列表)])。
+    """
+    with Session(engine) as session:
+        if session.get_bind().dialect.name == "postgresql":
+            session.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": RECRAWL_LOCK_KEY})
+        used, in_flight = recrawl_usage(session)
+        budget = tick_budget(used)
+        if budget <= 0:
+            return budget, []
+        selected = plan_recrawls(load_candidates(), now, settings.RECRAWL_DAILY_FETCH_BUDGET, in_flight)[:budget]
+
+        groups: Dict[str, List[str]] = {}
+        for item in selected:
+            groups.setdefault(item.crawl_spec, []).append(item.url)
+
+        tasks = []
+        for crawl_spec, urls in groups.items():
+            crawler_task = CrawlerTask(status="pending", recrawl_urls=json.dumps(urls))
+            session.add(crawler_task)
+            tasks.append((crawler_task, json.loads(crawl_spec), urls))
+        session.commit()
+        return budget, [(crawler_task.id, spec, urls) for crawler_task, spec, urls in tasks]
+
+
+class RecrawlScheduler:
+    """
+    后台定时调度：每 RECRAWL_TICK_SECONDS 选出优先级最高的页面，
+    按 crawl_spec（表名和列）分组，各自作为一个只抓取这些 URL 的手动爬虫任务运行。
+    """
+    _task: Optional[asyncio.Task] = None
+    _crawls: Set[asyncio.Task] = set()
+    _last_tick_at: Optional[datetime] = None
+
+    @classmethod
+    def start(cls):
+        if cls._task is None and settings.RECRAWL_ENABLED:
+            cls._task = asyncio.create_task(cls._loop())
+            logger.info("Recrawl scheduler started")
+
+    @classmethod
+    async def stop(cls):
+        if cls._task is not None:
+            cls._task.cancel()
+            await asyncio.gather(cls._task, return_exceptions=True)
+            cls._task = None
+        for crawl in list(cls._crawls):
+            crawl.cancel()
+        await asyncio.gather(*cls._crawls, return_exceptions=True)
+
+    @classmethod
+    async def _loop(cls):
+        while True:
+            try:
+                await cls.run_once()
+            except Exception as e:
+                logger.error(f"Recrawl tick failed: {e}")
+            await asyncio.sleep(settings.RECRAWL_TICK_SECONDS)
+
+    @classmethod
+    async def run_once(cls) -> List[uuid.UUID]:
+        """执行一次调度，返回创建的爬虫任务 ID。"""
+        now = datetime.utcnow()
+        cls._last_tick_at = now
+        budget, reserved = await asyncio.get_running_loop().run_in_executor(None, reserve_recrawls, now)
+        if not reserved:
+            return []
+
+        for task_id, spec, urls in reserved:
+            crawl = asyncio.create_task(generate_sql_from_spider(
+                task_id,
+                urls[0],
+                spec["table_name"],
+                spec["columns"],
+                max_pages=len(urls),
+                concurrency=settings.RECRAWL_CONCURRENCY,
+                seed_urls=urls,
+                revalidate=True,
+            ))
+            cls._crawls.add(crawl)
+            crawl.add_done_callback(cls._crawls.discard)
+
+        dispatched = sum(len(urls) for _, _, urls in reserved)
+        logger.info(f"Recrawl tick dispatched {dispatched} URLs in {len(reserved)} tasks (budget {budget})")
+        return [task_id for task_id, _, _ in reserved]
+
+    @classmethod
+    def schedule(cls, limit: int = 50) -> Dict[str, Any]:
+        """即将重抓的页面（按优先级排序，标出下次调度会选中的）和预算使用情况。"""
+        now = datetime.utcnow()
+        with Session(engine) as session:
+            used, in_flight = recrawl_usage(session)
+        budget = tick_budget(used)
+        candidates = load_candidates()
+        planned = plan_recrawls(candidates, now, settings.RECRAWL_DAILY_FETCH_BUDGET, in_flight)
+        next_tick_at = (
+            cls._last_tick_at + timedelta(seconds=settings.RECRAWL_TICK_SECONDS)
+            if cls._last_tick_at is not None else None
+        )
+        return {
+            "enabled": settings.RECRAWL_ENABLED,
+            "tracked_urls": len(candidates),
+            "due_urls": len(planned),
+            "in_flight_urls": len(in_flight),
+            "next_tick_at": next_tick_at.isoformat() if next_tick_at else None,
+            "budget": {
+                "daily": settings.RECRAWL_DAILY_FETCH_BUDGET,
+                "used_last_24h": used,
+                "remaining_last_24h": max(0, settings.RECRAWL_DAILY_FETCH_BUDGET - used),
+                "next_tick": budget,
+            },
+            "upcoming": [
+                {
+                    "url": item.url,
+                    "change_rate_per_day": round(item.change_rate, 4),
+                    "age_hours": round(item.age_days * 24, 2),
+                    "stale_probability": round(item.stale_probability, 4),
+                    "priority": round(item.priority, 6),
+                    "next_tick": rank < budget,
+                }
+                for rank, item in enumerate(planned[:limit])
+            ],
+        }
@@ -0,0 +1,235 @@
+"""
+重抓时的条件请求与变更检测
+
+每个 URL 在 CrawlIndex 中记录上次的 ETag、Last-Modified、精简后内容的哈希和页面上发现的后续链接。
+重抓任务（重抓调度或显式要求 revalidate 的任务）再次抓取时带上 If-None-Match / If-Modified-Since；
+返回 304，或精简后内容的哈希与上次相同时，页面不再进入 LLM 提取和输出阶段。
+只有上次按同样的表名和列（crawl_spec）提取过的页面才会跳过，普通任务总是完整输出，只记录检查结果。
+哈希基于精简后的内容而不是原始 HTML，页面上的时间戳、CSRF token 等无关变化不会被当作内容变化。
+
+这些字段只属于手动爬虫；content_md5 / content_type / size_bytes / file_path 属于工业采集器的数据湖，
+这里不读也不写。
+"""
+import hashlib
+import json
+import logging
+import math
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.models import CrawlIndex
+
+logger = logging.getLogger(__name__)
+
+
+def url_hash(url: str) -> str:
+    """CrawlIndex 的主键：URL 的 MD5（与工业采集器一致）。"""
+    return hashlib.md5(url.encode()).hexdigest()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def estimate_change_rate(checks: int, changes: int, observed_seconds: float) -> Optional[float]:
+    """
+    按泊松过程估计页面的变化率（次/天）。
+
+    每次检查只能知道“两次检查之间是否变化过”，直接用 changes / 时间会低估变化频繁的页面，
+    这里用 Cho & Garcia-Molina 的修正估计：-ln((n - X + 0.5) / (n + 0.5)) / 平均检查间隔。
+    还没有检查历史时返回 None。
+    """
+    if checks <= 0 or observed_seconds <= 0:
+        return None
+    mean_interval_days = observed_seconds / checks / 86400
+    return -math.log((checks - changes + 0.5) / (checks + 0.5)) / mean_interval_days
+
+
+@dataclass
+class Revalidation:
+    """抓取前从 CrawlIndex 读到的上次抓取记录。"""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    links: List[str] = field(default_factory=list)
+    crawl_spec: Optional[str] = None
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def _observe(entry: CrawlIndex, changed: bool, now: datetime):
+    """记录一次检查：累计检查次数、变化次数和观察时长，并更新估计的变化率。"""
+    if entry.last_checked_at is not None:
+        entry.check_count = (entry.check_count or 0) + 1
+        entry.change_count = (entry.change_count or 0) + (1 if changed else 0)
+        entry.observed_seconds = (entry.observed_seconds or 0.0) + max(
+            0.0, (now - entry.last_checked_at).total_seconds()
+        )
+        entry.change_rate = estimate_change_rate(entry.check_count, entry.change_count, entry.observed_seconds)
+    entry.last_checked_at = now
+
+
+class RevalidationIndex:
+    """
+    读写 CrawlIndex 中的重抓记录并统计命中率。lookup / touch / save 是同步的数据库操作，
+    在事件循环中应通过 run_in_executor 调用。
+
+    参数:
+        table_name / columns: 本任务提取的表和列，只有上次按同样的 crawl_spec 提取过的页面才能跳过
+        skip_unchanged: 为 True 时（重抓任务）发送条件请求并跳过未变化的页面；
+            为 False 时只记录检查结果，页面照常提取和输出
+
+    统计:
+        known: 以前抓取过（有记录）的页面数
+        not_modified: 服务器返回 304 的页面数
+        unchanged: 返回 200 但精简后内容哈希未变的页面数
+        changed / new: 内容变化 / 首次抓取的页面数
+        skipped: 实际跳过提取和输出的页面数（普通任务为 0）
+        hit_rate: (not_modified + unchanged) / known
+    """
+
+    def __init__(
+        self,
+        table_name: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        skip_unchanged: bool = False,
+    ):
+        # 保存到 CrawlIndex.crawl_spec，重抓调度按它重新提取同样的表和列
+        self.crawl_spec = json.dumps({"table_name": table_name, "columns": columns}) if table_name else None
+        self.skip_unchanged = skip_unchanged
+        self.known = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.changed = 0
+        self.new = 0
+        self.skipped = 0
+
+    def lookup(self, url: str) -> Optional[Revalidation]:
+        try:
+            with Session(engine) as session:
+                entry = session.get(CrawlIndex, url_hash(url))
+                if entry is None:
+                    return None
+                return Revalidation(
+                    etag=entry.etag,
+                    last_modified=entry.last_modified,
+                    content_hash=entry.content_hash,
+                    links=json.loads(entry.links) if entry.links else [],
+                    crawl_spec=entry.crawl_spec,
+                )
+        except Exception as e:
+            logger.warning(f"Crawl index lookup failed for {url}: {e}")
+            return None
+
+    def can_skip(self, previous: Optional[Revalidation]) -> bool:
+        """本任务是重抓任务，且页面上次按同样的表和列提取过，未变化时可以跳过。"""
+        return (
+            self.skip_unchanged
+            and previous is not None
+            and previous.content_hash is not None
+            and self.crawl_spec is not None
+            and previous.crawl_spec == self.crawl_spec
+        )
+
+    def check(
+        self,
+        previous: Optional[Revalidation],
+        new_hash: Optional[str],
+        not_modified: bool = False,
+    ) -> bool:
+        """
+        判断页面能否跳过提取和输出：304，或精简后内容的哈希与上次相同（且 can_skip）。
+        只做判断和计数，记录由调用方在结果写出后通过 touch / save 更新，
+        避免提取失败时新哈希已保存、下次被误判为未变化。
+        """
+        if not_modified:
+            self.known += 1
+            self.not_modified += 1
+            self.skipped += 1
+            return True
+        if new_hash is None:
+            return False
+        if previous is None or previous.content_hash is None:
+            self.new += 1
+            return False
+        self.known += 1
+        if previous.content_hash == new_hash:
+            self.unchanged += 1
+            if self.can_skip(previous):
+                self.skipped += 1
+                return True
+            return False
+        self.changed += 1
+        return False
+
+    def save(
+        self,
+        url: str,
+        status_code: int,
+        new_hash: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        links: List[str],
+    ):
+        """提取并输出后保存页面的验证器、内容哈希和后续链接，并记录这次检查内容是否变化。"""
+        now = datetime.utcnow()
+        try:
+            with Session(engine) as session:
+                key = url_hash(url)
+                entry = session.get(CrawlIndex, key) or CrawlIndex(
+                    url_hash=key, original_url=url[:2048], created_at=now
+                )
+                changed = entry.content_hash != new_hash
+                entry.etag = etag
+                entry.last_modified = last_modified
+                entry.content_hash = new_hash
+                entry.links = json.dumps(links)
+                entry.last_status = status_code
+                entry.crawl_spec = self.crawl_spec or entry.crawl_spec
+                _observe(entry, changed=changed, now=now)
+                if changed:
+                    entry.last_changed_at = now
+                entry.updated_at = now
+                session.add(entry)
+                session.commit()
+        except Exception as e:
+            logger.warning(f"Failed to save crawl index entry for {url}: {e}")
+
+    def touch(self, url: str, etag: Optional[str], last_modified: Optional[str], status_code: int):
+        """页面未变化：只更新检查时间和验证器。"""
+        try:
+            with Session(engine) as session:
+                entry = session.get(CrawlIndex, url_hash(url))
+                if entry is None:
+                    return
+                # 304 可能不带验证器，此时保留原值
+                entry.etag = etag or entry.etag
+                entry.last_modified = last_modified or entry.last_modified
+                entry.last_status = status_code
+                _observe(entry, changed=False, now=datetime.utcnow())
+                session.add(entry)
+                session.commit()
+        except Exception as e:
+            logger.warning(f"Failed to update crawl index entry for {url}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.not_modified + self.unchanged
+        return {
+            "known": self.known,
+            "not_modified": self.not_modified,
+            "unchanged": self.unchanged,
+            "changed": self.changed,
+            "new": self.new,
+            "skipped": self.skipped,
+            "hit_rate": round(hits / self.known, 3) if self.known else 0.0,
+        }
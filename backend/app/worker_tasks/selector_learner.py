@@ -0,0 +1,393 @@
+"""
+选择器学习（模板归纳）
+
+同一站点的页面通常共用一个模板。前 K 个页面照常交给 LLM 提取，SelectorLearner 在这些页面的
+DOM 中定位 LLM 返回的值，为每一列归纳出 XPath（取第一个匹配节点的文本或属性）。
+所有列都能稳定复现后，后续页面直接用选择器提取，不再调用 LLM；
+选择器结果校验失败（必填列为空、数字列解析失败）时该页面回退到 LLM，
+连续失败达到上限则丢弃模板重新学习。
+
+依赖 lxml（可选）；未安装时学习器不生效，所有页面照常走 LLM。
+"""
+import logging
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from app.core.config import settings
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+except ImportError:  # pragma: no cover - lxml 是可选加速依赖
+    etree = None
+    lxml_html = None
+
+if TYPE_CHECKING:
+    from app.worker_tasks.crawler import FetchedPage
+
+logger = logging.getLogger(__name__)
+
+SKIP_TAGS = {"script", "style", "noscript", "template", "head", "title", "meta"}
+# 可作为取值来源的属性
+VALUE_ATTRIBUTES = ("href", "src", "content", "title", "alt", "datetime", "value")
+URL_ATTRIBUTES = {"href", "src"}
+# 选择器向上最多包含的层级
+MAX_STEPS = 4
+# 数字匹配时元素文本的最大长度（避免匹配到大段正文里的数字）
+MAX_NUMBER_TEXT = 40
+# 字符串值达到该长度时允许元素文本以它开头（LLM 截断了长文本）
+PREFIX_MATCH_LENGTH = 40
+
+NUMBER_RE = re.compile(r"-?\d[\d,]*(?:\.\d+)?")
+UNSTABLE_TOKEN_RE = re.compile(r"\d|['\"]")
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def _is_null(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _numbers(text: str) -> List[float]:
+    numbers = []
+    for token in NUMBER_RE.findall(text):
+        try:
+            numbers.append(float(token.replace(",", "")))
+        except ValueError:
+            continue
+    return numbers
+
+
+@dataclass(frozen=True)
+class ColumnRule:
+    """
+    单列的取值规则。
+
+    kind:
+        text / number: 第一个匹配节点的文本（number 取文本中的第一个数字）
+        attr: 第一个匹配节点的属性值（href / src 转为绝对地址）
+        meta_url / meta_page_index: 直接取页面元数据
+        null: 预热页面上该列始终为空
+    """
+    kind: str
+    xpath: str = ""
+    attribute: str = ""
+    integer: bool = False
+    optional: bool = False
+
+
+@dataclass
+class _SiteState:
+    # 每个预热页面的 (页面, DOM, 各列候选规则)；候选规则已在该页面上验证能复现 LLM 的值
+    observations: Deque[Tuple["FetchedPage", Any, Dict[str, Any]]]
+    observed: int = 0
+    rules: Optional[Dict[str, ColumnRule]] = None
+    # 各列匹配节点的最近公共祖先的签名（同一条记录的容器），为空表示不校验
+    record: Optional[str] = None
+    failures: int = 0
+    gave_up: bool = False
+    stats: Dict[str, int] = field(default_factory=lambda: {
+        "fast_pages": 0, "llm_pages": 0, "validation_failures": 0, "relearns": 0,
+    })
+
+
+def _step(element) -> Tuple[str, bool]:
+    """单个层级的 XPath 片段；带稳定 id 时返回 (片段, True) 作为锚点。"""
+    tag = element.tag
+    element_id = element.get("id") or ""
+    if element_id and not UNSTABLE_TOKEN_RE.search(element_id):
+        return f'{tag}[@id="{element_id}"]', True
+    classes = [
+        token for token in (element.get("class") or "").split()
+        if len(token) <= 40 and not UNSTABLE_TOKEN_RE.search(token)
+    ][:2]
+    predicates = "".join(
+        f"[contains(concat(' ', normalize-space(@class), ' '), ' {token} ')]" for token in classes
+    )
+    return f"{tag}{predicates}", False
+
+
+def _record_signature(nodes: List[Any]) -> str:
+    """多个匹配节点的最近公共祖先的 XPath 片段，用于确认各列取自同一条记录。"""
+    if len(nodes) < 2:
+        return ""
+    common = None
+    for node in nodes:
+        chain = [node, *node.iterancestors()]
+        common = chain if common is None else [ancestor for ancestor in common if ancestor in chain]
+    return _step(common[0])[0] if common else ""
+
+
+def _candidate_xpaths(element) -> List[str]:
+    """从元素向上生成由具体到宽泛的候选 XPath（最具体的在前）。"""
+    steps = []
+    node = element
+    while node is not None and isinstance(node.tag, str) and node.tag not in ("html", "body"):
+        step, anchored = _step(node)
+        steps.append(step)
+        if anchored or len(steps) >= MAX_STEPS:
+            break
+        node = node.getparent()
+    return ["//" + "/".join(reversed(steps[:n])) for n in range(len(steps), 0, -1)]
+
+
+class SelectorLearner:
+    """
+    按站点（主机名）学习列选择器。
+
+    参数:
+        columns: 需要提取的列
+        warmup_pages: 学习前需要的 LLM 提取页面数，0 表示关闭
+        max_failures: 连续校验失败达到该次数后丢弃模板重新学习
+    """
+
+    def __init__(self, columns: List[str], warmup_pages: Optional[int] = None, max_failures: Optional[int] = None):
+        self.columns = columns
+        self.warmup_pages = settings.SPIDER_SELECTOR_WARMUP_PAGES if warmup_pages is None else warmup_pages
+        self.max_failures = max_failures or settings.SPIDER_SELECTOR_MAX_FAILURES
+        self.enabled = self.warmup_pages > 0 and lxml_html is not None
+        if self.warmup_pages > 0 and lxml_html is None:
+            logger.warning("lxml is not installed, learned selectors are disabled")
+        self._sites: Dict[str, _SiteState] = {}
+        self._xpaths: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _site(self, url: str) -> _SiteState:
+        host = urlsplit(url).netloc
+        site = self._sites.get(host)
+        if site is None:
+            site = self._sites[host] = _SiteState(observations=deque(maxlen=self.warmup_pages))
+        return site
+
+    def _compiled(self, xpath: str):
+        compiled = self._xpaths.get(xpath)
+        if compiled is None:
+            compiled = self._xpaths[xpath] = etree.XPath(f"({xpath})[1]")
+        return compiled
+
+    @staticmethod
+    def _parse(html_content: str):
+        if not html_content or not html_content.strip():
+            return None
+        try:
+            return lxml_html.fromstring(html_content)
+        except (etree.ParserError, ValueError) as e:
+            logger.debug(f"Selector learner could not parse page: {e}")
+            return None
+
+    def _apply(self, rule: ColumnRule, tree, page: "FetchedPage") -> Tuple[Any, Any]:
+        """按规则取值，返回 (值, 匹配节点)；取不到值时为 None。"""
+        if rule.kind == "meta_url":
+            return page.url, None
+        if rule.kind == "meta_page_index":
+            return page.page_index, None
+        if rule.kind == "null":
+            return None, None
+
+        nodes = self._compiled(rule.xpath)(tree)
+        if not nodes:
+            return None, None
+        node = nodes[0]
+        if rule.kind == "attr":
+            value = (node.get(rule.attribute) or "").strip()
+            if value and rule.attribute in URL_ATTRIBUTES:
+                value = urljoin(page.url, value)
+            return value or None, node
+
+        text = _normalize(node.text_content())
+        if rule.kind == "number":
+            numbers = _numbers(text)
+            if not numbers:
+                return None, node
+            return (int(numbers[0]) if rule.integer else numbers[0]), node
+        return text or None, node
+
+    def _extract_with(
+        self, rules: Dict[str, ColumnRule], tree, page: "FetchedPage"
+    ) -> Tuple[Optional[Dict[str, Any]], List[Any]]:
+        """用一组规则提取整页，返回 (结果, 匹配节点)；必填列取不到值时结果为 None。"""
+        result: Dict[str, Any] = {}
+        nodes = []
+        for column, rule in rules.items():
+            value, node = self._apply(rule, tree, page)
+            if value is None and rule.kind != "null" and not rule.optional:
+                return None, nodes
+            result[column] = value
+            if value is not None and node is not None:
+                nodes.append(node)
+        return result, nodes
+
+    def _candidates(self, tree, page: "FetchedPage", column: str, value: Any) -> List[ColumnRule]:
+        """在页面上找出能复现该值的规则。"""
+        if isinstance(value, str) and value.strip() == page.url:
+            return [ColumnRule("meta_url")]
+        if _is_number(value) and value == page.page_index and column in ("page_index", "page"):
+            return [ColumnRule("meta_page_index")]
+
+        rules: List[ColumnRule] = []
+        if _is_number(value):
+            target = float(value)
+            integer = isinstance(value, int)
+            for element in tree.iter():
+                if not isinstance(element.tag, str) or element.tag in SKIP_TAGS or not element.text:
+                    continue
+                if target not in _numbers(element.text):
+                    continue
+                if len(_normalize(element.text_content())) > MAX_NUMBER_TEXT:
+                    continue
+                rules.extend(ColumnRule("number", xpath, integer=integer) for xpath in _candidate_xpaths(element))
+        elif isinstance(value, str):
+            needle = _normalize(value)
+            for element in tree.iter():
+                if not isinstance(element.tag, str) or element.tag in SKIP_TAGS:
+                    continue
+                for attribute in VALUE_ATTRIBUTES:
+                    raw = (element.get(attribute) or "").strip()
+                    if not raw:
+                        continue
+                    if (urljoin(page.url, raw) if attribute in URL_ATTRIBUTES else raw) == needle:
+                        rules.extend(
+                            ColumnRule("attr", xpath, attribute=attribute) for xpath in _candidate_xpaths(element)
+                        )
+                # 只在值的文字出现在元素自身文本中时才计算完整文本
+                own_text = _normalize(element.text or "")
+                if not own_text or not (own_text in needle or needle.startswith(own_text[:20])):
+                    continue
+                text = _normalize(element.text_content())
+                if text == needle or (len(needle) >= PREFIX_MATCH_LENGTH and text.startswith(needle)):
+                    rules.extend(ColumnRule("text", xpath) for xpath in _candidate_xpaths(element))
+
+        # 只保留在本页面上（取第一个匹配节点时）确实能取回该值的规则
+        verified = []
+        for rule in dict.fromkeys(rules):
+            extracted, _ = self._apply(rule, tree, page)
+            if rule.kind == "number":
+                matches = extracted is not None and float(extracted) == float(value)
+            elif rule.kind == "text":
+                matches = extracted == _normalize(value) or (
+                    extracted is not None and len(_normalize(value)) >= PREFIX_MATCH_LENGTH
+                    and extracted.startswith(_normalize(value))
+                )
+            else:
+                matches = extracted == value.strip()
+            if matches:
+                verified.append(rule)
+        return verified
+
+    def _learn(self, site: _SiteState) -> Optional[Dict[str, ColumnRule]]:
+        """每一列都有在所有非空预热页面上成立的规则时返回模板。"""
+        rules: Dict[str, ColumnRule] = {}
+        for column in self.columns:
+            observed = [candidates[column] for _, _, candidates in site.observations]
+            present = [candidates for candidates in observed if candidates is not None]
+            if not present:
+                rules[column] = ColumnRule("null")
+                continue
+            common = [rule for rule in present[0] if all(rule in candidates for candidates in present[1:])]
+            if not common:
+                return None
+            # 候选按由具体到宽泛排列，取最具体的
+            rule = common[0]
+            if len(present) < len(observed):
+                rule = ColumnRule(rule.kind, rule.xpath, rule.attribute, rule.integer, optional=True)
+            rules[column] = rule
+        return rules
+
+    def observe(self, page: "FetchedPage", extracted: Dict[str, Any]):
+        """记录一个由 LLM 提取的页面；预热页面足够后尝试归纳模板。"""
+        if not self.enabled or not isinstance(extracted, dict):
+            return
+        with self._lock:
+            site = self._site(page.url)
+            if site.gave_up or site.rules is not None:
+                return
+        tree = self._parse(page.html_content)
+        if tree is None:
+            return
+
+        candidates = {
+            column: None if _is_null(extracted.get(column)) else self._candidates(tree, page, column, extracted[column])
+            for column in self.columns
+        }
+        with self._lock:
+            if site.rules is not None:
+                return
+            site.observations.append((page, tree, candidates))
+            site.observed += 1
+            if site.observed < self.warmup_pages:
+                return
+            rules = self._learn(site)
+            if rules is not None:
+                # 预热页面上各列总是落在同一种记录容器内时，提取时也要求如此
+                signatures = {
+                    _record_signature(self._extract_with(rules, warm_tree, warm_page)[1])
+                    for warm_page, warm_tree, _ in site.observations
+                }
+                site.record = signatures.pop() if len(signatures) == 1 else None
+                site.rules = rules
+                site.failures = 0
+                site.observations.clear()
+                logger.info(f"Learned selectors for {urlsplit(page.url).netloc}: {rules}")
+            elif site.observed >= self.warmup_pages * 3:
+                site.gave_up = True
+                logger.info(f"No stable selectors for {urlsplit(page.url).netloc}, keeping LLM extraction")
+
+    def extract(self, page: "FetchedPage") -> Optional[Dict[str, Any]]:
+        """用已学到的选择器提取；还没有模板或校验失败时返回 None（由调用方回退到 LLM）。"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            site = self._site(page.url)
+            rules, record = site.rules, site.record
+            if rules is None:
+                site.stats["llm_pages"] += 1
+                return None
+
+        tree = self._parse(page.html_content)
+        result = None
+        if tree is not None:
+            result, nodes = self._extract_with(rules, tree, page)
+            if result is not None and record is not None and _record_signature(nodes) != record:
+                # 某列缺失时第一个匹配节点可能来自另一条记录
+                result = None
+
+        with self._lock:
+            if result is not None:
+                site.failures = 0
+                site.stats["fast_pages"] += 1
+                return result
+            site.stats["validation_failures"] += 1
+            site.stats["llm_pages"] += 1
+            site.failures += 1
+            if site.failures >= self.max_failures and site.rules is rules:
+                logger.info(f"Selectors for {urlsplit(page.url).netloc} failed {site.failures} times, relearning")
+                site.rules = None
+                site.record = None
+                site.observed = 0
+                site.stats["relearns"] += 1
+            return None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                host: {
+                    **site.stats,
+                    "learned": site.rules is not None,
+                    "gave_up": site.gave_up,
+                    "record": site.record,
+                    "selectors": {
+                        column: rule.xpath or rule.kind for column, rule in (site.rules or {}).items()
+                    },
+                }
+                for host, site in self._sites.items()
+            }
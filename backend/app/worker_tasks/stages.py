@@ -0,0 +1,168 @@
+"""
+分阶段流水线
+
+各阶段（例如 抓取 -> 精简 -> 提取 -> 写入）通过有界队列串联，每个阶段有自己的并发数：
+下游变慢时上游在 put 上等待（背压），不会让某一种资源（网络、CPU、LLM）闲置而另一种排队。
+每个阶段统计处理数、错误数、忙碌时间、利用率、队列深度和因背压等待的时间，用于调参。
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 保留最近多少个任务的流水线指标（包括已结束的任务）
+RECENT_PIPELINES = 50
+
+
+class Stage:
+    """
+    流水线中的一个阶段。
+
+    参数:
+        name: 阶段名称（用于指标）
+        handler: async handler(item) -> 下一阶段的输入；返回 None 表示不再向下传递
+        concurrency: 工作协程数
+        queue_size: 输入队列长度，默认 concurrency * 4
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[Any]],
+        concurrency: int,
+        queue_size: Optional[int] = None,
+    ):
+        self.name = name
+        self.handler = handler
+        self.concurrency = max(1, concurrency)
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size or self.concurrency * 4)
+
+        # 指标
+        self.processed = 0
+        self.errors = 0
+        self.busy = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.max_queue_depth = 0
+
+    async def put(self, item: Any):
+        await self.queue.put(item)
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+
+    def stats(self, elapsed: float) -> Dict[str, Any]:
+        capacity = self.concurrency * elapsed
+        return {
+            "concurrency": self.concurrency,
+            "processed": self.processed,
+            "errors": self.errors,
+            "busy": self.busy,
+            "utilization": round(min(1.0, self.busy_seconds / capacity), 3) if capacity else 0.0,
+            "avg_ms": round(self.busy_seconds / self.processed * 1000, 2) if self.processed else 0.0,
+            "queue_depth": self.queue.qsize(),
+            "max_queue_depth": self.max_queue_depth,
+            "queue_size": self.queue.maxsize,
+            # 等待下游队列空位的总时间，持续偏高说明下游是瓶颈
+            "blocked_seconds": round(self.blocked_seconds, 3),
+        }
+
+
+class StagedPipeline:
+    """
+    用法:
+        pipeline = StagedPipeline([Stage("fetch", fetch, 5), Stage("extract", extract, 8)])
+
+        async def source():
+            for url in urls:
+                await pipeline.put(url)
+
+        await pipeline.run(source())
+    """
+
+    def __init__(self, stages: List[Stage]):
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.stages = stages
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    async def put(self, item: Any):
+        """向第一个阶段放入一个输入，队列满时等待。"""
+        await self.stages[0].put(item)
+
+    async def _worker(self, index: int):
+        stage = self.stages[index]
+        downstream = self.stages[index + 1] if index + 1 < len(self.stages) else None
+        while True:
+            item = await stage.queue.get()
+            try:
+                stage.busy += 1
+                start = time.perf_counter()
+                try:
+                    result = await stage.handler(item)
+                finally:
+                    stage.busy -= 1
+                    stage.busy_seconds += time.perf_counter() - start
+                stage.processed += 1
+                if result is not None and downstream is not None:
+                    start = time.perf_counter()
+                    await downstream.put(result)
+                    stage.blocked_seconds += time.perf_counter() - start
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                stage.errors += 1
+                logger.error(f"Pipeline stage '{stage.name}' failed: {e}")
+            finally:
+                stage.queue.task_done()
+
+    async def run(self, source: Awaitable[Any]):
+        """
+        启动各阶段的工作协程，等待 source 放完所有输入，再按顺序等待每个阶段的队列清空。
+        """
+        self.started_at = time.perf_counter()
+        workers = [
+            asyncio.create_task(self._worker(index))
+            for index, stage in enumerate(self.stages)
+            for _ in range(stage.concurrency)
+        ]
+        try:
+            await source
+            # 上游的条目在放入下游队列之后才 task_done，所以按顺序 join 即可确认全部完成
+            for stage in self.stages:
+                await stage.queue.join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            self.finished_at = time.perf_counter()
+
+    def stats(self) -> Dict[str, Any]:
+        if self.started_at is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self.finished_at or time.perf_counter()) - self.started_at
+        return {
+            "running": self.started_at is not None and self.finished_at is None,
+            "elapsed_seconds": round(elapsed, 3),
+            "stages": {stage.name: stage.stats(elapsed) for stage in self.stages},
+        }
+
+
+class PipelineRegistry:
+    """按任务 ID 记录流水线，供状态接口读取实时指标；只保留最近的若干个。"""
+    _pipelines: "OrderedDict[str, StagedPipeline]" = OrderedDict()
+
+    @classmethod
+    def register(cls, task_id: Any, pipeline: StagedPipeline):
+        cls._pipelines[str(task_id)] = pipeline
+        cls._pipelines.move_to_end(str(task_id))
+        while len(cls._pipelines) > RECENT_PIPELINES:
+            cls._pipelines.popitem(last=False)
+
+    @classmethod
+    def stats(cls, task_id: Any) -> Optional[Dict[str, Any]]:
+        pipeline = cls._pipelines.get(str(task_id))
+        return pipeline.stats() if pipeline is not None else None
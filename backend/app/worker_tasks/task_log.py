@@ -0,0 +1,133 @@
+"""
+爬虫任务日志
+
+日志逐行追加到 crawler_task_log，而不是每行都读出整个 pipeline_state、追加到 logs 列表再写回
+（那样每个任务的日志开销随行数平方增长）。TaskLogWriter 在内存中缓冲，
+按行数或时间批量插入；读取时按 seq 游标只返回新行。
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import func, insert
+from sqlmodel import Session, select
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models import CrawlerTaskLog
+
+logger = logging.getLogger(__name__)
+
+# 日志前缀 -> 级别（SnifferPipeline 给 ERROR / WARN 消息加前缀）
+LEVEL_PREFIXES = (("❌", "ERROR"), ("⚠️", "WARN"))
+
+
+def level_of(message: str) -> str:
+    for prefix, level in LEVEL_PREFIXES:
+        if message.startswith(prefix):
+            return level
+    return "INFO"
+
+
+def last_seq(session: Session, task_id: uuid.UUID) -> int:
+    return session.exec(
+        select(func.coalesce(func.max(CrawlerTaskLog.seq), 0)).where(CrawlerTaskLog.task_id == task_id)
+    ).one()
+
+
+def append_logs(session: Session, rows: List[dict]):
+    """批量插入（executemany），由调用方提交。"""
+    if rows:
+        session.execute(insert(CrawlerTaskLog), rows)
+
+
+def read_logs(session: Session, task_id: uuid.UUID, after: int = 0, limit: int = 500) -> List[CrawlerTaskLog]:
+    return list(session.exec(
+        select(CrawlerTaskLog)
+        .where(CrawlerTaskLog.task_id == task_id, CrawlerTaskLog.seq > after)
+        .order_by(CrawlerTaskLog.seq)
+        .limit(limit)
+    ).all())
+
+
+class TaskLogWriter:
+    """
+    单个任务的日志写入器（同一任务同时只应有一个写入器，seq 在内存中分配）。
+
+    用法:
+        task_log = TaskLogWriter(task_id)
+        await task_log.start()
+        try:
+            await task_log.write("Phase: Scout", phase="scout")
+        finally:
+            await task_log.close()
+    """
+
+    def __init__(
+        self,
+        task_id: uuid.UUID,
+        flush_rows: Optional[int] = None,
+        flush_seconds: Optional[float] = None,
+    ):
+        self.task_id = task_id
+        self.flush_rows = flush_rows or settings.CRAWL_LOG_FLUSH_ROWS
+        self.flush_seconds = flush_seconds if flush_seconds is not None else settings.CRAWL_LOG_FLUSH_SECONDS
+        self._buffer: List[dict] = []
+        self._seq = 0
+        self._lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self.rows = 0
+        self.batches = 0
+
+    async def start(self):
+        # 恢复的任务接着已有的 seq 继续
+        self._seq = await asyncio.get_running_loop().run_in_executor(None, self._load_last_seq)
+        self._flusher = asyncio.create_task(self._flush_periodically())
+
+    def _load_last_seq(self) -> int:
+        with Session(engine) as session:
+            return last_seq(session, self.task_id)
+
+    async def write(self, message: str, level: Optional[str] = None, phase: Optional[str] = None):
+        self._seq += 1
+        self._buffer.append({
+            "task_id": self.task_id,
+            "seq": self._seq,
+            "ts": datetime.now(),
+            "level": level or level_of(message),
+            "phase": phase,
+            "message": message,
+        })
+        if len(self._buffer) >= self.flush_rows:
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            if not self._buffer:
+                return
+            batch, self._buffer = self._buffer, []
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, self._insert, batch)
+                self.rows += len(batch)
+                self.batches += 1
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} task log lines for {self.task_id}: {e}")
+
+    def _insert(self, batch: List[dict]):
+        with Session(engine) as session:
+            append_logs(session, batch)
+            session.commit()
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            await self.flush()
+
+    async def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+        await self.flush()
@@ -0,0 +1,110 @@
+"""
+HtmlCleaner 引擎基准测试
+
+在已收割页面语料上对比 bs4 与 lxml 两种清理引擎的吞吐量，并检查输出是否等价
+（相同的可见文本和标签序列）。
+
+用法:
+    python benchmark_html_cleaner.py [语料目录或文件 ...] [--repeat N]
+
+默认语料：STORAGE_ROOT_DIR/raw、generated_data/industrial 和 app/storage/raw_harvest 下的 HTML 文件。
+"""
+import argparse
+import re
+import statistics
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from app.core.config import settings
+from app.core.paths import INDUSTRIAL_DIR
+from app.industrial_pipeline.html_cleaner import HtmlCleaner
+
+DEFAULT_CORPUS = [
+    Path(settings.STORAGE_ROOT_DIR) / "raw",
+    INDUSTRIAL_DIR,
+    Path(__file__).resolve().parent / "app" / "storage" / "raw_harvest",
+]
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def collect_corpus(paths: list[Path]) -> list[Path]:
+    files = []
+    for path in paths:
+        if path.is_file():
+            files.append(path)
+        elif path.is_dir():
+            files.extend(
+                p for p in path.rglob("*")
+                if p.suffix.lower() in (".html", ".htm") and "_cleaned" not in p.stem
+            )
+    # 跳过空文件
+    return sorted(p for p in files if p.stat().st_size > 0)
+
+
+def fingerprint(cleaned_html: str) -> tuple[str, list[str]]:
+    """用于等价比较的规范形式：合并空白后的可见文本 + 标签名序列。"""
+    soup = BeautifulSoup(cleaned_html, "html.parser")
+    text = WHITESPACE_RE.sub(" ", soup.get_text()).strip()
+    tags = [tag.name for tag in soup.find_all(True) if tag.name not in ("html", "head", "body")]
+    return text, tags
+
+
+def time_engine(html: str, engine: str, repeat: int) -> tuple[float, str]:
+    timings = []
+    output = ""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = HtmlCleaner.strip_non_semantic_tags(html, engine=engine)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HtmlCleaner engines")
+    parser.add_argument("paths", nargs="*", type=Path, help="HTML files or directories")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per file and engine")
+    args = parser.parse_args()
+
+    corpus = collect_corpus(args.paths or DEFAULT_CORPUS)
+    if not corpus:
+        print("No HTML files found in corpus.")
+        return
+
+    totals = {engine: 0.0 for engine in HtmlCleaner.ENGINES}
+    total_bytes = 0
+    mismatches = []
+
+    print(f"{'file':<48} {'size':>10} {'bs4 ms':>10} {'lxml ms':>10} {'speedup':>8}")
+    for path in corpus:
+        html = path.read_text(encoding="utf-8", errors="ignore")
+        size = len(html.encode("utf-8"))
+        total_bytes += size
+
+        results = {}
+        for engine in HtmlCleaner.ENGINES:
+            seconds, output = time_engine(html, engine, args.repeat)
+            totals[engine] += seconds
+            results[engine] = (seconds, output)
+
+        bs4_seconds = results["bs4"][0]
+        lxml_seconds = results["lxml"][0]
+        if fingerprint(results["bs4"][1]) != fingerprint(results["lxml"][1]):
+            mismatches.append(path)
+
+        speedup = bs4_seconds / lxml_seconds if lxml_seconds else float("inf")
+        print(f"{path.name[:48]:<48} {size:>10} {bs4_seconds * 1000:>10.2f} {lxml_seconds * 1000:>10.2f} {speedup:>7.1f}x")
+
+    mb = total_bytes / 1024 / 1024
+    print()
+    for engine, seconds in totals.items():
+        print(f"{engine:<5} total {seconds * 1000:.1f} ms, throughput {mb / seconds if seconds else 0:.2f} MB/s")
+    print(f"files: {len(corpus)}, equivalent output: {len(corpus) - len(mismatches)}/{len(corpus)}")
+    for path in mismatches:
+        print(f"  MISMATCH: {path}")
+
+
+if __name__ == "__main__":
+    main()
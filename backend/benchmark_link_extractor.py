@@ -0,0 +1,95 @@
+"""
+下一页识别基准测试
+
+在已收割页面语料上对比旧实现（html.parser 构建完整 BeautifulSoup 树，返回第一个文字含
+next / 下一页 / > / more 的链接）与 link_extractor（预编译正则只扫描链接并打分）的耗时，
+并列出两者结果不同的页面以便人工核对。
+
+用法:
+    python benchmark_link_extractor.py [语料目录或文件 ...] [--repeat N] [--base-url URL]
+
+默认语料与 benchmark_html_cleaner.py 相同。页面旁的 .meta.json 中有 url 字段时用作当前 URL。
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+
+from app.worker_tasks.link_extractor import find_next_page_url
+from benchmark_html_cleaner import DEFAULT_CORPUS, collect_corpus
+
+
+def legacy_next_page_url(current_url: str, html_content: str) -> str | None:
+    """改动前 get_next_page_url 的 HTML 解析策略。"""
+    soup = BeautifulSoup(html_content, "html.parser")
+    next_keywords = ["next", "下一页", ">", "more"]
+    for a in soup.find_all("a", href=True):
+        text = a.get_text().strip().lower()
+        if any(keyword in text for keyword in next_keywords):
+            return urljoin(current_url, a["href"])
+    return None
+
+
+def page_url(path: Path, default: str) -> str:
+    meta_path = path.with_name(path.name + ".meta.json")
+    try:
+        return json.loads(meta_path.read_text(encoding="utf-8")).get("url") or default
+    except (OSError, ValueError, AttributeError):
+        return default
+
+
+def time_call(func, url: str, html: str, repeat: int) -> tuple[float, str | None]:
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(url, html)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark next-page detection")
+    parser.add_argument("paths", nargs="*", type=Path, help="HTML files or directories")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per file and implementation")
+    parser.add_argument("--base-url", default="https://example.test/list", help="URL used when a page has no meta")
+    args = parser.parse_args()
+
+    corpus = collect_corpus(args.paths or DEFAULT_CORPUS)
+    if not corpus:
+        print("No HTML files found in corpus.")
+        return
+
+    legacy_total = fast_total = 0.0
+    differences = []
+
+    print(f"{'file':<48} {'size':>10} {'legacy ms':>10} {'fast ms':>10} {'speedup':>8}")
+    for path in corpus:
+        html = path.read_text(encoding="utf-8", errors="ignore")
+        url = page_url(path, args.base_url)
+
+        legacy_seconds, legacy_result = time_call(legacy_next_page_url, url, html, args.repeat)
+        fast_seconds, fast_result = time_call(find_next_page_url, url, html, args.repeat)
+        legacy_total += legacy_seconds
+        fast_total += fast_seconds
+        if legacy_result != fast_result:
+            differences.append((path, legacy_result, fast_result))
+
+        speedup = legacy_seconds / fast_seconds if fast_seconds else float("inf")
+        size = len(html.encode("utf-8"))
+        print(f"{path.name[:48]:<48} {size:>10} {legacy_seconds * 1000:>10.2f} {fast_seconds * 1000:>10.2f} {speedup:>7.1f}x")
+
+    print()
+    print(f"legacy total {legacy_total * 1000:.1f} ms, fast total {fast_total * 1000:.1f} ms, "
+          f"speedup {legacy_total / fast_total if fast_total else 0:.1f}x")
+    print(f"files: {len(corpus)}, different next page: {len(differences)}")
+    for path, legacy_result, fast_result in differences:
+        print(f"  {path.name}: legacy={legacy_result} fast={fast_result}")
+
+
+if __name__ == "__main__":
+    main()
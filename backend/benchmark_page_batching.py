@@ -0,0 +1,150 @@
+"""
+批量页面提取基准测试
+
+对同一批页面分别用单页提取（每页一次请求）和 PageBatcher（合并为批量请求）跑一遍，
+对比每页请求数、每页 token 数和总耗时。
+
+用法:
+    python benchmark_page_batching.py [语料目录或文件 ...] [--pages N] [--columns a,b,c] [--max-pages N]
+
+默认语料与 benchmark_html_cleaner.py 相同，页面先经 ContentReducer 精简；语料为空时使用合成的列表页。
+未配置 VOLC_API_KEY / VOLC_DEEPSEEK_MODEL_ID 时使用模拟模型（按提示词估算 prompt token，
+返回固定大小的结果），只用于比较请求数和 token 开销；配置后请求真实模型。
+基准运行期间禁用响应缓存。
+"""
+import argparse
+import asyncio
+import json
+import re
+import time
+from pathlib import Path
+
+import httpx
+
+from app.core.config import settings
+from app.core.llm_client import LlmClient
+from app.core.llm_metrics import track_llm_usage
+from app.industrial_pipeline.content_reducer import ContentReducer, estimate_tokens
+from app.worker_tasks.crawler import FetchedPage
+from app.worker_tasks.page_extraction import PageBatcher, extract_page_fields
+from benchmark_html_cleaner import DEFAULT_CORPUS, collect_corpus
+
+PAGE_KEY_RE = re.compile(r"^=== (page_\d+) ===$", re.MULTILINE)
+# 模拟模型的响应延迟
+SIMULATED_LATENCY_SECONDS = 0.05
+
+
+def synthetic_pages(count: int) -> list[str]:
+    pages = []
+    for index in range(1, count + 1):
+        items = "\n".join(
+            f"## Product {index}-{item}\nPrice: ¥{index * 10 + item}.00\nIn stock, ships in 24h."
+            for item in range(1, 6)
+        )
+        pages.append(f"# Category page {index}\n\n{items}\n\n[Next page](/list?page={index + 1})")
+    return pages
+
+
+def load_pages(paths: list[Path], count: int) -> list[FetchedPage]:
+    corpus = collect_corpus(paths)[:count]
+    if corpus:
+        contents = [
+            ContentReducer.reduce(
+                path.read_text(encoding="utf-8", errors="ignore"),
+                token_budget=settings.LLM_INPUT_TOKEN_BUDGET,
+                exemplars=settings.CONTENT_REDUCER_EXEMPLARS,
+            ).text
+            for path in corpus
+        ]
+    else:
+        contents = synthetic_pages(count)
+    return [
+        FetchedPage(index, f"https://example.test/list?page={index}", 200, "", content)
+        for index, content in enumerate(contents, start=1)
+    ]
+
+
+def simulated_transport(columns: list[str]) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        prompt = "".join(message["content"] for message in payload["messages"])
+        row = {column: f"value of {column}" for column in columns}
+        keys = PAGE_KEY_RE.findall(payload["messages"][-1]["content"])
+        content = json.dumps({key: row for key in keys} if keys else row)
+        await asyncio.sleep(SIMULATED_LATENCY_SECONDS)
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": content}}],
+            "usage": {"prompt_tokens": estimate_tokens(prompt), "completion_tokens": estimate_tokens(content)},
+        })
+
+    return httpx.MockTransport(handler)
+
+
+async def run_mode(name: str, pages: list[FetchedPage], columns: list[str], max_pages: int) -> dict:
+    batcher = PageBatcher(columns, max_pages=max_pages) if max_pages > 1 else None
+    start = time.perf_counter()
+    with track_llm_usage() as usage:
+        results = await asyncio.gather(
+            *(batcher.extract(page) if batcher else extract_page_fields(page, columns) for page in pages),
+            return_exceptions=True,
+        )
+    elapsed = time.perf_counter() - start
+    summary = usage.to_dict()
+    return {
+        "mode": name,
+        "pages": len(pages),
+        "requests": summary["calls"],
+        "failed_pages": sum(isinstance(result, Exception) for result in results),
+        "prompt_tokens": summary["prompt_tokens"],
+        "completion_tokens": summary["completion_tokens"],
+        "seconds": elapsed,
+        "batching": batcher.stats() if batcher else None,
+    }
+
+
+async def run(args) -> list[dict]:
+    columns = [column.strip() for column in args.columns.split(",") if column.strip()]
+    pages = load_pages(args.paths or DEFAULT_CORPUS, args.pages)
+
+    simulated = not (settings.VOLC_API_KEY and settings.VOLC_DEEPSEEK_MODEL_ID)
+    settings.LLM_CACHE_MAX_BYTES = 0
+    if simulated:
+        settings.VOLC_DEEPSEEK_MODEL_ID = settings.VOLC_DEEPSEEK_MODEL_ID or "simulated"
+        LlmClient._client = httpx.AsyncClient(base_url="http://llm.test", transport=simulated_transport(columns))
+        LlmClient._semaphore = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+    else:
+        LlmClient.start()
+
+    print(f"{len(pages)} pages, {sum(estimate_tokens(page.raw_content) for page in pages)} content tokens, "
+          f"{'simulated' if simulated else settings.VOLC_DEEPSEEK_MODEL_ID} model")
+    try:
+        return [
+            await run_mode("single", pages, columns, 1),
+            await run_mode("batched", pages, columns, args.max_pages),
+        ]
+    finally:
+        await LlmClient.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched page extraction")
+    parser.add_argument("paths", nargs="*", type=Path, help="HTML files or directories")
+    parser.add_argument("--pages", type=int, default=24, help="number of pages to extract")
+    parser.add_argument("--columns", default="title,price,description,category", help="comma separated columns")
+    parser.add_argument("--max-pages", type=int, default=settings.SPIDER_BATCH_MAX_PAGES, help="pages per batch")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(f"{'mode':<8} {'requests':>9} {'req/page':>9} {'prompt tok/page':>16} {'compl tok/page':>15} {'failed':>7} {'seconds':>8}")
+    for result in results:
+        pages = result["pages"] or 1
+        print(f"{result['mode']:<8} {result['requests']:>9} {result['requests'] / pages:>9.3f} "
+              f"{result['prompt_tokens'] / pages:>16.1f} {result['completion_tokens'] / pages:>15.1f} "
+              f"{result['failed_pages']:>7} {result['seconds']:>8.2f}")
+    for result in results:
+        if result["batching"]:
+            print(f"batching stats: {result['batching']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+COPY 批量入库基准测试
+
+向应用数据库中的临时测试表写入 N 行合成数据，对比三种方式的吞吐量（rows/s）：
+- executemany：原 Refinery 的逐行 INSERT（SQLAlchemy text + 参数列表）
+- copy：PgCopyLoader 追加模式
+- copy+upsert：PgCopyLoader 经暂存表 upsert（一半的键与已有数据重复）
+
+用法:
+    python benchmark_pg_copy.py [--rows N] [--batch N]
+
+需要可连接的 PostgreSQL（POSTGRES_* 配置）。测试表在结束时删除。
+"""
+import argparse
+import asyncio
+import time
+import uuid
+
+from sqlalchemy import text
+
+from app.core.bulk_loader import PgCopyLoader
+from app.core.db import engine
+
+COLUMNS = ["sku", "title", "price", "url"]
+
+
+def synthetic_rows(count: int, offset: int = 0) -> list[dict]:
+    return [
+        {
+            "sku": f"sku-{i}",
+            "title": f"Product {i} with a reasonably long descriptive title",
+            "price": f"{i % 1000}.99",
+            "url": f"https://shop.example.test/item/{i}",
+        }
+        for i in range(offset, offset + count)
+    ]
+
+
+def batches(rows: list[dict], size: int):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def bench_executemany(table: str, rows: list[dict], batch: int) -> float:
+    with engine.connect() as connection:
+        connection.execute(text(f'CREATE TABLE "{table}" (id BIGSERIAL PRIMARY KEY, {", ".join(f"{c} TEXT" for c in COLUMNS)})'))
+        connection.commit()
+        stmt = text(f'INSERT INTO "{table}" ({", ".join(COLUMNS)}) VALUES ({", ".join(f":{c}" for c in COLUMNS)})')
+        start = time.perf_counter()
+        for chunk in batches(rows, batch):
+            connection.execute(stmt, chunk)
+            connection.commit()
+        elapsed = time.perf_counter() - start
+        connection.execute(text(f'DROP TABLE "{table}"'))
+        connection.commit()
+    return elapsed
+
+
+async def bench_copy(table: str, rows: list[dict], batch: int, upsert: bool) -> float:
+    loader = PgCopyLoader(table, COLUMNS, upsert_keys=["sku"] if upsert else None)
+    await loader.start()
+    try:
+        if upsert:
+            # 预先写入一半的键，使 upsert 中一半是更新
+            for chunk in batches(rows[: len(rows) // 2], batch):
+                await loader.copy_rows(chunk)
+            loader.rows, loader.batches, loader.copy_seconds = 0, 0, 0.0
+        for chunk in batches(rows, batch):
+            await loader.copy_rows(chunk)
+        return loader.copy_seconds
+    finally:
+        async with loader._conn.cursor() as cur:
+            await cur.execute(f'DROP TABLE IF EXISTS "{table}"')
+        await loader.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark COPY bulk loading")
+    parser.add_argument("--rows", type=int, default=50000, help="rows to load per method")
+    parser.add_argument("--batch", type=int, default=500, help="rows per batch / transaction")
+    args = parser.parse_args()
+
+    rows = synthetic_rows(args.rows)
+    suffix = uuid.uuid4().hex[:8]
+    results = [
+        ("executemany", bench_executemany(f"bench_insert_{suffix}", rows, args.batch)),
+        ("copy", asyncio.run(bench_copy(f"bench_copy_{suffix}", rows, args.batch, upsert=False))),
+        ("copy+upsert", asyncio.run(bench_copy(f"bench_upsert_{suffix}", rows, args.batch, upsert=True))),
+    ]
+
+    baseline = results[0][1]
+    print(f"{'method':<12} {'rows':>8} {'seconds':>9} {'rows/s':>12} {'speedup':>8}")
+    for name, seconds in results:
+        print(f"{name:<12} {len(rows):>8} {seconds:>9.2f} {len(rows) / seconds:>12.0f} {baseline / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -84,8 +84,10 @@ def test_crawler_flow():
             if status == "completed":
                 print("\n✅ 任务完成！")
                 print("-" * 40)
+                print(f"结果: {data.get('result_row_count')} 行, {data.get('result_size_bytes')} 字节")
                 print("生成的 SQL 内容预览 (前 500 字符):")
-                sql_content = data.get("result_sql_content", "")
+                result = requests.get(f"{status_url}/result", headers=headers).json()
+                sql_content = result.get("result_preview") or ""
                 print(sql_content[:500] + "..." if len(sql_content) > 500 else sql_content)
                 print("-" * 40)
                 
@@ -98,7 +100,7 @@ def test_crawler_flow():
             
             elif status == "failed":
                 print("\n❌ 任务失败！")
-                print(f"错误信息: {data.get('result_sql_content')}")
+                print(f"错误信息: {data.get('error_message')}")
                 break
             
             time.sleep(1)
@@ -0,0 +1,129 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.api.routes.industrial import _query_batches, get_batches
+from app.models import IndustrialBatch
+
+START = datetime(2026, 10, 19, 8, 0, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'batches.db'}")
+    SQLModel.metadata.create_all(engine, tables=[IndustrialBatch.__table__])
+    with Session(engine) as session:
+        for i in range(7):
+            session.add(IndustrialBatch(
+                created_at=START + timedelta(minutes=i),
+                url=f"https://{'shop' if i % 2 else 'blog'}.test/{i}",
+                status="completed" if i < 5 else "processing",
+            ))
+        # Two batches created in the same instant are ordered by id
+        for _ in range(2):
+            session.add(IndustrialBatch(created_at=START + timedelta(minutes=3), url="https://tie.test/", status="failed"))
+        session.commit()
+        yield session
+
+
+def _all_pages(session, limit, **filters):
+    pages, cursor = [], None
+    while True:
+        page = _query_batches(session, limit, cursor, filters.get("status"), filters.get("url_prefix"))
+        pages.append(page)
+        if page.next_cursor is None:
+            return pages
+        cursor = page.next_cursor
+
+
+def test_cursor_pages_cover_every_batch_once_in_order(session) -> None:
+    everything = _query_batches(session, None, None, None, None)
+    assert len(everything.data) == 9 and everything.next_cursor is None
+
+    pages = _all_pages(session, 2)
+    ids = [batch.id for page in pages for batch in page.data]
+    assert ids == [batch.id for batch in everything.data]
+    assert [len(page.data) for page in pages] == [2, 2, 2, 2, 1]
+    keys = [(batch.created_at, uuid.UUID(batch.id)) for batch in everything.data]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_last_full_page_has_no_cursor(session) -> None:
+    page = _query_batches(session, 9, None, None, None)
+    assert len(page.data) == 9 and page.next_cursor is None
+
+
+def test_filters_apply_across_pages(session) -> None:
+    pages = _all_pages(session, 1, status=["completed", "failed"], url_prefix="https://shop.test/")
+    batches = [batch for page in pages for batch in page.data]
+    assert [batch.url for batch in batches] == ["https://shop.test/3", "https://shop.test/1"]
+
+    # LIKE wildcards in the prefix are matched literally
+    assert _query_batches(session, None, None, None, "https://%").data == []
+
+
+def test_invalid_cursor_is_rejected(session) -> None:
+    with pytest.raises(HTTPException) as error:
+        _query_batches(session, 10, "not-a-cursor", None, None)
+    assert error.value.status_code == 400
+
+
+def test_legacy_route_is_unbounded_unless_limited(session) -> None:
+    response = Response()
+    assert len(get_batches(session, response, None, None, None, None)) == 9
+    assert "X-Next-Cursor" not in response.headers
+
+    assert len(get_batches(session, response, 4, None, None, None)) == 4
+    assert response.headers["X-Next-Cursor"]
+
+
+def test_harvest_saves_item_count_only_on_phase_change(tmp_path, monkeypatch: pytest.MonkeyPatch) -> None:
+    import asyncio
+
+    from app.api.routes import industrial
+    from app.core import db as core_db
+    from app.industrial_pipeline import collector as collector_module
+    from app.industrial_pipeline.progress import ProgressBroker
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'harvest.db'}")
+    SQLModel.metadata.create_all(engine, tables=[IndustrialBatch.__table__])
+    with Session(engine) as db:
+        batch = IndustrialBatch(created_at=START, url="https://shop.test/", status="pending")
+        db.add(batch)
+        db.commit()
+        batch_id = str(batch.id)
+
+    def stored_count() -> int:
+        with Session(engine) as db:
+            return db.get(IndustrialBatch, uuid.UUID(batch_id)).item_count
+
+    observed = []
+
+    class FakeCollector:
+        def __init__(self, batch_id: str):
+            self.batch_id = batch_id
+            self.collected_count = 0
+
+        async def harvest(self, url, output_dir, config) -> int:
+            for count, phase in ((0, "navigating"), (2, "scrolling"), (5, "scrolling"), (7, "extracting")):
+                self.collected_count = count
+                ProgressBroker.publish(self.batch_id, "phase", phase=phase)
+                await asyncio.sleep(0.05)
+                observed.append(stored_count())
+            self.collected_count = 9
+            return 9
+
+    monkeypatch.setattr(core_db, "engine", engine)
+    monkeypatch.setattr(collector_module, "IndustrialCollector", FakeCollector)
+    monkeypatch.setattr(industrial, "INDUSTRIAL_DIR", tmp_path)
+
+    asyncio.run(industrial.run_industrial_harvest(batch_id, "https://shop.test/", {}))
+
+    # 同一阶段内的计数变化（scrolling 2 -> 5）不写库
+    assert observed == [0, 2, 2, 7]
+    with Session(engine) as db:
+        batch = db.get(IndustrialBatch, uuid.UUID(batch_id))
+        assert batch.status == "completed" and batch.item_count == 9
@@ -0,0 +1,91 @@
+import asyncio
+import uuid
+
+import psycopg
+import pytest
+
+from app.core.bulk_loader import (
+    PgCopyLoader,
+    _copy_value,
+    copy_statement,
+    create_table_statement,
+    database_conninfo,
+    fold_identifier,
+    fold_table_name,
+    merge_statement,
+    staging_statement,
+)
+
+
+def test_statements_quote_identifiers() -> None:
+    assert create_table_statement("public.items", ["title", "Price"]).as_string(None) == (
+        'CREATE TABLE IF NOT EXISTS "public"."items" (id BIGSERIAL PRIMARY KEY, "title" TEXT, "Price" TEXT)'
+    )
+    assert create_table_statement("items", ["id", "title"]).as_string(None) == (
+        'CREATE TABLE IF NOT EXISTS "items" ("id" TEXT, "title" TEXT)'
+    )
+    assert copy_statement('"items"', ["title"]).as_string(None) == 'COPY "items" ("title") FROM STDIN'
+    assert staging_statement("items", "_staging_items", ["title"]).as_string(None) == (
+        'CREATE TEMP TABLE IF NOT EXISTS "_staging_items" ON COMMIT DELETE ROWS '
+        'AS SELECT "title" FROM "items" WITH NO DATA'
+    )
+
+
+def test_merge_statement_keeps_last_row_per_key() -> None:
+    merge = merge_statement("items", "_staging_items", ["sku", "price"], ["sku"]).as_string(None)
+    assert merge == (
+        'INSERT INTO "items" ("sku", "price") SELECT DISTINCT ON ("sku") "sku", "price" FROM "_staging_items" '
+        'ORDER BY "sku", ctid DESC ON CONFLICT ("sku") DO UPDATE SET "price" = EXCLUDED."price"'
+    )
+    assert merge_statement("items", "_s", ["sku"], ["sku"]).as_string(None).endswith("DO NOTHING")
+
+
+def test_unquoted_names_fold_to_lowercase() -> None:
+    assert fold_table_name("MyTable") == fold_table_name("mytable") == "mytable"
+    assert fold_table_name('Shop."MyTable"') == "shop.MyTable"
+    assert fold_identifier("Price") == "price"
+    assert fold_identifier('"Price"') == "Price"
+
+
+def test_copy_values() -> None:
+    assert _copy_value(None) is None
+    assert _copy_value(10.5) == "10.5"
+    assert _copy_value({"a": "é"}) == '{"a": "é"}'
+
+
+def test_upsert_keys_must_be_loaded_columns() -> None:
+    loader = PgCopyLoader("items", ["title"], upsert_keys=["sku"], conninfo="postgresql://unused")
+    loader._conn = object()
+    with pytest.raises(ValueError):
+        asyncio.run(loader._prepare())
+
+
+def _database_available() -> bool:
+    try:
+        with psycopg.connect(database_conninfo(), connect_timeout=2):
+            return True
+    except Exception:
+        return False
+
+
+@pytest.mark.skipif(not _database_available(), reason="PostgreSQL is not reachable")
+def test_copy_and_upsert_roundtrip() -> None:
+    table = f"test_copy_{uuid.uuid4().hex[:8]}"
+
+    async def main():
+        loader = PgCopyLoader(table, ["sku", "price"], upsert_keys=["sku"])
+        await loader.start()
+        try:
+            await loader.copy_rows([{"sku": "a", "price": 1}, {"sku": "b", "price": 2}, {"sku": "a", "price": 3}])
+            await loader.copy_rows([{"sku": "b", "price": 5}])
+            async with loader._conn.cursor() as cur:
+                await cur.execute(f'SELECT sku, price FROM "{table}" ORDER BY sku')
+                rows = await cur.fetchall()
+                await cur.execute(f'DROP TABLE "{table}"')
+            return rows, loader.stats()
+        finally:
+            await loader.close()
+
+    rows, stats = asyncio.run(main())
+    assert rows == [("a", "3"), ("b", "5")]
+    assert stats["rows"] == 4 and stats["rows_per_second"] > 0
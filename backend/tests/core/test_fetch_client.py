@@ -0,0 +1,83 @@
+import asyncio
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.core.fetch_client import FetchClient, _HostStats
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = f"<html>{self.headers.get('User-Agent')}</html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def fresh_client(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(FetchClient, "_client", None)
+    monkeypatch.setattr(FetchClient, "_host_semaphores", {})
+    monkeypatch.setattr(FetchClient, "_host_stats", defaultdict(_HostStats))
+
+
+def test_connections_are_reused_across_requests_with_rotating_headers() -> None:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _KeepAliveHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/page"
+
+    async def run():
+        try:
+            return [
+                (await FetchClient.get(url, headers={"User-Agent": f"agent-{i}"})).text
+                for i in range(5)
+            ]
+        finally:
+            await FetchClient.stop()
+
+    try:
+        bodies = asyncio.run(run())
+    finally:
+        server.shutdown()
+
+    assert bodies == [f"<html>agent-{i}</html>" for i in range(5)]
+    metrics = FetchClient.metrics()
+    assert metrics["requests"] == 5
+    assert metrics["connections_opened"] == 1
+    assert metrics["reuse_rate"] == 0.8
+
+
+def test_per_host_limit_bounds_concurrent_requests(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "FETCH_MAX_CONNECTIONS_PER_HOST", 2)
+    in_flight = {"a.test": 0, "b.test": 0}
+    peak = {"a.test": 0, "b.test": 0}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        in_flight[host] += 1
+        peak[host] = max(peak[host], in_flight[host])
+        await asyncio.sleep(0.01)
+        in_flight[host] -= 1
+        return httpx.Response(200, text="ok")
+
+    monkeypatch.setattr(FetchClient, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    async def run():
+        await asyncio.gather(*(
+            FetchClient.get(f"https://{host}/{i}") for i in range(6) for host in ("a.test", "b.test")
+        ))
+
+    asyncio.run(run())
+
+    assert peak == {"a.test": 2, "b.test": 2}
+    assert FetchClient.metrics()["hosts"]["a.test"]["requests"] == 6
@@ -0,0 +1,159 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.core import llm_client
+from app.core.config import settings
+from app.core.llm_cache import LlmResponseCache
+from app.core.llm_client import LlmClient, LlmRequestError, backoff_delay, parse_retry_after
+from app.core.llm_metrics import LlmMetrics, track_llm_usage
+
+
+@pytest.fixture(autouse=True)
+def llm_cache(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "LLM_CACHE_DIR", str(tmp_path / "llm-cache"))
+    monkeypatch.setattr(settings, "LLM_CACHE_MAX_BYTES", 1024 * 1024)
+    monkeypatch.setattr(LlmResponseCache, "_cache", None)
+    monkeypatch.setattr(LlmResponseCache, "_prompt_tokens_saved", 0)
+    monkeypatch.setattr(LlmResponseCache, "_completion_tokens_saved", 0)
+
+
+def _install_transport(monkeypatch: pytest.MonkeyPatch, handler) -> None:
+    monkeypatch.setattr(llm_client, "BACKOFF_BASE_SECONDS", 0.001)
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 2)
+    client = httpx.AsyncClient(base_url=settings.VOLC_BASE_URL, transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(LlmClient, "_client", client)
+    monkeypatch.setattr(LlmClient, "_semaphore", asyncio.Semaphore(1))
+
+
+def test_parse_retry_after() -> None:
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+
+def test_backoff_delay_honors_retry_after_and_caps_jitter() -> None:
+    assert backoff_delay(0, retry_after=2.5) == 2.5
+    assert all(0 <= backoff_delay(10) <= llm_client.BACKOFF_MAX_SECONDS for _ in range(50))
+
+
+def test_chat_completion_retries_retryable_statuses(monkeypatch: pytest.MonkeyPatch) -> None:
+    statuses = [429, 503, 200]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = statuses.pop(0)
+        if status == 200:
+            return httpx.Response(200, json={"choices": []})
+        return httpx.Response(status, headers={"Retry-After": "0"})
+
+    _install_transport(monkeypatch, handler)
+    retries = LlmClient._retries
+
+    assert asyncio.run(LlmClient.chat_completion({"model": "m"})) == {"choices": []}
+    assert LlmClient._retries == retries + 2
+    assert not statuses
+
+
+def test_chat_completion_does_not_retry_client_errors(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(400, text="bad request")
+
+    _install_transport(monkeypatch, handler)
+
+    with pytest.raises(LlmRequestError) as exc_info:
+        asyncio.run(LlmClient.chat_completion({"model": "m"}))
+    assert exc_info.value.status_code == 400
+    assert len(calls) == 1
+    assert LlmClient.metrics()["queued"] == 0
+
+
+def test_chat_completion_serves_repeated_prompts_from_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, json={
+            "choices": [{"message": {"content": "{}"}}],
+            "usage": {"prompt_tokens": 30, "completion_tokens": 5},
+        })
+
+    _install_transport(monkeypatch, handler)
+    payload = {"model": "m", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.1}
+
+    async def run():
+        first = await LlmClient.chat_completion(payload)
+        second = await LlmClient.chat_completion(dict(payload))
+        await LlmClient.chat_completion({**payload, "temperature": 0.5})
+        await LlmClient.chat_completion(payload, use_cache=False)
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first == second
+    assert len(calls) == 3
+    stats = LlmResponseCache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["tokens_saved"] == 35
+
+
+def test_stream_chat_completion_yields_deltas_and_records_usage(monkeypatch: pytest.MonkeyPatch) -> None:
+    body = (
+        'data: {"choices": [{"delta": {"role": "assistant"}}]}\n\n'
+        'data: {"choices": [{"delta": {"content": "Hel"}}]}\n\n'
+        'data: {"choices": [{"delta": {"content": "lo"}}]}\n\n'
+        'data: {"choices": [], "usage": {"prompt_tokens": 7, "completion_tokens": 2}}\n\n'
+        "data: [DONE]\n\n"
+    )
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, text=body, headers={"Content-Type": "text/event-stream"})
+
+    _install_transport(monkeypatch, handler)
+    monkeypatch.setattr(LlmMetrics, "_stats", {})
+
+    async def run():
+        with track_llm_usage() as usage:
+            parts = [part async for part in LlmClient.stream_chat_completion({"model": "m"}, call_site="chat")]
+        return parts, usage.to_dict()
+
+    parts, usage = asyncio.run(run())
+
+    assert parts == ["Hel", "lo"]
+    assert requests[0]["stream"] is True
+    assert requests[0]["stream_options"] == {"include_usage": True}
+    assert usage["total_tokens"] == 9
+    (calls,) = LlmMetrics.snapshot()
+    assert (calls["call_site"], calls["calls"], calls["errors"]) == ("chat", 1, 0)
+    assert calls["ttft_ms"]["p50"] > 0
+
+
+def test_stream_chat_completion_shares_the_response_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, text='data: {"choices": [{"delta": {"content": "[1]"}}]}\n\ndata: [DONE]\n\n')
+
+    _install_transport(monkeypatch, handler)
+    payload = {"model": "m", "messages": [{"role": "user", "content": "hi"}]}
+
+    async def run():
+        streamed = [part async for part in LlmClient.stream_chat_completion(payload, use_cache=True)]
+        replayed = [part async for part in LlmClient.stream_chat_completion(payload, use_cache=True)]
+        completed = await LlmClient.chat_completion(payload)
+        return streamed, replayed, completed
+
+    streamed, replayed, completed = asyncio.run(run())
+
+    assert streamed == replayed == ["[1]"]
+    assert completed["choices"][0]["message"]["content"] == "[1]"
+    assert len(calls) == 1
@@ -0,0 +1,61 @@
+import asyncio
+
+import pytest
+
+from app.core.llm_metrics import LlmMetrics, merge_usage, track_llm_usage
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(LlmMetrics, "_stats", {})
+
+
+def test_record_aggregates_per_model_and_call_site() -> None:
+    usage = {"prompt_tokens": 100, "completion_tokens": 20}
+    LlmMetrics.record("m", "architect", 0.2, ttft=0.05, usage=usage, retries=1)
+    LlmMetrics.record("m", "architect", 0.4, ttft=0.15, usage=usage)
+    LlmMetrics.record("m", "architect", 0.001, usage=usage, cached=True)
+    LlmMetrics.record("m", "chat", 1.0, error=True)
+
+    architect, chat = LlmMetrics.snapshot()
+    assert (architect["model"], architect["call_site"]) == ("m", "architect")
+    assert architect["calls"] == 3
+    assert architect["cache_hits"] == 1
+    assert architect["retries"] == 1
+    assert architect["prompt_tokens"] == 200
+    assert architect["completion_tokens"] == 40
+    assert architect["latency_ms"]["avg"] == 300.0
+    assert architect["ttft_ms"]["p50"] == 150.0
+    assert chat["errors"] == 1
+
+
+def test_track_llm_usage_collects_calls_from_child_tasks() -> None:
+    async def call(site: str):
+        LlmMetrics.record("m", site, 0.1, usage={"prompt_tokens": 10, "completion_tokens": 5})
+
+    async def run():
+        with track_llm_usage() as usage:
+            await asyncio.gather(call("ai_extractor"), call("ai_extractor"), call("architect"))
+        LlmMetrics.record("m", "chat", 0.1, usage={"prompt_tokens": 99})
+        return usage.to_dict()
+
+    summary = asyncio.run(run())
+
+    assert summary["calls"] == 3
+    assert summary["total_tokens"] == 45
+    assert summary["by_call_site"]["ai_extractor"]["calls"] == 2
+    assert "chat" not in summary["by_call_site"]
+
+
+def test_merge_usage_adds_runs_together() -> None:
+    first = {"calls": 1, "prompt_tokens": 10, "latency_ms": 1.5,
+             "by_call_site": {"architect": {"calls": 1, "prompt_tokens": 10, "latency_ms": 1.5}}}
+    second = {"calls": 2, "prompt_tokens": 5, "latency_ms": 2.0,
+              "by_call_site": {"spider.process_page": {"calls": 2, "prompt_tokens": 5, "latency_ms": 2.0}}}
+
+    merged = merge_usage(first, second)
+
+    assert merged["calls"] == 3
+    assert merged["latency_ms"] == 3.5
+    assert set(merged["by_call_site"]) == {"architect", "spider.process_page"}
+    assert merge_usage(None, second) == second
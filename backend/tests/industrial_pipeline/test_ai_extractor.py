@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+import pytest
+
+from app.core.config import settings
+from app.core.llm_client import LlmClient
+from app.industrial_pipeline.ai_extractor import AiExtractor, merge_chunk_results, parse_json_array
+
+PAGE = "".join(f"<div><h3>Item {i}</h3><p>Price {i}</p></div>" for i in range(40))
+
+
+def test_parse_json_array_salvages_truncated_output() -> None:
+    assert parse_json_array('```json\n[{"a": 1}]\n```') == ([{"a": 1}], True)
+    assert parse_json_array('[{"a": 1}, {"b": {"c": 2}}, {"d": "tru') == ([{"a": 1}, {"b": {"c": 2}}], False)
+    with pytest.raises(json.JSONDecodeError):
+        parse_json_array("not json")
+
+
+def test_merge_chunk_results_drops_edge_duplicates() -> None:
+    merged = merge_chunk_results([
+        [{"name": "A", "price": 1}, {"name": "B"}],
+        [{"name": "B", "price": 2}, {"name": "C", "price": 3}],
+        [{"price": 3}, {"name": "C", "price": 3}, {"name": "D", "price": 4}],
+    ])
+    assert merged == [
+        {"name": "A", "price": 1},
+        {"name": "B", "price": 2},
+        {"name": "C", "price": 3},
+        {"name": "D", "price": 4},
+    ]
+
+
+def test_extract_maps_chunks_concurrently_and_merges(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "VOLC_API_KEY", "key")
+    monkeypatch.setattr(settings, "VOLC_DEEPSEEK_MODEL_ID", "model")
+    in_flight = 0
+    peak = 0
+
+    async def fake_chat_completion(payload, api_key=None, use_cache=True, call_site="default"):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        text = payload["messages"][1]["content"]
+        items = [{"name": line[4:]} for line in text.split("\n") if line.startswith("### ")]
+        return {"choices": [{"message": {"content": json.dumps(items)}}], "usage": {"total_tokens": 10}}
+
+    monkeypatch.setattr(LlmClient, "chat_completion", fake_chat_completion)
+
+    result = asyncio.run(AiExtractor().extract(PAGE, token_budget=60))
+
+    assert result["success"]
+    assert result["data"] == [{"name": f"Item {i}"} for i in range(40)]
+    assert result["chunks"]["total"] > 1
+    assert result["chunks"]["failed"] == 0
+    assert result["tokens_used"]["total_tokens"] == 10 * result["chunks"]["total"]
+    assert peak > 1
+
+
+def test_extract_stream_emits_items_before_the_completion_ends(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "VOLC_API_KEY", "key")
+    monkeypatch.setattr(settings, "VOLC_DEEPSEEK_MODEL_ID", "model")
+    finished_streams = 0
+
+    async def fake_stream(payload, api_key=None, use_cache=False, call_site="default"):
+        nonlocal finished_streams
+        text = payload["messages"][1]["content"]
+        items = [{"name": line[4:]} for line in text.split("\n") if line.startswith("### ")]
+        output = json.dumps(items)
+        for start in range(0, len(output), 7):
+            await asyncio.sleep(0)
+            yield output[start:start + 7]
+        finished_streams += 1
+
+    monkeypatch.setattr(LlmClient, "stream_chat_completion", fake_stream)
+
+    async def run():
+        events = []
+        async for event in AiExtractor().extract_stream(PAGE, token_budget=60):
+            events.append((event, finished_streams))
+        return events
+
+    events = asyncio.run(run())
+    items = [event for event, _ in events if event["type"] == "item"]
+    done = events[-1][0]
+
+    assert events[0][0]["type"] == "reduction"
+    # The first item arrives before any chunk's stream has finished
+    assert events[1] == (items[0], 0)
+    assert sorted(event["data"]["name"] for event in items) == sorted(f"Item {i}" for i in range(40))
+    assert done["type"] == "done" and done["success"]
+    assert done["data"] == [{"name": f"Item {i}"} for i in range(40)]
+    assert done["chunks"]["failed"] == 0
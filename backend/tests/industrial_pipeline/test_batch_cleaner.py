@@ -0,0 +1,109 @@
+import asyncio
+import os
+import uuid
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.deps import get_db
+from app.api.routes import industrial
+from app.industrial_pipeline import batch_cleaner
+from app.industrial_pipeline.batch_cleaner import BatchCleanJob, BatchCleanRegistry, find_html_captures
+from app.industrial_pipeline.clean_pool import CleanerPool, CleanerPoolBusyError
+
+
+def _capture(path: Path, content: str = "<html><body>x</body></html>") -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    return path
+
+
+def _fake_clean(calls: list, busy_first: int = 0):
+    async def clean_file(input_path: Path, output_path: Path):
+        calls.append(input_path.name)
+        if len(calls) <= busy_first:
+            raise CleanerPoolBusyError("busy")
+        output_path.write_text("x")
+        size = input_path.stat().st_size
+        return {"original_size": size, "cleaned_size": 1, "reduction_percent": 50.0}
+    return clean_file
+
+
+@pytest.fixture(autouse=True)
+def fake_pool(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(CleanerPool, "metrics", classmethod(lambda cls: {"workers": 2}))
+    monkeypatch.setattr(batch_cleaner, "BUSY_RETRY_SECONDS", 0)
+    monkeypatch.setattr(BatchCleanRegistry, "_jobs", {})
+
+
+def test_finds_captures_and_skips_up_to_date_outputs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    fresh = _capture(tmp_path / "index.html")
+    stale = _capture(tmp_path / "api_data" / "page.htm")
+    _capture(tmp_path / "notes.txt")
+    _capture(tmp_path / "index_cleaned.html", "y")
+    old_output = _capture(tmp_path / "api_data" / "page_cleaned.htm", "y")
+    # The cleaned output of page.htm predates its source
+    os.utime(old_output, (stale.stat().st_mtime - 60,) * 2)
+
+    assert find_html_captures(tmp_path) == [tmp_path / "api_data" / "page.htm", fresh]
+
+    calls = []
+    monkeypatch.setattr(CleanerPool, "clean_file", _fake_clean(calls))
+    job = BatchCleanJob("b", tmp_path)
+    asyncio.run(job.run())
+
+    assert calls == ["page.htm"]
+    statuses = {entry["file"]: entry["status"] for entry in job.snapshot()["files"]}
+    assert statuses == {"api_data/page.htm": "cleaned", "index.html": "skipped"}
+
+    calls.clear()
+    asyncio.run(BatchCleanJob("b", tmp_path, force=True).run())
+    assert sorted(calls) == ["index.html", "page.htm"]
+
+
+def test_busy_pool_is_retried(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    _capture(tmp_path / "index.html")
+    calls = []
+    monkeypatch.setattr(CleanerPool, "clean_file", _fake_clean(calls, busy_first=2))
+
+    job = BatchCleanJob("b", tmp_path)
+    asyncio.run(job.run())
+
+    assert calls == ["index.html"] * 3
+    assert job.status == "completed"
+    assert job.summary()["cleaned"] == 1
+
+
+def test_start_and_poll_batch_clean(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    _capture(tmp_path / "index.html")
+    calls = []
+    monkeypatch.setattr(CleanerPool, "clean_file", _fake_clean(calls))
+    batch_id = uuid.uuid4()
+
+    class FakeSession:
+        def get(self, model, key):
+            return SimpleNamespace(storage_path=str(tmp_path)) if key == batch_id else None
+
+    app = FastAPI()
+    app.include_router(industrial.router, prefix="/industrial")
+    app.dependency_overrides[get_db] = lambda: FakeSession()
+    client = TestClient(app)
+
+    assert client.get(f"/industrial/batch/{batch_id}/light-clean-all").status_code == 404
+    assert client.post(f"/industrial/batch/{uuid.uuid4()}/light-clean-all", json={}).status_code == 404
+
+    # Background tasks run before TestClient returns the response
+    started = client.post(f"/industrial/batch/{batch_id}/light-clean-all", json={})
+    assert started.status_code == 200
+    assert started.json()["status"] == "pending"
+
+    status = client.get(f"/industrial/batch/{batch_id}/light-clean-all").json()
+    assert status["job_id"] == started.json()["job_id"]
+    assert status["status"] == "completed"
+    assert status["summary"]["cleaned"] == 1
+
+    BatchCleanRegistry.get(str(batch_id)).status = "running"
+    assert client.post(f"/industrial/batch/{batch_id}/light-clean-all", json={}).status_code == 409
@@ -0,0 +1,104 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from app.core.config import settings
+from app.core.disk_cache import DiskLruCache
+from app.industrial_pipeline.clean_cache import CleanCache
+from app.industrial_pipeline.html_cleaner import HtmlCleaner
+
+
+@pytest.fixture
+def clean_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "HTML_CLEANER_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(settings, "HTML_CLEANER_CACHE_MAX_BYTES", 1024 * 1024)
+    monkeypatch.setattr(CleanCache, "_cache", None)
+    yield CleanCache
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = DiskLruCache(tmp_path, max_bytes=10)
+    cache.put_bytes("aa", b"1234", {"n": 1})
+    cache.put_bytes("bb", b"5678", {"n": 2})
+    assert cache.get_bytes("aa") == (b"1234", {"n": 1})
+
+    cache.put_bytes("cc", b"9012", {"n": 3})
+
+    assert cache.get_bytes("bb") is None
+    assert cache.get_bytes("aa") is not None
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["size_bytes"] == 8
+    assert stats["evictions"] == 1
+    assert stats["bytes_served"] == 8
+
+
+def test_disk_cache_expires_entries_after_ttl(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cache = DiskLruCache(tmp_path, max_bytes=100, ttl_seconds=60)
+    cache.put_bytes("aa", b"data", {"n": 1})
+    assert cache.get_bytes("aa") == (b"data", {"n": 1})
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+
+    assert cache.get_bytes("aa") is None
+    assert cache.stats()["expirations"] == 1
+    assert cache.stats()["entries"] == 0
+
+
+def test_disk_cache_restores_index_from_disk(tmp_path: Path) -> None:
+    DiskLruCache(tmp_path, max_bytes=100).put_bytes("aa", b"data", {})
+    assert DiskLruCache(tmp_path, max_bytes=100).get_bytes("aa") == (b"data", {})
+
+
+def test_clean_cache_roundtrip(clean_cache, tmp_path: Path) -> None:
+    source = tmp_path / "page.html"
+    output = tmp_path / "page_cleaned.html"
+    source.write_text('<div class="x"><script>x()</script><p>Hello</p></div>', encoding="utf-8")
+
+    key, cached = clean_cache.lookup(source, output)
+    assert key and cached is None
+
+    stats = HtmlCleaner.clean_file(source, output)
+    clean_cache.store(key, output, stats)
+    output.unlink()
+
+    replay = tmp_path / "replay_cleaned.html"
+    _, cached = clean_cache.lookup(source, replay)
+    assert cached["cached"] is True
+    assert cached["output_path"] == str(replay)
+    assert cached["cleaned_size"] == stats["cleaned_size"]
+    assert replay.read_text(encoding="utf-8") == "<div><p>Hello</p></div>"
+
+    summary = clean_cache.stats()
+    assert summary["hits"] == 1
+    assert summary["misses"] == 1
+    assert summary["hit_rate"] == 0.5
+
+
+def test_clean_cache_key_tracks_content_and_version(clean_cache, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    source = tmp_path / "page.html"
+    source.write_text("<p>a</p>", encoding="utf-8")
+    key = clean_cache.cache_key(source)
+
+    version = HtmlCleaner.VERSION
+    monkeypatch.setattr(HtmlCleaner, "VERSION", version + 1)
+    assert clean_cache.cache_key(source) != key
+    monkeypatch.setattr(HtmlCleaner, "VERSION", version)
+    assert clean_cache.cache_key(source) == key
+
+    source.write_text("<p>b</p>", encoding="utf-8")
+    assert clean_cache.cache_key(source) != key
+
+
+def test_clean_cache_skips_failed_results(clean_cache, tmp_path: Path) -> None:
+    source = tmp_path / "page.html"
+    output = tmp_path / "page_cleaned.html"
+    source.write_text("<p>x</p>", encoding="utf-8")
+    output.write_text("<p>x</p>", encoding="utf-8")
+
+    key, _ = clean_cache.lookup(source, output)
+    clean_cache.store(key, output, {"error": "boom"})
+
+    assert clean_cache.lookup(source, output)[1] is None
@@ -0,0 +1,107 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes import industrial
+from app.core.config import settings
+from app.industrial_pipeline import clean_pool
+from app.industrial_pipeline.clean_pool import CleanerPool, CleanerPoolBusyError
+
+
+def _crash(input_path: Path, output_path: Path) -> dict:
+    # Simulates a worker killed mid-task (e.g. by the OOM killer)
+    os._exit(1)
+
+
+def _clean(input_path: Path, output_path: Path) -> dict:
+    return {"ok": True}
+
+
+@pytest.fixture
+def pool(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "HTML_CLEANER_WORKERS", 1)
+    monkeypatch.setattr(settings, "HTML_CLEANER_MAX_PENDING", 1)
+    monkeypatch.setattr(clean_pool.CleanCache, "lookup", lambda input_path, output_path: (None, None))
+    monkeypatch.setattr(clean_pool.CleanCache, "store", lambda key, output_path, stats: None)
+    for name in ("_admitted", "_running", "_completed", "_failed", "_rejected"):
+        monkeypatch.setattr(CleanerPool, name, 0)
+    yield CleanerPool
+    CleanerPool.stop()
+
+
+def test_full_queue_is_rejected_with_503(pool, monkeypatch: pytest.MonkeyPatch) -> None:
+    async def busy(input_path: Path, output_path: Path):
+        raise CleanerPoolBusyError("Cleaner pool is busy (2 tasks admitted)")
+
+    monkeypatch.setattr(CleanerPool, "clean_file", busy)
+    app = FastAPI()
+    app.include_router(industrial.router, prefix="/industrial")
+
+    response = TestClient(app).post(
+        "/industrial/upload-clean", files={"file": ("page.html", b"<html></html>", "text/html")}
+    )
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+
+def test_admission_control_rejects_beyond_workers_plus_pending(pool, monkeypatch: pytest.MonkeyPatch) -> None:
+    async def main():
+        pool.start()
+        release = asyncio.Event()
+
+        async def slow_executor(executor, func, *args):
+            await release.wait()
+            return {}
+
+        loop = asyncio.get_running_loop()
+        real = loop.run_in_executor
+        monkeypatch.setattr(
+            loop, "run_in_executor",
+            lambda executor, func, *args: slow_executor(executor, func, *args) if executor is pool._executor
+            else real(executor, func, *args),
+        )
+        running = [asyncio.create_task(pool.clean_file(Path("a"), Path("b"))) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        with pytest.raises(CleanerPoolBusyError):
+            await pool.clean_file(Path("c"), Path("d"))
+        release.set()
+        await asyncio.gather(*running)
+
+    asyncio.run(main())
+    assert pool.metrics()["rejected"] == 1
+    assert pool.metrics()["completed"] == 2
+
+
+def test_worker_crash_restarts_the_pool_once(pool, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "HTML_CLEANER_WORKERS", 2)
+    monkeypatch.setattr(clean_pool, "HtmlCleaner", SimpleNamespace(clean_file=_crash))
+
+    async def main():
+        pool.start()
+        broken = pool._executor
+        results = await asyncio.gather(
+            pool.clean_file(Path("a"), Path("b")),
+            pool.clean_file(Path("c"), Path("d")),
+            return_exceptions=True,
+        )
+        assert all(isinstance(result, BrokenProcessPool) for result in results)
+        replacement = pool._executor
+        assert isinstance(replacement, ProcessPoolExecutor) and replacement is not broken
+
+        # A late failure from the old pool must not tear down the replacement
+        pool._restart_executor(broken)
+        assert pool._executor is replacement
+
+        monkeypatch.setattr(clean_pool, "HtmlCleaner", SimpleNamespace(clean_file=_clean))
+        return await pool.clean_file(Path("e"), Path("f"))
+
+    assert asyncio.run(main()) == {"ok": True}
+    assert pool.metrics()["failed"] == 2
@@ -0,0 +1,73 @@
+from app.industrial_pipeline.content_reducer import ContentReducer, estimate_tokens
+
+CARDS = "".join(
+    f'<div class="card"><h3><a href="/p/{i}">Product {i}</a></h3><span>¥{i}.00</span></div>'
+    for i in range(30)
+)
+LISTING = (
+    "<html><head><title>Shop</title><script>track()</script></head><body>"
+    '<nav><a href="/">Home</a><a href="/about">About us</a></nav>'
+    f'<main><div class="grid">{CARDS}</div></main>'
+    "<footer>Copyright 2026, all rights reserved</footer></body></html>"
+)
+
+
+def test_estimate_tokens_counts_cjk_per_character() -> None:
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcdefgh") == 2
+    assert estimate_tokens("价格") == 2
+
+
+def test_reduce_collapses_repeated_cards_and_drops_boilerplate() -> None:
+    reduced = ContentReducer.reduce(LISTING, exemplars=2)
+
+    assert "[Product 0](/p/0)" in reduced.text
+    assert "Product 1" in reduced.text
+    assert "Product 2" not in reduced.text
+    assert "28 more similar <div> items omitted" in reduced.text
+    for boilerplate in ("Home", "Copyright", "track()"):
+        assert boilerplate not in reduced.text
+    assert reduced.collapsed_groups == 1
+    assert reduced.omitted_items == 28
+    assert reduced.tokens_saved == reduced.original_tokens - reduced.reduced_tokens > 0
+
+
+def test_reduce_keeps_every_item_without_collapse() -> None:
+    reduced = ContentReducer.reduce(LISTING, collapse_repeats=False)
+
+    assert all(f"Product {i}" in reduced.text for i in range(30))
+    assert reduced.omitted_items == 0
+    assert not reduced.truncated
+
+
+def test_reduce_truncates_to_token_budget() -> None:
+    reduced = ContentReducer.reduce(LISTING, collapse_repeats=False, token_budget=50)
+
+    assert reduced.truncated
+    assert reduced.reduced_tokens <= 50 + estimate_tokens("[... content truncated to fit token budget]")
+    assert reduced.text.endswith("[... content truncated to fit token budget]")
+
+
+def test_reduce_renders_tables_as_rows() -> None:
+    html = "<table><tr><th>Name</th><th>Price</th></tr><tr><td>Pen</td><td>3</td></tr></table>"
+    assert ContentReducer.reduce(html).text == "| Name | Price |\n| Pen | 3 |"
+
+
+def test_split_chunks_cuts_before_headings_within_budget() -> None:
+    text = ContentReducer.reduce(LISTING, collapse_repeats=False).text
+    chunks = ContentReducer.split_chunks(text, chunk_tokens=40)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert chunk.startswith("### ")
+        assert sum(estimate_tokens(line) + 1 for line in chunk.split("\n")) <= 40
+    assert "\n".join(chunks) == text
+
+
+def test_split_chunks_overlaps_when_no_heading_boundary() -> None:
+    text = "\n".join(f"line {i} with some words" for i in range(20))
+    chunks = ContentReducer.split_chunks(text, chunk_tokens=30, overlap_lines=2)
+
+    assert len(chunks) > 1
+    for previous, current in zip(chunks, chunks[1:]):
+        assert previous.split("\n")[-2:] == current.split("\n")[:2]
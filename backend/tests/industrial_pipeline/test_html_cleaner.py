@@ -0,0 +1,105 @@
+import re
+from pathlib import Path
+
+import pytest
+from bs4 import BeautifulSoup
+
+from app.industrial_pipeline.html_cleaner import HtmlCleaner
+from app.industrial_pipeline.streaming_cleaner import StreamingHtmlCleaner
+
+FIXTURES = [
+    '<div class="card" id="c1"><p style="color:red">Price:   $10</p><script>track()</script>tail<!-- ad --><b>Buy</b></div>',
+    '<!DOCTYPE html><html><head><style>a{}</style><title>T</title></head>'
+    '<body onclick="x"><svg><path d="M0"/></svg><p>A\n\n\n  B</p><iframe src="x"></iframe></body></html>',
+    "<ul><li onclick='go()'>one</li><li>two</li></ul><noscript>enable js</noscript>",
+    "plain text only",
+    "<script>var a = 1;</script>after script",
+    "",
+]
+
+PAGE = Path(__file__).resolve().parents[2] / "backend" / "storage" / "raw" / "2026-01-14" / "a6da38c075051cba97a36f0be10cb823.html"
+
+
+def _fingerprint(cleaned_html: str) -> tuple[str, list[str]]:
+    soup = BeautifulSoup(cleaned_html, "html.parser")
+    text = re.sub(r"\s+", " ", soup.get_text()).strip()
+    return text, [tag.name for tag in soup.find_all(True)]
+
+
+@pytest.mark.parametrize("html", FIXTURES)
+def test_lxml_engine_matches_bs4(html: str) -> None:
+    expected = HtmlCleaner.strip_non_semantic_tags(html, engine="bs4")
+    assert HtmlCleaner.strip_non_semantic_tags(html, engine="lxml") == expected
+
+
+def test_lxml_engine_removes_junk() -> None:
+    cleaned = HtmlCleaner.strip_non_semantic_tags(FIXTURES[1], engine="lxml")
+    for junk in ("<style", "<svg", "<path", "<iframe", "onclick"):
+        assert junk not in cleaned
+    assert "<title>T</title>" in cleaned
+
+
+@pytest.mark.skipif(not PAGE.exists(), reason="harvested page fixture not available")
+def test_lxml_engine_equivalent_on_harvested_page() -> None:
+    html = PAGE.read_text(encoding="utf-8")
+    bs4_output = HtmlCleaner.strip_non_semantic_tags(html, engine="bs4")
+    lxml_output = HtmlCleaner.strip_non_semantic_tags(html, engine="lxml")
+    assert _fingerprint(lxml_output) == _fingerprint(bs4_output)
+
+
+@pytest.mark.parametrize("html", FIXTURES)
+def test_streaming_cleaner_matches_bs4(html: str, tmp_path: Path) -> None:
+    source = tmp_path / "page.html"
+    target = tmp_path / "page_cleaned.html"
+    source.write_text(html, encoding="utf-8")
+
+    # 很小的读取块，确保标签和文本跨块边界被切开
+    stats = StreamingHtmlCleaner.clean_file(source, target, read_chunk_size=7)
+
+    cleaned = target.read_text(encoding="utf-8")
+    assert _fingerprint(cleaned) == _fingerprint(HtmlCleaner.strip_non_semantic_tags(html, engine="bs4"))
+    assert stats["cleaned_size"] == len(cleaned.encode("utf-8"))
+    for junk in ("<script", "<style", "<svg", "<iframe", "<noscript", "onclick", "class=", "<!--"):
+        assert junk not in cleaned
+
+
+MALFORMED = [
+    ('<div><p>a</p><iframe src="x">junk<span>more</span></div><p>keep me</p>', "akeep me"),
+    ("<body><svg><g>icon</body><p>after</p>", "after"),
+    ("<section><canvas><canvas>x</canvas></section><b>kept</b>", "kept"),
+]
+
+
+@pytest.mark.parametrize(("html", "text"), MALFORMED)
+def test_streaming_cleaner_recovers_from_unclosed_junk(html: str, text: str, tmp_path: Path) -> None:
+    source = tmp_path / "page.html"
+    target = tmp_path / "page_cleaned.html"
+    source.write_text(html, encoding="utf-8")
+
+    StreamingHtmlCleaner.clean_file(source, target, read_chunk_size=7)
+
+    # 未闭合的垃圾标签只吞掉所在的外层元素，之后的内容照常保留
+    cleaned = target.read_text(encoding="utf-8")
+    assert _fingerprint(cleaned) == _fingerprint(HtmlCleaner.strip_non_semantic_tags(html, engine="bs4"))
+    assert _fingerprint(cleaned)[0] == text
+
+
+def test_clean_file_switches_to_streaming_above_threshold(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    from app.core.config import settings
+
+    source = tmp_path / "big.html"
+    source.write_text(FIXTURES[1] * 50, encoding="utf-8")
+    monkeypatch.setattr(settings, "HTML_CLEANER_STREAMING_THRESHOLD", 1024)
+
+    stats = HtmlCleaner.clean_file(source, tmp_path / "big_cleaned.html")
+
+    assert stats["mode"] == "streaming"
+    assert stats["cleaned_size"] < stats["original_size"]
+
+
+@pytest.mark.skipif(not PAGE.exists(), reason="harvested page fixture not available")
+def test_streaming_cleaner_equivalent_on_harvested_page(tmp_path: Path) -> None:
+    target = tmp_path / "page_cleaned.html"
+    StreamingHtmlCleaner.clean_file(PAGE, target, read_chunk_size=4096)
+    bs4_output = HtmlCleaner.strip_non_semantic_tags(PAGE.read_text(encoding="utf-8"), engine="bs4")
+    assert _fingerprint(target.read_text(encoding="utf-8")) == _fingerprint(bs4_output)
@@ -0,0 +1,41 @@
+from app.industrial_pipeline.json_stream import IncrementalJsonArrayParser
+
+
+def _feed_all(parser: IncrementalJsonArrayParser, text: str, step: int) -> list:
+    items = []
+    for start in range(0, len(text), step):
+        items.extend(parser.feed(text[start:start + step]))
+    return items
+
+
+def test_emits_each_element_as_soon_as_it_closes() -> None:
+    parser = IncrementalJsonArrayParser()
+
+    assert parser.feed('```json\n[{"name": "A", "tags": ["x", "]"]}') == [{"name": "A", "tags": ["x", "]"]}]
+    assert parser.feed(', {"name": "B\\"}"') == []
+    assert parser.feed('}, 3, "s"]\n```') == [{"name": 'B"}'}, 3, "s"]
+    assert parser.complete
+    assert parser.items_emitted == 4
+
+
+def test_split_points_do_not_change_the_result() -> None:
+    text = '[{"a": {"b": [1, 2]}}, {"c": "d,e"}, true, null]'
+    for step in (1, 2, 5, len(text)):
+        parser = IncrementalJsonArrayParser()
+        assert _feed_all(parser, text, step) == [{"a": {"b": [1, 2]}}, {"c": "d,e"}, True, None]
+
+
+def test_truncated_tail_keeps_completed_items() -> None:
+    parser = IncrementalJsonArrayParser()
+
+    items = _feed_all(parser, '[{"a": 1}, {"b": 2}, {"c": "cut of', 4)
+
+    assert items == [{"a": 1}, {"b": 2}]
+    assert parser.started and not parser.complete
+
+
+def test_malformed_element_is_skipped() -> None:
+    parser = IncrementalJsonArrayParser()
+
+    assert parser.feed('[{"a": 1}, {"b": oops}, {"c": 3}]') == [{"a": 1}, {"c": 3}]
+    assert parser.invalid_elements == 1
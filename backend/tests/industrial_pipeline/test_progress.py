@@ -0,0 +1,95 @@
+import asyncio
+from collections import OrderedDict
+
+import pytest
+
+from app.industrial_pipeline.progress import ProgressBroker
+
+
+@pytest.fixture(autouse=True)
+def fresh_broker(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(ProgressBroker, "_subscribers", {})
+    monkeypatch.setattr(ProgressBroker, "_snapshots", {})
+    monkeypatch.setattr(ProgressBroker, "_finished", OrderedDict())
+
+
+async def _collect(batch_id: str, heartbeat: float = 15.0, limit: int = 10) -> list:
+    events = []
+    async for event in ProgressBroker.subscribe(batch_id, heartbeat=heartbeat):
+        events.append(event)
+        if len(events) >= limit:
+            break
+    return events
+
+
+def test_subscribe_starts_with_snapshot() -> None:
+    async def scenario():
+        ProgressBroker.publish("b1", "phase", phase="processing")
+        ProgressBroker.publish("b1", "file", file_name="a.html", item_count=1)
+        ProgressBroker.publish("b1", "items", item_count=3)
+
+        subscriber = asyncio.create_task(_collect("b1"))
+        await asyncio.sleep(0)
+        ProgressBroker.publish("b1", "items", item_count=4)
+        ProgressBroker.publish("b1", "phase", phase="completed", item_count=4)
+        return await subscriber
+
+    events = asyncio.run(scenario())
+
+    snapshot = events[0]
+    assert snapshot["type"] == "snapshot"
+    assert snapshot["phase"] == "processing"
+    assert snapshot["item_count"] == 3
+    assert snapshot["files"] == ["a.html"]
+    assert [e["type"] for e in events[1:]] == ["items", "phase"]
+    assert events[-1]["phase"] == "completed"
+    # 结束后快照释放，订阅者也已注销
+    assert ProgressBroker.snapshot("b1") is None
+    assert "b1" not in ProgressBroker._subscribers
+
+
+def test_subscribe_after_finish_returns_terminal_event() -> None:
+    ProgressBroker.publish("b1", "phase", phase="processing")
+    ProgressBroker.publish("b1", "phase", phase="failed", error="boom")
+
+    events = asyncio.run(_collect("b1"))
+
+    assert len(events) == 1
+    assert events[0]["phase"] == "failed"
+    assert events[0]["error"] == "boom"
+
+
+def test_finished_evicts_oldest_first(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(ProgressBroker, "_finished_limit", 2)
+
+    for batch_id in ("b1", "b2", "b3"):
+        ProgressBroker.publish(batch_id, "phase", phase="completed")
+    assert list(ProgressBroker._finished) == ["b2", "b3"]
+
+    # 重新结束的批次移到末尾，下一次淘汰最旧的 b3
+    ProgressBroker.publish("b2", "phase", phase="completed")
+    ProgressBroker.publish("b4", "phase", phase="completed")
+    assert list(ProgressBroker._finished) == ["b2", "b4"]
+
+    # 重新开始运行的批次不再视为已结束
+    ProgressBroker.publish("b2", "phase", phase="processing")
+    assert list(ProgressBroker._finished) == ["b4"]
+
+
+def test_idle_subscription_yields_heartbeats() -> None:
+    async def scenario():
+        ProgressBroker.publish("b1", "phase", phase="processing")
+        events = []
+        async for event in ProgressBroker.subscribe("b1", heartbeat=0.01):
+            events.append(event)
+            if len(events) == 3:
+                ProgressBroker.publish("b1", "phase", phase="completed")
+        return events
+
+    events = asyncio.run(asyncio.wait_for(scenario(), timeout=5))
+
+    assert events[0]["type"] == "snapshot"
+    assert events[1] == {"type": "heartbeat", "batch_id": "b1"}
+    assert events[2] == {"type": "heartbeat", "batch_id": "b1"}
+    assert events[-1]["type"] == "phase"
+    assert events[-1]["phase"] == "completed"
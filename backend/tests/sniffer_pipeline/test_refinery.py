@@ -0,0 +1,52 @@
+import asyncio
+import csv
+
+from app.sniffer_pipeline import refinery
+from app.sniffer_pipeline.refinery import (
+    fold_identifier,
+    fold_table_name,
+    quoted_identifiers,
+    table_name_from_schema,
+)
+
+
+def test_table_name_from_schema() -> None:
+    assert table_name_from_schema("CREATE TABLE products (id INT)") == "products"
+    assert table_name_from_schema("create table if not exists Products(id INT)") == "Products"
+    assert table_name_from_schema('CREATE UNLOGGED TABLE public."Products" (id INT)') == 'public."Products"'
+    assert table_name_from_schema("SELECT 1") is None
+
+
+def test_identifiers_fold_like_postgres() -> None:
+    ddl = 'CREATE TABLE IF NOT EXISTS Shop.ProductList ("SKU" TEXT, productName TEXT)'
+    quoted = quoted_identifiers(ddl)
+
+    assert fold_table_name(table_name_from_schema(ddl)) == "shop.productlist"
+    assert fold_table_name('"Shop"."ProductList"') == "Shop.ProductList"
+    assert fold_identifier("productName", quoted) == "productname"
+    assert fold_identifier("SKU", quoted) == "SKU"
+
+
+class _FakeLoader:
+    def __init__(self):
+        self.calls = []
+
+    async def copy_rows(self, rows, columns=None):
+        self.calls.append((list(rows), columns))
+        return len(self.calls[-1][0])
+
+
+def test_flush_uses_union_of_row_keys(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(refinery, "CSV_DIR", tmp_path)
+    monkeypatch.setattr(refinery, "SQL_DIR", tmp_path)
+    loader = _FakeLoader()
+    buffer = [{"Name": "a"}, {"Name": "b", "Price": 2}, {"SKU": "x"}]
+
+    asyncio.run(refinery.Refinery()._flush_buffer(loader, buffer, "Products", "t1", {"SKU"}))
+
+    rows, columns = loader.calls[0]
+    assert columns == ["name", "price", "SKU"]
+    assert rows[1] == {"name": "b", "price": 2}
+    with open(tmp_path / "t1.csv", newline="", encoding="utf-8") as f:
+        assert list(csv.DictReader(f))[2] == {"Name": "", "Price": "", "SKU": "x"}
+    assert "INSERT INTO Products (Name, Price, SKU) VALUES ('a', NULL, NULL);" in (tmp_path / "t1.sql").read_text()
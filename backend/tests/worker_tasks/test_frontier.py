@@ -0,0 +1,57 @@
+import asyncio
+
+from app.worker_tasks.frontier import UrlFrontier, feed_frontier, frontier_fetch_stage, normalize_url
+from app.worker_tasks.stages import Stage, StagedPipeline
+
+
+def test_normalize_url_drops_noise() -> None:
+    assert normalize_url("HTTPS://Shop.Example.com:443/list?b=2&a=1&utm_source=x#top") == (
+        "https://shop.example.com/list?a=1&b=2"
+    )
+    assert normalize_url("http://example.com") == "http://example.com/"
+    assert normalize_url("http://example.com:8080/p") == "http://example.com:8080/p"
+
+
+def test_frontier_deduplicates_and_enforces_limits() -> None:
+    frontier = UrlFrontier(max_pages=3, max_depth=1, max_links_per_page=2)
+
+    assert frontier.add("https://a.test/list")
+    assert not frontier.add("https://a.test/list#again")
+    assert not frontier.add("https://a.test/deep", depth=2)
+    assert frontier.add_links(["https://a.test/2", "https://a.test/3", "https://a.test/4"], depth=1) == 2
+    assert not frontier.add("https://a.test/5", depth=1)
+    assert frontier.stats() == {"admitted": 3, "duplicates": 1, "rejected": 2, "pending": 3}
+
+
+def test_fetching_runs_ahead_of_slow_extraction() -> None:
+    # Page n links to n + 1; extraction is much slower than fetching
+    frontier = UrlFrontier(max_pages=6)
+    frontier.add("https://a.test/page-1")
+    events = []
+
+    async def fetch(index: int, url: str):
+        events.append(("fetch", index))
+        return index
+
+    async def discover(url: str, page: int):
+        return [f"https://a.test/page-{page + 1}", "https://a.test/page-1"]
+
+    async def extract(page: int):
+        await asyncio.sleep(0.01)
+        events.append(("extract", page))
+
+    async def main():
+        pipeline = StagedPipeline([
+            frontier_fetch_stage(frontier, fetch, discover, concurrency=1),
+            Stage("extract", extract, 1),
+        ])
+        await pipeline.run(feed_frontier(frontier, pipeline))
+
+    asyncio.run(main())
+
+    fetched = [index for kind, index in events if kind == "fetch"]
+    extracted = sorted(index for kind, index in events if kind == "extract")
+    assert fetched == extracted == [1, 2, 3, 4, 5, 6]
+    # Every page was fetched before the first extraction finished
+    assert events.index(("fetch", 6)) < events.index(("extract", 1))
+    assert frontier.stats()["duplicates"] == 6
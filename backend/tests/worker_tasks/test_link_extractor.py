@@ -0,0 +1,56 @@
+from app.worker_tasks.link_extractor import (
+    extract_links,
+    find_next_page_url,
+    find_pagination_links,
+)
+
+LISTING = """
+<html><head><link rel="stylesheet" href="/s.css"></head><body>
+<a href="/cart">View more &gt;</a>
+<div class="grid">
+  <a href="/item/1"><h3>Item 1</h3></a>
+  <a href="/item/2">Read more</a>
+</div>
+<ul class="pagination">
+  <li><a href="/list?cat=3&amp;pg=1">&laquo; Prev</a></li>
+  <li><a href="/list?cat=3&amp;pg=1">1</a></li>
+  <li><span>2</span></li>
+  <li><a href="/list?cat=3&amp;pg=3">3</a></li>
+  <li><a href="/list?cat=3&amp;pg=4">4</a></li>
+  <li><a href="/list?cat=3&amp;pg=3" class="page-next">&raquo;</a></li>
+</ul>
+<a href="https://other.test/list?pg=3">Next</a>
+</body></html>
+"""
+
+
+def test_extract_links_unescapes_and_resolves_hrefs() -> None:
+    links = extract_links("https://shop.test/list?cat=3&pg=2", LISTING)
+
+    pagination = [link for link in links if link.in_pagination]
+    assert [link.text for link in pagination] == ["« Prev", "1", "3", "4", "»"]
+    assert pagination[2].href == "https://shop.test/list?cat=3&pg=3"
+    assert links[1].text == "Item 1"
+
+
+def test_next_page_prefers_pagination_signals_over_first_keyword_match() -> None:
+    # The old heuristic returned the first anchor containing ">" or "more" (/cart)
+    assert find_next_page_url("https://shop.test/list?cat=3&pg=2", LISTING) == "https://shop.test/list?cat=3&pg=3"
+
+
+def test_rel_next_link_tag_wins() -> None:
+    html = '<link rel="next" href="/feed/after-xyz"><a href="/about">more</a>'
+    assert find_next_page_url("https://shop.test/feed", html) == "https://shop.test/feed/after-xyz"
+
+
+def test_no_candidate_above_threshold() -> None:
+    html = '<a href="/about">About</a><a href="https://other.test/">Next</a>'
+    assert find_next_page_url("https://shop.test/", html) is None
+
+
+def test_pagination_links_are_same_host_and_unique() -> None:
+    assert find_pagination_links("https://shop.test/list?cat=3&pg=2", LISTING) == [
+        "https://shop.test/list?cat=3&pg=1",
+        "https://shop.test/list?cat=3&pg=3",
+        "https://shop.test/list?cat=3&pg=4",
+    ]
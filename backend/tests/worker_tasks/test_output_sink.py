@@ -0,0 +1,206 @@
+import asyncio
+import csv
+import json
+
+import pytest
+
+from app.worker_tasks import output_sink
+from app.worker_tasks.output_sink import CrawlOutputSink, CrawlRecord, read_preview, render_sql
+
+
+def _sink(tmp_path, **kwargs) -> CrawlOutputSink:
+    return CrawlOutputSink(
+        "products",
+        ["title", "price"],
+        csv_path=tmp_path / "task.csv",
+        sql_path=tmp_path / "task.sql",
+        jsonl_path=tmp_path / "task.jsonl",
+        **kwargs,
+    )
+
+
+def _record(index: int) -> CrawlRecord:
+    return CrawlRecord(index, f"https://a.test/{index}", 200, {"title": f"It's {index}", "price": None})
+
+
+def test_concurrent_writers_share_one_header_and_batched_writes(tmp_path) -> None:
+    sink = _sink(tmp_path, queue_size=4, flush_rows=10, flush_seconds=0.01, fsync="none")
+
+    async def main():
+        await sink.start()
+        await asyncio.gather(*(sink.write(_record(i)) for i in range(1, 26)))
+        await sink.close()
+
+    asyncio.run(main())
+
+    with open(tmp_path / "task.csv", newline="", encoding="utf-8") as f:
+        rows = list(csv.reader(f))
+    assert rows[0] == ["page_index", "url", "status", "title", "price"]
+    assert len(rows) == 26 and rows.count(rows[0]) == 1
+
+    sql = (tmp_path / "task.sql").read_text(encoding="utf-8")
+    assert sql.count("INSERT INTO products (title) VALUES ('It''s 1');\n\n") == 1
+    lines = (tmp_path / "task.jsonl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 25 and json.loads(lines[0])["data"]["price"] is None
+
+    stats = sink.stats()
+    assert stats["rows"] == 25 and stats["batches"] < 25 and stats["fsyncs"] == 0
+
+
+def test_failed_extraction_keeps_metadata_row(tmp_path) -> None:
+    sink = _sink(tmp_path, fsync="none")
+
+    async def main():
+        await sink.start()
+        await sink.write(CrawlRecord(3, "https://a.test/3", 500, error="timeout"))
+        await sink.close()
+
+    asyncio.run(main())
+
+    assert (tmp_path / "task.csv").read_text(encoding="utf-8").splitlines()[1] == "3,https://a.test/3,500,,"
+    assert render_sql("products", CrawlRecord(3, "https://a.test/3", 500, error="timeout")) == (
+        "-- Error extracting data for https://a.test/3: timeout"
+    )
+    assert render_sql("products", CrawlRecord(1, "https://a.test/1", 200, {"title": None})) == (
+        "-- No data could be extracted for https://a.test/1"
+    )
+
+
+def test_fsync_policy(tmp_path, monkeypatch) -> None:
+    synced = []
+    monkeypatch.setattr(output_sink.os, "fsync", lambda fd: synced.append(fd))
+
+    async def run(fsync: str):
+        synced.clear()
+        sink = _sink(tmp_path, flush_rows=1, fsync=fsync)
+        await sink.start()
+        for i in range(3):
+            await sink.write(_record(i))
+        await sink.close()
+        return len(synced)
+
+    # Three files: once per batch plus once on close, or only on close
+    assert asyncio.run(run("batch")) == 3 * 3 + 3
+    assert asyncio.run(run("close")) == 3
+    assert asyncio.run(run("none")) == 0
+
+
+def test_write_error_surfaces_on_close(tmp_path, monkeypatch) -> None:
+    sink = _sink(tmp_path, flush_rows=1, fsync="none")
+
+    def broken(batch):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(sink, "_write_batch", broken)
+
+    async def main():
+        await sink.start()
+        for i in range(5):
+            await sink.write(_record(i))
+        await sink.close()
+
+    with pytest.raises(OSError, match="disk full"):
+        asyncio.run(main())
+
+
+class _FakeLoader:
+    def __init__(self):
+        self.batches = []
+        self.started = self.closed = False
+
+    async def start(self):
+        self.started = True
+
+    async def copy_rows(self, rows):
+        self.batches.append(list(rows))
+
+    async def close(self):
+        self.closed = True
+
+    def stats(self):
+        return {"rows": sum(len(batch) for batch in self.batches)}
+
+
+def test_loader_receives_extracted_rows(tmp_path) -> None:
+    loader = _FakeLoader()
+    sink = _sink(tmp_path, flush_rows=10, fsync="none", loader=loader)
+
+    async def main():
+        await sink.start()
+        await sink.write(_record(1))
+        await sink.write(CrawlRecord(2, "https://a.test/2", 500, error="timeout"))
+        await sink.write(CrawlRecord(3, "https://a.test/3", 200, {"title": None, "price": None}))
+        await sink.close()
+
+    asyncio.run(main())
+
+    assert loader.started and loader.closed
+    assert loader.batches == [[{"title": "It's 1", "price": None}]]
+    assert sink.stats()["direct_load"] == {"rows": 1}
+
+
+class _FailingLoader(_FakeLoader):
+    async def copy_rows(self, rows):
+        self.batches.append(list(rows))
+        raise RuntimeError("connection lost")
+
+
+def test_load_failure_keeps_writing_files(tmp_path) -> None:
+    loader = _FailingLoader()
+    sink = _sink(tmp_path, flush_rows=2, fsync="none", loader=loader)
+
+    async def main():
+        await sink.start()
+        for i in range(1, 7):
+            await sink.write(_record(i))
+        await sink.close()
+
+    with pytest.raises(RuntimeError, match="connection lost"):
+        asyncio.run(main())
+
+    # 入库只尝试一次，三种文件仍然包含全部记录
+    assert len(loader.batches) == 1 and loader.closed
+    assert sink.rows == 6
+    assert len((tmp_path / "task.jsonl").read_text(encoding="utf-8").splitlines()) == 6
+    assert (tmp_path / "task.sql").read_text(encoding="utf-8").count("INSERT INTO products") == 6
+
+
+def test_loader_rows_use_folded_column_names(tmp_path) -> None:
+    loader = _FakeLoader()
+    sink = CrawlOutputSink(
+        "Products",
+        ["Title", "price"],
+        csv_path=tmp_path / "task.csv",
+        sql_path=tmp_path / "task.sql",
+        jsonl_path=tmp_path / "task.jsonl",
+        fsync="none",
+        loader=loader,
+    )
+
+    async def main():
+        await sink.start()
+        await sink.write(CrawlRecord(1, "https://a.test/1", 200, {"Title": "A", "price": "1"}))
+        await sink.close()
+
+    asyncio.run(main())
+
+    assert loader.batches == [[{"title": "A", "price": "1"}]]
+
+
+def test_data_rows_and_bounded_preview(tmp_path) -> None:
+    sink = _sink(tmp_path, fsync="none")
+
+    async def main():
+        await sink.start()
+        for i in range(1, 41):
+            await sink.write(_record(i))
+        await sink.write(CrawlRecord(41, "https://a.test/41", 500, error="timeout"))
+        await sink.close()
+
+    asyncio.run(main())
+
+    assert sink.stats()["rows"] == 41 and sink.data_rows == 40
+    preview = read_preview(tmp_path / "task.sql", 200)
+    assert len(preview.encode("utf-8")) <= 200
+    assert preview.startswith("INSERT INTO products") and preview.endswith(";\n\n")
+    assert read_preview(tmp_path / "task.csv", 10_000) == (tmp_path / "task.csv").read_bytes().decode("utf-8")
@@ -0,0 +1,92 @@
+import asyncio
+import json
+
+from app.core.llm_client import LlmClient, LlmRequestError
+from app.worker_tasks.crawler import FetchedPage
+from app.worker_tasks.page_extraction import PageBatcher
+
+
+def _page(index: int) -> FetchedPage:
+    url = f"https://a.test/list?page={index}"
+    return FetchedPage(index, url, 200, "", f"# Item {index}\nPrice: {index}")
+
+
+def _response(data: dict) -> dict:
+    return {"choices": [{"message": {"content": json.dumps(data)}}]}
+
+
+def _fake_llm(monkeypatch, handler):
+    calls = []
+
+    async def fake_chat_completion(payload, api_key=None, use_cache=True, call_site="default"):
+        prompt = payload["messages"][1]["content"]
+        keys = [line.strip("= ") for line in prompt.splitlines() if line.startswith("=== page_")]
+        calls.append((call_site, keys))
+        return handler(call_site, keys, prompt)
+
+    monkeypatch.setattr(LlmClient, "chat_completion", staticmethod(fake_chat_completion))
+    return calls
+
+
+async def _extract_all(batcher: PageBatcher, pages):
+    return await asyncio.gather(*(batcher.extract(page) for page in pages))
+
+
+def test_concurrent_pages_share_one_request(monkeypatch) -> None:
+    def handler(call_site, keys, prompt):
+        return _response({key: {"title": key} for key in keys})
+
+    calls = _fake_llm(monkeypatch, handler)
+    batcher = PageBatcher(["title"], token_budget=10000, max_pages=4, linger_seconds=0.01)
+
+    results = asyncio.run(_extract_all(batcher, [_page(i) for i in range(1, 5)]))
+
+    assert results == [{"title": f"page_{i}"} for i in range(1, 5)]
+    assert calls == [("spider.batch", ["page_1", "page_2", "page_3", "page_4"])]
+    assert batcher.stats()["requests_per_page"] == 0.25
+
+
+def test_failed_batch_is_split_in_half(monkeypatch) -> None:
+    def handler(call_site, keys, prompt):
+        if len(keys) > 2:
+            raise LlmRequestError("context length exceeded")
+        if call_site == "spider.batch":
+            return _response({key: {"title": key} for key in keys})
+        return _response({"title": "single"})
+
+    calls = _fake_llm(monkeypatch, handler)
+    batcher = PageBatcher(["title"], token_budget=10000, max_pages=4, linger_seconds=0.01)
+
+    results = asyncio.run(_extract_all(batcher, [_page(i) for i in range(1, 5)]))
+
+    assert results == [{"title": f"page_{i}"} for i in range(1, 5)]
+    assert [keys for _, keys in calls] == [
+        ["page_1", "page_2", "page_3", "page_4"],
+        ["page_1", "page_2"],
+        ["page_3", "page_4"],
+    ]
+    assert batcher.stats()["splits"] == 1
+
+
+def test_missing_page_falls_back_to_single_request(monkeypatch) -> None:
+    def handler(call_site, keys, prompt):
+        if call_site == "spider.batch":
+            return _response({"page_1": {"title": "batched"}})
+        return _response({"title": "single"})
+
+    calls = _fake_llm(monkeypatch, handler)
+    batcher = PageBatcher(["title"], token_budget=10000, max_pages=2, linger_seconds=0.01)
+
+    results = asyncio.run(_extract_all(batcher, [_page(1), _page(2)]))
+
+    assert results == [{"title": "batched"}, {"title": "single"}]
+    assert [call_site for call_site, _ in calls] == ["spider.batch", "spider.process_page"]
+    assert batcher.stats()["single_fallbacks"] == 1
+
+
+def test_oversized_page_is_extracted_alone(monkeypatch) -> None:
+    calls = _fake_llm(monkeypatch, lambda call_site, keys, prompt: _response({"title": "single"}))
+    batcher = PageBatcher(["title"], token_budget=50, max_pages=4, linger_seconds=0.01)
+
+    assert asyncio.run(batcher.extract(_page(1))) == {"title": "single"}
+    assert [call_site for call_site, _ in calls] == ["spider.process_page"]
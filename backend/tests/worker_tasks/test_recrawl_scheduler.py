@@ -0,0 +1,148 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.core.config import settings
+from app.models import CrawlerTask, CrawlIndex
+from app.worker_tasks import recrawl_scheduler, revalidation
+from app.worker_tasks.recrawl_scheduler import (
+    RecrawlCandidate,
+    plan_recrawls,
+    recrawl_priority,
+    recrawl_usage,
+    reserve_recrawls,
+    tick_budget,
+)
+from app.worker_tasks.revalidation import estimate_change_rate
+
+NOW = datetime(2026, 10, 19, 12, 0, 0)
+SPEC = '{"table_name": "products", "columns": ["title"]}'
+
+
+def _candidate(url: str, rate: float | None, age: timedelta) -> RecrawlCandidate:
+    return RecrawlCandidate(url, SPEC, rate, NOW - age)
+
+
+def test_change_rate_estimate() -> None:
+    day = 86400
+    assert estimate_change_rate(0, 0, 0) is None
+    assert estimate_change_rate(10, 0, 10 * day) == 0
+    # Changed on every daily check: the estimate exceeds one change per day
+    assert estimate_change_rate(10, 10, 10 * day) > 1
+    half = estimate_change_rate(10, 5, 10 * day)
+    assert 0.5 < half < estimate_change_rate(10, 10, 10 * day)
+
+
+def test_observations_accumulate_history() -> None:
+    entry = CrawlIndex(url_hash="h", original_url="https://a.test", content_md5="m")
+    revalidation._observe(entry, changed=True, now=NOW)
+    assert entry.check_count == 0 and entry.last_checked_at == NOW
+
+    revalidation._observe(entry, changed=True, now=NOW + timedelta(days=1))
+    revalidation._observe(entry, changed=False, now=NOW + timedelta(days=2))
+    assert (entry.check_count, entry.change_count, entry.observed_seconds) == (2, 1, 2 * 86400)
+    assert entry.change_rate == pytest.approx(estimate_change_rate(2, 1, 2 * 86400))
+
+
+def test_priority_prefers_likely_stale_but_not_hopelessly_volatile_pages() -> None:
+    horizon = 1.0
+    assert recrawl_priority(1.0, 2.0, horizon) > recrawl_priority(1.0, 0.1, horizon)
+    assert recrawl_priority(0.5, 3.0, horizon) > recrawl_priority(0.01, 3.0, horizon)
+    # A page that changes every few minutes is stale almost immediately after a fetch
+    assert recrawl_priority(300.0, 3.0, horizon) < recrawl_priority(1.0, 3.0, horizon)
+
+
+def test_plan_orders_candidates_and_skips_recent_checks() -> None:
+    candidates = [
+        _candidate("https://a.test/stable", 0.01, timedelta(days=2)),
+        _candidate("https://a.test/daily", 1.0, timedelta(days=2)),
+        _candidate("https://a.test/just-checked", 1.0, timedelta(minutes=5)),
+        _candidate("https://a.test/new", None, timedelta(days=2)),
+    ]
+    planned = plan_recrawls(candidates, NOW, daily_budget=100)
+
+    urls = [item.url for item in planned]
+    assert "https://a.test/just-checked" not in urls
+    assert urls[-1] == "https://a.test/stable"
+    # Without history the default rate applies; the floor keeps stable pages in rotation
+    new = next(item for item in planned if item.url == "https://a.test/new")
+    assert new.change_rate == settings.RECRAWL_DEFAULT_CHANGE_RATE
+    assert planned[-1].change_rate == max(0.01, 1 / settings.RECRAWL_MAX_INTERVAL_DAYS)
+
+
+class _AwareDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return datetime.now(tz or timezone.utc)
+
+
+@pytest.fixture
+def task_db(tmp_path, monkeypatch: pytest.MonkeyPatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'tasks.db'}")
+    SQLModel.metadata.create_all(engine, tables=[CrawlerTask.__table__])
+    monkeypatch.setattr(recrawl_scheduler, "engine", engine)
+    # 任务时间统一带时区写入，与 24 小时窗口的比较值一致
+    monkeypatch.setattr(recrawl_scheduler, "datetime", _AwareDatetime)
+    monkeypatch.setattr(CrawlerTask.model_fields["created_at"], "default_factory", _AwareDatetime.now)
+    return engine
+
+
+def _recrawl_task(engine, urls: list[str], status: str, age: timedelta) -> None:
+    with Session(engine) as session:
+        session.add(CrawlerTask(
+            status=status,
+            created_at=_AwareDatetime.now() - age,
+            recrawl_urls=json.dumps(urls),
+        ))
+        session.commit()
+
+
+def test_budget_is_counted_from_recrawl_tasks(task_db, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "RECRAWL_DAILY_FETCH_BUDGET", 240)
+    monkeypatch.setattr(settings, "RECRAWL_TICK_SECONDS", 3600)
+    assert tick_budget(0) == 10
+
+    _recrawl_task(task_db, [f"https://a.test/old-{i}" for i in range(500)], "completed", timedelta(days=2))
+    _recrawl_task(task_db, [f"https://a.test/done-{i}" for i in range(233)], "completed", timedelta(hours=3))
+    _recrawl_task(task_db, ["https://a.test/running", "https://a.test/queued"], "processing (1/2)", timedelta(minutes=5))
+    with Session(task_db) as session:
+        session.add(CrawlerTask(status="processing"))
+        session.commit()
+
+        used, in_flight = recrawl_usage(session)
+
+    # 只统计 24 小时内调度器创建的任务；普通任务不占预算
+    assert used == 235
+    assert in_flight == {"https://a.test/running", "https://a.test/queued"}
+    assert tick_budget(used) == 5
+
+
+def test_reserve_records_urls_and_skips_in_flight(task_db, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "RECRAWL_DAILY_FETCH_BUDGET", 240)
+    candidates = [_candidate(f"https://a.test/{i}", 1.0, timedelta(days=2)) for i in range(3)]
+    monkeypatch.setattr(recrawl_scheduler, "load_candidates", lambda: candidates)
+    _recrawl_task(task_db, ["https://a.test/0"], "pending", timedelta(minutes=1))
+
+    budget, reserved = reserve_recrawls(NOW)
+
+    assert budget == 10
+    [(task_id, spec, urls)] = reserved
+    assert spec == json.loads(SPEC)
+    assert sorted(urls) == ["https://a.test/1", "https://a.test/2"]
+    # 新任务写入数据库：另一个 worker 的下一次调度不会重复派发这些 URL
+    with Session(task_db) as session:
+        assert json.loads(session.get(CrawlerTask, task_id).recrawl_urls) == urls
+    assert reserve_recrawls(NOW)[1] == []
+
+
+def test_plan_excludes_in_flight_urls_and_sizes_horizon_on_eligible_pages() -> None:
+    due = [_candidate(f"https://a.test/{i}", 1.0, timedelta(days=2)) for i in range(4)]
+    recent = [_candidate(f"https://a.test/recent-{i}", 1.0, timedelta(minutes=5)) for i in range(100)]
+
+    planned = plan_recrawls(due + recent, NOW, daily_budget=4, in_flight={"https://a.test/0"})
+
+    assert [item.url for item in planned] == ["https://a.test/1", "https://a.test/2", "https://a.test/3"]
+    # Three eligible pages at four per day: each comes around in under a day, not in 26 days
+    assert planned[0].priority == pytest.approx(recrawl_priority(1.0, 2.0, 0.75))
@@ -0,0 +1,83 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.fetch_client import FetchClient
+from app.worker_tasks import crawler
+from app.worker_tasks.revalidation import Revalidation, RevalidationIndex, content_hash
+
+
+SPEC = '{"table_name": "products", "columns": ["title"]}'
+
+
+def test_check_counts_hits_and_changes() -> None:
+    index = RevalidationIndex("products", ["title"], skip_unchanged=True)
+    assert index.crawl_spec == SPEC
+    previous = Revalidation(etag='"v1"', content_hash=content_hash("same"), crawl_spec=SPEC)
+
+    assert index.check(previous, None, not_modified=True)
+    assert index.check(previous, content_hash("same"))
+    assert not index.check(previous, content_hash("different"))
+    assert not index.check(None, content_hash("first visit"))
+    # Failed fetches have no hash and are neither hits nor misses
+    assert not index.check(previous, None)
+
+    assert index.stats() == {
+        "known": 3,
+        "not_modified": 1,
+        "unchanged": 1,
+        "changed": 1,
+        "new": 1,
+        "skipped": 2,
+        "hit_rate": 0.667,
+    }
+
+
+def test_only_recrawls_of_the_same_spec_skip() -> None:
+    same = Revalidation(content_hash=content_hash("same"), crawl_spec=SPEC)
+    other_columns = Revalidation(
+        content_hash=content_hash("same"), crawl_spec='{"table_name": "products", "columns": ["price"]}'
+    )
+
+    # Ordinary tasks always produce output, even for unchanged pages
+    ordinary = RevalidationIndex("products", ["title"])
+    assert not ordinary.can_skip(same)
+    assert not ordinary.check(same, content_hash("same"))
+
+    recrawl = RevalidationIndex("products", ["title"], skip_unchanged=True)
+    assert recrawl.can_skip(same)
+    assert not recrawl.can_skip(other_columns)
+    assert not recrawl.check(other_columns, content_hash("same"))
+    assert recrawl.stats()["skipped"] == 0
+
+
+def test_conditional_headers() -> None:
+    assert Revalidation().conditional_headers() == {}
+    assert Revalidation(etag='"v1"', last_modified="Mon, 19 Oct 2026 08:00:00 GMT").conditional_headers() == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 19 Oct 2026 08:00:00 GMT",
+    }
+
+
+def test_fetch_page_sends_conditional_request(monkeypatch: pytest.MonkeyPatch) -> None:
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"ETag": '"v1"'})
+        return httpx.Response(200, text="<html><body>catalog</body></html>", headers={"ETag": '"v1"'})
+
+    monkeypatch.setattr(crawler.random, "uniform", lambda a, b: 0)
+    monkeypatch.setattr(FetchClient, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    first = asyncio.run(crawler.fetch_page(1, "https://shop.test/list"))
+    assert first.status_code == 200 and first.etag == '"v1"' and not first.not_modified
+
+    previous = Revalidation(etag='"v1"', links=["https://shop.test/list?p=2"])
+    second = asyncio.run(crawler.fetch_page(1, "https://shop.test/list", previous))
+    assert second.not_modified and second.status_code == 304
+    assert second.html_content == "" and second.links == ["https://shop.test/list?p=2"]
+    assert second.next_page_url == "https://shop.test/list?p=2"
+    assert seen == [None, '"v1"']
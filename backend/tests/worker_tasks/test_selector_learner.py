@@ -0,0 +1,89 @@
+from app.worker_tasks.crawler import FetchedPage
+from app.worker_tasks.selector_learner import SelectorLearner
+
+COLUMNS = ["title", "price", "link", "url"]
+
+
+def _html(index: int, price: str | None = None) -> str:
+    price_html = f'<span class="price">¥{price or f"{index}9.00"}</span>' if price != "" else ""
+    return f"""
+    <html><body>
+      <div class="sidebar"><span>Hot deal 99.00</span></div>
+      <div id="main">
+        <div class="item card-{index}">
+          <h2 class="title"><a href="/item/{index}">Product {index}</a></h2>
+          {price_html}
+        </div>
+        <div class="item"><h2 class="title"><a href="/item/x">Other</a></h2><span class="price">¥1.00</span></div>
+      </div>
+    </body></html>
+    """
+
+
+def _page(index: int, **kwargs) -> FetchedPage:
+    url = f"https://shop.test/list?page={index}"
+    return FetchedPage(index, url, 200, _html(index, **kwargs), "")
+
+
+def _llm_result(index: int) -> dict:
+    return {
+        "title": f"Product {index}",
+        "price": float(f"{index}9.00"),
+        "link": f"https://shop.test/item/{index}",
+        "url": f"https://shop.test/list?page={index}",
+    }
+
+
+def _warm_up(learner: SelectorLearner, pages: int = 3):
+    for index in range(1, pages + 1):
+        assert learner.extract(_page(index)) is None
+        learner.observe(_page(index), _llm_result(index))
+
+
+def test_learns_selectors_after_warmup() -> None:
+    learner = SelectorLearner(COLUMNS, warmup_pages=3, max_failures=2)
+    _warm_up(learner)
+
+    assert learner.extract(_page(7)) == _llm_result(7)
+    stats = learner.stats()["shop.test"]
+    assert stats["learned"] and stats["fast_pages"] == 1 and stats["llm_pages"] == 3
+    assert stats["selectors"]["url"] == "meta_url"
+    assert "price" in stats["selectors"]["price"]
+    assert "item" in stats["record"]
+
+
+def test_validation_failure_falls_back_and_relearns() -> None:
+    learner = SelectorLearner(COLUMNS, warmup_pages=3, max_failures=2)
+    _warm_up(learner)
+
+    assert learner.extract(_page(4, price="")) is None
+    assert learner.stats()["shop.test"]["learned"]
+    assert learner.extract(_page(5, price="")) is None
+    stats = learner.stats()["shop.test"]
+    assert not stats["learned"] and stats["relearns"] == 1 and stats["validation_failures"] == 2
+
+
+def test_unlearnable_column_keeps_llm_extraction() -> None:
+    learner = SelectorLearner(["title", "summary"], warmup_pages=2)
+    for index in range(1, 7):
+        page = _page(index)
+        assert learner.extract(page) is None
+        learner.observe(page, {"title": f"Product {index}", "summary": f"Paraphrased summary {index}"})
+
+    stats = learner.stats()["shop.test"]
+    assert stats["gave_up"] and not stats["learned"]
+
+
+def test_column_always_null_is_learned_as_null() -> None:
+    learner = SelectorLearner(["title", "description"], warmup_pages=2)
+    for index in range(1, 3):
+        learner.observe(_page(index), {"title": f"Product {index}", "description": None})
+
+    assert learner.extract(_page(3)) == {"title": "Product 3", "description": None}
+
+
+def test_disabled_when_warmup_is_zero() -> None:
+    learner = SelectorLearner(COLUMNS, warmup_pages=0)
+    learner.observe(_page(1), _llm_result(1))
+    assert learner.extract(_page(2)) is None
+    assert learner.stats() == {}
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+
+from app.worker_tasks.stages import PipelineRegistry, Stage, StagedPipeline
+
+
+def test_items_flow_through_stages_in_order_of_processing() -> None:
+    written = []
+
+    async def double(item: int):
+        return item * 2
+
+    async def drop_odd_inputs(item: int):
+        # Returning None stops the item here
+        return item if item % 4 == 0 else None
+
+    async def write(item: int):
+        written.append(item)
+
+    pipeline = StagedPipeline([
+        Stage("double", double, 2),
+        Stage("filter", drop_odd_inputs, 2),
+        Stage("write", write, 1),
+    ])
+
+    async def source():
+        for i in range(10):
+            await pipeline.put(i)
+
+    asyncio.run(pipeline.run(source()))
+
+    assert sorted(written) == [0, 4, 8, 12, 16]
+    stats = pipeline.stats()
+    assert not stats["running"]
+    assert stats["stages"]["double"]["processed"] == 10
+    assert stats["stages"]["write"]["processed"] == 5
+
+
+def test_slow_stage_applies_backpressure_and_reports_utilization() -> None:
+    async def fetch(item: int):
+        return item
+
+    async def extract(item: int):
+        await asyncio.sleep(0.01)
+        return item
+
+    pipeline = StagedPipeline([
+        Stage("fetch", fetch, 4, queue_size=2),
+        Stage("extract", extract, 1, queue_size=2),
+    ])
+
+    async def source():
+        for i in range(20):
+            await pipeline.put(i)
+
+    asyncio.run(pipeline.run(source()))
+
+    fetch_stats = pipeline.stats()["stages"]["fetch"]
+    extract_stats = pipeline.stats()["stages"]["extract"]
+    # Queues never grow past their bound; the fast stage waits on the slow one
+    assert extract_stats["max_queue_depth"] <= 2 and fetch_stats["max_queue_depth"] <= 2
+    assert fetch_stats["blocked_seconds"] > 0
+    assert extract_stats["utilization"] > 0.8 > fetch_stats["utilization"]
+    assert extract_stats["queue_depth"] == 0
+
+
+def test_handler_errors_are_counted_and_do_not_stop_the_pipeline() -> None:
+    done = []
+
+    async def flaky(item: int):
+        if item == 3:
+            raise ValueError("boom")
+        return item
+
+    async def collect(item: int):
+        done.append(item)
+
+    pipeline = StagedPipeline([Stage("flaky", flaky, 2), Stage("collect", collect, 1)])
+
+    async def source():
+        for i in range(6):
+            await pipeline.put(i)
+
+    asyncio.run(pipeline.run(source()))
+
+    assert sorted(done) == [0, 1, 2, 4, 5]
+    assert pipeline.stats()["stages"]["flaky"]["errors"] == 1
+
+
+def test_registry_keeps_recent_pipelines(monkeypatch) -> None:
+    from app.worker_tasks import stages
+
+    monkeypatch.setattr(stages, "RECENT_PIPELINES", 2)
+    monkeypatch.setattr(PipelineRegistry, "_pipelines", type(PipelineRegistry._pipelines)())
+
+    async def noop(item):
+        return None
+
+    for task_id in ("a", "b", "c"):
+        PipelineRegistry.register(task_id, StagedPipeline([Stage("noop", noop, 1)]))
+
+    assert PipelineRegistry.stats("a") is None
+    assert PipelineRegistry.stats("c")["stages"]["noop"]["processed"] == 0
+    with pytest.raises(ValueError):
+        StagedPipeline([])
@@ -0,0 +1,92 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from app.models import CrawlerTaskLog
+from app.worker_tasks import task_log
+from app.worker_tasks.task_log import TaskLogWriter, append_logs, level_of, read_logs
+
+
+@pytest.fixture
+def log_engine(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'logs.db'}")
+    SQLModel.metadata.create_all(engine, tables=[CrawlerTaskLog.__table__])
+    monkeypatch.setattr(task_log, "engine", engine)
+    return engine
+
+
+def _seed(engine, task_id: uuid.UUID, count: int):
+    with Session(engine) as session:
+        append_logs(session, [
+            {
+                "task_id": task_id,
+                "seq": seq,
+                "ts": datetime(2026, 10, 19, 8, 0, seq, tzinfo=timezone.utc),
+                "level": "INFO",
+                "phase": "scout",
+                "message": f"line {seq}",
+            }
+            for seq in range(1, count + 1)
+        ])
+        session.commit()
+
+
+def test_writer_batches_lines(log_engine, monkeypatch) -> None:
+    task_id = uuid.uuid4()
+    writer = TaskLogWriter(task_id, flush_rows=3, flush_seconds=60)
+    batches = []
+    monkeypatch.setattr(writer, "_insert", batches.append)
+
+    async def main():
+        await writer.start()
+        for i in range(7):
+            await writer.write(f"line {i}", phase="scout")
+        await writer.write("❌ Scout crashed", phase="scout")
+        await writer.close()
+
+    asyncio.run(main())
+
+    # Two full batches of three, then the rest on close
+    assert [len(batch) for batch in batches] == [3, 3, 2]
+    assert (writer.rows, writer.batches) == (8, 3)
+    lines = [line for batch in batches for line in batch]
+    assert [line["seq"] for line in lines] == list(range(1, 9))
+    assert lines[-1]["level"] == "ERROR" and lines[0]["phase"] == "scout"
+
+
+def test_resumed_writer_continues_sequence(log_engine, monkeypatch) -> None:
+    task_id = uuid.uuid4()
+    _seed(log_engine, task_id, 4)
+    writer = TaskLogWriter(task_id, flush_seconds=60)
+    batches = []
+    monkeypatch.setattr(writer, "_insert", batches.append)
+
+    async def main():
+        await writer.start()
+        await writer.write("after resume")
+        await writer.close()
+
+    asyncio.run(main())
+
+    assert batches[0][0]["seq"] == 5
+
+
+def test_read_logs_by_cursor(log_engine) -> None:
+    task_id = uuid.uuid4()
+    _seed(log_engine, task_id, 6)
+    _seed(log_engine, uuid.uuid4(), 3)
+
+    with Session(log_engine) as session:
+        assert [row.seq for row in read_logs(session, task_id)] == [1, 2, 3, 4, 5, 6]
+        assert [row.message for row in read_logs(session, task_id, after=4)] == ["line 5", "line 6"]
+        assert read_logs(session, task_id, after=6) == []
+        assert [row.seq for row in read_logs(session, task_id, after=2, limit=2)] == [3, 4]
+
+
+def test_level_from_prefix() -> None:
+    assert level_of("❌ failed") == "ERROR"
+    assert level_of("⚠️ slow") == "WARN"
+    assert level_of("✅ ok") == "INFO"
@@ -0,0 +1,68 @@
+import { useEffect, useRef } from "react"
+
+import { OpenAPI } from "@/client"
+
+export interface BatchProgressEvent {
+  type: "snapshot" | "items" | "file" | "phase" | "blocked"
+  batch_id: string
+  phase?: string
+  item_count?: number
+  file_name?: string
+  reason?: string
+  error?: string
+  step?: number
+  total?: number
+}
+
+type TrackedBatch = { id: string; status: string }
+
+const ACTIVE_STATUSES = ["pending", "processing"]
+const TERMINAL_PHASES = ["completed", "failed"]
+const EVENT_TYPES = ["snapshot", "items", "file", "phase", "blocked"] as const
+
+// Subscribes to /industrial/batch/{id}/events for every running batch and
+// closes the stream once the batch reaches a terminal phase.
+export function useBatchProgress(
+  batches: TrackedBatch[],
+  onEvent: (event: BatchProgressEvent) => void,
+) {
+  const sourcesRef = useRef(new Map<string, EventSource>())
+  const onEventRef = useRef(onEvent)
+  onEventRef.current = onEvent
+
+  useEffect(() => {
+    const sources = sourcesRef.current
+    const baseUrl = OpenAPI.BASE || ""
+
+    for (const batch of batches) {
+      if (!ACTIVE_STATUSES.includes(batch.status) || sources.has(batch.id)) {
+        continue
+      }
+      const source = new EventSource(
+        `${baseUrl}/api/v1/industrial/batch/${batch.id}/events`,
+      )
+      const handle = (message: MessageEvent) => {
+        const event = JSON.parse(message.data) as BatchProgressEvent
+        onEventRef.current(event)
+        if (event.phase && TERMINAL_PHASES.includes(event.phase)) {
+          source.close()
+          sources.delete(batch.id)
+        }
+      }
+      for (const type of EVENT_TYPES) {
+        source.addEventListener(type, handle)
+      }
+      sources.set(batch.id, source)
+    }
+  }, [batches])
+
+  useEffect(() => {
+    const sources = sourcesRef.current
+    return () => {
+      for (const source of sources.values()) {
+        source.close()
+      }
+      sources.clear()
+    }
+  }, [])
+}
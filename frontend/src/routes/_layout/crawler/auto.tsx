@@ -30,13 +30,21 @@ interface CrawlerTaskStatus {
     current_phase?: "scout" | "architect" | "review" | "harvester" | "refinery" | "completed" | "failed";
     pipeline_state?: string | any;
     items_harvested?: number;
-    result_sql_content?: string;
+    result_size_bytes?: number;
+    result_row_count?: number;
+    error_message?: string;
 }
 
+const LOG_PAGE_SIZE = 500
+
 function AutoCrawlerPage() {
     const [currentTaskId, setCurrentTaskId] = useState<string | null>(null)
     const [logs, setLogs] = useState<string[]>([])
     const terminalRef = useRef<HTMLDivElement>(null)
+    // Cursor into the task log: only lines with seq > logCursor are fetched
+    const logCursor = useRef(0)
+    const logFetchInFlight = useRef(false)
+    const logFetchAgain = useRef(false)
 
     // Config State
     const [url, setUrl] = useState("https://books.toscrape.com/")
@@ -61,6 +69,19 @@ function AutoCrawlerPage() {
         },
     })
 
+    const taskFinished = taskStatus?.status === "completed" || taskStatus?.status === "failed"
+
+    // Poll the task log on its own interval: log-only lines don't update the status row,
+    // so the status query alone would not notice them
+    useEffect(() => {
+        if (!currentTaskId) return
+        // Once the task has finished this is one last fetch for the final lines
+        fetchNewLogs(currentTaskId)
+        if (taskFinished) return
+        const timer = setInterval(() => fetchNewLogs(currentTaskId), 1000)
+        return () => clearInterval(timer)
+    }, [currentTaskId, taskFinished])
+
     // Auto-scroll terminal
     useEffect(() => {
         if (terminalRef.current) {
@@ -68,7 +89,7 @@ function AutoCrawlerPage() {
         }
     }, [logs, taskStatus])
 
-    // Watch status for Phase updates and Logs
+    // Watch status for Phase updates
     useEffect(() => {
         if (taskStatus) {
             let state: any = null;
@@ -82,13 +103,6 @@ function AutoCrawlerPage() {
                 }
             }
 
-            // Sync logs from pipeline_state if available
-            if (state && state.logs && Array.isArray(state.logs)) {
-                if (JSON.stringify(state.logs) !== JSON.stringify(logs)) {
-                    setLogs(state.logs)
-                }
-            }
-
             // Check for Paused/Review state
             if (taskStatus.status === "paused" && taskStatus.current_phase === "review") {
                 if (!isReviewOpen && state && state.strategy) {
@@ -99,9 +113,46 @@ function AutoCrawlerPage() {
         }
     }, [taskStatus])
 
+    const fetchNewLogs = async (taskId: string) => {
+        if (logFetchInFlight.current) {
+            // Run again once the current fetch is done so the final fetch is never dropped
+            logFetchAgain.current = true
+            return
+        }
+        logFetchInFlight.current = true
+        try {
+            const token = typeof OpenAPI.TOKEN === 'function'
+                ? await (OpenAPI.TOKEN as any)()
+                : OpenAPI.TOKEN;
+            const baseUrl = OpenAPI.BASE || "";
+            // Keep reading until a page comes back short
+            while (true) {
+                const res = await fetch(`${baseUrl}/api/v1/crawl/logs/${taskId}?after=${logCursor.current}&limit=${LOG_PAGE_SIZE}`, {
+                    headers: token ? { 'Authorization': `Bearer ${token}` } : {}
+                })
+                if (!res.ok) return
+                const page: { data: { seq: number, ts: string, message: string }[], last_seq: number } = await res.json()
+                if (page.data.length > 0) {
+                    logCursor.current = page.last_seq
+                    setLogs(prev => [...prev, ...page.data.map(line => `[${line.ts.slice(11, 19)}] ${line.message}`)])
+                }
+                if (page.data.length < LOG_PAGE_SIZE) break
+            }
+        } catch (e) {
+            console.error("Failed to fetch task logs", e)
+        } finally {
+            logFetchInFlight.current = false
+            if (logFetchAgain.current) {
+                logFetchAgain.current = false
+                fetchNewLogs(taskId)
+            }
+        }
+    }
+
     const startMutation = useMutation({
         mutationFn: CrawlerService.startCrawl,
         onSuccess: (taskId) => {
+            logCursor.current = 0
             setCurrentTaskId(taskId)
             setLogs(prev => [...prev, `[System] Task started: ${taskId}`])
             toast.success("Crawler task started")
@@ -1,10 +1,11 @@
-import { useMutation, useQuery } from "@tanstack/react-query"
+import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query"
 import { createFileRoute } from "@tanstack/react-router"
 import { Loader2, Eraser, Database, FileDown, Sparkles, CheckCircle2, Upload, FileUp, Zap, AlertTriangle } from "lucide-react"
 import { useState, useRef } from "react"
 import { toast } from "sonner"
 
 import { OpenAPI } from "@/client"
+import { useBatchProgress } from "@/hooks/useBatchProgress"
 import { Button } from "@/components/ui/button"
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
 import { Label } from "@/components/ui/label"
@@ -74,7 +75,20 @@ function DataCleaningPage() {
             if (!res.ok) throw new Error('Failed to fetch batches');
             return res.json() as Promise<Batch[]>;
         },
-        refetchInterval: 5000,
+    })
+
+    // Running batches push their progress over SSE instead of polling the list
+    const queryClient = useQueryClient()
+    useBatchProgress(batches, (event) => {
+        if (event.phase === 'completed' || event.phase === 'failed') {
+            queryClient.invalidateQueries({ queryKey: ['batches'] })
+            return
+        }
+        if (event.item_count !== undefined) {
+            queryClient.setQueryData<Batch[]>(['batches'], (current = []) =>
+                current.map(b => b.id === event.batch_id ? { ...b, item_count: event.item_count! } : b)
+            )
+        }
     })
 
     // Fetch files for selected batch
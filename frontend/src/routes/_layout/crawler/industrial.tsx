@@ -5,6 +5,7 @@ import { useState, useEffect, useRef } from "react"
 import { toast } from "sonner"
 
 import { OpenAPI } from "@/client"
+import { useBatchProgress } from "@/hooks/useBatchProgress"
 import { Button } from "@/components/ui/button"
 import { Card, CardContent, CardHeader, CardTitle, CardFooter } from "@/components/ui/card"
 import { Input } from "@/components/ui/input"
@@ -48,8 +49,6 @@ function IndustrialCrawlerPage() {
     const [url, setUrl] = useState("https://books.toscrape.com/")
 
     const [batches, setBatches] = useState<Batch[]>([])
-    // Track previous batches for log diffing
-    const prevBatchesRef = useRef<Batch[]>([]);
     const [logs, setLogs] = useState<string[]>([])
     const terminalRef = useRef<HTMLDivElement>(null)
 
@@ -93,50 +92,44 @@ function IndustrialCrawlerPage() {
 
     useEffect(() => {
         fetchBatches();
-        const interval = setInterval(fetchBatches, 2000); // Polling faster for smoother logs
-        return () => clearInterval(interval);
     }, []);
 
-    // Log Streaming Logic (Phase 12)
-    useEffect(() => {
+    // Log Streaming Logic: progress events pushed by the server for running batches
+    useBatchProgress(batches, (event) => {
+        const shortId = event.batch_id.slice(0, 8);
+        const prev = batches.find(b => b.id === event.batch_id);
         const newLogs: string[] = [];
-        const prevBatches = prevBatchesRef.current;
-
-        batches.forEach(batch => {
-            const prev = prevBatches.find(p => p.id === batch.id);
-
-            // New Batch detected
-            if (!prev) {
-                // Don't log old completed batches on first load, only log pending/processing or recent ones
-                const isRecent = (new Date().getTime() - new Date(batch.created_at).getTime()) < 60000;
-                if (isRecent || batch.status === 'processing') {
-                    newLogs.push(`[System] New Batch Detected: ${batch.id.slice(0, 8)} [Goal: ${batch.url}]`);
-                }
-                return;
-            }
 
-            // Status Changed
-            if (prev.status !== batch.status) {
-                let msg = `[Status] Batch ${batch.id.slice(0, 8)}: ${prev.status} -> ${batch.status}`;
-                if (batch.status === 'completed') msg = `[Success] Batch ${batch.id.slice(0, 8)} completed. Harvested ${batch.item_count} items.`;
-                if (batch.status === 'captcha_blocked') msg = `[Warning] Batch ${batch.id.slice(0, 8)} stopped by CAPTCHA protection.`;
-                if (batch.status === 'failed') msg = `[Error] Batch ${batch.id.slice(0, 8)} failed unexpectedly.`;
-                newLogs.push(msg);
-            }
-
-            // Item Count Incremented
-            if (batch.item_count > prev.item_count) {
-                const diff = batch.item_count - prev.item_count;
-                newLogs.push(`[Harvest] Batch ${batch.id.slice(0, 8)} captured +${diff} items (Total: ${batch.item_count}).`);
-            }
-        });
+        if (event.type === 'snapshot') {
+            newLogs.push(`[System] Tracking Batch ${shortId}${prev ? ` [Goal: ${prev.url}]` : ''} (${event.phase}, ${event.item_count ?? 0} items)`);
+        } else if (event.type === 'phase') {
+            let msg = `[Status] Batch ${shortId}: ${event.phase}`;
+            if (event.phase === 'scrolling' && event.step) msg = `[Status] Batch ${shortId}: scrolling ${event.step}/${event.total}`;
+            if (event.phase === 'completed') msg = `[Success] Batch ${shortId} completed. Harvested ${event.item_count ?? prev?.item_count ?? 0} items.`;
+            if (event.phase === 'failed') msg = `[Error] Batch ${shortId} failed unexpectedly.`;
+            newLogs.push(msg);
+        } else if (event.type === 'blocked') {
+            newLogs.push(`[Warning] Batch ${shortId} stopped by CAPTCHA protection (${event.reason}).`);
+        } else if (event.type === 'items' && prev && event.item_count !== undefined && event.item_count > prev.item_count) {
+            const diff = event.item_count - prev.item_count;
+            newLogs.push(`[Harvest] Batch ${shortId} captured +${diff} items (Total: ${event.item_count}).`);
+        }
 
         if (newLogs.length > 0) {
-            setLogs(prev => [...prev, ...newLogs]);
+            setLogs(prevLogs => [...prevLogs, ...newLogs]);
         }
 
-        prevBatchesRef.current = batches;
-    }, [batches]);
+        setBatches(current => current.map(b => {
+            if (b.id !== event.batch_id) return b;
+            // navigating / scrolling / extracting are sub-phases of "processing"
+            const status = event.phase && ['processing', 'completed', 'failed'].includes(event.phase) ? event.phase : b.status;
+            return { ...b, status, item_count: event.item_count ?? b.item_count };
+        }));
+
+        if (event.phase === 'completed' || event.phase === 'failed') {
+            fetchBatches();
+        }
+    });
 
     const startIndustrialMutation = useMutation({
         mutationFn: async () => {
@@ -20,7 +20,10 @@ interface CrawlerTaskStatus {
     current_phase?: "scout" | "architect" | "review" | "harvester" | "refinery" | "completed" | "failed";
     pipeline_state?: string | any;
     items_harvested?: number;
-    result_sql_content?: string;
+    result_size_bytes?: number;
+    result_row_count?: number;
+    error_message?: string;
+    revalidation?: string;
 }
 
 function ManualCrawlerPage() {